@@ -0,0 +1,17 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assist', '0003_application_income_verification_and_grants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['updated_at'], name='assist_appl_updated_4797a1_idx'),
+        ),
+    ]
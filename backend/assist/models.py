@@ -72,6 +72,7 @@ class Application(models.Model):
             models.Index(fields=["organization", "status"]),
             models.Index(fields=["student", "status"]),
             models.Index(fields=["created_at"]),
+            models.Index(fields=["updated_at"]),
         ]
 
     def __str__(self):
@@ -14,8 +14,12 @@ from datetime import datetime, date
 import calendar
 import re
 from .models import Application, BatchItem
-from django.core.paginator import Paginator
+from roster.pagination import keyset_paginate, page_size_for
 from django.db.models import Exists, OuterRef, Subquery, DateTimeField
+
+# Rows per page on the dashboard drill-down lists (?page_size= overrides, capped)
+METRIC_LIST_PAGE_SIZE = 50
+
 # --- NEW DETAIL VIEWS FOR METRICS ---
 
 def _age_years(dob):
@@ -24,6 +28,39 @@ def _age_years(dob):
     today = timezone.now().date()
     return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
 
+def _class_div(s):
+    if not s.classroom:
+        return "-"
+    return s.classroom.grade if s.classroom.division == "" else f"{s.classroom.grade} {s.classroom.division}"
+
+def _metric_student_row(s, all_time: bool):
+    # For “Total students” show all-time indicators; otherwise, period-windowed
+    screened_flag = bool(s.ever_screened) if all_time else bool(s.screened_in_window)
+    red_flag = bool(s.ever_red) if all_time else bool(s.red_in_window)
+    phone = getattr(getattr(s, "primary_guardian", None), "phone_e164", None)
+    return {
+        "name": getattr(s, "full_name", f"{s.first_name} {s.last_name}".strip()),
+        "class_div": _class_div(s),
+        "age": _age_years(getattr(s, "dob", None)),
+        "phone": phone or "-",
+        "screened": "Yes" if screened_flag else "No",
+        "redflag": "Yes" if red_flag else "No",
+    }
+
+def _metric_application_row(a):
+    s = a.student
+    phone = getattr(getattr(s, "primary_guardian", None), "phone_e164", None)
+    return {
+        "name": getattr(s, "full_name", f"{s.first_name} {s.last_name}".strip()),
+        "class_div": _class_div(s),
+        "age": _age_years(getattr(s, "dob", None)),
+        "phone": phone or "-",
+        "applied_at": a.applied_at,
+        "forwarded_at": a.forwarded_at,
+        "status": "Approved" if a.status == Application.Status.APPROVED else "Pending",
+        "approved_at": a.approved_at or "Pending",
+    }
+
 def _students_metric_qs(org, metric: str, start_dt, end_dt):
     # Base queryset with useful relations for table rendering
     students = (
@@ -72,8 +109,7 @@ def _students_metric_qs(org, metric: str, start_dt, end_dt):
     else:
         title = "Total students"  # ignores the period filter, like your tile
 
-    students = students.order_by("classroom__grade", "classroom__division",
-                                 "first_name", "last_name")
+    # Ordered by the keyset pagination keys (last_name, first_name, id)
     return title, students
 
 @require_roles(Role.ORG_ADMIN, allow_superuser=True)
@@ -87,35 +123,16 @@ def metric_students(request, metric: str):
 
     title, qs = _students_metric_qs(org, metric, start_dt, end_dt)
 
-    rows = []
-    for s in qs.iterator():
-        # For “Total students” show all-time indicators; otherwise, period-windowed
-        screened_flag = bool(s.ever_screened) if title == "Total students" else bool(s.screened_in_window)
-        red_flag = bool(s.ever_red) if title == "Total students" else bool(s.red_in_window)
-
-        class_div = "-"
-        if s.classroom:
-            class_div = s.classroom.grade if s.classroom.division == "" else f"{s.classroom.grade} {s.classroom.division}"
-        phone = getattr(getattr(s, "primary_guardian", None), "phone_e164", None)
-
-        rows.append({
-            "name": getattr(s, "full_name", f"{s.first_name} {s.last_name}".strip()),
-            "class_div": class_div,
-            "age": _age_years(getattr(s, "dob", None)),
-            "phone": phone or "-",
-            "screened": "Yes" if screened_flag else "No",
-            "redflag": "Yes" if red_flag else "No",
-        })
-
-    paginator = Paginator(rows, 50)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    page = keyset_paginate(request, qs, page_size=page_size_for(request, METRIC_LIST_PAGE_SIZE))
+    all_time = title == "Total students"
 
     return render(request, "assist/metric_students_list.html", {
         "org": org,
         "title": title,
         "period": period,
-        "page_obj": page_obj,
-        "total": paginator.count,
+        "page": page,
+        "rows": [_metric_student_row(s, all_time) for s in page],
+        "total": qs.count(),
     })
 
 @require_roles(Role.ORG_ADMIN, allow_superuser=True)
@@ -151,37 +168,17 @@ def metric_applications(request, status: str):
     apps = (
         base.select_related("student__classroom", "student__primary_guardian")
             .annotate(approved_at=Subquery(approved_subq, output_field=DateTimeField()))
-            .order_by("-applied_at")
     )
-
-    rows = []
-    for a in apps.iterator():
-        s = a.student
-        class_div = "-"
-        if s.classroom:
-            class_div = s.classroom.grade if s.classroom.division == "" else f"{s.classroom.grade} {s.classroom.division}"
-        phone = getattr(getattr(s, "primary_guardian", None), "phone_e164", None)
-
-        rows.append({
-            "name": getattr(s, "full_name", f"{s.first_name} {s.last_name}".strip()),
-            "class_div": class_div,
-            "age": _age_years(getattr(s, "dob", None)),
-            "phone": phone or "-",
-            "applied_at": a.applied_at,
-            "forwarded_at": a.forwarded_at,
-            "status": "Approved" if a.status == Application.Status.APPROVED else "Pending",
-            "approved_at": a.approved_at or "Pending",
-        })
-
-    paginator = Paginator(rows, 50)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    page = keyset_paginate(request, apps, page_size=page_size_for(request, METRIC_LIST_PAGE_SIZE),
+                           keys=("student__last_name", "student__first_name", "id"))
 
     return render(request, "assist/metric_applications_list.html", {
         "org": org,
         "title": title,
         "period": period,
-        "page_obj": page_obj,
-        "total": paginator.count,
+        "page": page,
+        "rows": [_metric_application_row(a) for a in page],
+        "total": base.count(),
     })
 
 # ---------- Public parent application (consent) ----------
@@ -1,9 +1,18 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import MessageLog
+from .outbox import requeue_dead
+
+
+@admin.action(description="Requeue dead-lettered messages")
+def requeue_dead_messages(modeladmin, request, queryset):
+    n = requeue_dead(queryset.filter(status=MessageLog.Status.DEAD))
+    modeladmin.message_user(request, f"Requeued {n} message(s).", messages.SUCCESS)
+
 
 @admin.register(MessageLog)
 class MessageLogAdmin(admin.ModelAdmin):
-    list_display = ("created_at","organization","to_phone_e164","template_code","language","status","provider_msg_id")
+    list_display = ("created_at","organization","to_phone_e164","template_code","language","status","attempts","next_attempt_at","provider_msg_id")
     list_filter = ("organization","status","template_code","language")
     search_fields = ("to_phone_e164","provider_msg_id")
     readonly_fields = ("created_at","updated_at","sent_at")
+    actions = [requeue_dead_messages]
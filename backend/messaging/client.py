@@ -0,0 +1,152 @@
+"""Pooled, concurrent WhatsApp sending on top of the provider classes.
+
+Providers used to call `requests.post` directly, so every message paid a new
+TCP + TLS handshake, and each message was its own Celery task. Here:
+
+  - `http_session()` is one `requests.Session` per worker process (re-created
+    after fork) whose connection pool is sized for the largest provider
+    concurrency; providers send through it, so connections are kept alive
+    and reused across messages and tasks;
+  - `WhatsAppClient.send_many()` dispatches a batch on a per-process thread
+    pool of the provider's concurrency (WA_CONCURRENCY_META / _AISENSY /
+    _MOCK) and returns one `SendResult` per message, in order; a failed
+    message never fails the batch.
+
+`get_client()` returns the process-wide client for WHATSAPP_PROVIDER.
+Benchmark against a local mock server: `manage.py bench_whatsapp_client`.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = {"meta": 16, "aisensy": 8, "mock": 4}
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_clients: Dict[str, "WhatsAppClient"] = {}
+
+
+def provider_name() -> str:
+    return (os.getenv("WHATSAPP_PROVIDER") or "mock").lower()
+
+
+def concurrency_for(name: str) -> int:
+    """WA_CONCURRENCY_<PROVIDER>, else the provider default (at least 1)."""
+    raw = os.getenv(f"WA_CONCURRENCY_{name.upper()}")
+    try:
+        return max(1, int(raw)) if raw else DEFAULT_CONCURRENCY.get(name, 4)
+    except ValueError:
+        return DEFAULT_CONCURRENCY.get(name, 4)
+
+
+def http_session() -> requests.Session:
+    """The worker process's keep-alive session (one pool per host, sized for the thread pools)."""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _lock:
+            if _session is None or _session_pid != pid:
+                size = max(concurrency_for(name) for name in DEFAULT_CONCURRENCY)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session, _session_pid = session, pid
+                _clients.clear()  # their thread pools did not survive the fork either
+    return _session
+
+
+@dataclass
+class OutboundMessage:
+    to_phone_e164: str
+    template_name: str
+    language_code: str
+    components: dict = field(default_factory=dict)
+
+
+@dataclass
+class SendResult:
+    provider_msg_id: str = ""
+    provider_status: str = ""
+    error_code: str = ""
+    error_title: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error_title
+
+
+def _error_result(exc: Exception) -> SendResult:
+    response = getattr(exc, "response", None)
+    code = str(response.status_code) if response is not None else type(exc).__name__
+    return SendResult(error_code=code[:64], error_title=(str(exc) or type(exc).__name__)[:255])
+
+
+class WhatsAppClient:
+    """A provider plus a bounded thread pool; shared by all tasks in the process."""
+
+    def __init__(self, provider, concurrency: int = 1):
+        self.provider = provider
+        self.concurrency = max(1, concurrency)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def send(self, message: OutboundMessage) -> SendResult:
+        """Send one message; provider/HTTP errors propagate (callers such as Celery retry on them)."""
+        msg_id, status = self.provider.send_template(
+            message.to_phone_e164, message.template_name, message.language_code, message.components,
+        )
+        return SendResult(provider_msg_id=msg_id or "", provider_status=str(status or ""))
+
+    def _send_captured(self, message: OutboundMessage) -> SendResult:
+        try:
+            return self.send(message)
+        except Exception as exc:
+            log.warning("WhatsApp send to %s failed: %s", message.to_phone_e164, exc)
+            return _error_result(exc)
+
+    def send_many(self, messages: Sequence[OutboundMessage]) -> List[SendResult]:
+        """Send `messages` concurrently; results in the same order, errors captured per message."""
+        if len(messages) <= 1 or self.concurrency == 1:
+            return [self._send_captured(m) for m in messages]
+        if self._executor is None:
+            with _lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                                        thread_name_prefix="whatsapp-send")
+        return list(self._executor.map(self._send_captured, messages))
+
+
+def build_provider(name: str):
+    if name == "meta":
+        from .providers.meta_cloud import MetaCloudProvider
+        return MetaCloudProvider()
+    if name == "aisensy":
+        from .providers.aisensy import AiSensyProvider
+        return AiSensyProvider()
+    from .providers.mock import MockProvider
+    return MockProvider()
+
+
+def get_client(name: Optional[str] = None) -> WhatsAppClient:
+    """The process-wide client for provider `name` (default: WHATSAPP_PROVIDER)."""
+    name = name or provider_name()
+    http_session()  # drops clients inherited across a fork
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = WhatsAppClient(build_provider(name), concurrency_for(name))
+    return client
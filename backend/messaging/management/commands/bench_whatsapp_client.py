@@ -0,0 +1,87 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+from django.core.management.base import BaseCommand
+
+from messaging.client import OutboundMessage, WhatsAppClient, http_session
+from messaging.providers.meta_cloud import MetaCloudProvider
+
+
+class _GraphHandler(BaseHTTPRequestHandler):
+    """Answers template sends like the Cloud API, after `latency` seconds."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes
+    latency = 0.0
+    peers = set()
+    count = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        type(self).peers.add(self.client_address)
+        type(self).count += 1
+        time.sleep(self.latency)
+        body = json.dumps({"messages": [{"id": f"wamid.{self.count}"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Throughput of WhatsApp template sends against a local mock Cloud API: per-request vs pooled vs send_many."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--n", type=int, default=400, help="Messages per run")
+        parser.add_argument("--latency-ms", type=float, default=20.0, help="Mock server latency per request")
+        parser.add_argument("--concurrency", type=int, default=16)
+
+    def _run(self, label, n, fn):
+        _GraphHandler.peers, _GraphHandler.count = set(), 0
+        t0 = time.perf_counter()
+        results = fn()
+        dt = time.perf_counter() - t0
+        failed = sum(1 for r in results if not r.ok)
+        self.stdout.write(f"{label:<34} {n / dt:>8.1f} msg/s  ({dt:.2f}s, {len(_GraphHandler.peers)} connections,"
+                          f" {failed} failed)")
+
+    def handle(self, *args, **opts):
+        n = opts["n"]
+        _GraphHandler.latency = opts["latency_ms"] / 1000.0
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _GraphHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        env = {
+            "WA_PHONE_NUMBER_ID": "1000",
+            "WA_ACCESS_TOKEN": "bench",
+            "WA_GRAPH_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}/v20.0",
+            "WA_CONCURRENCY_META": str(opts["concurrency"]),
+        }
+        messages = [
+            OutboundMessage(f"+9190000{i:05d}", "nutrilift_compliance_reminder_v1", "en",
+                            {"body": ["Child", "https://example.org/c"], "buttons": ["https://example.org/c"]})
+            for i in range(n)
+        ]
+        try:
+            with mock.patch.dict(os.environ, env):
+                provider = MetaCloudProvider()
+                http_session()
+
+                # Before: a new connection per message (requests.post), one message at a time
+                with mock.patch.object(type(provider), "session", property(lambda self: requests)):
+                    self._run("per-request requests.post", n,
+                              lambda: WhatsAppClient(provider, 1).send_many(messages))
+                self._run("pooled session, sequential", n, lambda: WhatsAppClient(provider, 1).send_many(messages))
+                self._run(f"pooled send_many x{opts['concurrency']}", n,
+                          lambda: WhatsAppClient(provider, opts["concurrency"]).send_many(messages))
+        finally:
+            server.shutdown()
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0004_alter_messagelog_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='messagelog',
+            index=models.Index(fields=['updated_at'], name='messaging_m_updated_2ff8fe_idx'),
+        ),
+    ]
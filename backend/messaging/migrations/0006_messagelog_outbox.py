@@ -0,0 +1,37 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0005_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messagelog',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='messagelog',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='messagelog',
+            name='priority',
+            field=models.PositiveSmallIntegerField(default=50),
+        ),
+        migrations.AlterField(
+            model_name='messagelog',
+            name='status',
+            field=models.CharField(choices=[('QUEUED', 'Queued'), ('SENT', 'Sent'), ('DELIVERED', 'Delivered'), ('READ', 'Read'), ('FAILED', 'Failed'), ('SENDING', 'Sending'), ('DEAD', 'Dead-lettered')], default='QUEUED', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='messagelog',
+            index=models.Index(fields=['status', 'priority', 'next_attempt_at'], name='messaging_m_status_698dd6_idx'),
+        ),
+    ]
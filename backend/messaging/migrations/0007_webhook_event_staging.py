@@ -0,0 +1,31 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:44
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0006_messagelog_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='messagelog',
+            name='provider_msg_id',
+            field=models.CharField(blank=True, db_index=True, max_length=128),
+        ),
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.JSONField(default=dict)),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['processed_at', 'id'], name='messaging_w_process_3df52b_idx')],
+            },
+        ),
+    ]
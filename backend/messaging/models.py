@@ -17,6 +17,8 @@ class MessageLog(models.Model):
         DELIVERED = "DELIVERED", "Delivered"
         READ = "READ", "Read"
         FAILED = "FAILED", "Failed"
+        SENDING = "SENDING", "Sending"        # claimed by an outbox worker
+        DEAD = "DEAD", "Dead-lettered"       # outbox gave up (see messaging.outbox)
 
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="messages")
     to_phone_e164 = models.CharField(max_length=20, db_index=True)
@@ -25,12 +27,18 @@ class MessageLog(models.Model):
     language = models.CharField(max_length=16, default="en")      # 'en' | 'hi' | 'local' (or ISO)
     payload = models.JSONField(default=dict, blank=True)          # body/button params, links, etc.
     status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
-    provider_msg_id = models.CharField(max_length=128, blank=True)
+    provider_msg_id = models.CharField(max_length=128, blank=True, db_index=True)
     scheduled_at = models.DateTimeField(null=True, blank=True, db_index=True)
     sent_at = models.DateTimeField(null=True, blank=True)
     error_code = models.CharField(max_length=64, blank=True)
     error_title = models.CharField(max_length=255, blank=True)
 
+    # Outbox (messaging.outbox): only rows with next_attempt_at set are sent by
+    # the dispatcher; for SENDING rows it is the claim's lease expiry
+    priority = models.PositiveSmallIntegerField(default=50)  # lower is sent first
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+
     # linkage to operational event
     #related_screening = models.ForeignKey(Screening, on_delete=models.SET_NULL, null=True, blank=True, related_name="messages")
     related_screening = models.ForeignKey("screening.Screening", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
@@ -46,7 +54,24 @@ class MessageLog(models.Model):
         indexes = [
             models.Index(fields=["organization", "status"]),
             models.Index(fields=["scheduled_at", "status"]),
+            models.Index(fields=["updated_at"]),
+            models.Index(fields=["status", "priority", "next_attempt_at"]),
         ]
 
     def __str__(self):
         return f"{self.to_phone_e164} {self.template_code} {self.status}"
+
+
+class WebhookEvent(models.Model):
+    """A verified WhatsApp webhook POST body, staged for messaging.webhooks to apply in bulk."""
+    payload = models.JSONField(default=dict)
+    received_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["processed_at", "id"]),
+        ]
+
+    def __str__(self):
+        return f"webhook {self.id} ({'processed' if self.processed_at else 'pending'})"
@@ -0,0 +1,223 @@
+"""Outbox dispatcher for provider (template) sends.
+
+Writers put MessageLog rows into the outbox with `enqueue()` (status QUEUED,
+`next_attempt_at` = scheduled_at or now, `priority` from TEMPLATE_PRIORITY)
+instead of one Celery task per message. Click-to-chat logs, which a teacher
+sends by hand, are QUEUED without `next_attempt_at` and never picked up.
+
+`dispatch_outbox()` (task `messaging.tasks.dispatch_outbox`: Celery beat
+every minute and kicked after each enqueue) drains due rows in batches:
+
+  1. claim: in a short transaction, SELECT ... FOR UPDATE SKIP LOCKED the
+     next `batch_size` due QUEUED rows (priority, then due time) and mark
+     them SENDING with a lease (`next_attempt_at` = now + lease), so parallel
+     workers skip each other's rows;
+  2. send the batch concurrently through the pooled client
+     (messaging.client.send_many), outside any transaction;
+  3. write every outcome back in one bulk UPDATE: SENT; or a retry at
+     now + BACKOFF_BASE_SECONDS * 2**(attempts-1) (capped, jittered); or DEAD
+     after MAX_ATTEMPTS or a permanent 4xx.
+
+Rows left SENDING by a worker that died are returned to the queue once
+their lease expires (`release_expired_leases()`, start of each pass). The
+lease is sized for the slowest possible batch (`lease_seconds()`: every wave
+of `concurrency` sends hitting the provider timeout), so a live worker keeps
+its rows. If a lease does run out anyway, the rows may be sent again by
+another worker; the write-back only applies to rows still SENDING under the
+same lease, so the late worker never overwrites the newer outcome.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import MessageLog
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+MIN_LEASE_SECONDS = 300
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 6 * 3600
+
+# Lower is sent first; unknown templates get DEFAULT_PRIORITY
+TEMPLATE_PRIORITY: Dict[str, int] = {
+    "RED_ASSIST_V1": 10,
+    "RED_EDU_V1": 20,
+    "COMPLIANCE_REMINDER_V1": 50,
+}
+DEFAULT_PRIORITY = 40
+
+# Provider errors not worth retrying (bad number, template not approved, ...)
+_RETRYABLE_4XX = {"408", "409", "425", "429"}
+
+_OUTCOME_FIELDS = [
+    "provider_msg_id", "status", "sent_at", "error_code", "error_title", "attempts", "next_attempt_at", "updated_at",
+]
+
+
+def priority_for(template_code: str) -> int:
+    return TEMPLATE_PRIORITY.get(template_code, DEFAULT_PRIORITY)
+
+
+def _prepare(msg: MessageLog, now) -> MessageLog:
+    msg.status = MessageLog.Status.QUEUED
+    msg.priority = priority_for(msg.template_code)
+    msg.next_attempt_at = max(msg.scheduled_at or now, now)
+    return msg
+
+
+def outbox_message(**fields) -> MessageLog:
+    """An unsaved MessageLog ready for the outbox (bulk_create it, then kick())."""
+    return _prepare(MessageLog(**fields), timezone.now())
+
+
+def enqueue(messages: Iterable[MessageLog]) -> int:
+    """Put saved `messages` into the outbox and kick a dispatcher after commit."""
+    now = timezone.now()
+    msgs = [_prepare(m, now) for m in messages]
+    if not msgs:
+        return 0
+    for m in msgs:
+        m.updated_at = now
+    MessageLog.objects.bulk_update(msgs, ["status", "priority", "next_attempt_at", "updated_at"])
+    kick()
+    return len(msgs)
+
+
+def kick() -> None:
+    """Start a dispatcher run after the current transaction commits (beat covers a missing broker)."""
+    def _dispatch():
+        from .tasks import dispatch_outbox as task
+
+        try:
+            task.delay()
+        except Exception:
+            log.warning("Outbox: task queue unavailable; beat will dispatch", exc_info=True)
+
+    transaction.on_commit(_dispatch)
+
+
+def lease_seconds(batch_size: int, concurrency: int, timeout: float) -> int:
+    """Lease long enough for a batch whose every send runs into the HTTP timeout (x2: connect + read)."""
+    waves = -(-batch_size // max(1, concurrency))
+    return max(MIN_LEASE_SECONDS, int(waves * timeout * 2) + 60)
+
+
+def release_expired_leases(now=None) -> int:
+    """Return SENDING rows whose worker's lease ran out to the queue."""
+    now = now or timezone.now()
+    return MessageLog.objects.filter(status=MessageLog.Status.SENDING, next_attempt_at__lt=now).update(
+        status=MessageLog.Status.QUEUED, next_attempt_at=now, updated_at=now,
+    )
+
+
+def claim_batch(batch_size: int = BATCH_SIZE, now=None, lease: int = MIN_LEASE_SECONDS) -> List[MessageLog]:
+    """Lock, lease (for `lease` seconds) and return up to `batch_size` due QUEUED rows; other workers skip them."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        ids = list(
+            MessageLog.objects.select_for_update(skip_locked=True)
+            .filter(status=MessageLog.Status.QUEUED, next_attempt_at__lte=now)
+            .order_by("priority", "next_attempt_at", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        MessageLog.objects.filter(id__in=ids).update(
+            status=MessageLog.Status.SENDING,
+            next_attempt_at=now + timedelta(seconds=lease),
+            attempts=F("attempts") + 1,
+            updated_at=now,
+        )
+    return list(MessageLog.objects.filter(id__in=ids).order_by("priority", "id"))
+
+
+def _outbound(msg: MessageLog):
+    from .client import OutboundMessage
+    from .i18n import to_provider_lang
+    from .services import TEMPLATE_NAME
+
+    # Resolve the actual template name for the provider, e.g. "nutrilift_redflag_edu_v1"
+    return OutboundMessage(
+        msg.to_phone_e164,
+        TEMPLATE_NAME.get(msg.template_code, msg.template_code),
+        to_provider_lang(msg.language),  # "en" | "hi"
+        msg.payload.get("_components") or {},  # stashed before queueing
+    )
+
+
+def backoff_seconds(attempts: int) -> float:
+    base = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** max(0, attempts - 1))
+    return base * random.uniform(0.8, 1.2)
+
+
+def _settle(msg: MessageLog, result, now) -> None:
+    from .services import _apply_send_result
+
+    msg.updated_at = now
+    if result.ok:
+        _apply_send_result(msg, result, now)
+        msg.next_attempt_at = None
+        msg.error_code = msg.error_title = ""
+        return
+    msg.error_code = result.error_code
+    msg.error_title = result.error_title
+    permanent = result.error_code.startswith("4") and result.error_code not in _RETRYABLE_4XX
+    if permanent or msg.attempts >= MAX_ATTEMPTS:
+        msg.status = MessageLog.Status.DEAD
+        msg.next_attempt_at = None
+    else:
+        msg.status = MessageLog.Status.QUEUED
+        msg.next_attempt_at = now + timedelta(seconds=backoff_seconds(msg.attempts))
+
+
+def dispatch_outbox(batch_size: int = BATCH_SIZE, max_batches: Optional[int] = None) -> Dict[str, int]:
+    """Drain due outbox rows in claimed batches; safe to run in several workers at once."""
+    from .client import get_client
+
+    stats = {"claimed": 0, "sent": 0, "retry": 0, "dead": 0, "lost": 0, "released": release_expired_leases()}
+    client = get_client()
+    lease = lease_seconds(batch_size, client.concurrency, getattr(client.provider, "timeout", 20))
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        msgs = claim_batch(batch_size, lease=lease)
+        if not msgs:
+            break
+        batches += 1
+        leased_until = msgs[0].next_attempt_at  # the same for the whole claim
+        results = client.send_many([_outbound(m) for m in msgs])
+        now = timezone.now()
+        for msg, result in zip(msgs, results):
+            _settle(msg, result, now)
+            stats["sent" if result.ok else "dead" if msg.status == MessageLog.Status.DEAD else "retry"] += 1
+        # bulk_update() keeps the queryset's filter: only rows still under this claim's lease are written
+        written = MessageLog.objects.filter(
+            status=MessageLog.Status.SENDING, next_attempt_at=leased_until,
+        ).bulk_update(msgs, _OUTCOME_FIELDS)
+        if written < len(msgs):
+            log.warning("Outbox: lease expired for %d of %d rows before write-back", len(msgs) - written, len(msgs))
+            stats["lost"] += len(msgs) - written
+        stats["claimed"] += len(msgs)
+    return stats
+
+
+def requeue_dead(messages: Iterable[MessageLog]) -> int:
+    """Give dead-lettered rows a fresh set of attempts."""
+    now = timezone.now()
+    ids = [m.pk for m in messages if m.status == MessageLog.Status.DEAD]
+    n = MessageLog.objects.filter(id__in=ids, status=MessageLog.Status.DEAD).update(
+        status=MessageLog.Status.QUEUED, attempts=0, next_attempt_at=now, error_code="", error_title="", updated_at=now,
+    )
+    if n:
+        kick()
+    return n
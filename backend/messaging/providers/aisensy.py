@@ -1,5 +1,5 @@
 # messaging/providers/aisensy.py
-import os, requests
+import os
 from .base import WhatsAppProvider
 
 class AiSensyProvider(WhatsAppProvider):
@@ -49,7 +49,7 @@ class AiSensyProvider(WhatsAppProvider):
         if attrs:
             payload["attributes"] = {str(k): str(v) for k, v in attrs.items()}
 
-        r = requests.post(self.base_url, json=payload, timeout=20)
+        r = self.session.post(self.base_url, json=payload, timeout=self.timeout)
         # If AiSensy returns non-2xx, raise; Celery will retry if used
         r.raise_for_status()
 
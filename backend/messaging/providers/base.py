@@ -2,6 +2,14 @@ from abc import ABC, abstractmethod
 from typing import Dict, Tuple
 
 class WhatsAppProvider(ABC):
+    timeout = 20  # seconds per HTTP request (messaging.outbox sizes its claim lease from it)
+
+    @property
+    def session(self):
+        """The worker process's pooled keep-alive HTTP session (messaging.client)."""
+        from ..client import http_session
+        return http_session()
+
     @abstractmethod
     def send_template(self, to_phone_e164: str, template_name: str, language_code: str, components: Dict) -> Tuple[str, str]:
         """
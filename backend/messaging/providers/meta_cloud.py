@@ -1,4 +1,4 @@
-import os, requests
+import os
 from .base import WhatsAppProvider
 
 class MetaCloudProvider(WhatsAppProvider):
@@ -6,15 +6,18 @@ class MetaCloudProvider(WhatsAppProvider):
     Minimal wrapper for WhatsApp Cloud API (template sends).
     Requires:
       WA_PHONE_NUMBER_ID, WA_ACCESS_TOKEN
+    Optional:
+      WA_GRAPH_BASE_URL (default https://graph.facebook.com/v20.0)
     """
     def __init__(self):
         self.phone_number_id = os.getenv("WA_PHONE_NUMBER_ID")
         self.token = os.getenv("WA_ACCESS_TOKEN")
+        self.base_url = os.getenv("WA_GRAPH_BASE_URL", "https://graph.facebook.com/v20.0").rstrip("/")
         if not self.phone_number_id or not self.token:
             raise RuntimeError("Meta Cloud Provider missing WA_PHONE_NUMBER_ID/WA_ACCESS_TOKEN")
 
     def send_template(self, to_phone_e164: str, template_name: str, language_code: str, components: dict):
-        url = f"https://graph.facebook.com/v20.0/{self.phone_number_id}/messages"
+        url = f"{self.base_url}/{self.phone_number_id}/messages"
         headers = {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
         payload = {
             "messaging_product": "whatsapp",
@@ -40,7 +43,7 @@ class MetaCloudProvider(WhatsAppProvider):
                 "type": "button", "sub_type": "url", "index": idx,
                 "parameters": [{"type":"text","text": url_text}]
             })
-        r = requests.post(url, json=payload, headers=headers, timeout=20)
+        r = self.session.post(url, json=payload, headers=headers, timeout=self.timeout)
         r.raise_for_status()
         data = r.json()
         # Return first message id if present
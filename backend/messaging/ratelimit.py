@@ -1,30 +1,166 @@
-import os, time
+"""WhatsApp send rate limits: sliding windows, all keys checked atomically.
+
+Each `Limit` is a sliding-window log (a Redis sorted set of send timestamps)
+allowing `max_count` sends in any `window_sec`. `acquire(*limits)` runs one
+Lua script (one round trip) that trims every window, and records the send in
+all of them only if every one has room, so a request rejected by one limit
+does not use up the others. When refused it returns the seconds until the
+first slot frees up in every full window (`RateDecision.retry_after`,
+`RateLimitExceeded.retry_after`), for callers that schedule a retry.
+
+If Redis is unreachable the same check runs against an in-process log,
+per worker process, so sends keep flowing with per-process limits; Redis is
+tried again after REDIS_RETRY_SEC.
+
+Keys are "rl:wa:sw:..." (the earlier fixed-window counters under
+"rl:wa:..." are plain strings and simply expire).
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Tuple
+
 import redis
 
+log = logging.getLogger(__name__)
+
 _RURL = (
     os.getenv("RATELIMIT_REDIS_URL")
     or os.getenv("CELERY_BROKER_URL")
     or "redis://localhost:6379/0"
 )
 
-_r = redis.Redis.from_url(_RURL)
+_r = redis.Redis.from_url(_RURL, socket_connect_timeout=0.5, socket_timeout=0.5)
+
+REDIS_RETRY_SEC = 30
+_redis_down_until = 0.0
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, message: str = "", retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class Limit:
+    key: str
+    window_sec: int
+    max_count: int
+
+
+@dataclass(frozen=True)
+class RateDecision:
+    allowed: bool
+    retry_after: float = 0.0  # seconds; 0 when allowed
+
+
+# KEYS: sorted sets; ARGV: member, then (window_ms, max_count) per key.
+# Returns {1, 0} after recording the send in every window, or {0, wait_ms}.
+_SLIDING_WINDOW_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local wait = 0
+for i, key in ipairs(KEYS) do
+  local window = tonumber(ARGV[2 * i])
+  local limit = tonumber(ARGV[2 * i + 1])
+  redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+  local count = redis.call('ZCARD', key)
+  if count >= limit then
+    local frees = redis.call('ZRANGE', key, count - limit, count - limit, 'WITHSCORES')
+    local key_wait = window
+    if frees[2] then key_wait = tonumber(frees[2]) + window - now end
+    if key_wait > wait then wait = key_wait end
+  end
+end
+if wait > 0 then
+  return {0, wait}
+end
+for i, key in ipairs(KEYS) do
+  redis.call('ZADD', key, now, ARGV[1])
+  redis.call('PEXPIRE', key, tonumber(ARGV[2 * i]))
+end
+return {1, 0}
+"""
+
+_script = _r.register_script(_SLIDING_WINDOW_LUA)
 
-class RateLimitExceeded(Exception): ...
 
-def _bucket(key: str, window_sec: int, max_count: int):
-    now = int(time.time())
-    p = _r.pipeline()
-    p.incr(key, 1)
-    p.expire(key, window_sec)
-    count, _ = p.execute()
-    if int(count) > max_count:
-        raise RateLimitExceeded(f"Rate limit exceeded for {key}")
+class _LocalLimiter:
+    """In-process sliding-window log with the script's semantics (fallback when Redis is down)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits: Dict[str, Deque[float]] = {}
+
+    def acquire(self, limits: Tuple[Limit, ...], now: float = None) -> RateDecision:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            wait = 0.0
+            for lim in limits:
+                hits = self._hits.setdefault(lim.key, deque())
+                while hits and hits[0] <= now - lim.window_sec:
+                    hits.popleft()
+                if len(hits) >= lim.max_count:
+                    wait = max(wait, hits[len(hits) - lim.max_count] + lim.window_sec - now)
+            if wait > 0:
+                return RateDecision(False, wait)
+            for lim in limits:
+                self._hits[lim.key].append(now)
+            return RateDecision(True)
+
+
+_local = _LocalLimiter()
+
+
+def acquire(*limits: Limit) -> RateDecision:
+    """Record one send against every limit if all have room (one atomic Redis round trip)."""
+    if not limits:
+        return RateDecision(True)
+    global _redis_down_until
+    if time.monotonic() < _redis_down_until:
+        return _local.acquire(limits)
+    args = [uuid.uuid4().hex]
+    for lim in limits:
+        args += [lim.window_sec * 1000, lim.max_count]
+    try:
+        allowed, wait_ms = _script(keys=[lim.key for lim in limits], args=args)
+    except redis.RedisError as e:
+        log.warning("Rate limiter: Redis unavailable (%s), using in-process limits", e)
+        _redis_down_until = time.monotonic() + REDIS_RETRY_SEC
+        return _local.acquire(limits)
+    return RateDecision(bool(allowed), int(wait_ms) / 1000.0)
+
+
+def hit(*limits: Limit) -> None:
+    """acquire(), raising RateLimitExceeded (with retry_after) when refused."""
+    decision = acquire(*limits)
+    if not decision.allowed:
+        keys = ", ".join(lim.key for lim in limits)
+        raise RateLimitExceeded(f"Rate limit exceeded for {keys}", retry_after=decision.retry_after)
+
+
+def global_per_min() -> Limit:
+    return Limit("rl:wa:sw:global:1m", 60, int(os.getenv("WA_RATE_GLOBAL_PER_MIN", "90")))
+
+
+def per_phone_daily(phone: str, template: str) -> Limit:
+    return Limit(f"rl:wa:sw:{template}:{phone}:1d", 24 * 3600, int(os.getenv("WA_RATE_PER_PHONE_PER_DAY", "2")))
+
+
+def check_send(phone: str, template: str) -> None:
+    """The global per-minute and per-phone daily limits for one send, checked together."""
+    hit(global_per_min(), per_phone_daily(phone, template))
+
 
 def check_global_per_min():
-    cap = int(os.getenv("WA_RATE_GLOBAL_PER_MIN", "90"))
-    _bucket("rl:wa:global:1m", 60, cap)
+    hit(global_per_min())
+
 
 def check_per_phone_daily(phone: str, template: str):
-    cap = int(os.getenv("WA_RATE_PER_PHONE_PER_DAY", "2"))
-    key = f"rl:wa:{template}:{phone}:1d"
-    _bucket(key, 24*3600, cap)
+    hit(per_phone_daily(phone, template))
@@ -8,20 +8,28 @@ from .models import MessageLog
 from .i18n import choose_language, flags_to_text, edu_video_url, assist_apply_url
 import hashlib
 from django.db import transaction
-from .ratelimit import check_global_per_min, check_per_phone_daily, RateLimitExceeded
+from .ratelimit import check_send, RateLimitExceeded
 import uuid
-# provider picker
+from .client import SendResult, get_client
+from .outbox import kick, outbox_message
+
+# provider picker (the pooled process-wide client's provider, see messaging.client)
 def _provider():
-    prov = (os.getenv("WHATSAPP_PROVIDER") or "mock").lower()
-    if prov == "meta":
-        from .providers.meta_cloud import MetaCloudProvider
-        return MetaCloudProvider()
-    elif prov == "aisensy":
-        from .providers.aisensy import AiSensyProvider
-        return AiSensyProvider()
+    return get_client().provider
+
+
+def _apply_send_result(log: MessageLog, result: SendResult, now=None) -> None:
+    """Copy a provider result onto `log` (not saved); failures become FAILED with the error."""
+    if result.ok:
+        log.provider_msg_id = result.provider_msg_id
+        log.status = MessageLog.Status.SENT if result.provider_status.lower() == "sent" else MessageLog.Status.QUEUED
+        log.sent_at = now or timezone.now()
     else:
-        from .providers.mock import MockProvider
-        return MockProvider()
+        log.status = MessageLog.Status.FAILED
+        log.error_code = result.error_code
+        log.error_title = result.error_title
+    log.updated_at = now or timezone.now()
+
 
 # Map our internal codes to WABA template names
 TEMPLATE_NAME = {
@@ -79,8 +87,7 @@ def prepare_redflag_education_click_to_chat(screening: Screening):
         return existing, _click_to_chat_text(body)
 
     # Rate limiting (same as send)
-    check_global_per_min()
-    check_per_phone_daily(phone, "RED_EDU_V1")
+    check_send(phone, "RED_EDU_V1")
 
     log = MessageLog.objects.create(
         organization=org,
@@ -122,8 +129,7 @@ def prepare_redflag_assistance_click_to_chat(screening: Screening):
         return existing, _click_to_chat_text(body)
 
     # Rate limiting (same as send)
-    check_global_per_min()
-    check_per_phone_daily(phone, "RED_ASSIST_V1")
+    check_send(phone, "RED_ASSIST_V1")
 
     log = MessageLog.objects.create(
         organization=org,
@@ -165,10 +171,9 @@ def send_redflag_education(screening):
         return existing
 
     # Rate limiting
-    check_global_per_min()
-    check_per_phone_daily(phone, "RED_EDU_V1")
+    check_send(phone, "RED_EDU_V1")
 
-    log = MessageLog.objects.create(
+    log = outbox_message(
         organization=org,
         to_phone_e164=phone,
         template_code="RED_EDU_V1",
@@ -176,10 +181,9 @@ def send_redflag_education(screening):
         payload={"screening_id": screening.id, "flags": screening.red_flags, "video": video, "_components": components},
         related_screening=screening,
         idempotency_key=idem,
-        status=MessageLog.Status.QUEUED
     )
-    from .tasks import send_message_task  # local import breaks the cycle
-    send_message_task.delay(log.id)
+    log.save()
+    kick()  # messaging.outbox sends it after commit
     return log
 
 
@@ -201,22 +205,17 @@ def send_redflag_assistance(screening: Screening) -> MessageLog:
         "buttons": [video, apply_url]     # Button 0 -> video, Button 1 -> apply
     }
 
-    log = MessageLog.objects.create(
+    log = outbox_message(
         organization=org,
         to_phone_e164=phone,
         template_code="RED_ASSIST_V1",
         language=lang,
-        payload={"screening_id": screening.id, "flags": screening.red_flags, "video": video, "apply_url": apply_url},
+        payload={"screening_id": screening.id, "flags": screening.red_flags, "video": video, "apply_url": apply_url,
+                 "_components": components},
         related_screening=screening,
-        status=MessageLog.Status.QUEUED
     )
-
-    prov = _provider()
-    msg_id, pstatus = prov.send_template(phone, TEMPLATE_NAME["RED_ASSIST_V1"], LANG_CODE[lang], components)
-    log.provider_msg_id = msg_id
-    log.status = MessageLog.Status.SENT if pstatus.lower() == "sent" else MessageLog.Status.QUEUED
-    log.sent_at = timezone.now()
-    log.save(update_fields=["provider_msg_id","status","sent_at","updated_at"])
+    log.save()
+    kick()  # messaging.outbox sends it after commit
     return log
 
 # add to TEMPLATE_NAME mapping 
@@ -228,45 +227,62 @@ def send_compliance_reminder(supply) -> MessageLog:
     """
     Sends a WhatsApp reminder to complete Day-27 compliance.
     """
-    from django.urls import reverse
-    from django.conf import settings
-    from roster.models import Guardian
+    return send_compliance_reminders([supply])[0]
 
-    org = supply.enrollment.organization
-    student = supply.enrollment.student
-    guardian = student.primary_guardian
-    phone = guardian.phone_e164 if guardian else ""
 
-    base = os.getenv("PUBLIC_BASE_URL", "http://localhost:8000")
-    link = f"{base}{reverse('program:compliance_form', args=[supply.qr_token])}"
-
-    lang = choose_language(getattr(guardian, "preferred_language", None), getattr(org, "locale", None))
-    components = {
-        # Adjust placeholders to your approved WABA template
-        "body": [
-            student.full_name,  # {{1}} Child Name
-            link,               # {{2}} Link to compliance form
-        ],
-        "buttons": [link],     # URL button 0 -> {{1}} dynamic URL
-    }
+def send_compliance_reminders(supplies, *, dispatch: bool = True) -> list[MessageLog]:
+    """
+    Batch form of send_compliance_reminder(): one MessageLog per supply,
+    bulk-inserted into the outbox (messaging.outbox), which sends them in
+    concurrent batches after commit, retrying failures with backoff.
 
-    log = MessageLog.objects.create(
-        organization=org,
-        to_phone_e164=phone,
-        template_code="COMPLIANCE_REMINDER_V1",
-        language=lang,
-        payload={"supply_id": supply.id, "student": student.full_name, "link": link},
-        related_supply=supply,
-        status=MessageLog.Status.QUEUED,
-    )
+    `supplies` should have enrollment__student__primary_guardian and
+    enrollment__organization loaded. Returns the logs in `supplies` order.
+    Callers queueing several batches pass dispatch=False and kick() once.
+    """
+    from django.urls import reverse
 
-    prov = _provider()
-    msg_id, pstatus = prov.send_template(phone, TEMPLATE_NAME["COMPLIANCE_REMINDER_V1"], LANG_CODE[lang], components)
-    log.provider_msg_id = msg_id
-    log.status = MessageLog.Status.SENT if pstatus.lower() == "sent" else MessageLog.Status.QUEUED
-    log.sent_at = timezone.now()
-    log.save(update_fields=["provider_msg_id","status","sent_at","updated_at"])
-    return log
+    supplies = list(supplies)
+    if not supplies:
+        return []
+    base = os.getenv("PUBLIC_BASE_URL", "http://localhost:8000")
+    logs = []
+    for supply in supplies:
+        org = supply.enrollment.organization
+        student = supply.enrollment.student
+        guardian = student.primary_guardian
+        phone = guardian.phone_e164 if guardian else ""
+        link = f"{base}{reverse('program:compliance_form', args=[supply.qr_token])}"
+
+        lang = choose_language(getattr(guardian, "preferred_language", None), getattr(org, "locale", None))
+        components = {
+            # Adjust placeholders to your approved WABA template
+            "body": [
+                student.full_name,  # {{1}} Child Name
+                link,               # {{2}} Link to compliance form
+            ],
+            "buttons": [link],     # URL button 0 -> {{1}} dynamic URL
+        }
+        logs.append(outbox_message(
+            organization=org,
+            to_phone_e164=phone,
+            template_code="COMPLIANCE_REMINDER_V1",
+            language=lang,
+            payload={"supply_id": supply.id, "student": student.full_name, "link": link, "_components": components},
+            related_supply=supply,
+            idempotency_key=str(uuid.uuid4()),
+        ))
+
+    MessageLog.objects.bulk_create(logs)
+    # MySQL does not return ids from bulk inserts
+    ids = dict(MessageLog.objects.filter(
+        idempotency_key__in=[log.idempotency_key for log in logs]
+    ).values_list("idempotency_key", "id"))
+    for log in logs:
+        log.id = ids.get(log.idempotency_key)
+    if dispatch:
+        kick()
+    return logs
 
 def prepare_screening_status_click_to_chat(screening: Screening):
     """
@@ -285,3 +301,76 @@ def prepare_screening_status_click_to_chat(screening: Screening):
     if level == "RED" and is_low_income:
         return prepare_redflag_assistance_click_to_chat(screening)
     return prepare_redflag_education_click_to_chat(screening)
+
+
+def click_to_chat_url(phone_e164: str, text: str) -> str:
+    """wa.me link that opens WhatsApp with `text` pre-filled for `phone_e164`."""
+    from urllib.parse import quote
+    digits = "".join([c for c in (phone_e164 or "") if c.isdigit()])
+    return f"https://wa.me/{digits}?text={quote(text)}"
+
+
+def prepare_screening_status_click_to_chat_many(screenings) -> Dict[int, Tuple[MessageLog, str]]:
+    """
+    Batch form of prepare_screening_status_click_to_chat() for screenings of one
+    request (offline sync): same template rule, same idempotency keys and payloads,
+    but existing logs are looked up in one query and new ones are bulk-inserted.
+
+    `screenings` should have student__primary_guardian and organization loaded.
+    Returns {screening_id: (MessageLog, prefilled_text)}; screenings without a
+    guardian phone, or over a rate limit, are left out.
+    """
+    planned = []
+    for s in screenings:
+        guardian, phone = _guardian_and_phone(s)
+        if not phone:
+            continue
+        org = s.organization
+        lang = choose_language(getattr(guardian, "preferred_language", None), getattr(org, "locale", None))
+        flags_txt = flags_to_text(s.red_flags, lang)
+        video = edu_video_url(lang)
+        if (s.risk_level or "GREEN").upper() == "RED" and s.is_low_income_at_screen:
+            apply_url = assist_apply_url(s.student_id, s.id, lang)
+            code, idem = "RED_ASSIST_V1", _make_idem_key("red_assist", phone, s.id)
+            payload = {"screening_id": s.id, "flags": s.red_flags, "video": video, "apply_url": apply_url}
+            text = _click_to_chat_text([flags_txt, video, apply_url])
+        else:
+            components = {"body": [s.student.full_name, flags_txt, video], "buttons": [video]}
+            code, idem = "RED_EDU_V1", _make_idem_key("red_edu", phone, s.id)
+            payload = {"screening_id": s.id, "flags": s.red_flags, "video": video, "_components": components}
+            text = _click_to_chat_text(components["body"])
+        planned.append((s, phone, lang, code, idem, payload, text))
+
+    existing = MessageLog.objects.in_bulk([p[4] for p in planned], field_name="idempotency_key")
+    out: Dict[int, Tuple[MessageLog, str]] = {}
+    new_logs = []
+    for s, phone, lang, code, idem, payload, text in planned:
+        if idem in existing:
+            out[s.id] = (existing[idem], text)
+            continue
+        try:
+            check_send(phone, code)
+        except RateLimitExceeded:
+            continue
+        log = MessageLog(
+            organization=s.organization,
+            to_phone_e164=phone,
+            template_code=code,
+            language=lang,
+            payload=payload,
+            related_screening=s,
+            idempotency_key=idem,
+            status=MessageLog.Status.QUEUED,
+        )
+        new_logs.append(log)
+        out[s.id] = (log, text)
+
+    if new_logs:
+        MessageLog.objects.bulk_create(new_logs)
+        # MySQL does not return ids from bulk inserts
+        ids = dict(MessageLog.objects.filter(
+            idempotency_key__in=[log.idempotency_key for log in new_logs]
+        ).values_list("idempotency_key", "id"))
+        for log in new_logs:
+            log.id = ids.get(log.idempotency_key)
+    return out
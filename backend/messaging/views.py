@@ -1,12 +1,11 @@
 import hmac, hashlib, os, json
 from django.http import HttpResponse, JsonResponse, HttpResponseForbidden
 from django.views.decorators.csrf import csrf_exempt
-from django.utils import timezone
-from .models import MessageLog
+from .models import MessageLog, WebhookEvent
+from .webhooks import iter_statuses
 from .i18n import flags_to_text, choose_language
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
-from urllib.parse import quote
 
 VERIFY_TOKEN = os.getenv("WA_VERIFY_TOKEN","")
 APP_SECRET = os.getenv("WA_APP_SECRET","")
@@ -37,45 +36,18 @@ def wa_webhook(request):
             data = json.loads(request.body.decode("utf-8"))
         except Exception:
             return HttpResponse(status=400)
+        if not isinstance(data, dict):
+            return HttpResponse(status=400)
 
-        # Iterate status updates (Meta format)
-        for entry in data.get("entry", []):
-            for change in entry.get("changes", []):
-                value = change.get("value", {})
-                for status in value.get("statuses", []):
-                    msg_id = status.get("id") or ""
-                    wa_status = (status.get("status") or "").lower()
-                    error = status.get("errors", [{}])[0] if status.get("errors") else {}
-
-                    try:
-                        log = MessageLog.objects.get(provider_msg_id=msg_id)
-                    except MessageLog.DoesNotExist:
-                        continue
-
-                    if wa_status == "sent":
-                        log.status = MessageLog.Status.SENT
-                    elif wa_status == "delivered":
-                        log.status = MessageLog.Status.DELIVERED
-                    elif wa_status == "read":
-                        log.status = MessageLog.Status.READ
-                    elif wa_status == "failed":
-                        log.status = MessageLog.Status.FAILED
-                        log.error_code = str(error.get("code",""))
-                        log.error_title = error.get("title","")
-                    else:
-                        # unknown state; do not regress
-                        pass
-                    log.updated_at = timezone.now()
-                    log.save(update_fields=["status","error_code","error_title","updated_at"])
+        # Status updates are applied in bulk by messaging.webhooks (Celery beat)
+        if any(True for _ in iter_statuses(data)):
+            WebhookEvent.objects.create(payload=data)
         return JsonResponse({"ok": True})
     return HttpResponse(status=405)
 
-def _digits_only(phone_e164: str) -> str:
-    return "".join([c for c in (phone_e164 or "") if c.isdigit()])
-
 def _wa_link(phone_e164: str, text: str) -> str:
-    digits = _digits_only(phone_e164)
-    return f"https://wa.me/{digits}?text={quote(text)}"
+    from .services import click_to_chat_url
+    return click_to_chat_url(phone_e164, text)
 
 def whatsapp_preview(request, log_id: int):
     """
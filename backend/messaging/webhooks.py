@@ -0,0 +1,136 @@
+"""WhatsApp status webhooks: staged in the request, applied in bulk.
+
+`wa_webhook` used to look up and save one MessageLog per status inside the
+request. It now verifies the signature, stores the body as a WebhookEvent
+(one INSERT) and returns 200. `apply_webhook_events()` (task
+`messaging.tasks.ingest_webhook_events`, Celery beat every 15 s) then:
+
+  - claims a batch of unprocessed events (FOR UPDATE SKIP LOCKED, so
+    several consumers can run);
+  - keeps the most advanced status per provider message id across the batch;
+  - resolves all ids with one `provider_msg_id IN (...)` query (indexed);
+  - applies only forward transitions, one UPDATE per target status, each
+    also guarded in SQL by `status IN (lower statuses)`, so a late
+    "delivered" never overwrites READ even if two consumers race.
+
+Statuses for ids not yet known (the send's write-back can land after the
+provider's first callback) are re-staged and retried for UNRESOLVED_GRACE;
+processed events are deleted after RETENTION_DAYS.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MessageLog, WebhookEvent
+
+BATCH_SIZE = 500
+UNRESOLVED_GRACE = timedelta(minutes=10)
+RETENTION_DAYS = 7
+
+S = MessageLog.Status
+# Webhook status -> MessageLog status; transitions only ever move up RANK
+WA_STATUS = {"sent": S.SENT, "delivered": S.DELIVERED, "read": S.READ, "failed": S.FAILED}
+RANK = {S.QUEUED: 0, S.SENDING: 0, S.DEAD: 0, S.SENT: 1, S.FAILED: 2, S.DELIVERED: 3, S.READ: 4}
+
+
+def iter_statuses(payload: dict) -> Iterable[dict]:
+    """The `statuses` entries of a Meta webhook body."""
+    for entry in payload.get("entry", []) or []:
+        for change in entry.get("changes", []) or []:
+            yield from (change.get("value") or {}).get("statuses", []) or []
+
+
+def _latest_by_message(events: List[WebhookEvent]) -> Dict[str, Tuple[str, dict, WebhookEvent]]:
+    """{provider_msg_id: (target status, raw status, event)}, the highest-ranked per id."""
+    latest: Dict[str, Tuple[str, dict, WebhookEvent]] = {}
+    for event in events:
+        for raw in iter_statuses(event.payload or {}):
+            msg_id = raw.get("id") or ""
+            target = WA_STATUS.get((raw.get("status") or "").lower())
+            if not msg_id or target is None:
+                continue  # unknown state; do not regress
+            if msg_id not in latest or RANK[target] > RANK[latest[msg_id][0]]:
+                latest[msg_id] = (target, raw, event)
+    return latest
+
+
+def apply_webhook_events(batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """Apply one batch of staged webhook events; returns counts."""
+    now = timezone.now()
+    stats = {"events": 0, "statuses": 0, "updated": 0, "restaged": 0, "unknown": 0}
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True).order_by("id")[:batch_size]
+        )
+        if not events:
+            return stats
+        latest = _latest_by_message(events)
+        stats.update(events=len(events), statuses=len(latest))
+
+        current = {
+            msg_id: (pk, status)
+            for pk, msg_id, status in MessageLog.objects.filter(provider_msg_id__in=list(latest))
+            .values_list("id", "provider_msg_id", "status")
+        }
+
+        forward: Dict[str, List[int]] = {}
+        failed: Dict[Tuple[str, str], List[int]] = {}
+        unresolved: List[dict] = []
+        unresolved_since = []  # received_at of the events those statuses came from
+        for msg_id, (target, raw, event) in latest.items():
+            if msg_id not in current:
+                if now - event.received_at < UNRESOLVED_GRACE:
+                    unresolved.append(raw)
+                    unresolved_since.append(event.received_at)
+                else:
+                    stats["unknown"] += 1
+                continue
+            pk, status = current[msg_id]
+            if RANK[target] <= RANK.get(status, 0):
+                continue
+            if target == S.FAILED:
+                error = (raw.get("errors") or [{}])[0]
+                failed.setdefault((str(error.get("code", ""))[:64], str(error.get("title", ""))[:255]), []).append(pk)
+            else:
+                forward.setdefault(target, []).append(pk)
+
+        for target, pks in forward.items():
+            stats["updated"] += _advance(pks, target, now)
+        for (code, title), pks in failed.items():
+            stats["updated"] += _advance(pks, S.FAILED, now, error_code=code, error_title=title)
+
+        if unresolved:
+            # Oldest arrival among the re-staged statuses: the grace period is neither
+            # extended nor cut short by unrelated events in the same batch
+            WebhookEvent.objects.create(
+                payload={"entry": [{"changes": [{"value": {"statuses": unresolved}}]}]},
+                received_at=min(unresolved_since),
+            )
+            stats["restaged"] = len(unresolved)
+        WebhookEvent.objects.filter(id__in=[e.id for e in events]).update(processed_at=now)
+    return stats
+
+
+def _advance(pks: List[int], target: str, now, **fields) -> int:
+    lower = [status for status, rank in RANK.items() if rank < RANK[target]]
+    return MessageLog.objects.filter(id__in=pks, status__in=lower).update(status=target, updated_at=now, **fields)
+
+
+def ingest_webhook_events(batch_size: int = BATCH_SIZE, max_batches: int = 20) -> Dict[str, int]:
+    """Drain staged events (up to `max_batches`) and purge old processed ones."""
+    totals: Dict[str, int] = {}
+    for _ in range(max_batches):
+        stats = apply_webhook_events(batch_size)
+        for k, v in stats.items():
+            totals[k] = totals.get(k, 0) + v
+        if stats["events"] < batch_size:
+            break
+    cutoff = timezone.now() - timedelta(days=RETENTION_DAYS)
+    totals["purged"] = WebhookEvent.objects.filter(processed_at__lt=cutoff).delete()[0]
+    return totals
@@ -199,6 +199,54 @@ CELERY_BEAT_SCHEDULE.update({
     },
 })
 
+# Analytics warehouse export (reporting.warehouse)
+CELERY_BEAT_SCHEDULE.update({
+    "reporting-warehouse-export-nightly": {
+        "task": "reporting.tasks.export_warehouse_nightly",
+        "schedule": crontab(hour=3, minute=45),  # after rollups and backup
+    },
+})
+# Local directory or s3://bucket/prefix; empty disables the nightly export
+WAREHOUSE_EXPORT_URL = os.getenv("WAREHOUSE_EXPORT_URL", "")
+# For S3-compatible stores other than AWS (MinIO, R2, ...)
+WAREHOUSE_S3_ENDPOINT_URL = os.getenv("WAREHOUSE_S3_ENDPOINT_URL", "")
+
+# Measurement data-quality indicators (reporting.quality)
+CELERY_BEAT_SCHEDULE.update({
+    "reporting-quality-metrics-nightly": {
+        "task": "reporting.tasks.build_quality_metrics",
+        "schedule": crontab(hour=4, minute=15),
+    },
+})
+
+# WhatsApp outbox (messaging.outbox; enqueues also kick a run) and staged status webhooks (messaging.webhooks)
+CELERY_BEAT_SCHEDULE.update({
+    "messaging-dispatch-outbox-1m": {
+        "task": "messaging.tasks.dispatch_outbox",
+        "schedule": crontab(minute="*/1"),
+    },
+    "messaging-ingest-webhooks-15s": {
+        "task": "messaging.tasks.ingest_webhook_events",
+        "schedule": 15.0,
+    },
+})
+
+# Re-screening due dates (screening.rescreen), after the milestone job
+CELERY_BEAT_SCHEDULE.update({
+    "screening-rescreen-due-nightly": {
+        "task": "screening.tasks.rebuild_rescreen_due",
+        "schedule": crontab(hour=2, minute=45),
+    },
+})
+
+# Duplicate student review queue (roster.dedup)
+CELERY_BEAT_SCHEDULE.update({
+    "roster-duplicate-students-nightly": {
+        "task": "roster.tasks.find_duplicate_students",
+        "schedule": crontab(hour=3, minute=30),
+    },
+})
+
 # ------------------------------------------------------------------------------
 # Single-file environment profile (replaces settings.local/staging/production)
 # ------------------------------------------------------------------------------
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('program', '0004_screeningmilestone'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compliancesubmission',
+            index=models.Index(fields=['updated_at'], name='program_com_updated_54915c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['updated_at'], name='program_enr_updated_9b2596_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monthlysupply',
+            index=models.Index(fields=['updated_at'], name='program_mon_updated_7c655f_idx'),
+        ),
+    ]
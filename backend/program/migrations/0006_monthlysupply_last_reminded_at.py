@@ -0,0 +1,22 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('program', '0005_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlysupply',
+            name='last_reminded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='monthlysupply',
+            index=models.Index(fields=['compliance_due_at', 'last_reminded_at'], name='program_mon_complia_484285_idx'),
+        ),
+    ]
@@ -63,7 +63,10 @@ class Enrollment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        indexes = [models.Index(fields=["organization", "status"])]
+        indexes = [
+            models.Index(fields=["organization", "status"]),
+            models.Index(fields=["updated_at"]),
+        ]
 
     def __str__(self):
         return f"{self.student.full_name} ({self.status})"
@@ -113,6 +116,8 @@ class MonthlySupply(models.Model):
 
     qr_token = models.CharField(max_length=96, unique=True)
     ok_to_ship_next = models.BooleanField(default=False)  # used in Sprint 6 gating
+    # Last compliance reminder queued for this pack (program.reminders)
+    last_reminded_at = models.DateTimeField(null=True, blank=True)
 
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -122,6 +127,8 @@ class MonthlySupply(models.Model):
         indexes = [
             models.Index(fields=["delivered_on"]),
             models.Index(fields=["compliance_due_at"]),
+            models.Index(fields=["updated_at"]),
+            models.Index(fields=["compliance_due_at", "last_reminded_at"]),
         ]
 
     def __str__(self):
@@ -240,7 +247,10 @@ class ComplianceSubmission(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        indexes = [models.Index(fields=["status", "created_at"])]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["updated_at"]),
+        ]
 
     def __str__(self):
         return f"{self.monthly_supply} → {self.status}"
@@ -308,7 +318,10 @@ class ScreeningMilestone(models.Model):
                 due_on=e.start_date + timedelta(days=180),
             ))
         if rows:
+            from screening.rescreen import refresh_due_dates
+
             ScreeningMilestone.objects.bulk_create(rows, ignore_conflicts=True)
+            refresh_due_dates([e.student_id])
 
     def mark_completed(self, screening: Screening):
         if self.status == self.Status.COMPLETED:
@@ -0,0 +1,78 @@
+"""Compliance reminder planner (beat: program.tasks.send_compliance_due_reminders).
+
+Every 15 minutes, packs whose Day-27 compliance is due and not yet submitted
+get a WhatsApp reminder at most once per REMIND_EVERY. Candidates come from
+one query, with no per-supply lookups:
+
+  - delivered, compliance_due_at <= now, compliance NOT_SUBMITTED;
+  - guardian phone present (inner join through the student);
+  - `last_reminded_at` empty or older than REMIND_EVERY, served by the
+    (compliance_due_at, last_reminded_at) index;
+  - an anti-join (NOT EXISTS) against COMPLIANCE_REMINDER_V1 logs for the
+    supply in the window, which covers reminders queued by other paths.
+
+Candidates are taken in id-ordered chunks; each chunk is locked (SKIP
+LOCKED, so an overlapping run skips it), queued in the messaging outbox as
+one bulk insert (messaging.services.send_compliance_reminders) and stamped
+with `last_reminded_at` in one UPDATE, all in one transaction; the outbox
+dispatcher is kicked once at the end.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from messaging.models import MessageLog
+
+from .models import ComplianceSubmission, MonthlySupply
+
+REMIND_EVERY = timedelta(hours=24)
+PLAN_CHUNK = 1000
+TEMPLATE = "COMPLIANCE_REMINDER_V1"
+
+
+def reminder_candidates(now=None):
+    """Supplies due a compliance reminder at `now` (one query; ordered by id)."""
+    now = now or timezone.now()
+    since = now - REMIND_EVERY
+    recent = MessageLog.objects.filter(related_supply=OuterRef("pk"), template_code=TEMPLATE, created_at__gte=since)
+    return (
+        MonthlySupply.objects
+        .filter(delivered_on__isnull=False, compliance_due_at__lte=now,
+                compliance__status=ComplianceSubmission.Status.NOT_SUBMITTED,
+                enrollment__student__primary_guardian__phone_e164__gt="")
+        .filter(Q(last_reminded_at__isnull=True) | Q(last_reminded_at__lt=since))
+        .filter(~Exists(recent))
+        .order_by("id")
+    )
+
+
+def plan_compliance_reminders(now=None, *, chunk_size: int = PLAN_CHUNK, limit: Optional[int] = None) -> int:
+    """Queue reminders for every candidate (optionally at most `limit`); returns how many."""
+    from messaging.outbox import kick
+    from messaging.services import send_compliance_reminders
+
+    now = now or timezone.now()
+    queued, last_id = 0, 0
+    while limit is None or queued < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - queued)
+        with transaction.atomic():
+            chunk = list(
+                reminder_candidates(now).filter(id__gt=last_id)
+                .select_related("enrollment__student__primary_guardian", "enrollment__organization")
+                .select_for_update(skip_locked=True, of=("self",))[:size]
+            )
+            if not chunk:
+                break
+            send_compliance_reminders(chunk, dispatch=False)
+            MonthlySupply.objects.filter(id__in=[s.id for s in chunk]).update(last_reminded_at=now)
+        queued += len(chunk)
+        last_id = chunk[-1].id
+    if queued:
+        kick()  # one dispatcher run for the whole plan
+    return queued
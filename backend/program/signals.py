@@ -3,6 +3,8 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from screening.models import Screening
+from screening.rescreen import refresh_due_dates
+from screening.writes import side_effects_deferred
 from .models import Enrollment, ScreeningMilestone
 from .services import evaluate_org_enforcement
 from .models import MonthlySupply, ComplianceSubmission
@@ -18,18 +20,23 @@ def ensure_compliance_row(sender, instance: MonthlySupply, created, **kwargs):
 
 @receiver(post_save, sender=Screening)
 def _complete_milestone_on_screening(sender, instance: Screening, created, **kwargs):
-    if not created:
+    # screening.writes completes milestones for its screenings after commit, in batches
+    if not created or side_effects_deferred(instance):
         return
     student = instance.student
     org = instance.organization
     # For the student's ACTIVE enrollments, complete any due/overdue milestones whose due_on has passed.
     # NOTE: without this, an OVERDUE milestone can never be completed and a school will remain suspended.
     enrollments = Enrollment.objects.filter(student=student, organization=org, status=Enrollment.Status.ACTIVE)
+    completed = False
     for e in enrollments:
         for m in e.milestones.filter(
             status__in=[ScreeningMilestone.Status.DUE, ScreeningMilestone.Status.OVERDUE],
             due_on__lte=instance.screened_at.date(),
         ):
             m.mark_completed(instance)
+            completed = True
+    if completed:
+        refresh_due_dates([student.id])
     # Re-evaluate enforcement (may unsuspend)
     evaluate_org_enforcement(org)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SchoolStatDaily, SchoolReportStatus
+from .models import MeasurementQualityMonthly, SchoolStatDaily, SchoolReportStatus, WarehouseExportState
 
 @admin.register(SchoolStatDaily)
 class SchoolStatDailyAdmin(admin.ModelAdmin):
@@ -12,3 +12,13 @@ class SchoolReportStatusAdmin(admin.ModelAdmin):
     list_display = ("organization","next_due_on","last_sent_at","last_period_start","last_period_end")
     list_filter = ("next_due_on",)
     search_fields = ("organization__name",)
+
+@admin.register(WarehouseExportState)
+class WarehouseExportStateAdmin(admin.ModelAdmin):
+    list_display = ("table","last_updated_at","last_id","last_run_at","last_run_rows","total_rows")
+
+@admin.register(MeasurementQualityMonthly)
+class MeasurementQualityMonthlyAdmin(admin.ModelAdmin):
+    list_display = ("organization","scope","teacher","month","screened","biv","unit_suspect","height_dpi","weight_dpi","shift_flagged")
+    list_filter = ("scope","shift_flagged","organization")
+    date_hierarchy = "month"
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from reporting.quality import rebuild_quality_metrics
+
+
+class Command(BaseCommand):
+    help = "Recompute measurement data-quality indicators (BIV, digit preference, risk shifts) from all screenings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, action="append", help="Organization id (repeatable; default: all orgs)")
+
+    def handle(self, *args, **opts):
+        n = rebuild_quality_metrics(opts.get("org"))
+        self.stdout.write(self.style.SUCCESS(f"Stored {n} quality row(s)."))
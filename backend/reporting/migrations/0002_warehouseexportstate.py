@@ -0,0 +1,26 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WarehouseExportState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=64, unique=True)),
+                ('last_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_run_rows', models.PositiveIntegerField(default=0)),
+                ('total_rows', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
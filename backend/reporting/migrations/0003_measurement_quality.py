@@ -0,0 +1,47 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_org_type_alter_orgmembership_role'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reporting', '0002_warehouseexportstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeasurementQualityMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('SCHOOL', 'School'), ('TEACHER', 'Teacher')], max_length=8)),
+                ('month', models.DateField()),
+                ('screened', models.PositiveIntegerField(default=0)),
+                ('green', models.PositiveIntegerField(default=0)),
+                ('yellow', models.PositiveIntegerField(default=0)),
+                ('red', models.PositiveIntegerField(default=0)),
+                ('zscored', models.PositiveIntegerField(default=0)),
+                ('biv', models.PositiveIntegerField(default=0)),
+                ('unit_suspect', models.PositiveIntegerField(default=0)),
+                ('height_digits', models.JSONField(blank=True, default=list)),
+                ('weight_digits', models.JSONField(blank=True, default=list)),
+                ('height_dpi', models.FloatField(blank=True, null=True)),
+                ('weight_dpi', models.FloatField(blank=True, null=True)),
+                ('height_heaping', models.FloatField(blank=True, null=True)),
+                ('risk_shift', models.FloatField(blank=True, null=True)),
+                ('red_share_change', models.FloatField(blank=True, null=True)),
+                ('shift_flagged', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quality_months', to='accounts.organization')),
+                ('teacher', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'scope', 'month'], name='reporting_m_organiz_76b10a_idx'), models.Index(fields=['month', 'scope'], name='reporting_m_month_2eb6ec_idx')],
+            },
+        ),
+    ]
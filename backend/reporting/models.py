@@ -70,3 +70,74 @@ class SchoolReportStatus(models.Model):
             base = (self.organization.created_at.date() if hasattr(self.organization, "created_at") else timezone.now().date())
             self.next_due_on = base + timedelta(days=180)
         self.save(update_fields=["next_due_on","updated_at"])
+
+
+class WarehouseExportState(models.Model):
+    """
+    High-water mark per exported table (see reporting.warehouse). A run exports
+    rows strictly after (last_updated_at, last_id) and advances the mark after
+    each uploaded part file.
+    """
+    table = models.CharField(max_length=64, unique=True)
+    last_updated_at = models.DateTimeField(null=True, blank=True)  # tables watermarked on updated_at
+    last_id = models.BigIntegerField(default=0)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_run_rows = models.PositiveIntegerField(default=0)
+    total_rows = models.BigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        mark = self.last_updated_at.isoformat() if self.last_updated_at else f"id>{self.last_id}"
+        return f"{self.table} @ {mark}"
+
+
+class MeasurementQualityMonthly(models.Model):
+    """
+    Measurement data-quality indicators per (organization, month), for the
+    whole school (scope SCHOOL) and per screening teacher (scope TEACHER;
+    teacher is null for screenings entered through the public link). Rebuilt
+    from the full screening history by reporting.quality.
+    """
+    class Scope(models.TextChoices):
+        SCHOOL = "SCHOOL", "School"
+        TEACHER = "TEACHER", "Teacher"
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="quality_months")
+    scope = models.CharField(max_length=8, choices=Scope.choices)
+    teacher = models.ForeignKey("accounts.User", on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    month = models.DateField()  # first day of the month
+
+    screened = models.PositiveIntegerField(default=0)
+    green = models.PositiveIntegerField(default=0)
+    yellow = models.PositiveIntegerField(default=0)
+    red = models.PositiveIntegerField(default=0)
+
+    # Biologically implausible values (WHO flags) and likely unit errors
+    zscored = models.PositiveIntegerField(default=0)
+    biv = models.PositiveIntegerField(default=0)
+    unit_suspect = models.PositiveIntegerField(default=0)
+
+    # Digit preference: terminal-digit counts and dissimilarity index (0 = none, 90 = one digit only)
+    height_digits = models.JSONField(default=list, blank=True)  # whole-cm units digit
+    weight_digits = models.JSONField(default=list, blank=True)  # 0.1 kg digit
+    height_dpi = models.FloatField(null=True, blank=True)
+    weight_dpi = models.FloatField(null=True, blank=True)
+    height_heaping = models.FloatField(null=True, blank=True)  # share ending in 0/5 ÷ 0.2
+
+    # Risk-distribution shift against the previous months
+    risk_shift = models.FloatField(null=True, blank=True)        # chi-square, 2 df
+    red_share_change = models.FloatField(null=True, blank=True)
+    shift_flagged = models.BooleanField(default=False)
+
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["organization", "scope", "month"]),
+            models.Index(fields=["month", "scope"]),
+        ]
+
+    def __str__(self):
+        who = self.organization.name if self.scope == self.Scope.SCHOOL else (self.teacher or "public link")
+        return f"{who} – {self.month:%Y-%m}"
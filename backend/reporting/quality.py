@@ -0,0 +1,302 @@
+"""Measurement data-quality analytics over the screening history.
+
+`NewScreeningForm.clean` only range-checks single readings. This module looks
+at readings in bulk, per (organization, month) for the whole school and per
+screening teacher, and materializes the result into MeasurementQualityMonthly
+for the Inditech quality dashboard:
+
+  - Biologically implausible values (WHO flags): BMI-for-age z < -5 or > +5,
+    height-for-age z < -6 or > +6 when the HFA tables are installed.
+  - Likely unit errors: readings whose BAZ is implausible (> +3) as entered but
+    plausible with the weight read as pounds or the height as inches.
+  - Digit preference / heaping: the terminal-digit distribution of height
+    (whole-cm units digit; rounding to 5 cm piles up on 0 and 5) and weight
+    (0.1 kg digit), summarized as a dissimilarity index
+    DPI = 50 * sum(|share(d) - 0.1|) (0 = uniform, 90 = one digit only) and,
+    for height, the 0/5 share relative to the expected 20%.
+  - Risk-distribution shift: a month's GREEN/YELLOW/RED counts against the
+    same teacher's (or school's) previous SHIFT_BASELINE_MONTHS, as a 2x3
+    chi-square; flagged when it is significant and the RED share moved by at
+    least SHIFT_MIN_RED_CHANGE.
+
+Everything is computed with NumPy over the full history (grouping with
+np.unique + bincount) and replaces the stored rows per organization. Runs
+nightly (reporting.tasks.build_quality_metrics); command: build_quality_metrics.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from screening.batch import compute_baz, compute_bmi
+from screening.growth_reference import HFA, get_table
+from screening.models import Screening
+
+from .models import MeasurementQualityMonthly
+
+BAZ_BIV = 5.0
+HAZ_BIV = 6.0
+UNIT_SUSPECT_BAZ = 3.0
+LB_PER_KG = 2.20462
+CM_PER_INCH = 2.54
+
+MIN_DIGIT_READINGS = 30     # fewer readings: no digit-preference index
+DPI_FLAG = 20.0
+HEAPING_FLAG = 2.0          # twice the expected share on 0/5
+BIV_RATE_FLAG = 0.01
+
+SHIFT_BASELINE_MONTHS = 3
+SHIFT_MIN_N = 20
+SHIFT_CHI2 = 13.82          # chi-square, 2 df, p < 0.001
+SHIFT_MIN_RED_CHANGE = 0.15
+
+LOAD_CHUNK = 20000
+_LEVELS = {"GREEN": 0, "YELLOW": 1, "RED": 2}
+_NO_TEACHER = -1
+
+FIELDS = ("id", "organization_id", "teacher_id", "screened_at", "gender", "age_years", "age_months",
+          "height_cm", "weight_kg", "risk_level")
+
+
+@dataclass
+class QualityColumns:
+    org: np.ndarray        # int64
+    teacher: np.ndarray    # int64, _NO_TEACHER when null
+    month: np.ndarray      # int64, year * 12 + month - 1 (local time)
+    sex: np.ndarray
+    age_years: np.ndarray
+    age_months: np.ndarray
+    height_cm: np.ndarray
+    weight_kg: np.ndarray
+    level: np.ndarray      # int8 index into GREEN/YELLOW/RED
+
+    def __len__(self):
+        return len(self.org)
+
+
+def _f(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+def load_history(qs=None, *, chunk_size: int = LOAD_CHUNK) -> QualityColumns:
+    """All screenings of `qs` as columns (keyset-paginated by id)."""
+    qs = (Screening.objects.all() if qs is None else qs).order_by("id").values_list(*FIELDS)
+    org, teacher, month, sex, num, level = [], [], [], [], [], []
+    last_id = 0
+    while True:
+        rows = list(qs.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            break
+        for pk, org_id, teacher_id, at, gender, age_y, age_m, h, w, risk in rows:
+            local = timezone.localtime(at)
+            org.append(org_id)
+            teacher.append(_NO_TEACHER if teacher_id is None else teacher_id)
+            month.append(local.year * 12 + local.month - 1)
+            sex.append((gender or "").upper()[:1])
+            num.append((_f(age_y), _f(age_m), _f(h), _f(w)))
+            level.append(_LEVELS.get(risk, 0))
+        last_id = rows[-1][0]
+
+    num_arr = np.array(num, dtype=float).reshape(-1, 4)
+    return QualityColumns(
+        org=np.array(org, dtype=np.int64), teacher=np.array(teacher, dtype=np.int64),
+        month=np.array(month, dtype=np.int64), sex=np.array(sex, dtype="<U1"),
+        age_years=num_arr[:, 0], age_months=num_arr[:, 1], height_cm=num_arr[:, 2], weight_kg=num_arr[:, 3],
+        level=np.array(level, dtype=np.int8),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Per-screening indicators
+# ---------------------------------------------------------------------------
+
+def _baz(cols: QualityColumns, height_cm: np.ndarray, weight_kg: np.ndarray) -> np.ndarray:
+    return compute_baz(compute_bmi(height_cm, weight_kg), cols.age_years, cols.age_months, cols.sex)
+
+
+def _haz(cols: QualityColumns) -> np.ndarray:
+    haz = np.full(len(cols), np.nan)
+    months = np.where(np.isnan(cols.age_months), cols.age_years * 12.0, cols.age_months)
+    for s in ("M", "F"):
+        table = get_table(HFA, s)
+        if table is None:
+            continue
+        mask = ((cols.sex == s) & ~np.isnan(cols.height_cm)
+                & (months >= table.min_months) & (months <= table.max_months))
+        if mask.any():
+            haz[mask] = table.zscores(cols.height_cm[mask], months[mask])
+    return haz
+
+
+def screening_flags(cols: QualityColumns) -> Dict[str, np.ndarray]:
+    """Per-screening arrays: zscored / biv / unit_suspect (bool), height and weight terminal digits (-1 = none)."""
+    baz = _baz(cols, cols.height_cm, cols.weight_kg)
+    haz = _haz(cols)
+    with np.errstate(invalid="ignore"):
+        biv = (np.abs(baz) > BAZ_BIV) | (np.abs(haz) > HAZ_BIV)
+        high = baz > UNIT_SUSPECT_BAZ
+        as_lb = np.abs(_baz(cols, cols.height_cm, cols.weight_kg / LB_PER_KG)) <= UNIT_SUSPECT_BAZ
+        as_inch = np.abs(_baz(cols, cols.height_cm * CM_PER_INCH, cols.weight_kg)) <= UNIT_SUSPECT_BAZ
+    height_ok = ~np.isnan(cols.height_cm)
+    weight_ok = ~np.isnan(cols.weight_kg)
+    height_digit = np.where(height_ok, np.floor(np.nan_to_num(cols.height_cm)) % 10, -1).astype(np.int64)
+    weight_digit = np.where(weight_ok, np.round(np.nan_to_num(cols.weight_kg) * 10) % 10, -1).astype(np.int64)
+    return {
+        "zscored": ~np.isnan(baz) | ~np.isnan(haz),
+        "biv": biv,
+        "unit_suspect": high & (as_lb | as_inch),
+        "height_digit": height_digit,
+        "weight_digit": weight_digit,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Group statistics
+# ---------------------------------------------------------------------------
+
+def digit_preference_index(counts: np.ndarray) -> np.ndarray:
+    """DPI per row of a (g, 10) digit-count matrix; NaN below MIN_DIGIT_READINGS."""
+    n = counts.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dpi = 50.0 * np.abs(counts / n - 0.1).sum(axis=1)
+    return np.where(n[:, 0] >= MIN_DIGIT_READINGS, dpi, np.nan)
+
+
+def heaping_ratio(counts: np.ndarray) -> np.ndarray:
+    n = counts.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = (counts[:, 0] + counts[:, 5]) / n / 0.2
+    return np.where(n >= MIN_DIGIT_READINGS, ratio, np.nan)
+
+
+def risk_shift(series: np.ndarray, month: np.ndarray, levels: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Chi-square, RED share change and flag for each group vs. its series' previous months.
+
+    `series` identifies the teacher/school a group belongs to, `levels` is the
+    (g, 3) GREEN/YELLOW/RED count matrix.
+    """
+    g = len(month)
+    index = {(int(s), int(m)): i for i, (s, m) in enumerate(zip(series, month))}
+    baseline = np.zeros((g, 3))
+    for i in range(g):
+        s, m = int(series[i]), int(month[i])
+        for back in range(1, SHIFT_BASELINE_MONTHS + 1):
+            j = index.get((s, m - back))
+            if j is not None:
+                baseline[i] += levels[j]
+
+    current = levels.astype(float)
+    n_cur, n_base = current.sum(axis=1), baseline.sum(axis=1)
+    table = np.stack([current, baseline], axis=1)                # (g, 2, 3)
+    total = table.sum(axis=(1, 2))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        expected = table.sum(axis=2)[:, :, None] * table.sum(axis=1)[:, None, :] / total[:, None, None]
+        chi2 = np.where(expected > 0, (table - expected) ** 2 / expected, 0.0).sum(axis=(1, 2))
+        red_change = current[:, 2] / n_cur - baseline[:, 2] / n_base
+    enough = (n_cur >= SHIFT_MIN_N) & (n_base >= SHIFT_MIN_N)
+    chi2 = np.where(enough, chi2, np.nan)
+    red_change = np.where(enough, red_change, np.nan)
+    flagged = enough & (chi2 >= SHIFT_CHI2) & (np.abs(red_change) >= SHIFT_MIN_RED_CHANGE)
+    return chi2, red_change, flagged
+
+
+def _group(keys: np.ndarray, cols: QualityColumns, flags: Dict[str, np.ndarray]) -> dict:
+    """Aggregate per unique row of `keys` (n, k) -> dict of per-group arrays."""
+    uniq, inv = np.unique(keys, axis=0, return_inverse=True)
+    inv = inv.reshape(-1)
+    g = len(uniq)
+
+    def count(mask: np.ndarray) -> np.ndarray:
+        return np.bincount(inv, weights=mask.astype(float), minlength=g).astype(np.int64)
+
+    def digits(d: np.ndarray) -> np.ndarray:
+        ok = d >= 0
+        return np.bincount(inv[ok] * 10 + d[ok], minlength=g * 10).reshape(g, 10)
+
+    levels = np.bincount(inv * 3 + cols.level, minlength=g * 3).reshape(g, 3)
+    height_digits, weight_digits = digits(flags["height_digit"]), digits(flags["weight_digit"])
+    return {
+        "keys": uniq, "screened": levels.sum(axis=1), "levels": levels,
+        "zscored": count(flags["zscored"]), "biv": count(flags["biv"]),
+        "unit_suspect": count(flags["unit_suspect"]),
+        "height_digits": height_digits, "weight_digits": weight_digits,
+        "height_dpi": digit_preference_index(height_digits),
+        "weight_dpi": digit_preference_index(weight_digits),
+        "height_heaping": heaping_ratio(height_digits),
+    }
+
+
+def _num(x) -> Optional[float]:
+    return None if np.isnan(x) else round(float(x), 3)
+
+
+def compute_quality(cols: QualityColumns) -> List[MeasurementQualityMonthly]:
+    """Unsaved MeasurementQualityMonthly rows (both scopes) for every group in `cols`."""
+    if not len(cols):
+        return []
+    flags = screening_flags(cols)
+    now = timezone.now()
+    Scope = MeasurementQualityMonthly.Scope
+    out: List[MeasurementQualityMonthly] = []
+
+    for scope, keys in (
+        (Scope.SCHOOL, np.stack([cols.org, cols.month], axis=1)),
+        (Scope.TEACHER, np.stack([cols.org, cols.teacher, cols.month], axis=1)),
+    ):
+        agg = _group(keys, cols, flags)
+        k = agg["keys"]
+        series = np.unique(k[:, :-1], axis=0, return_inverse=True)[1].reshape(-1)
+        chi2, red_change, flagged = risk_shift(series, k[:, -1], agg["levels"])
+        for i in range(len(k)):
+            teacher = int(k[i, 1]) if scope == Scope.TEACHER and k[i, 1] != _NO_TEACHER else None
+            y, m = divmod(int(k[i, -1]), 12)
+            green, yellow, red = (int(x) for x in agg["levels"][i])
+            out.append(MeasurementQualityMonthly(
+                organization_id=int(k[i, 0]), scope=scope, teacher_id=teacher,
+                month=date(y, m + 1, 1),
+                screened=int(agg["screened"][i]), green=green, yellow=yellow, red=red,
+                zscored=int(agg["zscored"][i]), biv=int(agg["biv"][i]), unit_suspect=int(agg["unit_suspect"][i]),
+                height_digits=agg["height_digits"][i].tolist(), weight_digits=agg["weight_digits"][i].tolist(),
+                height_dpi=_num(agg["height_dpi"][i]), weight_dpi=_num(agg["weight_dpi"][i]),
+                height_heaping=_num(agg["height_heaping"][i]),
+                risk_shift=_num(chi2[i]), red_share_change=_num(red_change[i]), shift_flagged=bool(flagged[i]),
+                computed_at=now,
+            ))
+    return out
+
+
+def rebuild_quality_metrics(org_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute from the full history and replace the stored rows (all orgs, or `org_ids`)."""
+    qs = Screening.objects.all()
+    existing = MeasurementQualityMonthly.objects.all()
+    if org_ids is not None:
+        org_ids = list(org_ids)
+        qs = qs.filter(organization_id__in=org_ids)
+        existing = existing.filter(organization_id__in=org_ids)
+    rows = compute_quality(load_history(qs))
+    with transaction.atomic():
+        existing.delete()
+        MeasurementQualityMonthly.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def row_issues(row: MeasurementQualityMonthly) -> List[str]:
+    """Dashboard labels for the thresholds a row crosses."""
+    issues = []
+    if row.zscored and row.biv / row.zscored >= BIV_RATE_FLAG:
+        issues.append(f"{row.biv} implausible")
+    if row.unit_suspect:
+        issues.append(f"{row.unit_suspect} unit errors?")
+    if (row.height_dpi or 0) >= DPI_FLAG or (row.height_heaping or 0) >= HEAPING_FLAG:
+        issues.append("height heaping")
+    if (row.weight_dpi or 0) >= DPI_FLAG:
+        issues.append("weight digit preference")
+    if row.shift_flagged:
+        issues.append("risk shift")
+    return issues
@@ -6,7 +6,8 @@ nightly Celery beat job, which meant dashboards could show all zeros unless a
 backfill was run.
 
 These signals keep daily rollups current by rebuilding the relevant day whenever
-source data changes.
+source data changes. Screenings saved through screening.writes are rebuilt by
+its deferred batch instead.
 """
 
 from __future__ import annotations
@@ -21,6 +22,7 @@ from django.utils import timezone
 from assist.models import Application
 from program.models import ComplianceSubmission, Enrollment, MonthlySupply, ScreeningMilestone
 from screening.models import Screening
+from screening.writes import side_effects_deferred
 
 from .services import build_daily_rollup
 
@@ -59,6 +61,8 @@ def _screening_capture_previous(sender, instance: Screening, **kwargs):
 @receiver(post_save, sender=Screening)
 @receiver(post_delete, sender=Screening)
 def _screening_refresh_rollup(sender, instance: Screening, **kwargs):
+    if side_effects_deferred(instance):
+        return  # rebuilt by screening.writes.apply_side_effects()
     _queue_rebuild(instance.organization, _local_day(getattr(instance, "screened_at", None)))
 
     prev_dt = getattr(instance, "_prev_screened_at", None)
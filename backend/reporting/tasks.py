@@ -64,3 +64,19 @@ def send_due_school_reports():
             rs.save(update_fields=["last_sent_at","last_period_start","last_period_end","next_due_on","updated_at"])
             sent += 1
     return sent
+
+@shared_task
+def export_warehouse_nightly():
+    from django.conf import settings
+    from .warehouse import export_warehouse
+
+    if not getattr(settings, "WAREHOUSE_EXPORT_URL", ""):
+        return "no destination configured"
+    results = export_warehouse()
+    return {r.table: r.rows for r in results}
+
+@shared_task
+def build_quality_metrics():
+    from .quality import rebuild_quality_metrics
+
+    return rebuild_quality_metrics()
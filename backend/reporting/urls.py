@@ -15,6 +15,9 @@ urlpatterns = [
     path("reporting/inditech/school/<int:org_id>", inditech_school, name="inditech_school"),
     path("reporting/inditech/school/<int:org_id>/export.csv", inditech_export_school_csv, name="inditech_export_school_csv"),
     path("inditech/", views.inditech_console, name="inditech_console"),
+    path("reporting/inditech/risk-simulator", views.inditech_risk_simulator, name="inditech_risk_simulator"),
+    path("reporting/inditech/students", views.inditech_student_lookup, name="inditech_student_lookup"),
+    path("reporting/inditech/quality", views.inditech_quality, name="inditech_quality"),
     path(
     "reporting/inditech/school/<int:org_id>/applications/<str:bucket>",
     inditech_school_applications,
@@ -1,7 +1,7 @@
 from __future__ import annotations
-import csv, io
+import csv, io, json
 from datetime import timedelta, date
-from django.http import HttpResponse, HttpResponseForbidden
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import render, get_object_or_404
 from django.utils import timezone
 from accounts.decorators import require_roles
@@ -168,3 +168,99 @@ def inditech_school_applications(request, org_id: int, bucket: str):
             "applications": apps,
         },
     )
+
+
+@require_roles(Role.INDITECH, allow_superuser=True)
+def inditech_student_lookup(request):
+    """Find a student across all schools by exact student code or guardian phone."""
+    from roster.search import lookup_students
+
+    q = (request.GET.get("q") or "").strip()
+    students = []
+    if q:
+        students = (
+            lookup_students(q)
+            .select_related("organization", "classroom", "primary_guardian")
+            .order_by("organization__name", "last_name", "first_name", "id")[:100]
+        )
+    return render(request, "reporting/inditech_student_lookup.html", {"q": q, "students": students})
+
+
+@require_roles(Role.INDITECH, allow_superuser=True)
+def inditech_risk_simulator(request):
+    """What-if threshold simulator (read-only; see screening.simulator).
+
+    GET renders the page; POST takes JSON
+      {"overrides": {"baz.bands.3.above": 1.5}, "group_by": ["org", "grade", "sex"]}
+    and returns level distributions under the active vs. the scenario ruleset.
+    """
+    from screening.rules import RulesetError, get_active_ruleset
+    from screening.simulator import GROUP_DIMENSIONS, simulate
+
+    if request.method != "POST":
+        active = get_active_ruleset()
+        return render(request, "reporting/inditech_risk_simulator.html", {
+            "ruleset": active,
+            "definition_json": json.dumps(active.definition, indent=2),
+            "dimensions": GROUP_DIMENSIONS,
+        })
+
+    try:
+        body = json.loads(request.body.decode("utf-8") or "{}")
+        result = simulate(
+            body.get("overrides") or {},
+            definition=body.get("definition"),
+            group_by=body.get("group_by", GROUP_DIMENSIONS),
+        )
+    except (RulesetError, json.JSONDecodeError, AttributeError) as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
+
+    org_names = dict(
+        Organization.objects.filter(pk__in={g["org"] for g in result["groups"] if "org" in g})
+        .values_list("id", "name")
+    )
+    for g in result["groups"]:
+        if "org" in g:
+            g["org_name"] = org_names.get(g["org"], "")
+    return JsonResponse({"ok": True, **result})
+
+
+@require_roles(Role.INDITECH, allow_superuser=True)
+def inditech_quality(request):
+    """Measurement data-quality dashboard (reporting.quality), rebuilt nightly.
+
+    Schools by month; ?org=<id> shows that school's teachers, ?flagged=1 only
+    rows that cross a threshold.
+    """
+    from .models import MeasurementQualityMonthly
+    from .quality import row_issues
+
+    try:
+        months = max(1, min(int(request.GET.get("months") or 6), 36))
+    except ValueError:
+        months = 6
+    today = timezone.now().date()
+    y, m = divmod(today.year * 12 + today.month - 1 - (months - 1), 12)
+    since = date(y, m + 1, 1)
+
+    rows = (MeasurementQualityMonthly.objects.filter(month__gte=since)
+            .select_related("organization", "teacher"))
+    org = None
+    if request.GET.get("org"):
+        org = get_object_or_404(Organization, pk=request.GET["org"])
+        rows = rows.filter(organization=org).order_by("-month", "scope", "teacher__email")
+    else:
+        rows = rows.filter(scope=MeasurementQualityMonthly.Scope.SCHOOL).order_by("-month", "organization__name")
+
+    flagged_only = request.GET.get("flagged") == "1"
+    out = []
+    for row in rows:
+        row.issues = row_issues(row)
+        row.biv_rate = round(100 * row.biv / row.zscored, 1) if row.zscored else None
+        row.red_rate = round(100 * row.red / row.screened, 1) if row.screened else None
+        if row.issues or not flagged_only:
+            out.append(row)
+    return render(request, "reporting/inditech_quality.html", {
+        "rows": out, "org": org, "months": months, "since": since, "flagged_only": flagged_only,
+        "computed_at": max((r.computed_at for r in out), default=None),
+    })
@@ -0,0 +1,436 @@
+"""
+Nightly incremental export of operational tables for analytics.
+
+Analysts read these files instead of querying the production database. Each run
+exports only rows changed since the previous run, per table:
+
+  - Tables with `updated_at` (screenings, applications, enrollments, supplies,
+    compliance, messages) are read in (updated_at, id) order after the stored
+    high-water mark. Rows changed within the last EXPORT_LAG are left for the
+    next run so transactions that commit late are not skipped. A screening
+    re-scored, back-filled or moved by a student merge is exported again;
+    keep the row with the latest updated_at per id.
+  - SchoolStatDaily has no `updated_at` and is read in id order. Rollup rows
+    are deleted and re-inserted when rebuilt, so a rebuilt day shows up again
+    with a new id; keep the highest id per (organization_id, day).
+
+Layout (one part file per table/partition/chunk):
+
+  <dest>/<table>/dt=YYYY-MM-DD/part-<run>-<seq>.parquet   (pyarrow installed)
+  <dest>/<table>/dt=YYYY-MM-DD/part-<run>-<seq>.csv.gz    (otherwise)
+  <dest>/<table>/_schema.json                              column names + types
+
+`dest` is a local directory or s3://bucket/prefix (any S3-compatible store;
+set WAREHOUSE_S3_ENDPOINT_URL for non-AWS endpoints). The high-water mark
+(WarehouseExportState) advances after each part file is stored, so a failed
+run resumes where it stopped; a part may be re-sent after a crash between
+upload and commit, so consumers should de-duplicate on id.
+
+Direct identifiers (names, phone numbers, QR tokens, free-text form data) are
+not exported. `Screening.answers` is flattened into one typed column per
+question (prefix `a_`).
+"""
+from __future__ import annotations
+
+import csv
+import gzip
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from assist.models import Application
+from messaging.models import MessageLog
+from program.models import ComplianceSubmission, Enrollment, MonthlySupply
+from screening.models import Screening
+from screening.rules import ENUM_VALUES, TRUTHY_KEYS, YES_NO_KEYS
+from .models import SchoolStatDaily, WarehouseExportState
+
+try:  # optional: Parquet output
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on the deployment
+    pa = pq = None
+
+CHUNK_SIZE = 50000
+EXPORT_LAG = timedelta(minutes=10)
+
+# Column kinds
+INT, FLOAT, STR, BOOL, DATE, TIMESTAMP, JSON = "int", "float", "str", "bool", "date", "timestamp", "json"
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    kind: str
+    source: Optional[str] = None  # ORM path for values(); defaults to name
+
+    @property
+    def path(self) -> str:
+        return self.source or self.name
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    name: str
+    model: Any
+    watermark: str            # "updated_at" or "id"
+    partition_by: str         # date/datetime column (by name) used for dt=
+    columns: Tuple[Column, ...]
+    extra: Callable[[Dict[str, Any]], Dict[str, Any]] = None  # derived columns from the raw row
+    extra_columns: Tuple[Column, ...] = ()
+    raw_fields: Tuple[str, ...] = ()  # fetched for `extra` only, not exported as-is
+
+    @property
+    def all_columns(self) -> Tuple[Column, ...]:
+        return self.columns + self.extra_columns
+
+
+# ---------------------------------------------------------------------------
+# Screening answers -> typed columns
+# ---------------------------------------------------------------------------
+
+# Section A (name, id, dob, phone) is left out on purpose.
+_ANSWER_COLUMNS: Tuple[Column, ...] = (
+    tuple(Column(f"a_{k}", BOOL) for k in TRUTHY_KEYS)
+    + tuple(Column(f"a_{k}", BOOL) for k in YES_NO_KEYS)
+    + tuple(Column(f"a_{k}", STR) for k in ENUM_VALUES)
+    + (
+        Column("a_weight_kg_r1", FLOAT),
+        Column("a_height_cm_r1", FLOAT),
+        Column("a_menarche_age_years", FLOAT),
+        Column("a_pads_per_day", FLOAT),
+        Column("a_cycle_length_days", FLOAT),
+        Column("a_deworming_months_ago", INT),
+    )
+)
+_ANSWER_SOURCE = {"a_deworming_months_ago": "deworming_date"}
+
+
+def _flatten_answers(row: Dict[str, Any]) -> Dict[str, Any]:
+    answers = row.get("answers") or {}
+    if not isinstance(answers, dict):
+        answers = {}
+    return {c.name: answers.get(_ANSWER_SOURCE.get(c.name, c.name[2:])) for c in _ANSWER_COLUMNS}
+
+
+# ---------------------------------------------------------------------------
+# Tables
+# ---------------------------------------------------------------------------
+
+def _cols(*specs) -> Tuple[Column, ...]:
+    return tuple(Column(*s) if isinstance(s, tuple) else s for s in specs)
+
+
+TABLES: Dict[str, TableSpec] = {t.name: t for t in (
+    TableSpec(
+        "screening", Screening, "updated_at", "screened_at",
+        _cols(("id", INT), ("organization_id", INT), ("student_id", INT), ("teacher_id", INT),
+              ("screened_at", TIMESTAMP), ("gender", STR), ("age_years", FLOAT), ("age_months", INT),
+              ("height_cm", FLOAT), ("weight_kg", FLOAT), ("muac_cm", FLOAT), ("bmi", FLOAT), ("baz", FLOAT),
+              ("risk_level", STR), ("red_flags", JSON), ("is_low_income_at_screen", BOOL),
+              ("ruleset_version", STR), ("reference_hash", STR),
+              ("health_flags", INT), ("diet_flags", INT), ("hunger_code", INT), ("diet_type_code", INT),
+              ("baz_category_code", INT), ("updated_at", TIMESTAMP)),
+        extra=_flatten_answers, extra_columns=_ANSWER_COLUMNS, raw_fields=("answers",),
+    ),
+    TableSpec(
+        "application", Application, "updated_at", "updated_at",
+        _cols(("id", INT), ("organization_id", INT), ("student_id", INT), ("guardian_id", INT),
+              ("trigger_screening_id", INT), ("low_income_declared", BOOL), ("income_verification_status", STR),
+              ("income_verified_at", TIMESTAMP), ("source", STR), ("status", STR), ("form_lang", STR),
+              ("applied_at", TIMESTAMP), ("sapa_reviewed_at", TIMESTAMP), ("forwarded_at", TIMESTAMP),
+              ("forwarded_by_id", INT), ("created_at", TIMESTAMP), ("updated_at", TIMESTAMP)),
+    ),
+    TableSpec(
+        "enrollment", Enrollment, "updated_at", "updated_at",
+        _cols(("id", INT), ("organization_id", INT), ("application_id", INT), ("student_id", INT),
+              ("start_date", DATE), ("end_date", DATE), ("status", STR), ("approved_by_id", INT),
+              ("created_at", TIMESTAMP), ("updated_at", TIMESTAMP)),
+    ),
+    TableSpec(
+        "monthly_supply", MonthlySupply, "updated_at", "updated_at",
+        _cols(("id", INT), ("organization_id", INT, "enrollment__organization_id"), ("enrollment_id", INT),
+              ("month_index", INT), ("scheduled_delivery_date", DATE), ("delivered_on", DATE),
+              ("compliance_due_at", TIMESTAMP), ("ok_to_ship_next", BOOL),
+              ("created_at", TIMESTAMP), ("updated_at", TIMESTAMP)),
+    ),
+    TableSpec(
+        "compliance_submission", ComplianceSubmission, "updated_at", "updated_at",
+        _cols(("id", INT), ("organization_id", INT, "monthly_supply__enrollment__organization_id"),
+              ("monthly_supply_id", INT), ("status", STR), ("submitted_at", TIMESTAMP), ("responses", JSON),
+              ("created_at", TIMESTAMP), ("updated_at", TIMESTAMP)),
+    ),
+    TableSpec(
+        "message_log", MessageLog, "updated_at", "updated_at",
+        _cols(("id", INT), ("organization_id", INT), ("channel", STR), ("template_code", STR),
+              ("language", STR), ("status", STR), ("scheduled_at", TIMESTAMP), ("sent_at", TIMESTAMP),
+              ("error_code", STR), ("related_screening_id", INT), ("related_supply_id", INT),
+              ("created_at", TIMESTAMP), ("updated_at", TIMESTAMP)),
+    ),
+    TableSpec(
+        "school_stat_daily", SchoolStatDaily, "id", "day",
+        _cols(("id", INT), ("organization_id", INT), ("day", DATE),
+              *[(f.name, INT) for f in SchoolStatDaily._meta.concrete_fields
+                if f.get_internal_type() == "PositiveIntegerField"],
+              ("created_at", TIMESTAMP)),
+    ),
+)}
+
+
+# ---------------------------------------------------------------------------
+# Value conversion
+# ---------------------------------------------------------------------------
+
+def _convert(kind: str, value: Any) -> Any:
+    if value is None or value == "":
+        return None
+    try:
+        if kind == INT:
+            return int(value)
+        if kind == FLOAT:
+            return float(value)
+        if kind == BOOL:
+            if isinstance(value, str):
+                return {"yes": True, "true": True, "1": True, "no": False, "false": False, "0": False}.get(value.lower())
+            return bool(value)
+        if kind == STR:
+            return str(value)
+        if kind == DATE:
+            return value if isinstance(value, date) and not isinstance(value, datetime) else date.fromisoformat(str(value)[:10])
+        if kind == TIMESTAMP:
+            return value.astimezone(dt_timezone.utc) if timezone.is_aware(value) else value.replace(tzinfo=dt_timezone.utc)
+        if kind == JSON:
+            return json.dumps(value, sort_keys=True, default=str)
+    except (TypeError, ValueError, AttributeError):
+        return None
+    return value
+
+
+def _partition_day(value: Any) -> str:
+    if isinstance(value, datetime):
+        return timezone.localtime(value).date().isoformat() if timezone.is_aware(value) else value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return "unknown"
+
+
+# ---------------------------------------------------------------------------
+# File formats
+# ---------------------------------------------------------------------------
+
+def _arrow_type(kind: str):
+    return {
+        INT: pa.int64(), FLOAT: pa.float64(), BOOL: pa.bool_(), DATE: pa.date32(),
+        TIMESTAMP: pa.timestamp("us", tz="UTC"), STR: pa.string(), JSON: pa.string(),
+    }[kind]
+
+
+def _write_parquet(path: str, columns: Sequence[Column], rows: List[List[Any]]) -> None:
+    schema = pa.schema([(c.name, _arrow_type(c.kind)) for c in columns])
+    arrays = [pa.array([r[i] for r in rows], type=schema.field(i).type) for i in range(len(columns))]
+    pq.write_table(pa.Table.from_arrays(arrays, schema=schema), path, compression="zstd")
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _write_csv_gz(path: str, columns: Sequence[Column], rows: List[List[Any]]) -> None:
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as fh:
+        w = csv.writer(fh)
+        w.writerow([c.name for c in columns])
+        for r in rows:
+            w.writerow([_csv_value(v) for v in r])
+
+
+def default_format() -> str:
+    return "parquet" if pq is not None else "csv"
+
+
+# ---------------------------------------------------------------------------
+# Destinations
+# ---------------------------------------------------------------------------
+
+class LocalStore:
+    def __init__(self, root: str):
+        self.root = root
+
+    def put(self, key: str, local_path: str) -> str:
+        dest = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(local_path, dest)
+        return dest
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        dest = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with open(dest, "wb") as fh:
+            fh.write(data)
+        return dest
+
+
+class S3Store:
+    def __init__(self, bucket: str, prefix: str = ""):
+        import boto3
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=getattr(settings, "WAREHOUSE_S3_ENDPOINT_URL", "") or None,
+            region_name=os.getenv("AWS_DEFAULT_REGION"),
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put(self, key: str, local_path: str) -> str:
+        self.client.upload_file(local_path, self.bucket, self._key(key), ExtraArgs={"ServerSideEncryption": "AES256"})
+        os.unlink(local_path)
+        return f"s3://{self.bucket}/{self._key(key)}"
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data, ServerSideEncryption="AES256")
+        return f"s3://{self.bucket}/{self._key(key)}"
+
+
+def get_store(dest: Optional[str] = None):
+    dest = dest or getattr(settings, "WAREHOUSE_EXPORT_URL", "")
+    if not dest:
+        return None
+    if dest.startswith("s3://"):
+        bucket, _, prefix = dest[len("s3://"):].partition("/")
+        return S3Store(bucket, prefix)
+    return LocalStore(dest)
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+@dataclass
+class TableResult:
+    table: str
+    rows: int = 0
+    files: List[str] = field(default_factory=list)
+
+
+def _delta(spec: TableSpec, last_ts: Optional[datetime], last_id: int, cutoff: datetime):
+    qs = spec.model.objects.all()
+    if spec.watermark == "updated_at":
+        qs = qs.filter(updated_at__lt=cutoff)
+        if last_ts is not None:
+            qs = qs.filter(Q(updated_at__gt=last_ts) | Q(updated_at=last_ts, id__gt=last_id))
+        qs = qs.order_by("updated_at", "id")
+    else:
+        qs = qs.filter(id__gt=last_id).order_by("id")
+    return qs.values(*[c.path for c in spec.columns], *spec.raw_fields)
+
+
+def _iter_chunks(spec: TableSpec, state: WarehouseExportState, cutoff: datetime, chunk_size: int):
+    """Keyset-paged chunks of raw value dicts after the high-water mark."""
+    last_ts, last_id = state.last_updated_at, state.last_id
+    while True:
+        rows = list(_delta(spec, last_ts, last_id, cutoff)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1]["id"]
+        if spec.watermark == "updated_at":
+            last_ts = rows[-1]["updated_at"]
+
+
+def _schema_json(spec: TableSpec, fmt: str) -> bytes:
+    return json.dumps({
+        "table": spec.name,
+        "format": fmt,
+        "watermark": spec.watermark,
+        "partition_by": spec.partition_by,
+        "columns": [{"name": c.name, "type": c.kind} for c in spec.all_columns],
+    }, indent=2).encode("utf-8")
+
+
+def export_table(spec: TableSpec, store, *, fmt: Optional[str] = None, chunk_size: int = CHUNK_SIZE,
+                 run_id: Optional[str] = None, now: Optional[datetime] = None) -> TableResult:
+    fmt = fmt or default_format()
+    if fmt == "parquet" and pq is None:
+        raise RuntimeError("pyarrow is not installed; use the csv format")
+    now = now or timezone.now()
+    run_id = run_id or now.strftime("%Y%m%dT%H%M%S")
+    ext, writer = (".parquet", _write_parquet) if fmt == "parquet" else (".csv.gz", _write_csv_gz)
+
+    state, _ = WarehouseExportState.objects.get_or_create(table=spec.name)
+    result = TableResult(spec.name)
+    columns = spec.all_columns
+    seq = 0
+
+    store.put_bytes(f"{spec.name}/_schema.json", _schema_json(spec, fmt))
+
+    for chunk in _iter_chunks(spec, state, now - EXPORT_LAG, chunk_size):
+        partitions: Dict[str, List[List[Any]]] = {}
+        for raw in chunk:
+            values = {c.name: raw[c.path] for c in spec.columns}
+            if spec.extra:
+                values.update(spec.extra(raw))
+            partitions.setdefault(_partition_day(raw[spec.partition_by]), []).append(
+                [_convert(c.kind, values[c.name]) for c in columns]
+            )
+
+        for day, rows in sorted(partitions.items()):
+            seq += 1
+            fd, tmp = tempfile.mkstemp(suffix=ext)
+            os.close(fd)
+            try:
+                writer(tmp, columns, rows)
+                result.files.append(store.put(f"{spec.name}/dt={day}/part-{run_id}-{seq:05d}{ext}", tmp))
+            finally:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+
+        # Advance the mark only after the whole chunk is stored
+        last = chunk[-1]
+        state.last_id = last["id"]
+        if spec.watermark == "updated_at":
+            state.last_updated_at = last["updated_at"]
+        state.total_rows += len(chunk)
+        result.rows += len(chunk)
+        state.save(update_fields=["last_id", "last_updated_at", "total_rows", "updated_at"])
+
+    state.last_run_at = now
+    state.last_run_rows = result.rows
+    state.save(update_fields=["last_run_at", "last_run_rows", "updated_at"])
+    return result
+
+
+def export_warehouse(tables: Optional[Iterable[str]] = None, *, dest: Optional[str] = None,
+                     fmt: Optional[str] = None, chunk_size: int = CHUNK_SIZE) -> List[TableResult]:
+    """Export the delta of every table (or `tables`) to `dest` (default settings.WAREHOUSE_EXPORT_URL)."""
+    store = get_store(dest)
+    if store is None:
+        raise ValueError("No warehouse destination configured (WAREHOUSE_EXPORT_URL)")
+    names = list(tables) if tables else list(TABLES)
+    unknown = [n for n in names if n not in TABLES]
+    if unknown:
+        raise ValueError(f"Unknown table(s): {', '.join(unknown)}")
+    now = timezone.now()
+    run_id = now.strftime("%Y%m%dT%H%M%S")
+    return [export_table(TABLES[n], store, fmt=fmt, chunk_size=chunk_size, run_id=run_id, now=now) for n in names]
+
+
+def reset_watermarks(tables: Iterable[str]) -> int:
+    """Forget the high-water marks so the next run re-exports everything."""
+    return WarehouseExportState.objects.filter(table__in=list(tables)).delete()[0]
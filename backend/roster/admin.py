@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Classroom, Guardian, Student, StudentGuardian
+from .models import Classroom, DuplicateCandidate, Guardian, Student, StudentGuardian
 
 @admin.register(Classroom)
 class ClassroomAdmin(admin.ModelAdmin):
@@ -23,3 +23,42 @@ class StudentAdmin(admin.ModelAdmin):
 class StudentGuardianAdmin(admin.ModelAdmin):
     list_display = ("student", "guardian", "relationship", "created_at")
     search_fields = ("student__first_name", "guardian__full_name")
+
+@admin.action(description="Merge pair (keeps the student with more screenings)")
+def _merge_candidates(modeladmin, request, queryset):
+    from .dedup import merge_candidate
+    merged = 0
+    # A merge deletes the other candidates of the dropped student, so re-check each row
+    for pk in queryset.filter(status=DuplicateCandidate.Status.PENDING).values_list("pk", flat=True):
+        c = DuplicateCandidate.objects.filter(pk=pk).select_related("student_a", "student_b").first()
+        if c:
+            merge_candidate(c, user=request.user)
+            merged += 1
+    modeladmin.message_user(request, f"Merged {merged} pair(s).")
+
+@admin.action(description="Not duplicates (dismiss)")
+def _dismiss_candidates(modeladmin, request, queryset):
+    from .dedup import dismiss_candidate
+    for c in queryset:
+        dismiss_candidate(c, user=request.user)
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    list_display = ("organization", "first_student", "second_student", "score", "reasons", "status", "reviewed_by")
+    list_select_related = ("organization", "student_a", "student_b", "reviewed_by")
+    list_filter = ("status", "organization")
+    search_fields = ("student_a__first_name", "student_a__last_name", "student_b__first_name", "student_b__last_name")
+    ordering = ("-score",)
+    raw_id_fields = ("student_a", "student_b")
+    readonly_fields = ("score", "reasons", "reviewed_by", "reviewed_at")
+    actions = [_merge_candidates, _dismiss_candidates]
+
+    @admin.display(description="Student A")
+    def first_student(self, obj):
+        s = obj.student_a
+        return f"{s.full_name} ({s.student_code or '-'}, {s.dob or 'no DOB'})"
+
+    @admin.display(description="Student B")
+    def second_student(self, obj):
+        s = obj.student_b
+        return f"{s.full_name} ({s.student_code or '-'}, {s.dob or 'no DOB'})"
@@ -0,0 +1,217 @@
+"""Per-organization classroom catalog (cached).
+
+A seeded school has ~350 Classroom rows that almost never change, yet the
+teacher pages read them several times per request (grade choices, division
+choices, divisions-by-grade JSON, (grade, division) -> id, the class filter).
+`get_catalog(org)` serves all of these from one immutable snapshot:
+
+  1. in-process LRU (CATALOG_LOCAL_MAX orgs), trusted for CATALOG_LOCAL_SECONDS;
+  2. Redis, keyed by a per-org version number;
+  3. the database, when both miss (the result is written back to Redis).
+
+Classroom post_save/post_delete (roster.signals) and the bulk default-class
+seeding call `bump_catalog_version()` after commit, so other processes pick
+the change up on their next revalidation. If Redis is unreachable the catalog
+is built from the database and only cached locally.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from django.db import transaction
+
+from .models import Classroom
+
+logger = logging.getLogger(__name__)
+
+CATALOG_LOCAL_MAX = 256
+CATALOG_LOCAL_SECONDS = 30
+CATALOG_REDIS_TTL = 7 * 24 * 3600
+
+GRADE_ORDER = ["Nursery"] + [str(i) for i in range(1, 13)] + ["Other"]
+DIVISION_ORDER = [chr(c) for c in range(ord("A"), ord("Z") + 1)] + ["Other"]
+_GRADE_RANK = {g: i for i, g in enumerate(GRADE_ORDER)}
+_DIVISION_RANK = {d: i for i, d in enumerate(DIVISION_ORDER)}
+
+
+def grade_sort_key(grade: str):
+    """Nursery, 1..12, Other, then any non-standard values."""
+    return (_GRADE_RANK.get(grade, 999), str(grade))
+
+
+def division_sort_key(division: str):
+    """A..Z, Other, then any non-standard values."""
+    return (_DIVISION_RANK.get(division or "", 999), str(division or ""))
+
+
+class CatalogClassroom(NamedTuple):
+    id: int
+    grade: str
+    division: str
+
+    def __str__(self):
+        return f"{self.grade}{('-' + self.division) if self.division else ''}"
+
+
+@dataclass(frozen=True)
+class ClassroomCatalog:
+    org_id: int
+    version: int
+    classrooms: Tuple[CatalogClassroom, ...]
+    grades: Tuple[str, ...] = field(init=False)
+    divisions_by_grade: Dict[str, List[str]] = field(init=False)
+    divisions_by_grade_json: str = field(init=False)
+    _by_key: Dict[Tuple[str, str], int] = field(init=False, repr=False)
+    _by_id: Dict[int, CatalogClassroom] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        ordered = tuple(sorted(self.classrooms, key=lambda c: (grade_sort_key(c.grade), division_sort_key(c.division))))
+        by_grade: Dict[str, List[str]] = {}
+        for c in ordered:
+            divisions = by_grade.setdefault(c.grade, [])
+            if (c.division or "") not in divisions:
+                divisions.append(c.division or "")
+        set_ = object.__setattr__
+        set_(self, "classrooms", ordered)
+        set_(self, "grades", tuple(by_grade))
+        set_(self, "divisions_by_grade", by_grade)
+        set_(self, "divisions_by_grade_json", json.dumps(by_grade))
+        set_(self, "_by_key", {(c.grade, c.division or ""): c.id for c in ordered})
+        set_(self, "_by_id", {c.id: c for c in ordered})
+
+    def classroom_id(self, grade: str, division: str) -> Optional[int]:
+        return self._by_key.get((grade or "", division or ""))
+
+    def get(self, classroom_id) -> Optional[CatalogClassroom]:
+        try:
+            return self._by_id.get(int(classroom_id))
+        except (TypeError, ValueError):
+            return None
+
+    def divisions(self, grade: str) -> List[str]:
+        return self.divisions_by_grade.get(grade, [])
+
+    def to_json(self) -> str:
+        return json.dumps([list(c) for c in self.classrooms], separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, org_id: int, version: int, raw) -> "ClassroomCatalog":
+        return cls(org_id, version, tuple(CatalogClassroom(*row) for row in json.loads(raw)))
+
+
+# ---------------------------------------------------------------------------
+# Redis tier
+# ---------------------------------------------------------------------------
+
+_redis = None
+
+
+def _client():
+    global _redis
+    if _redis is None:
+        import redis
+
+        url = (
+            os.getenv("CATALOG_REDIS_URL")
+            or os.getenv("RATELIMIT_REDIS_URL")
+            or os.getenv("CELERY_BROKER_URL")
+            or "redis://localhost:6379/0"
+        )
+        _redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+    return _redis
+
+
+def _version_key(org_id: int) -> str:
+    return f"roster:classrooms:{org_id}:v"
+
+
+def _payload_key(org_id: int, version: int) -> str:
+    return f"roster:classrooms:{org_id}:{version}"
+
+
+def _redis_version(org_id: int) -> Optional[int]:
+    try:
+        return int(_client().get(_version_key(org_id)) or 0)
+    except Exception:
+        logger.warning("Classroom catalog: Redis unavailable, using the database")
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Local tier
+# ---------------------------------------------------------------------------
+
+_local: "OrderedDict[int, Tuple[ClassroomCatalog, float]]" = OrderedDict()
+_lock = Lock()
+
+
+def _remember(catalog: ClassroomCatalog) -> ClassroomCatalog:
+    with _lock:
+        _local[catalog.org_id] = (catalog, time.monotonic() + CATALOG_LOCAL_SECONDS)
+        _local.move_to_end(catalog.org_id)
+        while len(_local) > CATALOG_LOCAL_MAX:
+            _local.popitem(last=False)
+    return catalog
+
+
+def _build(org_id: int, version: int) -> ClassroomCatalog:
+    rows = Classroom.objects.filter(organization_id=org_id).values_list("id", "grade", "division")
+    return ClassroomCatalog(org_id, version, tuple(CatalogClassroom(*row) for row in rows))
+
+
+def get_catalog(org) -> ClassroomCatalog:
+    """Classroom catalog for `org` (an Organization or its id)."""
+    org_id = getattr(org, "pk", org)
+    with _lock:
+        entry = _local.get(org_id)
+        if entry:
+            _local.move_to_end(org_id)
+    if entry and time.monotonic() < entry[1]:
+        return entry[0]
+
+    version = _redis_version(org_id)
+    if entry and version is not None and entry[0].version == version:
+        return _remember(entry[0])
+
+    if version is not None:
+        try:
+            raw = _client().get(_payload_key(org_id, version))
+            if raw:
+                return _remember(ClassroomCatalog.from_json(org_id, version, raw))
+        except Exception:
+            logger.warning("Classroom catalog: could not read org %s from Redis", org_id, exc_info=True)
+
+    catalog = _build(org_id, version or 0)
+    if version is not None:
+        try:
+            _client().set(_payload_key(org_id, version), catalog.to_json(), ex=CATALOG_REDIS_TTL)
+        except Exception:
+            logger.warning("Classroom catalog: could not store org %s in Redis", org_id, exc_info=True)
+    return _remember(catalog)
+
+
+def forget_catalog(org_id: int) -> None:
+    with _lock:
+        _local.pop(org_id, None)
+
+
+def bump_catalog_version(org_id: int) -> None:
+    """Invalidate `org_id`'s catalog everywhere once the current transaction commits."""
+    forget_catalog(org_id)
+
+    def _bump():
+        forget_catalog(org_id)
+        try:
+            _client().incr(_version_key(org_id))
+        except Exception:
+            logger.warning("Classroom catalog: could not bump version for org %s", org_id, exc_info=True)
+
+    transaction.on_commit(_bump)
@@ -0,0 +1,348 @@
+"""Duplicate student detection and merging.
+
+The same child is often entered twice (a teacher adds them before the bulk
+import, a sibling's phone, "Mohd. Arif" vs "Mohammad Arif", a day/month swap
+in the DOB). `find_duplicates(org)` proposes such pairs for review as
+DuplicateCandidate rows; `merge_students(keep, drop)` folds one into the other.
+
+Comparing every pair of a 100k-student district is out of the question, so
+students are only compared within *blocks* that share a key, all scoped to
+the organization:
+
+  ("d", dob, first-name key)       same birthday, similar-sounding first name
+  ("n", first key, last key)       similar-sounding full name (either order), any DOB
+  ("p", guardian phone)            last 10 digits of the primary guardian phone
+  ("c", student code)              student code with punctuation/case folded
+
+Name keys (`name_key`) build on the search index's phonetic folding
+(roster.search.phonetic: aspiration, sh/s, w/v, long vowels, doubled letters)
+and then keep the first letter plus the consonant skeleton, which absorbs the
+vowel spelling variants common in romanized Indian names (Mohammad /
+Muhammed / Mohd -> "md"). Blocks larger than BLOCK_MAX (a shared school
+phone, a very common name on one birthday) are skipped, so the work is at most
+n * BLOCK_MAX comparisons per key kind: linear in the roster size.
+
+Each pair is scored from name similarity (Jaro-Winkler on folded names) and
+corroborating evidence (DOB, guardian phone, student code, classroom);
+conflicting gender or DOB pulls the score down. Pairs scoring REVIEW_MIN or
+more are written as PENDING candidates.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DuplicateCandidate, Student, StudentGuardian
+from .search import code_token, phone_token, phonetic, words
+
+BLOCK_MAX = 50
+REVIEW_MIN = 0.6
+FIRST_NAME_MIN = 0.8   # below this the first names are different children (siblings, twins)
+
+_VOWELS = set("aeiouyh")
+
+
+class _Row(NamedTuple):
+    id: int
+    first: str
+    last: str
+    gender: str
+    dob: Optional[date]
+    code: str
+    phone: str
+    classroom_id: Optional[int]
+    guardian_id: Optional[int]
+
+
+@dataclass
+class DedupStats:
+    students: int = 0
+    blocks: int = 0
+    oversized_blocks: int = 0
+    pairs: int = 0
+    created: int = 0
+    updated: int = 0
+    removed: int = 0
+
+
+# ---------------------------------------------------------------------------
+# Keys and similarity
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=65536)
+def name_key(word: str) -> str:
+    """Phonetic key of one name word: first letter + consonant skeleton."""
+    word = phonetic(word)
+    if not word:
+        return ""
+    skeleton = [word[0]]
+    for ch in word[1:]:
+        if ch not in _VOWELS and ch != skeleton[-1]:
+            skeleton.append(ch)
+    return "".join(skeleton)
+
+
+def jaro_winkler(a: str, b: str) -> float:
+    if a == b:
+        return 1.0 if a else 0.0
+    if not a or not b:
+        return 0.0
+    window = max(max(len(a), len(b)) // 2 - 1, 0)
+    used = [False] * len(b)
+    matches_a = []
+    for i, ch in enumerate(a):
+        for j in range(max(0, i - window), min(len(b), i + window + 1)):
+            if not used[j] and b[j] == ch:
+                used[j] = True
+                matches_a.append(ch)
+                break
+    if not matches_a:
+        return 0.0
+    matches_b = [b[j] for j in range(len(b)) if used[j]]
+    m = len(matches_a)
+    transpositions = sum(x != y for x, y in zip(matches_a, matches_b)) / 2
+    jaro = (m / len(a) + m / len(b) + (m - transpositions) / m) / 3
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def _name_similarity(x: str, y: str) -> float:
+    """Jaro-Winkler on the folded names, counting a phonetic-key match as 0.95."""
+    if not x or not y:
+        return 0.0
+    sim = jaro_winkler(x, y)
+    if sim < 0.95 and name_key(x) == name_key(y):
+        sim = 0.95
+    return sim
+
+
+def _dob_swapped(a: date, b: date) -> bool:
+    return a.year == b.year and a.day == b.month and a.month == b.day
+
+
+def score_pair(a: _Row, b: _Row) -> Tuple[float, List[str]]:
+    """(score in 0..1, reasons) for two students of one organization (names as `_norm` gives them)."""
+    a_first, b_first, a_last, b_last = a.first, b.first, a.last, b.last
+    first = _name_similarity(a_first, b_first)
+    last = _name_similarity(a_last, b_last) if a_last and b_last else None
+    # "Sharma Rahul" entered the other way round
+    crossed = min(_name_similarity(a_first, b_last), _name_similarity(a_last, b_first))
+    if crossed > first and crossed >= FIRST_NAME_MIN:
+        first, last = crossed, crossed
+    if first < FIRST_NAME_MIN:
+        return 0.0, []
+
+    name = first if last is None else 0.6 * first + 0.4 * last
+    score = 0.5 * name
+    reasons = [f"name {name:.2f}"]
+
+    if a.dob and b.dob:
+        if a.dob == b.dob:
+            score += 0.3
+            reasons.append("same DOB")
+        elif _dob_swapped(a.dob, b.dob):
+            score += 0.2
+            reasons.append("DOB day/month swapped")
+        else:
+            score -= 0.3
+            reasons.append("different DOB")
+    if a.guardian_id and a.guardian_id == b.guardian_id or a.phone and a.phone == b.phone:
+        score += 0.2
+        reasons.append("same guardian phone")
+    if a.code and a.code == b.code:
+        score += 0.25
+        reasons.append("same student code")
+    if a.classroom_id and a.classroom_id == b.classroom_id:
+        score += 0.05
+        reasons.append("same class")
+    if a.gender and b.gender and a.gender != b.gender:
+        score -= 0.4
+        reasons.append("different gender")
+    return round(max(0.0, min(score, 1.0)), 3), reasons
+
+
+def blocking_keys(row: _Row) -> Set[tuple]:
+    first = row.first.split()
+    last = row.last.split()
+    keys = set()
+    first_key = name_key(first[0]) if first else ""
+    last_key = name_key(last[-1]) if last else ""
+    if row.dob and first_key:
+        keys.add(("d", row.dob, first_key))
+    if first_key and last_key:
+        keys.add(("n", *sorted((first_key, last_key))))
+    if len(row.phone) == 10:
+        keys.add(("p", row.phone))
+    if row.code:
+        keys.add(("c", row.code))
+    return keys
+
+
+# ---------------------------------------------------------------------------
+# Batch job
+# ---------------------------------------------------------------------------
+
+def _norm(name: Optional[str]) -> str:
+    return " ".join(words(name or ""))
+
+
+def _load_rows(org_id: int) -> List[_Row]:
+    qs = (Student.objects.filter(organization_id=org_id)
+          .values_list("id", "first_name", "last_name", "gender", "dob", "student_code",
+                       "primary_guardian__phone_e164", "classroom_id", "primary_guardian_id"))
+    return [
+        _Row(pk, _norm(first), _norm(last), gender or "", dob, code_token(code or ""),
+             phone_token(phone), classroom_id, guardian_id)
+        for pk, first, last, gender, dob, code, phone, classroom_id, guardian_id in qs.iterator(chunk_size=5000)
+    ]
+
+
+def candidate_pairs(rows: Iterable[_Row], stats: Optional[DedupStats] = None) -> Set[Tuple[int, int]]:
+    """(lower id, higher id) pairs sharing a block of at most BLOCK_MAX students."""
+    stats = stats or DedupStats()
+    blocks: Dict[tuple, List[int]] = defaultdict(list)
+    for row in rows:
+        for key in blocking_keys(row):
+            blocks[key].append(row.id)
+    pairs: Set[Tuple[int, int]] = set()
+    for ids in blocks.values():
+        if len(ids) < 2:
+            continue
+        if len(ids) > BLOCK_MAX:
+            stats.oversized_blocks += 1
+            continue
+        stats.blocks += 1
+        ids.sort()
+        for i, x in enumerate(ids):
+            for y in ids[i + 1:]:
+                pairs.add((x, y))
+    return pairs
+
+
+def find_duplicates(org_id: int) -> DedupStats:
+    """Score candidate pairs of one organization and refresh its PENDING review queue.
+
+    Dismissed pairs are left alone; PENDING pairs that no longer score
+    REVIEW_MIN (the records were corrected) are removed.
+    """
+    stats = DedupStats()
+    rows = _load_rows(org_id)
+    stats.students = len(rows)
+    by_id = {r.id: r for r in rows}
+
+    found: Dict[Tuple[int, int], Tuple[float, List[str]]] = {}
+    for a, b in candidate_pairs(rows, stats):
+        stats.pairs += 1
+        score, reasons = score_pair(by_id[a], by_id[b])
+        if score >= REVIEW_MIN:
+            found[(a, b)] = (score, reasons)
+
+    existing = {
+        (c.student_a_id, c.student_b_id): c
+        for c in DuplicateCandidate.objects.filter(organization_id=org_id)
+    }
+    to_create, to_update, stale = [], [], []
+    for pair, (score, reasons) in found.items():
+        c = existing.get(pair)
+        if c is None:
+            to_create.append(DuplicateCandidate(organization_id=org_id, student_a_id=pair[0], student_b_id=pair[1],
+                                                score=score, reasons=reasons))
+        elif c.status == DuplicateCandidate.Status.PENDING and (c.score, c.reasons) != (score, reasons):
+            c.score, c.reasons = score, reasons
+            to_update.append(c)
+    for pair, c in existing.items():
+        if pair not in found and c.status == DuplicateCandidate.Status.PENDING:
+            stale.append(c.pk)
+
+    with transaction.atomic():
+        DuplicateCandidate.objects.bulk_create(to_create, batch_size=1000)
+        DuplicateCandidate.objects.bulk_update(to_update, ["score", "reasons", "updated_at"], batch_size=1000)
+        DuplicateCandidate.objects.filter(pk__in=stale).delete()
+    stats.created, stats.updated, stats.removed = len(to_create), len(to_update), len(stale)
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Review
+# ---------------------------------------------------------------------------
+
+def dismiss_candidate(candidate: DuplicateCandidate, *, user=None) -> None:
+    candidate.status = DuplicateCandidate.Status.DISMISSED
+    candidate.reviewed_by = user
+    candidate.reviewed_at = timezone.now()
+    candidate.save(update_fields=["status", "reviewed_by", "reviewed_at", "updated_at"])
+
+
+_FILL_FIELDS = ("last_name", "dob", "classroom_id", "primary_guardian_id")
+
+
+@transaction.atomic
+def merge_students(keep: Student, drop: Student, *, user=None) -> Dict[str, int]:
+    """Move everything of `drop` onto `keep` and delete `drop`.
+
+    Screenings, assistance applications and program enrollments are moved with
+    one UPDATE each; guardian links are moved unless `keep` already has that
+    guardian. Blank fields of `keep` are filled from `drop`, and drop's
+    student code is noted on `keep`. Returns the number of rows moved per kind.
+    """
+    from assist.models import Application
+    from audit.utils import audit_log
+    from program.models import Enrollment
+    from screening.models import Screening
+    from screening.status import refresh_student_status
+
+    if keep.pk == drop.pk:
+        raise ValueError("Cannot merge a student into itself.")
+    if keep.organization_id != drop.organization_id:
+        raise ValueError("Students belong to different organizations.")
+    keep = Student.objects.select_for_update().get(pk=keep.pk)
+    drop = Student.objects.select_for_update().get(pk=drop.pk)
+
+    now = timezone.now()  # .update() skips auto_now; the warehouse export keys on updated_at
+    moved = {
+        "screenings": Screening.objects.filter(student=drop).update(student=keep, updated_at=now),
+        "applications": Application.objects.filter(student=drop).update(student=keep, updated_at=now),
+        "enrollments": Enrollment.objects.filter(student=drop).update(student=keep, updated_at=now),
+    }
+    have = StudentGuardian.objects.filter(student=keep).values("guardian_id")
+    StudentGuardian.objects.filter(student=drop, guardian_id__in=have).delete()
+    moved["guardian_links"] = StudentGuardian.objects.filter(student=drop).update(student=keep)
+
+    changed = [f for f in _FILL_FIELDS if not getattr(keep, f) and getattr(drop, f)]
+    for f in changed:
+        setattr(keep, f, getattr(drop, f))
+    if drop.is_low_income and not keep.is_low_income:
+        keep.is_low_income = True
+        changed.append("is_low_income")
+    note = f"Merged duplicate record #{drop.pk}" + (f" (code {drop.student_code})" if drop.student_code else "") + "."
+    keep.notes = f"{keep.notes}\n{note}".strip()
+    changed.append("notes")
+
+    payload = {"dropped_id": drop.pk, "dropped_code": drop.student_code, "dropped_name": drop.full_name, **moved}
+    drop.delete()
+    keep.save(update_fields=changed + ["updated_at"])
+
+    # keep.save() reindexed the search tokens; the moved screenings bypassed signals
+    refresh_student_status([keep.pk])
+    audit_log(user, keep.organization, "STUDENT_MERGED", target=keep, payload=payload)
+    return moved
+
+
+def merge_candidate(candidate: DuplicateCandidate, *, keep_id: Optional[int] = None, user=None) -> Dict[str, int]:
+    """Merge a reviewed pair, keeping `keep_id` (default: the student with more screenings)."""
+    a, b = candidate.student_a, candidate.student_b
+    if keep_id is None:
+        keep_id = a.pk if a.screenings.count() >= b.screenings.count() else b.pk
+    keep, drop = (a, b) if keep_id == a.pk else (b, a)
+    return merge_students(keep, drop, user=user)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Organization
+from roster.dedup import find_duplicates
+
+
+class Command(BaseCommand):
+    help = "Propose possible duplicate students for review (blocked by DOB, phonetic name, guardian phone, code)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, action="append", help="Organization id (repeatable; default: all schools)")
+
+    def handle(self, *args, **opts):
+        orgs = Organization.objects.filter(org_type=Organization.OrgType.SCHOOL)
+        if opts.get("org"):
+            orgs = Organization.objects.filter(id__in=opts["org"])
+        for org_id, name in orgs.order_by("id").values_list("id", "name"):
+            s = find_duplicates(org_id)
+            self.stdout.write(
+                f"{name}: {s.students} students, {s.pairs} pairs in {s.blocks} blocks "
+                f"({s.oversized_blocks} oversized skipped); {s.created} new, {s.updated} updated, "
+                f"{s.removed} resolved candidates"
+            )
+        self.stdout.write(self.style.SUCCESS("Done."))
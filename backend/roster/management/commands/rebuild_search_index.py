@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from roster.models import StudentSearchToken
+from roster.search import REINDEX_CHUNK, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Recompute the student search tokens (names, transliteration, codes, guardian phones)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id (default: all orgs)")
+        parser.add_argument("--chunk-size", type=int, default=REINDEX_CHUNK)
+
+    def handle(self, *args, **opts):
+        def _progress(n):
+            self.stdout.write(f"Reindexed {n} students")
+
+        n = rebuild_search_index(opts.get("org"), chunk_size=opts["chunk_size"], progress=_progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Reindexed {n} students ({StudentSearchToken.objects.count()} tokens in total)."
+        ))
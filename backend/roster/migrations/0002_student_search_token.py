@@ -0,0 +1,29 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_org_type_alter_orgmembership_role'),
+        ('roster', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('N', 'Name'), ('P', 'Phonetic key'), ('C', 'Student code'), ('T', 'Guardian phone')], max_length=1)),
+                ('token', models.CharField(max_length=64)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.organization')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='roster.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'kind', 'token'], name='roster_stud_organiz_9e01e9_idx'), models.Index(fields=['kind', 'token'], name='roster_stud_kind_fd2edf_idx')],
+                'unique_together': {('student', 'kind', 'token')},
+            },
+        ),
+    ]
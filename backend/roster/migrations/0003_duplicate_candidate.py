@@ -0,0 +1,38 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_org_type_alter_orgmembership_role'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('roster', '0002_student_search_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('reasons', models.JSONField(blank=True, default=list)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending review'), ('DISMISSED', 'Not a duplicate')], default='PENDING', max_length=16)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.organization')),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('student_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='roster.student')),
+                ('student_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='roster.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'status', '-score'], name='roster_dupl_organiz_b91d79_idx')],
+                'unique_together': {('student_a', 'student_b')},
+            },
+        ),
+    ]
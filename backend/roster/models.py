@@ -74,3 +74,63 @@ class StudentGuardian(TimeStampedModel):
 
     class Meta:
         unique_together = (("student", "guardian"),)
+
+class StudentSearchToken(models.Model):
+    """Normalized search tokens for a student (maintained by roster.search).
+
+    Name words are stored case/diacritic-folded (Devanagari transliterated to
+    Latin) plus a looser phonetic key, so `token LIKE 'q%'` prefix lookups hit
+    the (organization, kind, token) index. Student code and guardian phone
+    tokens also have a (kind, token) index for cross-organization lookups.
+    """
+
+    class Kind(models.TextChoices):
+        NAME = "N", "Name"
+        PHONETIC = "P", "Phonetic key"
+        CODE = "C", "Student code"
+        PHONE = "T", "Guardian phone"
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="+")
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="search_tokens")
+    kind = models.CharField(max_length=1, choices=Kind.choices)
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = (("student", "kind", "token"),)
+        indexes = [
+            models.Index(fields=["organization", "kind", "token"]),
+            models.Index(fields=["kind", "token"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.token}"
+
+class DuplicateCandidate(models.Model):
+    """A pair of students that may be the same child (written by roster.dedup).
+
+    student_a.id < student_b.id. School staff review PENDING rows and either
+    merge the pair (`merge_students`, which deletes one student and with it
+    the row) or dismiss it; dismissed pairs are not proposed again.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending review"
+        DISMISSED = "DISMISSED", "Not a duplicate"
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="+")
+    student_a = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="+")
+    student_b = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+    reasons = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    reviewed_by = models.ForeignKey("accounts.User", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = (("student_a", "student_b"),)
+        indexes = [models.Index(fields=["organization", "status", "-score"])]
+
+    def __str__(self):
+        return f"{self.student_a_id} ~ {self.student_b_id} ({self.score:.2f})"
@@ -0,0 +1,130 @@
+"""Keyset (seek) pagination for student lists.
+
+Pages are addressed by an opaque cursor holding the sort key of the boundary
+row, so each page is one indexed range query (`WHERE (last_name, first_name,
+id) > (...) ORDER BY ... LIMIT n+1`) instead of OFFSET scans or slicing a
+Python list. Default order is (last_name, first_name, id), matching the
+(organization, last_name, first_name) index on Student.
+
+Usage in a view:
+
+    page = keyset_paginate(request, students, page_size=50)
+    # template: {% for s in page %} ... <a href="?{{ page.next_query }}">Next</a>
+
+For querysets over other models pass the student key paths, e.g.
+keys=("student__last_name", "student__first_name", "id").
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence
+
+from django.db.models import Q
+
+STUDENT_KEYS = ("last_name", "first_name", "id")
+MAX_PAGE_SIZE = 200
+
+
+def page_size_for(request, default: int, maximum: int = MAX_PAGE_SIZE) -> int:
+    """`?page_size=` clamped to [1, maximum]; `default` when absent or invalid."""
+    try:
+        size = int(request.GET.get("page_size") or default)
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], n_keys: int) -> Optional[List[Any]]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != n_keys or None in values:
+        return None  # malformed or tampered: start from the first page
+    return values
+
+
+def _seek(keys: Sequence[str], values: Sequence[Any], forward: bool) -> Q:
+    """(k1, k2, k3) > (v1, v2, v3) as OR-ed prefix equalities (portable row comparison)."""
+    op = "gt" if forward else "lt"
+    q = Q()
+    for i, key in enumerate(keys):
+        term = Q(**{f"{key}__{op}": values[i]})
+        for prev, value in zip(keys[:i], values[:i]):
+            term &= Q(**{prev: value})
+        q |= term
+    return q
+
+
+def _key_of(obj, keys: Sequence[str]) -> List[Any]:
+    out = []
+    for key in keys:
+        value = obj
+        for part in key.split("__"):
+            value = getattr(value, part)
+        out.append(value)
+    return out
+
+
+@dataclass
+class KeysetPage:
+    object_list: List[Any]
+    page_size: int
+    has_next: bool = False
+    has_previous: bool = False
+    next_query: str = ""
+    previous_query: str = ""
+    first_query: str = ""
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_paginate(request, qs, *, page_size: int, keys: Sequence[str] = STUDENT_KEYS,
+                    after_param: str = "after", before_param: str = "before") -> KeysetPage:
+    """One page of `qs` ordered by `keys` (ascending), after/before the cursor in the request."""
+    after = decode_cursor(request.GET.get(after_param), len(keys))
+    before = None if after else decode_cursor(request.GET.get(before_param), len(keys))
+
+    if before is not None:
+        rows = list(qs.filter(_seek(keys, before, forward=False)).order_by(*[f"-{k}" for k in keys])[:page_size + 1])
+        more_before = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_previous, has_next = more_before, True
+    else:
+        page_qs = qs.filter(_seek(keys, after, forward=True)) if after else qs
+        rows = list(page_qs.order_by(*keys)[:page_size + 1])
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        has_previous = after is not None
+
+    def _query(**cursor) -> str:
+        params = request.GET.copy()
+        for p in (after_param, before_param):
+            params.pop(p, None)
+        for p, value in cursor.items():
+            params[p] = value
+        return params.urlencode()
+
+    page = KeysetPage(object_list=rows, page_size=page_size, first_query=_query())
+    if rows and has_next:
+        page.has_next = True
+        page.next_query = _query(**{after_param: encode_cursor(_key_of(rows[-1], keys))})
+    if rows and has_previous:
+        page.has_previous = True
+        page.previous_query = _query(**{before_param: encode_cursor(_key_of(rows[0], keys))})
+    return page
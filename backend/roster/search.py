@@ -0,0 +1,250 @@
+"""Indexed student search (StudentSearchToken).
+
+Teacher lists used `icontains` over first_name/last_name/student_code, which
+scans every student of the organization and cannot match Devanagari input to
+Latin-script names. Instead each student gets a handful of normalized tokens:
+
+  NAME      each name word, lowercased, diacritics stripped, Devanagari
+            transliterated to Latin ("राहुल" -> "raahul")
+  PHONETIC  a looser key of the same word (vowel length, aspiration, sh/s,
+            w/v, doubled letters folded) so "Rahul"/"राहुल" and
+            "Sharma"/"शर्मा" agree
+  CODE      student_code, alphanumerics only
+  PHONE     last 10 digits of the primary guardian's phone
+
+and a query term matches on a token *prefix*, which is an index range scan on
+(organization, kind, token). Multiple terms are AND-ed.
+
+Tokens are rewritten on Student/Guardian saves (roster.signals); bulk writers
+that bypass signals call `reindex_students()` themselves. Command:
+rebuild_search_index.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Set, Tuple
+
+from django.db.models import Q
+
+from .models import Student, StudentSearchToken
+
+Kind = StudentSearchToken.Kind
+
+REINDEX_CHUNK = 1000
+TOKEN_MAX = 64
+MIN_PHONE_DIGITS = 6
+
+# ---------------------------------------------------------------------------
+# Devanagari -> Latin (simplified Hindi romanization with schwa deletion)
+# ---------------------------------------------------------------------------
+
+_CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "व": "v", "ळ": "l",
+    "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+}
+# NFC keeps क़/ज़/फ़... decomposed (consonant + nukta)
+_NUKTA_FORMS = {"k": "q", "j": "z", "d": "r", "dh": "rh", "ph": "f"}
+_VOWELS = {
+    "अ": "a", "आ": "aa", "इ": "i", "ई": "ee", "उ": "u", "ऊ": "oo", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au", "ऑ": "o",
+}
+_MATRAS = {
+    "ा": "aa", "ि": "i", "ी": "ee", "ु": "u", "ू": "oo", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au", "ॉ": "o",
+}
+_CODAS = {"ं": "n", "ँ": "n", "ः": "h"}
+_VIRAMA = "्"
+_NUKTA = "़"
+_DIGITS = {chr(0x0966 + i): str(i) for i in range(10)}
+
+
+def _is_devanagari(ch: str) -> bool:
+    return "ऀ" <= ch <= "ॿ"
+
+
+def _transliterate_word(word: str) -> str:
+    # units: [consonant, vowel, inherent?]; schwa deletion needs the neighbours
+    units: List[list] = []
+    for ch in word:
+        if ch in _CONSONANTS:
+            units.append([_CONSONANTS[ch], "a", True])
+        elif ch in _MATRAS and units and units[-1][2]:
+            units[-1][1:] = [_MATRAS[ch], False]
+        elif ch == _VIRAMA and units and units[-1][2]:
+            units[-1][1:] = ["", False]
+        elif ch in _VOWELS:
+            units.append(["", _VOWELS[ch], False])
+        elif ch in _CODAS and units:
+            units[-1][1] += _CODAS[ch]
+            units[-1][2] = False
+        elif ch == _NUKTA:
+            if units and units[-1][2]:
+                units[-1][0] = _NUKTA_FORMS.get(units[-1][0], units[-1][0])
+        elif ch in _DIGITS:
+            units.append([_DIGITS[ch], "", False])
+        else:
+            units.append([ch, "", False])
+
+    # Word-final schwa is silent; so is a medial one in V C(a) C V, decided
+    # right to left ("रमन" -> raman, "कमला" -> kamlaa)
+    if units and units[-1][2]:
+        units[-1][1:] = ["", False]
+    for i in range(len(units) - 2, 0, -1):
+        if units[i][2] and units[i - 1][1] and units[i + 1][0] and units[i + 1][1]:
+            units[i][1:] = ["", False]
+    return "".join(c + v for c, v, _ in units)
+
+
+def transliterate(text: str) -> str:
+    """Latin rendering of any Devanagari runs in `text`; other characters pass through."""
+    text = unicodedata.normalize("NFC", text or "")
+    if not any(_is_devanagari(ch) for ch in text):
+        return text
+    return re.sub(r"[ऀ-ॿ]+", lambda m: _transliterate_word(m.group(0)), text)
+
+
+# ---------------------------------------------------------------------------
+# Normalization
+# ---------------------------------------------------------------------------
+
+def fold(text: str) -> str:
+    """Lowercase, transliterated, without diacritics ("Zoë", "ज़ोया" -> "zoe", "zoyaa")."""
+    text = unicodedata.normalize("NFKD", transliterate(text))
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def words(text: str) -> List[str]:
+    return [w[:TOKEN_MAX] for w in re.findall(r"[a-z0-9]+", fold(text))]
+
+
+_PHONETIC_RULES = [
+    (re.compile(r"shh|sh"), "s"), (re.compile(r"chh|ch"), "c"), (re.compile(r"ph"), "f"),
+    (re.compile(r"w"), "v"), (re.compile(r"z"), "j"), (re.compile(r"q"), "k"), (re.compile(r"x"), "ks"),
+    (re.compile(r"([bdgjkt])h"), r"\1"),
+    (re.compile(r"ee|ii"), "i"), (re.compile(r"oo|uu"), "u"), (re.compile(r"ou"), "au"),
+    (re.compile(r"(.)\1+"), r"\1"),
+]
+
+
+def phonetic(word: str) -> str:
+    for pattern, repl in _PHONETIC_RULES:
+        word = pattern.sub(repl, word)
+    return word
+
+
+def code_token(code: str) -> str:
+    return "".join(words(code))[:TOKEN_MAX]
+
+
+def phone_token(phone: str) -> str:
+    return re.sub(r"\D", "", phone or "")[-10:]
+
+
+def student_tokens(first_name: str, last_name: str, student_code: str,
+                   phone: Optional[str]) -> Set[Tuple[str, str]]:
+    out: Set[Tuple[str, str]] = set()
+    for w in words(f"{first_name} {last_name}"):
+        out.add((Kind.NAME, w))
+        out.add((Kind.PHONETIC, phonetic(w)))
+    if code_token(student_code):
+        out.add((Kind.CODE, code_token(student_code)))
+    if phone_token(phone):
+        out.add((Kind.PHONE, phone_token(phone)))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Index maintenance
+# ---------------------------------------------------------------------------
+
+def reindex_students(student_ids: Iterable[int]) -> int:
+    """Rewrite the tokens of `student_ids` (a few queries per chunk). Returns rows written."""
+    ids = sorted({int(i) for i in student_ids if i})
+    written = 0
+    for start in range(0, len(ids), REINDEX_CHUNK):
+        chunk = ids[start:start + REINDEX_CHUNK]
+        rows = [
+            StudentSearchToken(organization_id=org_id, student_id=student_id, kind=kind, token=token)
+            for student_id, org_id, first, last, code, phone in Student.objects.filter(id__in=chunk).values_list(
+                "id", "organization_id", "first_name", "last_name", "student_code", "primary_guardian__phone_e164",
+            )
+            for kind, token in student_tokens(first, last, code, phone)
+        ]
+        StudentSearchToken.objects.filter(student_id__in=chunk).delete()
+        StudentSearchToken.objects.bulk_create(rows, batch_size=REINDEX_CHUNK)
+        written += len(rows)
+    return written
+
+
+def rebuild_search_index(org_id: Optional[int] = None, *, chunk_size: int = REINDEX_CHUNK,
+                         progress=None) -> int:
+    """Reindex every student (optionally one organization), in id order."""
+    qs = Student.objects.order_by("id")
+    if org_id:
+        qs = qs.filter(organization_id=org_id)
+    done, last_id = 0, 0
+    while True:
+        ids = list(qs.filter(id__gt=last_id).values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return done
+        reindex_students(ids)
+        done += len(ids)
+        last_id = ids[-1]
+        if progress:
+            progress(done)
+
+
+# ---------------------------------------------------------------------------
+# Lookups
+# ---------------------------------------------------------------------------
+
+def _term_q(term: str) -> Optional[Q]:
+    q = Q()
+    for w in words(term):
+        q |= Q(kind=Kind.NAME, token__startswith=w) | Q(kind=Kind.PHONETIC, token__startswith=phonetic(w))
+    code = code_token(term)
+    if code:
+        q |= Q(kind=Kind.CODE, token__startswith=code)
+    digits = re.sub(r"\D", "", term)
+    if len(digits) >= MIN_PHONE_DIGITS:
+        q |= Q(kind=Kind.PHONE, token__startswith=digits[-10:])
+    return q or None
+
+
+def search_students(students, query: str, *, organization=None):
+    """Narrow the `students` queryset to rows whose tokens prefix-match every term of `query`.
+
+    Pass `organization` so each token lookup stays on the (organization, kind,
+    token) index; without it the match runs across all organizations.
+    """
+    tokens = StudentSearchToken.objects.all()
+    if organization is not None:
+        tokens = tokens.filter(organization=organization)
+    for term in (query or "").split():
+        q = _term_q(term)
+        if q is not None:
+            students = students.filter(id__in=tokens.filter(q).values("student_id"))
+    return students
+
+
+def lookup_students(query: str):
+    """Exact student code / guardian phone match across every organization (Inditech)."""
+    query = (query or "").strip()
+    q = Q()
+    if code_token(query):
+        q |= Q(kind=Kind.CODE, token=code_token(query))
+    digits = phone_token(query)
+    if len(digits) == 10:
+        q |= Q(kind=Kind.PHONE, token=digits)
+    elif len(digits) >= MIN_PHONE_DIGITS:
+        q |= Q(kind=Kind.PHONE, token__startswith=digits)
+    if not q:
+        return Student.objects.none()
+    return Student.objects.filter(id__in=StudentSearchToken.objects.filter(q).values("student_id"))
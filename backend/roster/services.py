@@ -10,6 +10,7 @@ from __future__ import annotations
 from django.db import transaction
 
 from accounts.models import Organization
+from .catalog import bump_catalog_version
 from .models import Classroom
 
 
@@ -55,4 +56,6 @@ def ensure_default_classrooms_for_school(org: Organization) -> int:
 
     # INSERT IGNORE (MySQL) / ON CONFLICT DO NOTHING (Postgres) behavior.
     Classroom.objects.bulk_create(rows, ignore_conflicts=True, batch_size=500)
+    # bulk_create sends no signals
+    bump_catalog_version(org.id)
     return len(rows)
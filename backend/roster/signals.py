@@ -4,15 +4,24 @@ Goal:
   When a new SCHOOL organization is created, automatically seed default
   Classroom rows (grades Nursery..12 + Other; sections A..Z + Other) so that
   teachers can immediately select grade/division in the "Add student" flow.
+
+  Student and Guardian saves rewrite the student search tokens
+  (roster.search) inside the writing transaction.
+
+  Classroom saves/deletes bump the organization's classroom catalog version
+  (roster.catalog) once the transaction commits.
 """
 
 from __future__ import annotations
 
 from django.db import transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
 from accounts.models import Organization
+from .catalog import bump_catalog_version
+from .models import Classroom, Guardian, Student, StudentSearchToken
+from .search import reindex_students
 from .services import ensure_default_classrooms_for_school
 
 
@@ -30,3 +39,40 @@ def seed_default_classrooms_on_new_school(sender, instance: Organization, create
 
     # If org creation rolls back, we should not leave behind classrooms.
     transaction.on_commit(lambda: ensure_default_classrooms_for_school(instance))
+
+
+@receiver(post_save, sender=Student)
+def reindex_student_on_save(sender, instance: Student, raw: bool = False, **kwargs):
+    if not raw:
+        reindex_students([instance.pk])
+
+
+@receiver(post_save, sender=Guardian)
+def reindex_guardian_students(sender, instance: Guardian, created: bool, raw: bool = False, **kwargs):
+    # A new guardian has no students yet; a changed phone moves their PHONE tokens
+    if created or raw:
+        return
+    reindex_students(Student.objects.filter(primary_guardian=instance).values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=Guardian)
+def drop_guardian_phone_tokens(sender, instance: Guardian, **kwargs):
+    # Student.primary_guardian is SET_NULL by a bulk UPDATE, which sends no signals
+    StudentSearchToken.objects.filter(
+        kind=StudentSearchToken.Kind.PHONE,
+        student__primary_guardian=instance,
+    ).delete()
+
+
+@receiver(post_save, sender=Classroom)
+def bump_catalog_on_save(sender, instance: Classroom, raw: bool = False, **kwargs):
+    if not raw:
+        bump_catalog_version(instance.organization_id)
+
+
+@receiver(post_delete, sender=Classroom)
+def bump_catalog_on_delete(sender, instance: Classroom, origin=None, **kwargs):
+    # Deleting the whole organization needs no per-classroom bumps
+    if isinstance(origin, Organization):
+        return
+    bump_catalog_version(instance.organization_id)
@@ -0,0 +1,13 @@
+from __future__ import annotations
+from celery import shared_task
+from accounts.models import Organization
+
+
+@shared_task
+def find_duplicate_students():
+    from .dedup import find_duplicates
+
+    created = 0
+    for org_id in Organization.objects.filter(org_type=Organization.OrgType.SCHOOL).values_list("id", flat=True):
+        created += find_duplicates(org_id).created
+    return created
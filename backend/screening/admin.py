@@ -1,8 +1,21 @@
 from django.contrib import admin
-from .models import Screening
+from .models import RiskRuleset, Screening
 
 @admin.register(Screening)
 class ScreeningAdmin(admin.ModelAdmin):
-    list_display = ("student", "organization", "risk_level", "screened_at")
+    list_display = ("student", "organization", "risk_level", "screened_at", "ruleset_version")
     list_filter = ("organization", "risk_level", "screened_at")
     search_fields = ("student__first_name", "student__last_name")
+
+
+@admin.register(RiskRuleset)
+class RiskRulesetAdmin(admin.ModelAdmin):
+    list_display = ("version", "is_active", "content_hash", "created_at")
+    list_filter = ("is_active",)
+    readonly_fields = ("content_hash", "created_at")
+
+    def get_readonly_fields(self, request, obj=None):
+        # Published rulesets are immutable (RiskRuleset.clean); only is_active and notes change
+        if obj is not None and obj.pk:
+            return self.readonly_fields + ("version", "definition")
+        return self.readonly_fields
@@ -0,0 +1,369 @@
+"""Compact binary storage for Screening.answers.
+
+A screening's answers were stored as ~45 keys of JSON (long key names,
+true/false literals, numbers as strings), which is most of the screening
+table's size. `PackedAnswersField` stores the same dict in a versioned binary
+layout and hands back an identical dict on load, so readers (`compute_risk`,
+batch scoring, templates, exports) are unchanged.
+
+Layout (version 1):
+
+    byte 0      format version (1)
+    states      2 bits per schema slot, 4 slots per byte:
+                  0 = key absent, 1 = None, 2 = value (bool: False),
+                  3 = "" (bool: True)
+    fixed       little-endian fixed-width values of every state-2 non-bool,
+                non-string slot, in slot order (struct, see _KINDS)
+    strings     varint length + UTF-8 for each state-2 string slot
+    overflow    compact JSON of keys outside the schema and values that do not
+                fit their slot (wrong type, out of range); absent when empty
+
+Every packed value is decoded again while encoding and anything that would not
+come back identical goes to `overflow`, so decode(encode(d)) == d for any
+JSON-serializable dict. Rows that still hold JSON text (written before the
+column was converted) are recognized by their first byte and parsed as JSON;
+`pack_screening_answers` rewrites them.
+
+The schema is append-only per version: a new question gets a new version with
+the extra slot, and decoders for older versions stay.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.db import models
+from django.db.models import ExpressionWrapper, F
+
+from .rules import ENUM_VALUES, TRUTHY_KEYS, YES_NO_KEYS
+
+FORMAT_VERSION = 1
+PLAN_CACHE_MAX = 4096
+
+_ABSENT, _NONE, _VALUE, _EMPTY = 0, 1, 2, 3
+_MISSING = object()
+
+
+# ---------------------------------------------------------------------------
+# Slot kinds: struct code, encoder (value -> int), decoder (int -> value)
+# ---------------------------------------------------------------------------
+
+def _enum(values: Tuple[str, ...]):
+    index = {v: i for i, v in enumerate(values)}
+    return "B", index.__getitem__, values.__getitem__
+
+
+def _dec_encode(value: str) -> int:
+    # canonical decimal string with <= 3 places -> coefficient * 4 + places
+    t = Decimal(value).as_tuple()
+    places = -t.exponent
+    if not 0 <= places <= 3:
+        raise ValueError(value)
+    coefficient = int("".join(map(str, t.digits)) or "0")
+    return (-coefficient if t.sign else coefficient) * 4 + places
+
+
+def _dec_decode(packed: int) -> str:
+    coefficient, places = packed >> 2, packed & 3
+    digits = str(abs(coefficient))
+    if places:
+        digits = digits.rjust(places + 1, "0")
+        digits = f"{digits[:-places]}.{digits[-places:]}"
+    return f"-{digits}" if coefficient < 0 else digits
+
+
+def _phone_encode(value: str) -> int:
+    if not value.startswith("+"):
+        raise ValueError(value)
+    return int(value[1:])
+
+
+def _tenths_encode(value: float) -> int:
+    if type(value) is not float:
+        raise TypeError(value)
+    return round(value * 10)
+
+
+def _int_encode(value: int) -> int:
+    if type(value) is not int:
+        raise TypeError(value)
+    return value
+
+
+_KINDS: Dict[str, Tuple[Optional[str], Optional[Callable], Optional[Callable]]] = {
+    "bool": (None, None, None),
+    "str": (None, None, None),
+    "int": ("H", _int_encode, int),
+    "tenths": ("h", _tenths_encode, lambda v: v / 10),
+    "decimal": ("i", _dec_encode, _dec_decode),
+    "date": ("I", lambda v: date.fromisoformat(v).toordinal(), lambda v: date.fromordinal(v).isoformat()),
+    "phone": ("Q", _phone_encode, lambda v: f"+{v}"),
+}
+
+
+def _slots_v1() -> Tuple[Tuple[str, str, Any], ...]:
+    """(key, kind, enum values) in NewScreeningForm answer order."""
+    slots = [
+        ("student_name", "str", None),
+        ("unique_student_id", "str", None),
+        ("dob", "date", None),
+        ("sex", "enum", ("M", "F", "O")),
+        ("parent_phone_e164", "phone", None),
+        ("weight_kg_r1", "decimal", None),
+        ("height_cm_r1", "decimal", None),
+    ]
+    slots += [(k, "bool", None) for k in TRUTHY_KEYS if k.startswith("health_")]
+    slots += [
+        ("appetite", "enum", ENUM_VALUES["appetite"]),
+        ("menarche_started", "bool", None),
+        ("menarche_age_years", "tenths", None),
+        ("pads_per_day", "int", None),
+        ("bleeding_clots", "bool", None),
+        ("cycle_length_days", "int", None),
+        ("diet_type", "enum", ENUM_VALUES["diet_type"]),
+    ]
+    slots += [(k, "bool", None) for k in YES_NO_KEYS if k != "deworming_taken"]
+    slots += [
+        ("deworming_taken", "bool", None),
+        ("deworming_date", "int", None),
+        ("hunger_vital_sign", "enum", ENUM_VALUES["hunger_vital_sign"]),
+    ]
+    return tuple(slots)
+
+
+class _Schema:
+    def __init__(self, version: int, slots):
+        self.version = version
+        self.keys = tuple(key for key, _, _ in slots)
+        self.key_set = frozenset(self.keys)
+        self.kinds = []
+        for key, kind, values in slots:
+            code, enc, dec = _enum(values) if kind == "enum" else _KINDS[kind]
+            self.kinds.append((key, kind if kind in ("bool", "str") else "fixed", code, enc, dec))
+        self.state_bytes = (len(slots) + 3) // 4
+        self.plans: Dict[bytes, tuple] = {}
+
+    def plan(self, states: bytes) -> tuple:
+        """(template dict, fixed struct, fixed (key, decoder) list, string keys) for one state pattern."""
+        plan = self.plans.get(states)
+        if plan is not None:
+            return plan
+        template, fmt, fixed, strings = {}, "<", [], []
+        for j, (key, kind, code, _, dec) in enumerate(self.kinds):
+            state = (states[j >> 2] >> ((j & 3) * 2)) & 3
+            if state == _ABSENT:
+                continue
+            if kind == "bool":
+                template[key] = None if state == _NONE else state == _EMPTY
+            elif state != _VALUE:
+                template[key] = None if state == _NONE else ""
+            else:
+                template[key] = None
+                if kind == "str":
+                    strings.append(key)
+                else:
+                    fmt += code
+                    fixed.append((key, dec))
+        plan = (template, struct.Struct(fmt), fixed, strings)
+        if len(self.plans) >= PLAN_CACHE_MAX:
+            self.plans.clear()
+        self.plans[states] = plan
+        return plan
+
+
+_SCHEMAS: Dict[int, _Schema] = {1: _Schema(1, _slots_v1())}
+
+
+# ---------------------------------------------------------------------------
+# Encode / decode
+# ---------------------------------------------------------------------------
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _read_varint(buf, pos: int) -> Tuple[int, int]:
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def encode_answers(answers: Optional[Dict[str, Any]], version: int = FORMAT_VERSION) -> bytes:
+    schema = _SCHEMAS[version]
+    answers = answers or {}
+    states = bytearray(schema.state_bytes)
+    fmt, values, strings = "<", [], []
+    overflow = {k: v for k, v in answers.items() if k not in schema.key_set}
+
+    for j, (key, kind, code, enc, dec) in enumerate(schema.kinds):
+        value = answers.get(key, _MISSING)
+        if value is _MISSING:
+            continue
+        if value is None:
+            state = _NONE
+        elif kind == "bool":
+            if type(value) is not bool:
+                overflow[key] = value
+                continue
+            state = _EMPTY if value else _VALUE
+        elif value == "" and type(value) is str:
+            state = _EMPTY
+        elif kind == "str":
+            if type(value) is not str:
+                overflow[key] = value
+                continue
+            strings.append(value.encode("utf-8"))
+            state = _VALUE
+        else:
+            try:
+                packed = enc(value)
+                struct.pack("<" + code, packed)
+                ok = dec(packed) == value and type(dec(packed)) is type(value)
+            except (KeyError, TypeError, ValueError, InvalidOperation, OverflowError, struct.error):
+                ok = False
+            if not ok:
+                overflow[key] = value
+                continue
+            fmt += code
+            values.append(packed)
+            state = _VALUE
+        states[j >> 2] |= state << ((j & 3) * 2)
+
+    out = bytearray((version,))
+    out += states
+    out += struct.pack(fmt, *values)
+    for raw in strings:
+        out += _varint(len(raw))
+        out += raw
+    if overflow:
+        out += json.dumps(overflow, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return bytes(out)
+
+
+def is_packed(raw) -> bool:
+    return bool(raw) and raw[0] in _SCHEMAS
+
+
+def decode_answers(raw) -> Dict[str, Any]:
+    """The answers dict for a stored value (packed bytes, legacy JSON text, or None)."""
+    if raw is None:
+        return {}
+    if isinstance(raw, str):
+        return json.loads(raw) if raw else {}
+    if isinstance(raw, memoryview):
+        raw = raw.tobytes()
+    if not raw:
+        return {}
+    schema = _SCHEMAS.get(raw[0])
+    if schema is None:
+        return json.loads(raw)
+
+    pos = 1 + schema.state_bytes
+    template, fixed_struct, fixed, strings = schema.plan(raw[1:pos])
+    out = template.copy()
+    if fixed:
+        for (key, dec), value in zip(fixed, fixed_struct.unpack_from(raw, pos)):
+            out[key] = dec(value)
+    pos += fixed_struct.size
+    for key in strings:
+        n, pos = _read_varint(raw, pos)
+        out[key] = raw[pos:pos + n].decode("utf-8")
+        pos += n
+    if pos < len(raw):
+        out.update(json.loads(raw[pos:]))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Model field
+# ---------------------------------------------------------------------------
+
+class PackedAnswersField(models.BinaryField):
+    """A dict stored with encode_answers(); bytes values are written as they are."""
+
+    description = "Screening answers (packed binary)"
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("default", dict)
+        super().__init__(*args, **kwargs)
+
+    def from_db_value(self, value, expression, connection):
+        return decode_answers(value)
+
+    def to_python(self, value):
+        if isinstance(value, dict):
+            return value
+        return decode_answers(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if isinstance(value, dict):
+            value = encode_answers(value)
+        return super().get_db_prep_value(value, connection, prepared)
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj))
+
+
+# ---------------------------------------------------------------------------
+# Migration path
+# ---------------------------------------------------------------------------
+
+@dataclass
+class PackStats:
+    scanned: int = 0
+    rewritten: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+
+def pack_stored_answers(qs=None, *, chunk_size: int = 2000, to_json: bool = False, progress=None) -> PackStats:
+    """Rewrite stored answers of `qs` (default: all screenings) in the packed format.
+
+    Migration 0009 turns the JSON column into a binary one in place, so
+    existing rows hold JSON text until this runs; both read back the same.
+    With `to_json`, rows are written back as JSON text instead (run this before
+    reversing the migration).
+    """
+    from .models import Screening
+
+    qs = Screening.objects.all() if qs is None else qs
+    raw_qs = qs.order_by("id").annotate(
+        raw=ExpressionWrapper(F("answers"), output_field=models.BinaryField())
+    ).values_list("id", "raw")
+    stats, last_id = PackStats(), 0
+    while True:
+        rows = list(raw_qs.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return stats
+        updates = []
+        for pk, raw in rows:
+            raw = raw.encode("utf-8") if isinstance(raw, str) else bytes(raw or b"")
+            if is_packed(raw) != to_json:
+                continue
+            answers = decode_answers(raw)
+            new = json.dumps(answers).encode("utf-8") if to_json else encode_answers(answers)
+            updates.append(Screening(id=pk, answers=new))
+            stats.bytes_before += len(raw)
+            stats.bytes_after += len(new)
+        if updates:
+            Screening.objects.bulk_update(updates, ["answers"], batch_size=500)
+        stats.scanned += len(rows)
+        stats.rewritten += len(updates)
+        last_id = rows[-1][0]
+        if progress:
+            progress(stats)
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ScreeningConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'screening'
+
+    def ready(self):
+        # Drop the cached active ruleset when a RiskRuleset is published/edited.
+        from . import signals
+
+        # Backfill the StudentStatus projection for students that have no row yet
+        post_migrate.connect(signals.fill_status_after_migrate, sender=self)
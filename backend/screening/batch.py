@@ -0,0 +1,472 @@
+"""Vectorized batch (re-)scoring of stored screenings.
+
+`screening.services.compute_risk` scores one screening at a time. This module
+scores whole chunks of `Screening` rows at once:
+
+  1) rows are loaded with `values_list` (no model instances),
+  2) `answers` is flattened into NumPy columns (one pass over the JSON),
+  3) BMI, BAZ, MUAC level, health/diet flags and the final level are computed
+     as array operations,
+  4) only rows whose stored result differs are written back via `bulk_update`
+     (including the indexed facet columns, see screening.facets).
+
+Thresholds come from a compiled ruleset (screening.rules), so the output is
+identical to calling `compute_risk` row by row with the same ruleset (same
+level, same `red_flags` list in the same order, same stored bmi/baz).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from django.db import transaction
+from django.db.backends.utils import format_number
+from django.utils import timezone
+
+from .facets import BAZ_CODES, DIET_BITS, FACET_FIELDS, HEALTH_FACETS
+from .growth_reference import BFA, get_table, reference_hash
+from .models import Screening
+from .rules import ENUM_VALUES, TRUTHY_KEYS, YES_NO_KEYS, CompiledRuleset, enum_code, get_active_ruleset
+from .status import refresh_student_status
+
+# Columns pulled from the DB for scoring (order matters: see load_columns()).
+SCORING_FIELDS = (
+    "id", "organization_id", "screened_at", "gender",
+    "age_years", "age_months", "height_cm", "weight_kg", "muac_cm",
+    "answers", "risk_level", "red_flags", "bmi", "baz",
+    "ruleset_version", "reference_hash", *FACET_FIELDS,
+)
+
+LEVELS = np.array(["GREEN", "YELLOW", "RED"])
+_GREEN, _YELLOW, _RED = 0, 1, 2
+_LEVEL_CODES = {"GREEN": _GREEN, "YELLOW": _YELLOW, "RED": _RED}
+
+# MUAC level codes: 0 == not applicable
+_MUAC_FLAGS = (None, "muac_red", "muac_yellow", None)
+
+# Column positions of the flattened answer catalogs (see screening.rules)
+_TRUTHY_IDX = {k: j for j, k in enumerate(TRUTHY_KEYS)}
+_YES_NO_IDX = {k: j for j, k in enumerate(YES_NO_KEYS)}
+_YES, _NO = 1, 2  # yes/no codes: 0 == anything other than a real bool
+
+
+def _to_int(value) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except Exception:
+        return None
+
+
+def _to_float(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+@dataclass
+class ScreeningColumns:
+    """Column-oriented view of a chunk of screenings (one array per attribute)."""
+    ids: np.ndarray
+    org_ids: np.ndarray
+    screened_at: List[Any]
+    sex: np.ndarray                # "M" / "F" / other (upper-cased)
+    age_years: np.ndarray          # float, NaN when missing
+    age_months: np.ndarray         # float, NaN when missing
+    height_cm: np.ndarray
+    weight_kg: np.ndarray
+    muac_cm: np.ndarray
+    truthy: np.ndarray             # bool (n, len(TRUTHY_KEYS)), bool(answers[key])
+    yes_no: np.ndarray             # int8 (n, len(YES_NO_KEYS)), _YES / _NO / 0
+    enums: Dict[str, np.ndarray]   # key -> int8 rules.enum_code() (0 == other/missing)
+    pads_per_day: np.ndarray       # float, NaN when missing/unparseable
+    cycle_length_days: np.ndarray  # float, NaN when missing/unparseable
+    # (risk_level, red_flags, bmi, baz, ruleset_version, reference_hash, *FACET_FIELDS)
+    stored: List[Tuple[Any, ...]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def load_columns(rows: Sequence[tuple]) -> ScreeningColumns:
+    """Build columns from `values_list(*SCORING_FIELDS)` tuples.
+
+    This is the only per-row Python loop: it flattens every answer a ruleset
+    may reference, using exactly the same truthiness/identity rules as the
+    scalar evaluator in screening.rules. Trailing facet columns are optional
+    (they are only compared against when re-scoring).
+    """
+    n = len(rows)
+    ids = np.empty(n, dtype=np.int64)
+    org_ids = np.empty(n, dtype=np.int64)
+    sex = np.empty(n, dtype="<U1")
+    num = np.full((n, 5), np.nan)                  # age_years, age_months, height, weight, muac
+    truthy = np.zeros((n, len(TRUTHY_KEYS)), dtype=bool)
+    yes_no = np.zeros((n, len(YES_NO_KEYS)), dtype=np.int8)
+    enums = {key: np.zeros(n, dtype=np.int8) for key in ENUM_VALUES}
+    girls = np.full((n, 2), np.nan)                # pads_per_day, cycle_length_days
+    screened_at: List[Any] = []
+    stored: List[Tuple[Any, ...]] = []
+
+    for i, row in enumerate(rows):
+        (pk, org_id, at, gender, age_y, age_m, h, w, muac, answers,
+         risk_level, red_flags, bmi, baz, version, ref_hash) = row[:16]
+        answers = answers or {}
+        ids[i] = pk
+        org_ids[i] = org_id
+        screened_at.append(at)
+        sex[i] = (gender or "").upper()[:1]
+        num[i] = (_to_float(age_y), _to_float(age_m), _to_float(h), _to_float(w), _to_float(muac))
+        stored.append((risk_level, red_flags, bmi, baz, version, ref_hash, *row[16:]))
+
+        for j, key in enumerate(TRUTHY_KEYS):
+            if answers.get(key):
+                truthy[i, j] = True
+        for j, key in enumerate(YES_NO_KEYS):
+            v = answers.get(key)
+            if v is True:
+                yes_no[i, j] = _YES
+            elif v is False:
+                yes_no[i, j] = _NO
+        for key, col in enums.items():
+            col[i] = enum_code(key, answers.get(key))
+
+        pads = _to_int(answers.get("pads_per_day"))
+        cycle = _to_int(answers.get("cycle_length_days"))
+        girls[i] = (np.nan if pads is None else pads, np.nan if cycle is None else cycle)
+
+    return ScreeningColumns(
+        ids=ids, org_ids=org_ids, screened_at=screened_at, sex=sex,
+        age_years=num[:, 0], age_months=num[:, 1],
+        height_cm=num[:, 2], weight_kg=num[:, 3], muac_cm=num[:, 4],
+        truthy=truthy, yes_no=yes_no, enums=enums,
+        pads_per_day=girls[:, 0], cycle_length_days=girls[:, 1], stored=stored,
+    )
+
+
+def _enum_mask(codes: np.ndarray, key: str, values: Iterable[str]) -> np.ndarray:
+    return np.isin(codes, [enum_code(key, v) for v in values])
+
+
+# ---------------------------------------------------------------------------
+# Array kernels
+# ---------------------------------------------------------------------------
+
+def compute_bmi(height_cm: np.ndarray, weight_kg: np.ndarray) -> np.ndarray:
+    m = height_cm / 100.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bmi = weight_kg / (m * m)
+    return np.where(height_cm > 0, bmi, np.nan)
+
+
+def compute_baz(bmi: np.ndarray, age_years: np.ndarray, age_months: np.ndarray, sex: np.ndarray,
+                age_range: Tuple[float, float] = (5.0, 18.0)) -> np.ndarray:
+    """BAZ for rows inside the ruleset's age range (M/F only); NaN elsewhere."""
+    baz = np.full(len(bmi), np.nan)
+    lo, hi = age_range
+    eligible = ~np.isnan(bmi) & (age_years >= lo) & (age_years <= hi)
+    months = np.where(np.isnan(age_months), age_years * 12.0, age_months)
+    for s in ("M", "F"):
+        mask = eligible & (sex == s)
+        table = get_table(BFA, s)
+        if table is None or not mask.any():
+            continue
+        baz[mask] = table.zscores(bmi[mask], months[mask])
+    return baz
+
+
+def baz_category(baz: np.ndarray, rs: CompiledRuleset) -> np.ndarray:
+    """Index into rs.baz_categories (0 where BAZ is NaN, first matching band wins)."""
+    conditions = [np.isnan(baz)]
+    for band in rs.baz_bands:
+        conditions.append(baz < band.below if band.below is not None else baz > band.above)
+    return np.select(conditions, list(range(len(conditions))), default=len(conditions)).astype(np.int8)
+
+
+def muac_level(muac_cm: np.ndarray, age_months: np.ndarray, rs: CompiledRuleset) -> np.ndarray:
+    """0 = not applicable, 1 = RED, 2 = YELLOW, 3 = GREEN."""
+    lo, hi = rs.muac_age_months
+    applicable = ~np.isnan(muac_cm) & (age_months >= lo) & (age_months <= hi)
+    level = np.where(muac_cm < rs.muac_red_below, 1, np.where(muac_cm <= rs.muac_yellow_max, 2, 3))
+    return np.where(applicable, level, 0).astype(np.int8)
+
+
+def diet_flag_matrix(cols: ScreeningColumns, rs: CompiledRuleset) -> np.ndarray:
+    """bool (n, len(rs.diet_flags)): answer matched `when` and the diet-type condition holds."""
+    flags = np.zeros((len(cols), len(rs.diet_flags)), dtype=bool)
+    for j, spec in enumerate(rs.diet_flags):
+        hit = cols.yes_no[:, _YES_NO_IDX[spec.key]] == (_YES if spec.when else _NO)
+        if spec.diet_types is not None:
+            hit &= _enum_mask(cols.enums["diet_type"], "diet_type", spec.diet_types)
+        flags[:, j] = hit
+    return flags
+
+
+_HEALTH_IDX = {k: j for j, k in enumerate(HEALTH_FACETS)}
+
+
+def health_flag_matrix(cols: ScreeningColumns, rs: CompiledRuleset) -> np.ndarray:
+    """bool (n, len(facets.HEALTH_FACETS)): Section-C red flags, appetite and adolescent-girl checks."""
+    flags = np.zeros((len(cols), len(HEALTH_FACETS)), dtype=bool)
+    for k in rs.health_keys:
+        flags[:, _HEALTH_IDX[k]] = cols.truthy[:, _TRUTHY_IDX[k]]
+    flags[:, _HEALTH_IDX["appetite_poor"]] = _enum_mask(cols.enums["appetite"], "appetite", rs.appetite_red)
+    adolescent_girl = (cols.sex == "F") & (cols.age_years >= rs.menstrual_min_age_years)
+    heavy = np.zeros(len(cols), dtype=bool)
+    if rs.heavy_pads_per_day is not None:
+        heavy |= cols.pads_per_day >= rs.heavy_pads_per_day
+    if rs.clots_are_heavy:
+        heavy |= cols.truthy[:, _TRUTHY_IDX["bleeding_clots"]]
+    flags[:, _HEALTH_IDX["heavy_bleeding"]] = adolescent_girl & heavy
+    if rs.irregular_cycle_days_over is not None:
+        flags[:, _HEALTH_IDX["irregular_cycles"]] = adolescent_girl & (cols.cycle_length_days > rs.irregular_cycle_days_over)
+    return flags
+
+
+@dataclass
+class BatchScores:
+    level: np.ndarray       # int8 codes into LEVELS
+    bmi: np.ndarray         # float, NaN when unavailable
+    baz: np.ndarray         # float, NaN when unavailable
+    baz_cat: np.ndarray     # int8 codes into ruleset.baz_categories
+    muac: np.ndarray        # int8 muac level codes
+    food_red: np.ndarray    # bool
+    diet_mask: np.ndarray   # int64 bitmask over ruleset.diet_flags
+    ruleset: CompiledRuleset
+    health_facets: np.ndarray = None  # int64 bitmask over facets.HEALTH_FACETS
+    diet_facets: np.ndarray = None    # int64 bitmask over facets.DIET_FACETS
+    hunger: np.ndarray = None         # int8 rules.enum_code("hunger_vital_sign")
+    diet_type: np.ndarray = None      # int8 rules.enum_code("diet_type")
+
+    def flags(self, i: int) -> List[str]:
+        """Rebuild the compute_risk() `flags` list for row i."""
+        out = [f"baz_{self.ruleset.baz_categories[self.baz_cat[i]]}"]
+        muac = _MUAC_FLAGS[self.muac[i]]
+        if muac:
+            out.append(muac)
+        if self.food_red[i]:
+            out.append("food_insecurity")
+        out.extend(_diet_names(self.ruleset, int(self.diet_mask[i])))
+        if not np.isnan(self.baz[i]):
+            out.append(f"baz={float(self.baz[i]):.2f}")
+        if not np.isnan(self.bmi[i]):
+            out.append(f"bmi={float(self.bmi[i]):.1f}")
+        return out
+
+    def facets(self, i: int) -> Dict[str, int]:
+        """Facet column values for row i (same as facets.facets_from_derived())."""
+        category = self.ruleset.baz_categories[self.baz_cat[i]]
+        return {
+            "health_flags": int(self.health_facets[i]),
+            "diet_flags": int(self.diet_facets[i]),
+            "hunger_code": int(self.hunger[i]),
+            "diet_type_code": int(self.diet_type[i]),
+            "baz_category_code": BAZ_CODES.get(category, 0),
+        }
+
+
+_DIET_NAME_CACHE: Dict[Tuple[str, int], Tuple[str, ...]] = {}
+
+
+def _diet_names(rs: CompiledRuleset, mask: int) -> Tuple[str, ...]:
+    key = (rs.content_hash, mask)
+    names = _DIET_NAME_CACHE.get(key)
+    if names is None:
+        names = tuple(d.flag for j, d in enumerate(rs.diet_flags) if mask & (1 << j))
+        _DIET_NAME_CACHE[key] = names
+    return names
+
+
+def score_columns(cols: ScreeningColumns, ruleset: Optional[CompiledRuleset] = None, *,
+                  bmi: Optional[np.ndarray] = None, baz: Optional[np.ndarray] = None) -> BatchScores:
+    """Array equivalent of compute_risk() over a whole chunk.
+
+    `bmi`/`baz` may be passed in precomputed (BAZ over all ages, as returned by
+    compute_baz(..., age_range=(-inf, inf))); the ruleset's BAZ age range is
+    still applied here.
+    """
+    rs = ruleset or get_active_ruleset()
+    if bmi is None:
+        bmi = compute_bmi(cols.height_cm, cols.weight_kg)
+    if baz is None:
+        baz = compute_baz(bmi, cols.age_years, cols.age_months, cols.sex, rs.baz_age_years)
+    else:
+        lo, hi = rs.baz_age_years
+        baz = np.where((cols.age_years >= lo) & (cols.age_years <= hi), baz, np.nan)
+    cat = baz_category(baz, rs)
+    cat_levels = np.array(
+        [_LEVEL_CODES[rs.baz_unavailable_level]]
+        + [_LEVEL_CODES[b.level] for b in rs.baz_bands]
+        + [_LEVEL_CODES[rs.baz_default[0]]],
+        dtype=np.int8,
+    )
+    growth = cat_levels[cat]
+
+    muac = muac_level(cols.muac_cm, cols.age_months, rs)
+    hunger = cols.enums["hunger_vital_sign"]
+    food_red = _enum_mask(hunger, "hunger_vital_sign", rs.hunger_red)
+    hunger_green = _enum_mask(hunger, "hunger_vital_sign", rs.hunger_green)
+    diet = diet_flag_matrix(cols, rs)
+
+    health = health_flag_matrix(cols, rs)
+
+    red = (growth == _RED) | (muac == 1) | health.any(axis=1) | food_red
+    yellow = (growth == _YELLOW) | (muac == 2) | diet.any(axis=1) | ~hunger_green
+    level = np.where(red, _RED, np.where(yellow, _YELLOW, _GREEN)).astype(np.int8)
+
+    bits = 1 << np.arange(diet.shape[1], dtype=np.int64)
+    diet_facet_bits = np.array([DIET_BITS.get(d.flag, 0) for d in rs.diet_flags], dtype=np.int64)
+    health_bits = 1 << np.arange(health.shape[1], dtype=np.int64)
+    return BatchScores(
+        level=level, bmi=bmi, baz=baz, baz_cat=cat, muac=muac,
+        food_red=food_red, diet_mask=diet.astype(np.int64) @ bits, ruleset=rs,
+        health_facets=health.astype(np.int64) @ health_bits,
+        diet_facets=diet.astype(np.int64) @ diet_facet_bits if len(rs.diet_flags) else np.zeros(len(cols), np.int64),
+        hunger=hunger, diet_type=cols.enums["diet_type"],
+    )
+
+
+# ---------------------------------------------------------------------------
+# DB driver
+# ---------------------------------------------------------------------------
+
+_BMI_FIELD = Screening._meta.get_field("bmi")
+_BAZ_FIELD = Screening._meta.get_field("baz")
+
+
+def _as_stored(model_field, value: float) -> Optional[Decimal]:
+    """Round a float the way the DecimalField would when saving it."""
+    if np.isnan(value):
+        return None
+    return Decimal(format_number(model_field.to_python(float(value)), model_field.max_digits, model_field.decimal_places))
+
+
+def iter_chunks(qs, chunk_size: int) -> Iterator[List[tuple]]:
+    """Keyset-paginate `qs` by id, yielding lists of SCORING_FIELDS tuples."""
+    last_id = 0
+    base = qs.order_by("id").values_list(*SCORING_FIELDS)
+    while True:
+        rows = list(base.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+@dataclass
+class RescoreStats:
+    scanned: int = 0
+    changed: int = 0
+    level_changes: Dict[str, int] = field(default_factory=dict)  # "YELLOW->RED" -> n
+    touched_days: Set[Tuple[int, date]] = field(default_factory=set)
+
+
+_RESULT_FIELDS = ["risk_level", "red_flags", "bmi", "baz", "ruleset_version", "reference_hash", *FACET_FIELDS]
+
+
+def rescore_chunk(rows: Sequence[tuple], *, ruleset: Optional[CompiledRuleset] = None, dry_run: bool = False,
+                  stats: Optional[RescoreStats] = None) -> RescoreStats:
+    stats = stats or RescoreStats()
+    rs = ruleset or get_active_ruleset()
+    ref_hash = reference_hash()
+    cols = load_columns(rows)
+    scores = score_columns(cols, rs)
+    levels = LEVELS[scores.level]
+
+    updates: List[Screening] = []
+    for i in range(len(cols)):
+        old_level = cols.stored[i][0]
+        new_level = str(levels[i])
+        facets = scores.facets(i)
+        new = (
+            new_level, scores.flags(i),
+            _as_stored(_BMI_FIELD, scores.bmi[i]), _as_stored(_BAZ_FIELD, scores.baz[i]),
+            rs.version, ref_hash, *(facets[f] for f in FACET_FIELDS),
+        )
+        if new == cols.stored[i]:
+            continue
+
+        stats.changed += 1
+        if new_level != old_level:
+            key = f"{old_level}->{new_level}"
+            stats.level_changes[key] = stats.level_changes.get(key, 0) + 1
+            stats.touched_days.add((int(cols.org_ids[i]), timezone.localtime(cols.screened_at[i]).date()))
+        updates.append(Screening(id=int(cols.ids[i]), **dict(zip(_RESULT_FIELDS, new))))
+
+    stats.scanned += len(cols)
+    if updates and not dry_run:
+        now = timezone.now()
+        for u in updates:
+            u.updated_at = now  # bulk_update() does not fill auto_now; the warehouse export reads it
+        with transaction.atomic():
+            Screening.objects.bulk_update(updates, _RESULT_FIELDS + ["updated_at"], batch_size=500)
+            refresh_student_status(
+                Screening.objects.filter(id__in=[u.id for u in updates]).values_list("student_id", flat=True)
+            )
+    return stats
+
+
+def rescore_screenings(qs=None, *, ruleset: Optional[CompiledRuleset] = None, stale_only: bool = False,
+                       chunk_size: int = 5000, dry_run: bool = False, progress=None) -> RescoreStats:
+    """Re-score every screening in `qs` (default: all) in id-ordered chunks.
+
+    With `stale_only`, rows already scored under this ruleset version and the
+    installed reference tables are skipped at the SQL level.
+
+    bulk_update() does not fire signals, so rollup days whose RED counts
+    changed are collected in `stats.touched_days` for the caller to rebuild.
+    """
+    qs = Screening.objects.all() if qs is None else qs
+    rs = ruleset or get_active_ruleset()
+    if stale_only:
+        qs = qs.exclude(ruleset_version=rs.version, reference_hash=reference_hash())
+    stats = RescoreStats()
+    for rows in iter_chunks(qs, chunk_size):
+        rescore_chunk(rows, ruleset=rs, dry_run=dry_run, stats=stats)
+        if progress:
+            progress(stats)
+    return stats
+
+
+def backfill_facets(qs=None, *, ruleset: Optional[CompiledRuleset] = None, chunk_size: int = 5000,
+                    progress=None) -> RescoreStats:
+    """Fill the facet columns of `qs` (default: all screenings) without touching the scores.
+
+    Facets are evaluated with the active ruleset; only rows whose stored
+    facets differ are written (`stats.changed`). Risk levels, flags and the
+    student status projection are left as they are.
+    """
+    qs = Screening.objects.all() if qs is None else qs
+    rs = ruleset or get_active_ruleset()
+    stats = RescoreStats()
+    for rows in iter_chunks(qs, chunk_size):
+        cols = load_columns(rows)
+        scores = score_columns(cols, rs)
+        updates = []
+        now = timezone.now()
+        for i in range(len(cols)):
+            facets = scores.facets(i)
+            if tuple(facets[f] for f in FACET_FIELDS) != cols.stored[i][6:]:
+                updates.append(Screening(id=int(cols.ids[i]), updated_at=now, **facets))
+        if updates:
+            Screening.objects.bulk_update(updates, [*FACET_FIELDS, "updated_at"], batch_size=500)
+        stats.scanned += len(cols)
+        stats.changed += len(updates)
+        if progress:
+            progress(stats)
+    return stats
+
+
+def rebuild_rollups(days: Iterable[Tuple[int, date]]) -> int:
+    from accounts.models import Organization
+    from reporting.services import build_daily_rollup
+
+    days = sorted(set(days))
+    orgs = Organization.objects.in_bulk({org_id for org_id, _ in days})
+    for org_id, day in days:
+        if org_id in orgs:
+            build_daily_rollup(orgs[org_id], day)
+    return len(days)
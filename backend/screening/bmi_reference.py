@@ -1,38 +1,18 @@
-import json
-from functools import lru_cache
-from pathlib import Path
-from typing import Dict, Tuple
+from typing import Optional, Tuple
 
-_DATA_DIR = Path(__file__).resolve().parent / "data"
-_BOYS_FILE = _DATA_DIR / "bmi_boys_5_18.json"
-_GIRLS_FILE = _DATA_DIR / "bmi_girls_5_18.json"
+from .growth_reference import BFA, age_in_months, get_table
 
-@lru_cache(maxsize=2)
-def _load_table(sex: str) -> Dict[float, Dict[str, float]]:
-    sex = (sex or "").upper()
-    path = _BOYS_FILE if sex == "M" else _GIRLS_FILE
-    raw = json.loads(path.read_text(encoding="utf-8"))
-    return {float(k): {"median": float(v["median"]), "sd": float(v["sd"])} for k, v in raw.items()}
 
-def nearest_age_key(age_years: float, sex: str) -> float:
-    table = _load_table(sex)
-    ages = sorted(table.keys())
-    if age_years <= ages[0]:
-        return ages[0]
-    if age_years >= ages[-1]:
-        return ages[-1]
-    return min(ages, key=lambda a: abs(a - age_years))
-
-def bmi_to_baz(*, bmi: float, age_years: float, sex: str) -> Tuple[float, float, float, float]:
+def bmi_to_baz(*, bmi: float, age_years: float, sex: str, age_months: Optional[int] = None) -> Tuple[float, float, float, float]:
     """
-    BAZ = (BMI - median) / SD
-    Returns: (baz, ref_age_used, median, sd)
+    BAZ = (BMI - median) / SD, with median/SD linearly interpolated at the
+    child's age in months (see screening.growth_reference).
+    Returns: (baz, ref_age_years_used, median, sd)
     """
-    ref_age = nearest_age_key(age_years, sex)
-    ref = _load_table(sex)[ref_age]
-    median = ref["median"]
-    sd = ref["sd"]
-    if sd <= 0:
-        raise ValueError("Invalid SD in BMI reference table")
-    baz = (float(bmi) - float(median)) / float(sd)
-    return baz, ref_age, median, sd
+    table = get_table(BFA, sex)
+    if table is None:
+        raise ValueError(f"No BMI reference table for sex={sex!r}")
+    months = age_in_months(age_years, age_months)
+    months = min(max(months, table.min_months), table.max_months)
+    baz, (median, sd) = table.zscore(float(bmi), months)
+    return baz, months / 12.0, median, sd
@@ -0,0 +1,455 @@
+"""Bulk screening import (CSV / XLSX) for a whole class.
+
+Field teams run screening camps on paper and then enter 40-200 children at
+once. Instead of one `teacher_add_student` / `screening_create` round trip per
+child, an upload goes through:
+
+  1) stream parsing (csv reader / openpyxl read-only rows) into dicts keyed by
+     `NewScreeningForm` field names (headers may also be the form labels),
+  2) per-row validation with `NewScreeningForm` itself, collecting row-level
+     errors instead of stopping at the first one,
+  3) per chunk: guardian and student upserts with bulk queries, vectorized
+     scoring (screening.batch) and one `bulk_create` of the screenings,
+  4) one rollup rebuild per affected (org, day) and one audit row at the end,
+  5) after commit, the deferred milestone completion and enforcement of
+     screening.writes (bulk_create skips the post_save receivers).
+
+Students are matched on `student_code` (the form's "Unique Student ID") within
+the organization: existing students are updated and moved to the target
+class, new ones are created in it. No WhatsApp messages are prepared here;
+teachers can still send them from each screening's result page.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from django import forms as django_forms
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from accounts.models import Organization
+from audit.utils import audit_log
+from roster.models import Classroom, Guardian, Student
+from roster.search import reindex_students
+
+from .batch import LEVELS, _BAZ_FIELD, _BMI_FIELD, _as_stored, load_columns, rebuild_rollups, score_columns
+from .forms import NewScreeningForm
+from .growth_reference import reference_hash
+from .models import Screening
+from .rules import get_active_ruleset
+from .status import refresh_student_status
+from .writes import dispatch_side_effects
+
+CHUNK_SIZE = 500
+MAX_ROWS = 5000
+OPTIONAL_COLUMNS = ("is_low_income",)
+
+_TRUE = {"true", "yes", "y", "1", "on", "t"}
+_FALSE = {"false", "no", "n", "0", "off", "f"}
+_DMY = re.compile(r"^(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})$")
+
+
+class ImportFileError(ValueError):
+    """The file itself cannot be read (format, header, size)."""
+
+
+@dataclass
+class RowError:
+    line: int
+    field: str
+    message: str
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    screenings_created: int = 0
+    students_created: int = 0
+    students_updated: int = 0
+    guardians_created: int = 0
+    level_counts: Dict[str, int] = field(default_factory=dict)
+    errors: List[RowError] = field(default_factory=list)
+    dry_run: bool = False
+
+    @property
+    def error_lines(self) -> int:
+        return len({e.line for e in self.errors})
+
+
+# ---------------------------------------------------------------------------
+# Column layout
+# ---------------------------------------------------------------------------
+
+def form_columns() -> List[str]:
+    """Importable columns, in NewScreeningForm order (the template header)."""
+    return list(NewScreeningForm.base_fields) + list(OPTIONAL_COLUMNS)
+
+
+def _header_aliases() -> Dict[str, str]:
+    aliases = {}
+    for name, f in NewScreeningForm.base_fields.items():
+        aliases[name.lower()] = name
+        if f.label:
+            aliases[str(f.label).strip().lower()] = name
+    for name in OPTIONAL_COLUMNS:
+        aliases[name] = name
+    aliases["low income family"] = "is_low_income"
+    return aliases
+
+
+def template_csv() -> str:
+    buff = io.StringIO()
+    csv.writer(buff).writerow(form_columns())
+    return buff.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Stream parsing
+# ---------------------------------------------------------------------------
+
+def _iter_csv(fileobj) -> Iterator[Sequence[Any]]:
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.reader(text)
+    finally:
+        text.detach()
+
+
+def _iter_xlsx(fileobj) -> Iterator[Sequence[Any]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("XLSX upload needs the openpyxl package; upload a CSV instead.")
+    wb = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def iter_records(fileobj, filename: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line number, {form field: raw value}) for each non-empty data row."""
+    name = (filename or "").lower()
+    if name.endswith(".xlsx"):
+        rows = _iter_xlsx(fileobj)
+    elif name.endswith(".csv") or not name:
+        rows = _iter_csv(fileobj)
+    else:
+        raise ImportFileError("Upload a .csv or .xlsx file.")
+
+    aliases = _header_aliases()
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise ImportFileError("The file is empty.")
+    columns = [aliases.get(str(h or "").strip().lower()) for h in header]
+    required = {n for n, f in NewScreeningForm.base_fields.items() if f.required}
+    missing = required - set(columns)
+    if missing:
+        raise ImportFileError(f"Missing column(s): {', '.join(sorted(missing))}")
+
+    for line, values in enumerate(rows, start=2):
+        if not any(v not in (None, "") for v in values):
+            continue
+        yield line, {c: v for c, v in zip(columns, values) if c}
+
+
+# ---------------------------------------------------------------------------
+# Row validation
+# ---------------------------------------------------------------------------
+
+def _cell_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _form_data(record: Dict[str, Any]) -> Dict[str, str]:
+    """Spreadsheet cells -> the POST-style values NewScreeningForm expects."""
+    data: Dict[str, str] = {}
+    fields = NewScreeningForm.base_fields
+    for name, raw in record.items():
+        f = fields.get(name)
+        text = _cell_text(raw)
+        low = text.lower()
+        if isinstance(f, django_forms.BooleanField):
+            # CheckboxInput treats any non-empty string (even "no") as checked
+            if low in _TRUE:
+                data[name] = "true"
+            elif low in _FALSE or not low:
+                data[name] = "false"
+            else:
+                data[name] = text
+        elif isinstance(f, django_forms.TypedChoiceField) and dict(f.choices).keys() >= {"yes", "no"}:
+            data[name] = "yes" if low in _TRUE else "no" if low in _FALSE else text
+        elif isinstance(f, django_forms.ChoiceField):
+            by_label = {str(label).lower(): value for value, label in f.choices}
+            data[name] = by_label.get(low, text.upper())
+        elif isinstance(f, django_forms.DateField):
+            m = _DMY.match(text)
+            data[name] = f"{m.group(3)}-{int(m.group(2)):02d}-{int(m.group(1)):02d}" if m else text
+        else:
+            data[name] = text
+    return data
+
+
+@dataclass
+class ValidRow:
+    line: int
+    answers: Dict[str, Any]
+    derived: Dict[str, Any]
+    dob: Optional[date]
+    phone: str
+    code: str
+    is_low_income: Optional[bool]
+    # set by offline sync (screening.sync); imports use "now" and the upload's class
+    sync_key: Optional[str] = None
+    screened_at: Optional[datetime] = None
+    classroom_id: Optional[int] = None
+
+
+def validate_record(line: int, record: Dict[str, Any]) -> Tuple[Optional[ValidRow], List[RowError]]:
+    form = NewScreeningForm(_form_data(record), student=None, organization=None)
+    if not form.is_valid():
+        errors = []
+        for name, messages in form.errors.items():
+            for message in messages:
+                errors.append(RowError(line, "" if name == "__all__" else name, str(message)))
+        return None, errors
+
+    cd = form.cleaned_data
+    low_income = _cell_text(record.get("is_low_income")).lower()
+    return ValidRow(
+        line=line,
+        answers=cd["answers"],
+        derived=cd["_derived"],
+        dob=cd.get("dob"),
+        phone=cd["parent_phone_e164"],
+        code=cd["unique_student_id"],
+        is_low_income=True if low_income in _TRUE else False if low_income in _FALSE else None,
+    ), []
+
+
+# ---------------------------------------------------------------------------
+# Bulk writes
+# ---------------------------------------------------------------------------
+
+def _upsert_guardians(org: Organization, phones: Set[str]) -> Tuple[Dict[str, int], int]:
+    existing = dict(Guardian.objects.filter(organization=org, phone_e164__in=phones).values_list("phone_e164", "id"))
+    new = [
+        Guardian(organization=org, phone_e164=p, full_name="Parent", whatsapp_opt_in=True)
+        for p in sorted(phones - existing.keys())
+    ]
+    if new:
+        Guardian.objects.bulk_create(new, batch_size=CHUNK_SIZE, ignore_conflicts=True)
+        existing.update(Guardian.objects.filter(
+            organization=org, phone_e164__in=[g.phone_e164 for g in new]
+        ).values_list("phone_e164", "id"))
+    return existing, len(new)
+
+
+def _students_by_code(org: Organization, codes: Iterable[str]) -> Dict[str, Student]:
+    lowered = {c.lower() for c in codes}
+    qs = (Student.objects.filter(organization=org)
+          .annotate(code_lower=Lower("student_code"))
+          .filter(code_lower__in=lowered))
+    return {s.code_lower: s for s in qs}
+
+
+def _upsert_students(org: Organization, classroom: Optional[Classroom], rows: List[ValidRow],
+                     guardian_ids: Dict[str, int]) -> Tuple[Dict[str, Student], int, int]:
+    """Create/update students by code. `classroom` (if given) wins over each row's classroom_id."""
+    existing = _students_by_code(org, [r.code for r in rows])
+    now = timezone.now()
+    to_update, to_create = [], []
+    for r in rows:
+        classroom_id = classroom.id if classroom else r.classroom_id
+        s = existing.get(r.code.lower())
+        if s is None:
+            to_create.append(Student(
+                organization=org,
+                classroom_id=classroom_id,
+                first_name=(r.answers.get("student_name") or "").strip(),
+                last_name="",
+                gender=r.answers.get("sex"),
+                dob=r.dob,
+                is_low_income=bool(r.is_low_income),
+                student_code=r.code,
+                primary_guardian_id=guardian_ids[r.phone],
+            ))
+            continue
+        s.dob = r.dob or s.dob
+        s.gender = r.answers.get("sex") or s.gender
+        s.classroom_id = classroom_id or s.classroom_id
+        s.primary_guardian_id = guardian_ids[r.phone]
+        if r.is_low_income is not None:
+            s.is_low_income = r.is_low_income
+        s.updated_at = now
+        to_update.append(s)
+
+    if to_update:
+        Student.objects.bulk_update(
+            to_update, ["dob", "gender", "classroom", "primary_guardian", "is_low_income", "updated_at"],
+            batch_size=CHUNK_SIZE,
+        )
+    if to_create:
+        Student.objects.bulk_create(to_create, batch_size=CHUNK_SIZE)
+        # MySQL does not return ids from bulk inserts
+        existing.update(_students_by_code(org, [s.student_code for s in to_create]))
+    return existing, len(to_create), len(to_update)
+
+
+def _score(org: Organization, rows: List[ValidRow], students: Dict[str, Student]):
+    ruleset = get_active_ruleset()
+    tuples = []
+    for i, r in enumerate(rows):
+        d = r.derived
+        tuples.append((
+            i, org.id, None, students[r.code.lower()].gender,
+            d["age_years"], d["age_months"], d["height_cm"], d["weight_kg"], d.get("muac_cm"),
+            r.answers, "", [], None, None, "", "",
+        ))
+    return ruleset, score_columns(load_columns(tuples), ruleset)
+
+
+def _created_ids(org: Organization, screenings: List[Screening]) -> List[int]:
+    """Ids of just-inserted `screenings`; MySQL returns none, so read them back.
+
+    Synced screenings are found by their idempotency key, imported ones by
+    (student, screened_at).
+    """
+    if all(s.pk for s in screenings):
+        return [s.pk for s in screenings]
+    if all(s.sync_key for s in screenings):
+        return list(Screening.objects.filter(organization=org, sync_key__in=[s.sync_key for s in screenings])
+                    .values_list("id", flat=True))
+    wanted = {(s.student_id, s.screened_at) for s in screenings}
+    rows = Screening.objects.filter(
+        organization=org,
+        student_id__in={sid for sid, _ in wanted},
+        screened_at__in={at for _, at in wanted},
+    ).values_list("id", "student_id", "screened_at")
+    return [pk for pk, sid, at in rows if (sid, at) in wanted]
+
+
+def write_rows(org: Organization, rows: List[ValidRow], *, result: ImportResult,
+               touched_days: Set[Tuple[int, date]], classroom: Optional[Classroom] = None,
+               teacher=None) -> List[Screening]:
+    """Upsert guardians/students, score and bulk_create one screening per row.
+
+    Student codes must be unique within `rows`. Runs in one transaction; the
+    caller rebuilds the rollups for `touched_days` once everything is written.
+    Returned screenings have no pk on backends that cannot return ids from
+    bulk inserts (MySQL). Milestone completion and enforcement for the new
+    screenings are dispatched after commit (screening.writes).
+    """
+    with transaction.atomic():
+        guardian_ids, n_guardians = _upsert_guardians(org, {r.phone for r in rows})
+        students, n_created, n_updated = _upsert_students(org, classroom, rows, guardian_ids)
+        ruleset, scores = _score(org, rows, students)
+        ref_hash = reference_hash()
+
+        now_dt = timezone.now()
+        screenings = []
+        for i, r in enumerate(rows):
+            student = students[r.code.lower()]
+            d = r.derived
+            level = str(LEVELS[scores.level[i]])
+            screened_at = r.screened_at or now_dt
+            screenings.append(Screening(
+                organization=org,
+                student=student,
+                teacher=teacher,
+                screened_at=screened_at,
+                gender=student.gender,
+                age_years=d["age_years"],
+                age_months=d["age_months"],
+                height_cm=d["height_cm"],
+                weight_kg=d["weight_kg"],
+                muac_cm=d.get("muac_cm"),
+                answers=r.answers,
+                is_low_income_at_screen=bool(student.is_low_income),
+                risk_level=level,
+                red_flags=scores.flags(i),
+                bmi=_as_stored(_BMI_FIELD, scores.bmi[i]),
+                baz=_as_stored(_BAZ_FIELD, scores.baz[i]),
+                ruleset_version=ruleset.version,
+                reference_hash=ref_hash,
+                sync_key=r.sync_key,
+                **scores.facets(i),
+            ))
+            result.level_counts[level] = result.level_counts.get(level, 0) + 1
+            touched_days.add((org.id, timezone.localtime(screened_at).date()))
+        Screening.objects.bulk_create(screenings, batch_size=CHUNK_SIZE)
+        refresh_student_status(st.id for st in students.values())
+        reindex_students(st.id for st in students.values())
+        created_ids = _created_ids(org, screenings)
+        transaction.on_commit(lambda: dispatch_side_effects(created_ids, audit=False, rollups=False))
+
+    result.guardians_created += n_guardians
+    result.students_created += n_created
+    result.students_updated += n_updated
+    result.screenings_created += len(screenings)
+    return screenings
+
+
+def import_screenings(fileobj, filename: str, *, org: Organization, classroom: Classroom,
+                      teacher=None, dry_run: bool = False) -> ImportResult:
+    """Validate every row, then write the valid ones in chunks.
+
+    Rows with errors are skipped and reported; a Unique Student ID repeated
+    within the file is an error on every repeat after the first.
+    """
+    if classroom.organization_id != org.id:
+        raise ImportFileError("Classroom does not belong to this organization.")
+
+    result = ImportResult(dry_run=dry_run)
+    valid: List[ValidRow] = []
+    seen_codes: Dict[str, int] = {}
+    for line, record in iter_records(fileobj, filename):
+        result.rows += 1
+        if result.rows > MAX_ROWS:
+            raise ImportFileError(f"Too many rows (max {MAX_ROWS} per upload).")
+        row, errors = validate_record(line, record)
+        if errors:
+            result.errors.extend(errors)
+            continue
+        first = seen_codes.setdefault(row.code.lower(), line)
+        if first != line:
+            result.errors.append(RowError(line, "unique_student_id", f"Duplicate of line {first}."))
+            continue
+        valid.append(row)
+
+    if dry_run:
+        return result
+
+    touched_days: Set[Tuple[int, date]] = set()
+    for start in range(0, len(valid), CHUNK_SIZE):
+        write_rows(org, valid[start:start + CHUNK_SIZE], result=result, touched_days=touched_days,
+                   classroom=classroom, teacher=teacher)
+
+    if result.screenings_created:
+        transaction.on_commit(lambda: rebuild_rollups(touched_days))
+        audit_log(teacher, org, "SCREENING_BULK_IMPORT", target=classroom, payload={
+            "file": filename,
+            "rows": result.rows,
+            "screenings": result.screenings_created,
+            "students_created": result.students_created,
+            "students_updated": result.students_updated,
+            "errors": len(result.errors),
+            "levels": result.level_counts,
+        })
+    return result
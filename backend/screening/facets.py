@@ -0,0 +1,146 @@
+"""Indexed screening facets (red-flag bitmasks and small enum codes).
+
+Questions like "how many children had pallor" used to load `answers` /
+`red_flags` JSON for every screening and test it in Python. Each Screening now
+also stores, at write time:
+
+  health_flags       bitmask over HEALTH_FACETS (Section C red flags, appetite,
+                     adolescent-girl menstrual flags)
+  diet_flags         bitmask over DIET_FACETS (Sections D + E)
+  hunger_code        rules.enum_code("hunger_vital_sign", ...) (0 == missing)
+  diet_type_code     rules.enum_code("diet_type", ...)         (0 == missing)
+  baz_category_code  index into BAZ_CATEGORIES                 (0 == unavailable)
+
+Flags are those the scoring ruleset raised, so a health key that the active
+ruleset does not treat as a red flag is never set. The catalogs are
+append-only: bit positions and codes are stored data, so never reorder them.
+Flags a custom ruleset names outside the catalog are not indexed.
+
+`filter_flags()` / `count_flags()` / `count_enum()` turn these into SQL
+(`health_flags & mask`), so dashboards and exports filter and COUNT without
+touching the JSON. Rows written before the columns existed are filled by the
+backfill_screening_facets command.
+"""
+
+from __future__ import annotations
+
+import operator
+from functools import reduce
+from typing import Any, Dict, Iterable, List, Tuple
+
+from django.db.models import Count, F, Q
+from django.db.models.lookups import Exact, GreaterThan
+
+from .rules import ENUM_VALUES, TRUTHY_KEYS, enum_code
+
+HEALTH_FACETS: Tuple[str, ...] = TRUTHY_KEYS + ("appetite_poor", "heavy_bleeding", "irregular_cycles")
+DIET_FACETS: Tuple[str, ...] = (
+    "breakfast_skipped",
+    "lunch_skipped",
+    "missing_green_leafy_veg",
+    "missing_other_vegetables",
+    "missing_fruits",
+    "missing_dal_pulses_beans",
+    "missing_milk_curd",
+    "missing_egg",
+    "missing_fish_chicken_meat",
+    "missing_nuts_groundnuts",
+    "missing_millet_whole_grains",
+    "ssb_or_packaged_snacks",
+    "deworming_not_recent",
+)
+BAZ_CATEGORIES: Tuple[str, ...] = ("unavailable", "severe_thinness", "thinness", "normal", "overweight", "obesity")
+
+HEALTH_BITS: Dict[str, int] = {name: 1 << j for j, name in enumerate(HEALTH_FACETS)}
+DIET_BITS: Dict[str, int] = {name: 1 << j for j, name in enumerate(DIET_FACETS)}
+BAZ_CODES: Dict[str, int] = {name: j for j, name in enumerate(BAZ_CATEGORIES)}
+
+FACET_FIELDS: Tuple[str, ...] = ("health_flags", "diet_flags", "hunger_code", "diet_type_code", "baz_category_code")
+# enum column -> value names indexed by code ("" == missing/other)
+ENUM_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "hunger_code": ("",) + ENUM_VALUES["hunger_vital_sign"],
+    "diet_type_code": ("",) + ENUM_VALUES["diet_type"],
+    "baz_category_code": BAZ_CATEGORIES,
+}
+
+
+def health_facet(flag: str) -> str:
+    """Catalog name of a compute_risk() health flag ("irregular_cycles_gt_45" -> "irregular_cycles")."""
+    return "irregular_cycles" if flag.startswith("irregular_cycles_gt_") else flag
+
+
+def mask_of(flags: Iterable[str], bits: Dict[str, int]) -> int:
+    mask = 0
+    for flag in flags:
+        mask |= bits.get(flag, 0)
+    return mask
+
+
+def facets_from_derived(derived: Dict[str, Any]) -> Dict[str, int]:
+    """Facet column values for a compute_risk() result's `derived` dict."""
+    return {
+        "health_flags": mask_of((health_facet(f) for f in derived.get("health_red_flags") or ()), HEALTH_BITS),
+        "diet_flags": mask_of(derived.get("diet_flags") or (), DIET_BITS),
+        "hunger_code": enum_code("hunger_vital_sign", derived.get("hunger_vital_sign")),
+        "diet_type_code": enum_code("diet_type", derived.get("diet_type")),
+        "baz_category_code": BAZ_CODES.get(derived.get("baz_category") or "unavailable", 0),
+    }
+
+
+def flag_names(health_flags: int, diet_flags: int) -> List[str]:
+    """Catalog names set in the two masks (health first, catalog order)."""
+    return ([n for n, b in HEALTH_BITS.items() if health_flags & b]
+            + [n for n, b in DIET_BITS.items() if diet_flags & b])
+
+
+# ---------------------------------------------------------------------------
+# Query helpers
+# ---------------------------------------------------------------------------
+
+def _flag_bit(flag: str) -> Tuple[str, int]:
+    if flag in HEALTH_BITS:
+        return "health_flags", HEALTH_BITS[flag]
+    if flag in DIET_BITS:
+        return "diet_flags", DIET_BITS[flag]
+    raise ValueError(f"Unknown screening flag {flag!r}")
+
+
+def flag_condition(flag: str):
+    """Boolean SQL expression "screening has `flag`" (usable in filter() and Count(filter=))."""
+    field, bit = _flag_bit(flag)
+    return GreaterThan(F(field).bitand(bit), 0)
+
+
+def filter_flags(qs, *flags: str, match_any: bool = False):
+    """Screenings with every one of `flags` (or at least one, with match_any=True)."""
+    masks: Dict[str, int] = {}
+    for flag in flags:
+        field, bit = _flag_bit(flag)
+        masks[field] = masks.get(field, 0) | bit
+    if not masks:
+        return qs
+    conditions = [
+        GreaterThan(F(field).bitand(mask), 0) if match_any else Exact(F(field).bitand(mask), mask)
+        for field, mask in masks.items()
+    ]
+    if match_any:
+        return qs.filter(reduce(operator.or_, (Q(c) for c in conditions)))
+    return qs.filter(*conditions)
+
+
+def count_flags(qs, flags: Iterable[str] = HEALTH_FACETS + DIET_FACETS) -> Dict[str, int]:
+    """{flag: number of screenings in `qs` with it}, in one aggregate query."""
+    flags = list(flags)
+    if not flags:
+        return {}
+    counts = qs.aggregate(**{f"n{j}": Count("pk", filter=flag_condition(f)) for j, f in enumerate(flags)})
+    return {f: counts[f"n{j}"] or 0 for j, f in enumerate(flags)}
+
+
+def count_enum(qs, field: str) -> Dict[str, int]:
+    """{value: count} for one enum facet column ("" for missing/other)."""
+    names = ENUM_FIELDS[field]
+    out = {name: 0 for name in names}
+    for code, n in qs.order_by().values_list(field).annotate(n=Count("pk")):
+        out[names[code] if code < len(names) else ""] += n
+    return out
@@ -3,7 +3,8 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 import re
 
-from roster.models import Student, Classroom
+from roster.catalog import get_catalog
+from roster.models import Student
 from .models import Screening
 
 def _normalize_phone_to_e164(raw: str) -> str:
@@ -285,39 +286,25 @@ class AddStudentForm(forms.Form):
 
     def __init__(self, *args, **kwargs):
         self.org = kwargs.pop("organization")
+        # Grade/division choices come from the cached catalog (roster.catalog),
+        # already in Nursery, 1..12, Other / A..Z, Other order.
+        self.catalog = kwargs.pop("catalog", None) or get_catalog(self.org)
         super().__init__(*args, **kwargs)
 
-        # Prefer a natural grade ordering for dropdown UX:
-        # Nursery, 1..12, Other, then any non-standard values.
-        preferred_grade_order = ["Nursery"] + [str(i) for i in range(1, 13)] + ["Other"]
-        grade_rank = {g: i for i, g in enumerate(preferred_grade_order)}
-
-        grades = list(
-            Classroom.objects.filter(organization=self.org)
-            .values_list("grade", flat=True)
-            .distinct()
-        )
-        grades.sort(key=lambda g: (grade_rank.get(g, 999), str(g)))
+        grades = self.catalog.grades
         self.fields["grade"].choices = [("", "Select grade")] + [(g, g) for g in grades]
 
-        initial_grade = self.initial.get("grade") or (grades[0] if grades else "")
-
-        # Prefer A..Z then Other for divisions/sections.
-        preferred_division_order = [chr(c) for c in range(ord("A"), ord("Z") + 1)] + ["Other"]
-        division_rank = {d: i for i, d in enumerate(preferred_division_order)}
-
-        divisions = list(
-            Classroom.objects.filter(organization=self.org, grade=initial_grade)
-            .values_list("division", flat=True)
-            .distinct()
-        )
-        divisions.sort(key=lambda d: (division_rank.get(d or "", 999), str(d or "")))
+        # Divisions of the submitted grade (POST) or the preselected one
+        grade = (self.data.get(self.add_prefix("grade")) if self.is_bound else None) \
+            or self.initial.get("grade") or (grades[0] if grades else "")
+        divisions = self.catalog.divisions(grade)
         self.fields["division"].choices = [("", "Select division")] + [(d, d or "—") for d in divisions]
 
     def clean(self):
         data = super().clean()
         grade = data.get("grade") or ""
         division = data.get("division") or ""
-        if grade and not Classroom.objects.filter(organization=self.org, grade=grade, division=division).exists():
+        data["classroom_id"] = self.catalog.classroom_id(grade, division) if grade else None
+        if grade and not data["classroom_id"]:
             raise ValidationError("Selected Grade/Division does not exist. Please ask admin to create the class first.")
         return data
@@ -0,0 +1,203 @@
+"""Growth trajectories: each student's measurement series and checks on it.
+
+The series (date, age in months, height, weight, BMI, BAZ per screening,
+oldest first, at most GROWTH_MAX_POINTS) is precomputed into
+StudentStatus.growth by screening.status, so it is rewritten exactly when
+screenings are written (signals, bulk import / sync, re-scoring) and read
+back with the student's status row instead of re-querying history.
+
+On top of it:
+
+  - `plausibility_warnings()` for a new measurement, against the previous
+    point and the elapsed time: shrinking height (beyond measurement error),
+    height velocity above what even a pubertal growth spurt produces, and a
+    weight velocity z-score (change in BMI-for-age z per interval; more than
+    WEIGHT_Z_JUMP SD between screenings under a year apart is implausible).
+    Without a BAZ (outside the reference ages) a kg/year bound is used.
+  - `baz_trend()`: least-squares BAZ slope per year over recent screenings.
+  - `chart()`: the series as parallel arrays for the growth chart.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.utils import timezone
+
+GROWTH_MAX_POINTS = 60
+
+HEIGHT_TOLERANCE_CM = 1.5          # repeat-measurement error in school settings
+MAX_HEIGHT_VELOCITY_CM_YR = 15.0   # above peak pubertal height velocity
+WEIGHT_Z_JUMP = 2.0                # |delta BAZ| between screenings < 1 year apart
+MAX_WEIGHT_VELOCITY_KG_YR = 10.0   # fallback when no BAZ is available
+MIN_INTERVAL_YEARS = 0.25          # velocities over shorter gaps are noise
+
+TREND_WINDOW_DAYS = 730
+TREND_MIN_SPAN_DAYS = 90
+TREND_STABLE_Z_PER_YEAR = 0.25
+
+
+@dataclass(frozen=True)
+class GrowthPoint:
+    screening_id: int
+    day: date
+    age_months: Optional[int]
+    height_cm: Optional[float]
+    weight_kg: Optional[float]
+    bmi: Optional[float]
+    baz: Optional[float]
+
+    def to_json(self) -> list:
+        return [self.screening_id, self.day.isoformat(), self.age_months,
+                self.height_cm, self.weight_kg, self.bmi, self.baz]
+
+    @classmethod
+    def from_json(cls, row) -> "GrowthPoint":
+        sid, day, age, h, w, bmi, baz = row
+        return cls(sid, date.fromisoformat(day), age, h, w, bmi, baz)
+
+
+def _f(value) -> Optional[float]:
+    return None if value is None else round(float(value), 2)
+
+
+def point_from_values(screening_id, screened_at: datetime, age_months, height_cm, weight_kg, bmi, baz) -> GrowthPoint:
+    return GrowthPoint(
+        screening_id, timezone.localtime(screened_at).date() if timezone.is_aware(screened_at) else screened_at.date(),
+        age_months, _f(height_cm), _f(weight_kg), _f(bmi), _f(baz),
+    )
+
+
+# Screening columns needed for one point, in point_from_values() order
+SERIES_FIELDS = ("id", "screened_at", "age_months", "height_cm", "weight_kg", "bmi", "baz")
+
+
+def series_json_by_student(rows: Iterable[Tuple]) -> Dict[int, list]:
+    """(student_id, *SERIES_FIELDS) rows ordered by student, screened_at, id -> JSON series per student."""
+    out: Dict[int, list] = {}
+    for student_id, *values in rows:
+        out.setdefault(student_id, []).append(point_from_values(*values).to_json())
+    return {sid: pts[-GROWTH_MAX_POINTS:] for sid, pts in out.items()}
+
+
+@dataclass(frozen=True)
+class Trend:
+    slope_per_year: float
+    direction: str  # "rising" | "falling" | "stable"
+    points: int
+
+
+class GrowthSeries:
+    def __init__(self, student_id: int, points: Iterable[GrowthPoint]):
+        self.student_id = student_id
+        self.points: List[GrowthPoint] = sorted(points, key=lambda p: (p.day, p.screening_id))
+
+    @classmethod
+    def from_json(cls, student_id: int, rows) -> "GrowthSeries":
+        return cls(student_id, (GrowthPoint.from_json(r) for r in rows or []))
+
+    def __len__(self):
+        return len(self.points)
+
+    @property
+    def latest(self) -> Optional[GrowthPoint]:
+        return self.points[-1] if self.points else None
+
+    def before(self, screening_id: int) -> Optional[GrowthPoint]:
+        """The point preceding `screening_id`'s (None if first or unknown)."""
+        for i, p in enumerate(self.points):
+            if p.screening_id == screening_id:
+                return self.points[i - 1] if i else None
+        return None
+
+    def change_since_previous(self, screening_id: int) -> Optional[dict]:
+        prev = self.before(screening_id)
+        cur = next((p for p in self.points if p.screening_id == screening_id), None)
+        if not prev or not cur:
+            return None
+
+        def _delta(a, b):
+            return None if a is None or b is None else round(b - a, 1)
+
+        return {
+            "since": prev.day,
+            "days": (cur.day - prev.day).days,
+            "height_cm": _delta(prev.height_cm, cur.height_cm),
+            "weight_kg": _delta(prev.weight_kg, cur.weight_kg),
+        }
+
+    def plausibility_warnings(self, *, height_cm: Optional[float], weight_kg: Optional[float],
+                              baz: Optional[float] = None, on: Optional[date] = None) -> List[str]:
+        """Checks a new measurement against the most recent earlier point."""
+        on = on or timezone.localdate()
+        prev = next((p for p in reversed(self.points) if p.day <= on), None)
+        if prev is None:
+            return []
+        days = (on - prev.day).days
+        years = max(days / 365.25, MIN_INTERVAL_YEARS)
+        since = f"since {prev.day:%d %b %Y}"
+        warnings = []
+
+        if height_cm is not None and prev.height_cm is not None:
+            dh = float(height_cm) - prev.height_cm
+            if dh < -HEIGHT_TOLERANCE_CM:
+                warnings.append(f"Height decreased by {-dh:.1f} cm {since}. Please re-measure.")
+            elif dh > MAX_HEIGHT_VELOCITY_CM_YR * years + HEIGHT_TOLERANCE_CM:
+                warnings.append(f"Height increased by {dh:.1f} cm {since}, faster than children grow. "
+                                "Please verify readings.")
+
+        if weight_kg is not None and prev.weight_kg is not None:
+            dw = float(weight_kg) - prev.weight_kg
+            if baz is not None and prev.baz is not None:
+                dz = float(baz) - prev.baz
+                if abs(dz) > WEIGHT_Z_JUMP and days < 365:
+                    warnings.append(f"Weight changed by {dw:+.1f} kg {since} (BMI-for-age moved {dz:+.1f} SD). "
+                                    "Please verify readings.")
+            elif abs(dw) > MAX_WEIGHT_VELOCITY_KG_YR * max(years, 0.5):
+                warnings.append(f"Weight changed by {dw:+.1f} kg {since}. Please verify readings.")
+        return warnings
+
+    def baz_trend(self, *, today: Optional[date] = None) -> Optional[Trend]:
+        """Least-squares BAZ slope (SD/year) over the last TREND_WINDOW_DAYS."""
+        today = today or timezone.localdate()
+        pts = [(p.day.toordinal(), p.baz) for p in self.points
+               if p.baz is not None and (today - p.day).days <= TREND_WINDOW_DAYS]
+        if len(pts) < 2 or pts[-1][0] - pts[0][0] < TREND_MIN_SPAN_DAYS:
+            return None
+        n = len(pts)
+        mx = sum(x for x, _ in pts) / n
+        my = sum(y for _, y in pts) / n
+        sxx = sum((x - mx) ** 2 for x, _ in pts)
+        slope = sum((x - mx) * (y - my) for x, y in pts) / sxx * 365.25
+        if slope > TREND_STABLE_Z_PER_YEAR:
+            direction = "rising"
+        elif slope < -TREND_STABLE_Z_PER_YEAR:
+            direction = "falling"
+        else:
+            direction = "stable"
+        return Trend(round(slope, 2), direction, n)
+
+    def chart(self) -> dict:
+        return {
+            "dates": [p.day.isoformat() for p in self.points],
+            "age_months": [p.age_months for p in self.points],
+            "height_cm": [p.height_cm for p in self.points],
+            "weight_kg": [p.weight_kg for p in self.points],
+            "bmi": [p.bmi for p in self.points],
+            "baz": [p.baz for p in self.points],
+        }
+
+
+def series_for(student) -> GrowthSeries:
+    """The student's precomputed series; computed from Screening if the status row is missing."""
+    from .models import Screening, StudentStatus
+
+    try:
+        rows = student.current_status.growth
+    except StudentStatus.DoesNotExist:
+        qs = (Screening.objects.filter(student_id=student.pk).order_by("student_id", "screened_at", "id")
+              .values_list("student_id", *SERIES_FIELDS))
+        rows = series_json_by_student(qs).get(student.pk, [])
+    return GrowthSeries.from_json(student.pk, rows)
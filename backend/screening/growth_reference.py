@@ -0,0 +1,238 @@
+"""Growth reference tables (BMI-, height- and weight-for-age).
+
+Each (indicator, sex) table is loaded once from `screening/data/` into compact
+sorted arrays keyed by age in *months*. Lookups use `bisect` plus linear
+interpolation between the two bracketing reference ages, so a child aged
+7y 3m gets parameters between the 7y and 7y 6m rows instead of snapping to
+one of them.
+
+Two table shapes are supported:
+  - median/SD rows  {"median": .., "sd": ..}    ->  z = (X - median) / SD
+  - WHO LMS rows     {"L": .., "M": .., "S": ..} ->  WHO 2007 LMS z-score
+
+File format: a JSON object of age -> row. Ages are in years unless the file
+has a top-level "_meta": {"age_unit": "months"} entry (the BMI sheet tables
+we ship are keyed in years, WHO downloads are usually keyed in months).
+
+Tables that are not present in `screening/data/` are simply unavailable:
+`get_table()` returns None and callers skip that indicator.
+
+The scalar (`zscore`) and array (`zscores`) paths use the same arithmetic in
+the same order, so per-request scoring and batch scoring agree bit for bit.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+_DATA_DIR = Path(__file__).resolve().parent / "data"
+
+BFA = "bfa"   # BMI-for-age
+HFA = "hfa"   # height-for-age (stunting)
+WFA = "wfa"   # weight-for-age (underweight)
+
+# indicator -> {sex: filename}
+TABLE_FILES = {
+    BFA: {"M": "bmi_boys_5_18.json", "F": "bmi_girls_5_18.json"},
+    HFA: {"M": "hfa_boys_5_19.json", "F": "hfa_girls_5_19.json"},
+    WFA: {"M": "wfa_boys_5_10.json", "F": "wfa_girls_5_10.json"},
+}
+
+# WHO restricts extreme z-scores for weight-based indicators (see _lms_z).
+_WEIGHT_BASED = {BFA, WFA}
+
+
+@dataclass(frozen=True)
+class ReferenceTable:
+    indicator: str
+    sex: str
+    months: Tuple[float, ...]
+    # median/SD tables: (median, sd); LMS tables: (L, M, S)
+    params: Tuple[Tuple[float, ...], ...]
+    is_lms: bool
+    _xs: np.ndarray = field(init=False, repr=False, compare=False)
+    _ps: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_xs", np.array(self.months))
+        object.__setattr__(self, "_ps", np.array(self.params))
+
+    @property
+    def min_months(self) -> float:
+        return self.months[0]
+
+    @property
+    def max_months(self) -> float:
+        return self.months[-1]
+
+    # -- scalar path -------------------------------------------------------
+
+    def params_at(self, age_months: float) -> Tuple[float, ...]:
+        """Interpolated parameters at `age_months` (clamped to the table range)."""
+        xs = self.months
+        if age_months <= xs[0]:
+            return self.params[0]
+        if age_months >= xs[-1]:
+            return self.params[-1]
+        j = bisect_right(xs, age_months) - 1
+        if xs[j] == age_months:
+            return self.params[j]
+        t = (age_months - xs[j]) / (xs[j + 1] - xs[j])
+        lo, hi = self.params[j], self.params[j + 1]
+        return tuple([a + (b - a) * t for a, b in zip(lo, hi)])
+
+    def zscore(self, value: float, age_months: float) -> Tuple[float, Tuple[float, ...]]:
+        """Returns (z, interpolated params)."""
+        p = self.params_at(age_months)
+        if self.is_lms:
+            z = _lms_z(value, *p, restrict=self.indicator in _WEIGHT_BASED)
+        else:
+            median, sd = p
+            if sd <= 0:
+                raise ValueError(f"Invalid SD in {self.indicator} reference table")
+            z = (value - median) / sd
+        return z, p
+
+    # -- array path --------------------------------------------------------
+
+    def params_at_many(self, age_months: np.ndarray) -> np.ndarray:
+        """Vectorized params_at(); returns shape (n, n_params)."""
+        xs, ps = self._xs, self._ps
+        x = np.clip(age_months, xs[0], xs[-1])
+        j = np.clip(np.searchsorted(xs, x, side="right") - 1, 0, len(xs) - 2)
+        exact = xs[j] == x
+        t = ((x - xs[j]) / (xs[j + 1] - xs[j]))[:, None]
+        lo, hi = ps[j], ps[j + 1]
+        interp = lo + (hi - lo) * t
+        at_end = (x == xs[-1])[:, None]
+        out = np.where(exact[:, None], lo, interp)
+        return np.where(at_end, ps[-1], out)
+
+    def zscores(self, values: np.ndarray, age_months: np.ndarray) -> np.ndarray:
+        p = self.params_at_many(age_months)
+        if self.is_lms:
+            # Per-element math.pow keeps LMS results identical to the scalar path.
+            z = np.array([
+                _lms_z(float(v), *row, restrict=self.indicator in _WEIGHT_BASED)
+                for v, row in zip(values, p)
+            ]) if len(values) else np.empty(0)
+            return z
+        return (values - p[:, 0]) / p[:, 1]
+
+
+def _lms_value(L: float, M: float, S: float, z: float) -> float:
+    if L == 0:
+        return M * math.exp(S * z)
+    return M * (1 + L * S * z) ** (1 / L)
+
+
+def _lms_z(value: float, L: float, M: float, S: float, *, restrict: bool) -> float:
+    """WHO 2007 LMS z-score, with the WHO restriction beyond ±3 SD for weight-based indicators."""
+    if value <= 0:
+        return float("nan")
+    z = math.log(value / M) / S if L == 0 else ((value / M) ** L - 1) / (L * S)
+    if not restrict or -3 <= z <= 3:
+        return z
+    if z > 3:
+        sd3 = _lms_value(L, M, S, 3)
+        sd23 = sd3 - _lms_value(L, M, S, 2)
+        return 3 + (value - sd3) / sd23
+    sd3 = _lms_value(L, M, S, -3)
+    sd23 = _lms_value(L, M, S, -2) - sd3
+    return -3 + (value - sd3) / sd23
+
+
+@lru_cache(maxsize=None)
+def get_table(indicator: str, sex: str) -> Optional[ReferenceTable]:
+    """Load (once) and return the table, or None if it is not shipped/applicable."""
+    sex = (sex or "").upper()
+    filename = TABLE_FILES.get(indicator, {}).get(sex)
+    if not filename:
+        return None
+    path = _DATA_DIR / filename
+    if not path.exists():
+        return None
+
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    meta = raw.pop("_meta", {}) or {}
+    per_year = (meta.get("age_unit") or "years") == "years"
+
+    rows = []
+    for age, row in raw.items():
+        months = float(age) * 12.0 if per_year else float(age)
+        if "L" in row:
+            rows.append((months, (float(row["L"]), float(row["M"]), float(row["S"]))))
+        else:
+            rows.append((months, (float(row["median"]), float(row["sd"]))))
+    rows.sort(key=lambda r: r[0])
+    if not rows:
+        return None
+
+    is_lms = len(rows[0][1]) == 3
+    return ReferenceTable(
+        indicator=indicator,
+        sex=sex,
+        months=tuple(r[0] for r in rows),
+        params=tuple(r[1] for r in rows),
+        is_lms=is_lms,
+    )
+
+
+def zscore(indicator: str, *, value: float, age_months: float, sex: str) -> Optional[float]:
+    """z-score for one measurement, or None when no table covers this sex/indicator/age."""
+    table = get_table(indicator, sex)
+    if table is None or not (table.min_months <= age_months <= table.max_months):
+        return None
+    return table.zscore(float(value), float(age_months))[0]
+
+
+@lru_cache(maxsize=1)
+def reference_hash() -> str:
+    """Short content hash of every installed reference table.
+
+    Stored on each Screening so re-scoring can target rows computed against
+    different tables.
+    """
+    h = hashlib.sha256()
+    for indicator in sorted(TABLE_FILES):
+        for sex, filename in sorted(TABLE_FILES[indicator].items()):
+            path = _DATA_DIR / filename
+            if path.exists():
+                h.update(f"{indicator}:{sex}:".encode())
+                h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def age_in_months(age_years: Optional[float], age_months: Optional[int]) -> Optional[float]:
+    """Prefer the exact month count; fall back to fractional years * 12."""
+    if age_months is not None:
+        return float(age_months)
+    if age_years is not None:
+        return float(age_years) * 12.0
+    return None
+
+
+# HAZ / WAZ cut-offs (WHO): < -3 severe, < -2 moderate
+def haz_category(haz: float) -> str:
+    if haz < -3:
+        return "severe_stunting"
+    if haz < -2:
+        return "stunting"
+    return "normal"
+
+
+def waz_category(waz: float) -> str:
+    if waz < -3:
+        return "severe_underweight"
+    if waz < -2:
+        return "underweight"
+    return "normal"
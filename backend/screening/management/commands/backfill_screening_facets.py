@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from screening.batch import backfill_facets
+from screening.models import Screening
+from screening.rules import get_active_ruleset
+
+
+class Command(BaseCommand):
+    help = "Fill the indexed red-flag/enum facet columns of stored screenings (chunked bulk_update)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id (default: all orgs)")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **opts):
+        qs = Screening.objects.all()
+        if opts.get("org"):
+            qs = qs.filter(organization_id=opts["org"])
+
+        def _progress(stats):
+            self.stdout.write(f"Scanned {stats.scanned}, changed {stats.changed}")
+
+        ruleset = get_active_ruleset()
+        self.stdout.write(f"Ruleset {ruleset.version} ({ruleset.content_hash[:12]})")
+        stats = backfill_facets(qs, ruleset=ruleset, chunk_size=opts["chunk_size"], progress=_progress)
+        self.stdout.write(self.style.SUCCESS(f"Scanned {stats.scanned} screenings; updated facets on {stats.changed}."))
@@ -0,0 +1,45 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from screening.answers_codec import decode_answers, encode_answers
+from screening.models import Screening
+
+
+class Command(BaseCommand):
+    help = "Compare JSON and packed Screening.answers: bytes per row and encode/decode/read throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20000, help="Screenings to sample")
+        parser.add_argument("--repeat", type=int, default=5, help="Passes per timing")
+
+    def _time(self, label, n, repeat, fn):
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        self.stdout.write(f"{label:<34} {best * 1e6 / n:>8.2f} us/row  ({n / best:>10.0f} rows/s)")
+
+    def handle(self, *args, **opts):
+        answers = list(Screening.objects.order_by("-id").values_list("answers", flat=True)[:opts["limit"]])
+        if not answers:
+            raise CommandError("No screenings to sample.")
+        n, repeat = len(answers), opts["repeat"]
+        as_json = [json.dumps(a).encode("utf-8") for a in answers]
+        packed = [encode_answers(a) for a in answers]
+        assert all(decode_answers(p) == a for p, a in zip(packed, answers))
+
+        json_bytes, packed_bytes = sum(map(len, as_json)), sum(map(len, packed))
+        self.stdout.write(f"Rows sampled: {n}")
+        self.stdout.write(f"JSON answers:   {json_bytes / n:>8.1f} bytes/row  ({json_bytes} total)")
+        self.stdout.write(f"Packed answers: {packed_bytes / n:>8.1f} bytes/row  ({packed_bytes} total, "
+                          f"{json_bytes / packed_bytes:.1f}x smaller)")
+
+        self._time("json.loads", n, repeat, lambda: [json.loads(b) for b in as_json])
+        self._time("decode_answers (packed)", n, repeat, lambda: [decode_answers(b) for b in packed])
+        self._time("json.dumps", n, repeat, lambda: [json.dumps(a) for a in answers])
+        self._time("encode_answers", n, repeat, lambda: [encode_answers(a) for a in answers])
+        self._time("DB read values_list('answers')", n, repeat,
+                   lambda: list(Screening.objects.order_by("-id").values_list("answers", flat=True)[:n]))
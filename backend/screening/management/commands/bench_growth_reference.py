@@ -0,0 +1,39 @@
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from screening.bmi_reference import bmi_to_baz
+from screening.growth_reference import BFA, get_table
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark growth reference lookups (per-lookup cost, scalar and vectorized)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--n", type=int, default=200_000, help="Lookups per measurement")
+
+    def _time(self, label, n, fn):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        self.stdout.write(f"{label:<38} {dt * 1e9 / n:>10.1f} ns/lookup  ({dt:.3f}s for {n})")
+
+    def handle(self, *args, **opts):
+        n = opts["n"]
+        rng = random.Random(7)
+        months = [rng.uniform(60, 216) for _ in range(n)]
+        bmis = [rng.uniform(11, 30) for _ in range(n)]
+        table = get_table(BFA, "M")
+
+        self._time("ReferenceTable.params_at (bisect)", n,
+                   lambda: [table.params_at(m) for m in months])
+        self._time("ReferenceTable.zscore", n,
+                   lambda: [table.zscore(b, m) for b, m in zip(bmis, months)])
+        self._time("bmi_to_baz (compute_risk path)", n,
+                   lambda: [bmi_to_baz(bmi=b, age_years=m / 12.0, sex="M") for b, m in zip(bmis, months)])
+
+        months_arr, bmis_arr = np.array(months), np.array(bmis)
+        self._time("ReferenceTable.zscores (vectorized)", n,
+                   lambda: table.zscores(bmis_arr, months_arr))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Organization
+from roster.models import Classroom
+from screening.bulk_import import ImportFileError, import_screenings
+
+
+class Command(BaseCommand):
+    help = "Import a class's screenings from a CSV/XLSX in the NewScreeningForm layout."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or XLSX file")
+        parser.add_argument("--org", type=int, required=True, help="Organization id")
+        parser.add_argument("--classroom", type=int, help="Classroom id")
+        parser.add_argument("--grade", help="Grade (with --division) instead of --classroom")
+        parser.add_argument("--division", default="", help="Division/section (default: none)")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; write nothing")
+
+    def handle(self, *args, **opts):
+        org = Organization.objects.filter(pk=opts["org"]).first()
+        if not org:
+            raise CommandError(f"Organization {opts['org']} not found")
+
+        classrooms = Classroom.objects.filter(organization=org)
+        if opts.get("classroom"):
+            classroom = classrooms.filter(pk=opts["classroom"]).first()
+        elif opts.get("grade"):
+            classroom = classrooms.filter(grade=opts["grade"], division=opts["division"]).first()
+        else:
+            raise CommandError("Pass --classroom or --grade/--division")
+        if not classroom:
+            raise CommandError("Classroom not found in this organization")
+
+        try:
+            with open(opts["path"], "rb") as fh:
+                result = import_screenings(fh, opts["path"], org=org, classroom=classroom, dry_run=opts["dry_run"])
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+
+        for e in result.errors:
+            self.stdout.write(f"  line {e.line}: {e.field or '(row)'}: {e.message}")
+
+        if result.dry_run:
+            self.stdout.write(self.style.WARNING(
+                f"Dry run: {result.rows} rows checked, {result.error_lines} with errors."
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.screenings_created} of {result.rows} rows into {classroom} "
+            f"({result.students_created} new students, {result.students_updated} updated, "
+            f"{result.guardians_created} new guardians; {result.error_lines} rows with errors)."
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from screening.answers_codec import pack_stored_answers
+from screening.models import Screening
+
+
+class Command(BaseCommand):
+    help = "Rewrite stored Screening.answers JSON text in the packed binary format (chunked bulk_update)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id (default: all orgs)")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--to-json", action="store_true",
+            help="Write packed rows back as JSON text (before reversing migration screening 0009)",
+        )
+
+    def handle(self, *args, **opts):
+        qs = Screening.objects.all()
+        if opts.get("org"):
+            qs = qs.filter(organization_id=opts["org"])
+
+        def _progress(stats):
+            self.stdout.write(f"Scanned {stats.scanned}, rewritten {stats.rewritten}")
+
+        stats = pack_stored_answers(qs, chunk_size=opts["chunk_size"], to_json=opts["to_json"], progress=_progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rewrote {stats.rewritten} of {stats.scanned} screenings: "
+            f"{stats.bytes_before} -> {stats.bytes_after} bytes of answers."
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from screening.rescreen import REBUILD_CHUNK, rebuild_due_dates
+
+
+class Command(BaseCommand):
+    help = "Recompute the re-screening due dates on StudentStatus (last screening cycle and open milestones)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id (default: all orgs)")
+        parser.add_argument("--chunk-size", type=int, default=REBUILD_CHUNK)
+
+    def handle(self, *args, **opts):
+        def _progress(n):
+            self.stdout.write(f"Updated {n} students")
+
+        n = rebuild_due_dates(opts.get("org"), chunk_size=opts["chunk_size"], progress=_progress)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt re-screening due dates for {n} students."))
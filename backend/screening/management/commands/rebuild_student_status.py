@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from screening.models import StudentStatus
+from screening.status import REFRESH_CHUNK, rebuild_student_status
+
+
+class Command(BaseCommand):
+    help = "Recompute the StudentStatus projection (latest screening, yearly count, supplements) from source tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id (default: all orgs)")
+        parser.add_argument("--chunk-size", type=int, default=REFRESH_CHUNK)
+
+    def handle(self, *args, **opts):
+        def _progress(n):
+            self.stdout.write(f"Refreshed {n} students")
+
+        n = rebuild_student_status(opts.get("org"), chunk_size=opts["chunk_size"], progress=_progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt status for {n} students ({StudentStatus.objects.count()} rows in total)."
+        ))
@@ -0,0 +1,60 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from screening.batch import rebuild_rollups, rescore_screenings
+from screening.growth_reference import reference_hash
+from screening.models import Screening
+from screening.rules import get_active_ruleset
+
+
+class Command(BaseCommand):
+    help = "Re-score stored screenings with the current risk rules (vectorized, chunked bulk_update)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id (default: all orgs)")
+        parser.add_argument("--since", type=str, help="Only screenings on/after YYYY-MM-DD")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+        parser.add_argument(
+            "--stale-only", action="store_true",
+            help="Only screenings scored under a different ruleset version or reference tables",
+        )
+
+    def handle(self, *args, **opts):
+        qs = Screening.objects.all()
+        if opts.get("org"):
+            qs = qs.filter(organization_id=opts["org"])
+        if opts.get("since"):
+            try:
+                since = datetime.fromisoformat(opts["since"])
+            except ValueError:
+                raise CommandError("--since must be YYYY-MM-DD")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(datetime.combine(since.date(), time.min))
+            qs = qs.filter(screened_at__gte=since)
+
+        dry_run = opts["dry_run"]
+
+        def _progress(stats):
+            self.stdout.write(f"Scanned {stats.scanned}, changed {stats.changed}")
+
+        ruleset = get_active_ruleset()
+        self.stdout.write(f"Ruleset {ruleset.version} ({ruleset.content_hash[:12]}), reference tables {reference_hash()}")
+        stats = rescore_screenings(
+            qs, ruleset=ruleset, stale_only=opts["stale_only"],
+            chunk_size=opts["chunk_size"], dry_run=dry_run, progress=_progress,
+        )
+
+        for transition, n in sorted(stats.level_changes.items()):
+            self.stdout.write(f"  {transition}: {n}")
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"Dry run: {stats.changed} of {stats.scanned} screenings would change."))
+            return
+
+        days = rebuild_rollups(stats.touched_days)
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-scored {stats.scanned} screenings; updated {stats.changed}; rebuilt {days} rollup day(s)."
+        ))
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.14 on 2026-10-17 01:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0002_yellow_and_anthro_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskRuleset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=32, unique=True)),
+                ('definition', models.JSONField()),
+                ('content_hash', models.CharField(editable=False, max_length=64)),
+                ('is_active', models.BooleanField(default=True)),
+                ('notes', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='screening',
+            name='reference_hash',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='screening',
+            name='ruleset_version',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='screening',
+            index=models.Index(fields=['ruleset_version', 'reference_hash'], name='screening_s_ruleset_46607b_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.14 on 2026-10-17 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0003_risk_ruleset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screening',
+            name='sync_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='screening',
+            constraint=models.UniqueConstraint(fields=('organization', 'sync_key'), name='uniq_screening_sync_key'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.14 on 2026-10-17 01:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0004_screening_sync_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='screening',
+            index=models.Index(fields=['organization', '-screened_at'], name='screening_s_organiz_19b973_idx'),
+        ),
+    ]
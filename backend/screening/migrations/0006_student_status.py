@@ -0,0 +1,34 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_org_type_alter_orgmembership_role'),
+        ('roster', '0001_initial'),
+        ('screening', '0005_screening_org_screened_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentStatus',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='current_status', serialize=False, to='roster.student')),
+                ('last_screened_at', models.DateTimeField(blank=True, null=True)),
+                ('last_risk', models.CharField(blank=True, default='', max_length=8)),
+                ('last_baz', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('academic_year', models.CharField(blank=True, default='', max_length=7)),
+                ('screenings_this_year', models.PositiveIntegerField(default=0)),
+                ('supplements_granted', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('last_screening', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='screening.screening')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.organization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'last_risk'], name='screening_s_organiz_4fe633_idx'), models.Index(fields=['organization', '-last_screened_at'], name='screening_s_organiz_7a3cf7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0006_student_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentstatus',
+            name='growth',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
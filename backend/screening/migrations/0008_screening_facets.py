@@ -0,0 +1,50 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0007_student_status_growth'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screening',
+            name='baz_category_code',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='screening',
+            name='diet_flags',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='screening',
+            name='diet_type_code',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='screening',
+            name='health_flags',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='screening',
+            name='hunger_code',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='screening',
+            index=models.Index(fields=['organization', 'screened_at', 'health_flags', 'diet_flags'], name='screening_s_organiz_e905ee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='screening',
+            index=models.Index(fields=['organization', 'hunger_code'], name='screening_s_organiz_fa103a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='screening',
+            index=models.Index(fields=['organization', 'baz_category_code'], name='screening_s_organiz_b937bb_idx'),
+        ),
+    ]
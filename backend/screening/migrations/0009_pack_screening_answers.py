@@ -0,0 +1,19 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:18
+
+from django.db import migrations
+import screening.answers_codec
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0008_screening_facets'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='screening',
+            name='answers',
+            field=screening.answers_codec.PackedAnswersField(blank=True, default=dict),
+        ),
+    ]
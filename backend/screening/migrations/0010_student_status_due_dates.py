@@ -0,0 +1,32 @@
+# Generated by Django 4.2.14 on 2026-10-17 02:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0009_pack_screening_answers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentstatus',
+            name='milestone_due_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentstatus',
+            name='next_due_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentstatus',
+            name='rescreen_due_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='studentstatus',
+            index=models.Index(fields=['organization', 'next_due_on'], name='screening_s_organiz_5e916c_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.14 on 2026-10-17 03:03
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def updated_at_from_screened_at(apps, schema_editor):
+    # Existing rows would otherwise all carry the migration time
+    Screening = apps.get_model("screening", "Screening")
+    Screening.objects.update(updated_at=F("screened_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0010_student_status_due_dates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screening',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(updated_at_from_screened_at, migrations.RunPython.noop),
+    ]
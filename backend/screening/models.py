@@ -2,6 +2,7 @@ from django.db import models
 from django.utils import timezone
 from accounts.models import Organization, User
 from roster.models import Student
+from .answers_codec import PackedAnswersField
 
 class Screening(models.Model):
     class RiskLevel(models.TextChoices):
@@ -25,18 +26,136 @@ class Screening(models.Model):
     bmi = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
     baz = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
 
-    # Stores ALL Section A–F answers (raw) per screening
-    answers = models.JSONField(default=dict, blank=True)
+    # Stores ALL Section A–F answers (raw) per screening, packed (screening.answers_codec)
+    answers = PackedAnswersField(default=dict, blank=True)
 
     risk_level = models.CharField(max_length=8, choices=RiskLevel.choices, default=RiskLevel.GREEN)
     red_flags = models.JSONField(default=list, blank=True)  # now holds all triggering reasons
     is_low_income_at_screen = models.BooleanField(default=False)
 
+    # Which rules/reference tables produced risk_level (see screening.rules)
+    ruleset_version = models.CharField(max_length=32, blank=True, default="")
+    reference_hash = models.CharField(max_length=16, blank=True, default="")
+
+    # Indexed copies of the scoring facets (screening.facets): red-flag bitmasks + enum codes
+    health_flags = models.PositiveIntegerField(default=0)
+    diet_flags = models.PositiveIntegerField(default=0)
+    hunger_code = models.PositiveSmallIntegerField(default=0)
+    diet_type_code = models.PositiveSmallIntegerField(default=0)
+    baz_category_code = models.PositiveSmallIntegerField(default=0)
+
+    # Client-generated idempotency key for screenings captured offline (screening.sync)
+    sync_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+
+    # Warehouse export watermark (reporting.warehouse); bulk_update()/update() callers set it explicitly
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
     class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["organization", "sync_key"], name="uniq_screening_sync_key"),
+        ]
         indexes = [
             models.Index(fields=["student", "-screened_at"]),
             models.Index(fields=["organization", "risk_level"]),
+            models.Index(fields=["organization", "-screened_at"]),
+            models.Index(fields=["ruleset_version", "reference_hash"]),
+            # Covering index for flag counts over a date range (no row lookups)
+            models.Index(fields=["organization", "screened_at", "health_flags", "diet_flags"]),
+            models.Index(fields=["organization", "hunger_code"]),
+            models.Index(fields=["organization", "baz_category_code"]),
         ]
 
     def __str__(self):
         return f"{self.student.full_name} @ {self.screened_at:%Y-%m-%d} ({self.risk_level})"
+
+
+class RiskRuleset(models.Model):
+    """A published version of the risk rules (schema: screening.rules).
+
+    The most recent active row overrides the bundled default ruleset file.
+    Once saved, `version` and `definition` cannot change (screenings record
+    only the version they were scored with); publish a new version instead.
+    Only `is_active` and `notes` stay editable.
+    """
+    version = models.CharField(max_length=32, unique=True)
+    definition = models.JSONField()
+    content_hash = models.CharField(max_length=64, editable=False)
+    is_active = models.BooleanField(default=True)
+    notes = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        from .rules import RulesetError, compile_ruleset, content_hash
+
+        definition = dict(self.definition or {})
+        definition.setdefault("version", self.version)
+        if definition["version"] != self.version:
+            raise ValidationError({"definition": "definition.version must match version"})
+        try:
+            compile_ruleset(definition)
+        except RulesetError as e:
+            raise ValidationError({"definition": str(e)})
+        if self.pk:
+            published = RiskRuleset.objects.filter(pk=self.pk).values_list("version", "content_hash").first()
+            if published and published != (self.version, content_hash(definition)):
+                raise ValidationError(
+                    f"Ruleset {published[0]} is already published; save the change as a new version."
+                )
+        self.definition = definition
+
+    def save(self, *args, **kwargs):
+        from .rules import content_hash
+        self.clean()  # also outside the admin: a bad active row would break every compute_risk()
+        self.content_hash = content_hash(self.definition or {})
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.version}{'' if self.is_active else ' (inactive)'}"
+
+
+class StudentStatus(models.Model):
+    """One row per student: latest screening and assistance state for teacher lists.
+
+    A projection maintained by screening.status (signals + bulk writers);
+    `rebuild_student_status` recomputes it from Screening / Application.
+    """
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name="current_status")
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="+")
+
+    last_screening = models.ForeignKey(Screening, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_screened_at = models.DateTimeField(null=True, blank=True)
+    last_risk = models.CharField(max_length=8, blank=True, default="")
+    last_baz = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+
+    # Screenings in `academic_year` (e.g. "2025-26"); stale once the year rolls over
+    academic_year = models.CharField(max_length=7, blank=True, default="")
+    screenings_this_year = models.PositiveIntegerField(default=0)
+
+    supplements_granted = models.BooleanField(default=False)  # any APPROVED application
+
+    # Measurement series, oldest first: [[screening_id, "YYYY-MM-DD", age_months,
+    # height_cm, weight_kg, bmi, baz], ...] (see screening.growth)
+    growth = models.JSONField(default=list, blank=True)
+
+    # Re-screening planner (screening.rescreen): one cycle after the last
+    # screening (or after joining the roster), the earliest open enrollment
+    # milestone, and the earlier of the two
+    rescreen_due_on = models.DateField(null=True, blank=True)
+    milestone_due_on = models.DateField(null=True, blank=True)
+    next_due_on = models.DateField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["organization", "last_risk"]),
+            models.Index(fields=["organization", "-last_screened_at"]),
+            models.Index(fields=["organization", "next_due_on"]),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id}: {self.last_risk or '-'}"
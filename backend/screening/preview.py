@@ -0,0 +1,132 @@
+"""Live risk preview for the screening form.
+
+`preview_risk(params)` takes whatever NewScreeningForm fields the teacher has
+filled in so far (form-encoded names and values, e.g. the query string the
+form's script sends on every change) and returns the provisional BMI, BAZ,
+BAZ category and level from the active ruleset's `evaluate`, the same code
+compute_risk() uses on submit.
+
+It is called on every field change, so it never touches the database: the
+active ruleset and the growth reference tables are already cached per
+process (screening.rules, screening.growth_reference), and results are
+memoized per distinct input (PREVIEW_CACHE_MAX entries), so retyping a value
+or toggling a checkbox back is a dict lookup. Fields that are missing or out
+of the form's ranges are reported under "missing" / "errors"; the level is
+then provisional (e.g. YELLOW until the hunger question is answered).
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import date
+from threading import Lock
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from django.utils import timezone
+
+from .forms import _age_months, _coerce_bool
+from .rules import ENUM_VALUES, TRUTHY_KEYS, YES_NO_KEYS, get_active_ruleset
+
+PREVIEW_CACHE_MAX = 2048
+
+# (field, low, high) as validated by NewScreeningForm.clean()
+_RANGES = (("weight_kg_r1", 5, 200), ("height_cm_r1", 50, 250), ("muac_cm", 5, 35))
+_INT_KEYS = ("pads_per_day", "cycle_length_days")
+_REQUIRED = ("dob", "sex", "weight_kg_r1", "height_cm_r1", "hunger_vital_sign")
+
+_memo: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_lock = Lock()
+
+
+def _number(raw) -> Optional[float]:
+    try:
+        return float(raw) if raw not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_preview_input(params: Mapping[str, Any], *, today: Optional[date] = None) -> Tuple[dict, dict, Dict[str, str]]:
+    """(measurements, answers, errors) from form-encoded NewScreeningForm fields."""
+    errors: Dict[str, str] = {}
+    measurements: Dict[str, Any] = {"age_years": None, "age_months": None, "sex": "",
+                                    "height_cm": None, "weight_kg": None, "muac_cm": None}
+
+    dob = None
+    if params.get("dob"):
+        try:
+            dob = date.fromisoformat(str(params["dob"]))
+        except ValueError:
+            errors["dob"] = "Enter a valid date."
+    if dob:
+        months = _age_months(dob, today or timezone.localdate())
+        measurements.update(age_months=months, age_years=round(months / 12.0, 2))
+
+    sex = str(params.get("sex") or "").upper()
+    if sex in ("M", "F", "O"):
+        measurements["sex"] = sex
+
+    for field, low, high in _RANGES:
+        value = _number(params.get(field))
+        if value is None:
+            if params.get(field):
+                errors[field] = "Enter a number."
+        elif not low <= value <= high:
+            errors[field] = f"Expected {low}–{high}."
+        else:
+            measurements[{"weight_kg_r1": "weight_kg", "height_cm_r1": "height_cm"}.get(field, field)] = value
+
+    answers: Dict[str, Any] = {k: _coerce_bool(params.get(k)) is True for k in TRUTHY_KEYS}
+    for key in YES_NO_KEYS:
+        answers[key] = _coerce_bool(params.get(key))
+    for key, values in ENUM_VALUES.items():
+        value = str(params.get(key) or "").upper()
+        answers[key] = value if value in values else None
+    for key in _INT_KEYS:
+        value = _number(params.get(key))
+        answers[key] = int(value) if value is not None and value >= 0 else None
+    answers["menarche_age_years"] = _number(params.get("menarche_age_years"))
+    return measurements, answers, errors
+
+
+def _evaluate(measurements: dict, answers: dict) -> Dict[str, Any]:
+    ruleset = get_active_ruleset()
+    key = (ruleset.content_hash, tuple(measurements.values()), tuple(sorted(answers.items())))
+    with _lock:
+        hit = _memo.get(key)
+        if hit is not None:
+            _memo.move_to_end(key)
+            return hit
+
+    rr = ruleset.evaluate(answers=answers, **measurements)
+    d = rr.derived
+    out = {
+        "level": rr.level,
+        "bmi": None if d.get("bmi") is None else round(d["bmi"], 1),
+        "baz": None if d.get("baz") is None else round(d["baz"], 2),
+        "baz_category": d.get("baz_category") or "unavailable",
+        "muac_level": d.get("muac_level"),
+        "health_red_flags": d.get("health_red_flags") or [],
+        "diet_flags": d.get("diet_flags") or [],
+        "flags": [f for f in rr.flags if "=" not in f],
+        "ruleset_version": rr.ruleset_version,
+    }
+    with _lock:
+        _memo[key] = out
+        while len(_memo) > PREVIEW_CACHE_MAX:
+            _memo.popitem(last=False)
+    return out
+
+
+def preview_risk(params: Mapping[str, Any], *, today: Optional[date] = None) -> Dict[str, Any]:
+    """Provisional result for a partially filled screening form (no database access)."""
+    measurements, answers, errors = parse_preview_input(params, today=today)
+    present = {
+        "dob": measurements["age_months"] is not None,
+        "sex": bool(measurements["sex"]),
+        "weight_kg_r1": measurements["weight_kg"] is not None,
+        "height_cm_r1": measurements["height_cm"] is not None,
+        "hunger_vital_sign": answers["hunger_vital_sign"] is not None,
+    }
+    missing = [f for f in _REQUIRED if not present[f]]
+    return {**_evaluate(measurements, answers), "provisional": bool(missing or errors),
+            "missing": missing, "errors": errors}
@@ -0,0 +1,132 @@
+"""Re-screening planner: which children are due for screening, per class and school.
+
+A child is due one cycle (RESCREEN_CYCLE_DAYS) after their last screening, or
+from the day they joined the roster if never screened, and on the due date of
+any open (DUE/OVERDUE) 3/6-month milestone of an ACTIVE enrollment
+(program.ScreeningMilestone). The dates live on the StudentStatus projection
+(rescreen_due_on, milestone_due_on, next_due_on), so "due today / overdue"
+for a class or a whole school is one range scan on the (organization,
+next_due_on) index joined to Student, with no per-student subqueries; the
+rows store dates rather than flags, so they do not go stale as days pass.
+
+Kept current incrementally:
+
+  - screening.status fills all three in `_refresh_chunk()` and advances the
+    rescreen date in `note_new_screening()` (one UPDATE per screening);
+  - `refresh_due_dates()` after milestones are created or completed
+    (program.models / program.signals, screening.writes.apply_side_effects).
+
+`rebuild_due_dates()` (command: rebuild_rescreen_due, Celery beat nightly
+after the milestone job) recomputes every row in id-ordered chunks: two
+set-based SELECTs and one bulk UPDATE per chunk.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .models import StudentStatus
+
+RESCREEN_CYCLE_DAYS = 183
+REBUILD_CHUNK = 2000
+
+DUE_FIELDS = ["rescreen_due_on", "milestone_due_on", "next_due_on"]
+
+
+def rescreen_due_on(last_screened_at: Optional[datetime], joined_at: Optional[datetime] = None) -> Optional[date]:
+    """One cycle after the last screening; the roster join date if never screened."""
+    if last_screened_at is not None:
+        return timezone.localdate(last_screened_at) + timedelta(days=RESCREEN_CYCLE_DAYS)
+    return timezone.localdate(joined_at) if joined_at is not None else None
+
+
+def next_due_on(*dates: Optional[date]) -> Optional[date]:
+    present = [d for d in dates if d is not None]
+    return min(present) if present else None
+
+
+def milestone_due_by_student(student_ids: Iterable[int]) -> Dict[int, date]:
+    """Earliest open milestone due date on each student's ACTIVE enrollments (one GROUP BY)."""
+    from program.models import Enrollment, ScreeningMilestone
+
+    return dict(
+        ScreeningMilestone.objects.filter(
+            enrollment__student_id__in=list(student_ids),
+            enrollment__status=Enrollment.Status.ACTIVE,
+            status__in=[ScreeningMilestone.Status.DUE, ScreeningMilestone.Status.OVERDUE],
+        )
+        .values("enrollment__student_id").annotate(due=Min("due_on"))
+        .values_list("enrollment__student_id", "due")
+    )
+
+
+def refresh_due_dates(student_ids: Iterable[int]) -> int:
+    """Recompute the due dates of `student_ids`' status rows."""
+    ids = sorted({int(i) for i in student_ids if i})
+    if not ids:
+        return 0
+    milestones = milestone_due_by_student(ids)
+    rows = []
+    for student_id, last_screened_at, joined_at in (
+        StudentStatus.objects.filter(student_id__in=ids)
+        .values_list("student_id", "last_screened_at", "student__created_at")
+    ):
+        rescreen = rescreen_due_on(last_screened_at, joined_at)
+        milestone = milestones.get(student_id)
+        rows.append(StudentStatus(student_id=student_id, rescreen_due_on=rescreen, milestone_due_on=milestone,
+                                  next_due_on=next_due_on(rescreen, milestone)))
+    StudentStatus.objects.bulk_update(rows, DUE_FIELDS)
+    return len(rows)
+
+
+def rebuild_due_dates(org_id: Optional[int] = None, *, chunk_size: int = REBUILD_CHUNK,
+                      progress: Optional[Callable[[int], None]] = None) -> int:
+    """Recompute every status row's due dates (optionally one organization), in id order."""
+    qs = StudentStatus.objects.order_by("student_id")
+    if org_id:
+        qs = qs.filter(organization_id=org_id)
+    done, last_id = 0, 0
+    while True:
+        ids = list(qs.filter(student_id__gt=last_id).values_list("student_id", flat=True)[:chunk_size])
+        if not ids:
+            return done
+        done += refresh_due_dates(ids)
+        last_id = ids[-1]
+        if progress:
+            progress(done)
+
+
+# ---------------------------------------------------------------------------
+# Queries for dashboards
+# ---------------------------------------------------------------------------
+
+DUE_FILTERS = ("overdue", "today", "due")
+
+
+def filter_due(students, which: str, today: Optional[date] = None):
+    """Narrow a Student queryset to those overdue, due today, or either ("due")."""
+    today = today or timezone.localdate()
+    if which == "overdue":
+        return students.filter(current_status__next_due_on__lt=today)
+    if which == "today":
+        return students.filter(current_status__next_due_on=today)
+    if which == "due":
+        return students.filter(current_status__next_due_on__lte=today)
+    return students
+
+
+def due_counts_by_class(org, today: Optional[date] = None) -> Dict[Optional[int], Dict[str, int]]:
+    """{classroom_id: {"overdue": n, "due_today": n}} for `org` (None: no class), one GROUP BY."""
+    today = today or timezone.localdate()
+    rows = (
+        StudentStatus.objects.filter(organization=org, next_due_on__lte=today)
+        .values("student__classroom_id")
+        .annotate(overdue=Count("pk", filter=Q(next_due_on__lt=today)),
+                  due_today=Count("pk", filter=Q(next_due_on=today)))
+        .values_list("student__classroom_id", "overdue", "due_today")
+    )
+    return {classroom_id: {"overdue": o, "due_today": t} for classroom_id, o, t in rows}
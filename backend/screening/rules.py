@@ -0,0 +1,471 @@
+"""Declarative, versioned risk rulesets.
+
+The thresholds and flag logic used by `compute_risk` are data, not code:
+
+  - the bundled default lives in `screening/data/rulesets/<version>.json`,
+  - program staff can publish newer versions as `RiskRuleset` rows (admin);
+    the most recent active row wins over the bundled file.
+
+A ruleset definition is validated and compiled once into a `CompiledRuleset`
+whose `evaluate()` is a chain of closures (no dict lookups of thresholds at
+scoring time). Compiled rulesets are cached by content hash, so two versions
+with identical content share one evaluator.
+
+Every scored Screening records `ruleset_version` and the growth
+`reference_hash`, so `rescore_screenings --stale-only` can target just the
+rows scored under older semantics. That only holds because a published
+version never changes: RiskRuleset.save() validates the definition and
+rejects edits to a saved row. An invalid active row that got in anyway is
+logged and the bundled file is used instead.
+
+Definition schema (see data/rulesets/v1.json for a complete example):
+
+  baz:    age_years [lo, hi], ordered bands ({"below"|"above": z, level,
+          category}; first match wins), default {level, category},
+          unavailable_level
+  muac:   age_months [lo, hi], red_below, yellow_max
+  health_red_flags: Section C answer keys; any truthy answer => RED
+  appetite_red:     appetite values that count as a health red flag
+  menstrual:        adolescent-girl checks (min_age_years, heavy_pads_per_day,
+                    clots_are_heavy, irregular_cycle_days_over)
+  hunger:           {"red": [...], "green": [...]}; anything not green => YELLOW
+  diet_flags:       ordered [{key, flag, when: true|false, diet_types?}]
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from django.db import DatabaseError
+
+from .bmi_reference import bmi_to_baz
+from .growth_reference import HFA, WFA, age_in_months, haz_category, reference_hash, waz_category, zscore
+
+logger = logging.getLogger(__name__)
+
+_RULESET_DIR = Path(__file__).resolve().parent / "data" / "rulesets"
+DEFAULT_RULESET_FILE = _RULESET_DIR / "v1.json"
+
+LEVELS = ("GREEN", "YELLOW", "RED")
+
+# Answer columns a ruleset may reference. Batch scoring flattens exactly these,
+# so any valid ruleset can be evaluated over a stored columnar snapshot.
+TRUTHY_KEYS: Tuple[str, ...] = (
+    "health_general_poor",
+    "health_pallor",
+    "health_fatigue_dizzy_faint",
+    "health_breathlessness",
+    "health_frequent_infections",
+    "health_chronic_cough_or_diarrhea",
+    "health_visible_worms",
+    "health_dental_or_gum_or_ulcers",
+    "health_night_vision_difficulty",
+    "health_bone_or_joint_pain",
+    "menarche_started",
+    "bleeding_clots",
+)
+YES_NO_KEYS: Tuple[str, ...] = (
+    "breakfast_eaten",
+    "lunch_eaten",
+    "green_leafy_veg",
+    "other_vegetables",
+    "fruits",
+    "dal_pulses_beans",
+    "milk_curd",
+    "egg",
+    "fish_chicken_meat",
+    "nuts_groundnuts",
+    "millet_whole_grains",
+    "ssb_or_packaged_snacks",
+    "deworming_taken",
+)
+# enum answer key -> allowed (upper-cased) values; position + 1 is the batch code
+ENUM_VALUES: Dict[str, Tuple[str, ...]] = {
+    "appetite": ("GOOD", "NORMAL", "POOR"),
+    "hunger_vital_sign": ("OFTEN_TRUE", "SOMETIMES_TRUE", "NEVER_TRUE"),
+    "diet_type": ("LACTO_VEG", "LACTO_OVO", "NON_VEG"),
+}
+
+
+class RulesetError(ValueError):
+    pass
+
+
+def content_hash(definition: Dict[str, Any]) -> str:
+    canonical = json.dumps(definition, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def enum_code(key: str, value: Any) -> int:
+    try:
+        return ENUM_VALUES[key].index((value or "").upper()) + 1
+    except ValueError:
+        return 0
+
+
+@dataclass(frozen=True)
+class BazBand:
+    below: Optional[float]
+    above: Optional[float]
+    level: str
+    category: str
+
+
+@dataclass(frozen=True)
+class DietFlag:
+    key: str
+    flag: str
+    when: bool
+    diet_types: Optional[Tuple[str, ...]]
+
+
+@dataclass
+class CompiledRuleset:
+    """A validated ruleset: parameters for the batch kernels + the scalar evaluator."""
+    version: str
+    content_hash: str
+    baz_age_years: Tuple[float, float]
+    baz_bands: Tuple[BazBand, ...]
+    baz_default: Tuple[str, str]
+    baz_unavailable_level: str
+    muac_age_months: Tuple[float, float]
+    muac_red_below: float
+    muac_yellow_max: float
+    health_keys: Tuple[str, ...]
+    appetite_red: Tuple[str, ...]
+    menstrual_min_age_years: float
+    heavy_pads_per_day: Optional[int]
+    clots_are_heavy: bool
+    irregular_cycle_days_over: Optional[int]
+    hunger_red: Tuple[str, ...]
+    hunger_green: Tuple[str, ...]
+    diet_flags: Tuple[DietFlag, ...]
+    definition: Dict[str, Any] = None
+    evaluate: Callable[..., Any] = None
+
+    @property
+    def baz_categories(self) -> Tuple[str, ...]:
+        """Category names indexed by the batch BAZ code (0 == unavailable)."""
+        return ("unavailable",) + tuple(b.category for b in self.baz_bands) + (self.baz_default[1],)
+
+    @property
+    def sd_boundaries(self) -> Tuple[float, ...]:
+        return tuple(sorted({b.below if b.below is not None else b.above for b in self.baz_bands}))
+
+
+# ---------------------------------------------------------------------------
+# Validation
+# ---------------------------------------------------------------------------
+
+def _level(value: Any, where: str) -> str:
+    if value not in LEVELS:
+        raise RulesetError(f"{where}: level must be one of {LEVELS}, got {value!r}")
+    return value
+
+
+def _enum_values(key: str, values: Sequence[Any], where: str) -> Tuple[str, ...]:
+    out = tuple(str(v).upper() for v in (values or ()))
+    bad = [v for v in out if v not in ENUM_VALUES[key]]
+    if bad:
+        raise RulesetError(f"{where}: unknown {key} value(s) {bad}")
+    return out
+
+
+def _parse(definition: Dict[str, Any]) -> Dict[str, Any]:
+    version = str(definition.get("version") or "").strip()
+    if not version:
+        raise RulesetError("ruleset.version is required")
+
+    baz = definition.get("baz") or {}
+    bands = []
+    for i, b in enumerate(baz.get("bands") or []):
+        if ("below" in b) == ("above" in b):
+            raise RulesetError(f"baz.bands[{i}]: exactly one of 'below'/'above' is required")
+        bands.append(BazBand(
+            below=float(b["below"]) if "below" in b else None,
+            above=float(b["above"]) if "above" in b else None,
+            level=_level(b.get("level"), f"baz.bands[{i}]"),
+            category=str(b.get("category") or f"band_{i}"),
+        ))
+    default = baz.get("default") or {"level": "GREEN", "category": "normal"}
+
+    muac = definition.get("muac") or {}
+    menstrual = definition.get("menstrual") or {}
+    hunger = definition.get("hunger") or {}
+
+    health_keys = tuple(definition.get("health_red_flags") or ())
+    unknown = [k for k in health_keys if k not in TRUTHY_KEYS]
+    if unknown:
+        raise RulesetError(f"health_red_flags: unknown answer key(s) {unknown}")
+
+    diet_flags = []
+    for i, d in enumerate(definition.get("diet_flags") or []):
+        if d.get("key") not in YES_NO_KEYS:
+            raise RulesetError(f"diet_flags[{i}]: unknown yes/no answer key {d.get('key')!r}")
+        if not isinstance(d.get("when"), bool):
+            raise RulesetError(f"diet_flags[{i}]: 'when' must be true or false")
+        types = d.get("diet_types")
+        diet_flags.append(DietFlag(
+            key=d["key"],
+            flag=str(d.get("flag") or d["key"]),
+            when=d["when"],
+            diet_types=_enum_values("diet_type", types, f"diet_flags[{i}]") if types is not None else None,
+        ))
+
+    lo_y, hi_y = baz.get("age_years") or (5.0, 18.0)
+    lo_m, hi_m = muac.get("age_months") or (6, 59)
+    pads = menstrual.get("heavy_pads_per_day")
+    cycle = menstrual.get("irregular_cycle_days_over")
+    return dict(
+        version=version,
+        content_hash=content_hash(definition),
+        baz_age_years=(float(lo_y), float(hi_y)),
+        baz_bands=tuple(bands),
+        baz_default=(_level(default.get("level"), "baz.default"), str(default.get("category") or "normal")),
+        baz_unavailable_level=_level(baz.get("unavailable_level", "YELLOW"), "baz.unavailable_level"),
+        muac_age_months=(float(lo_m), float(hi_m)),
+        muac_red_below=float(muac.get("red_below", 11.5)),
+        muac_yellow_max=float(muac.get("yellow_max", 12.5)),
+        health_keys=health_keys,
+        appetite_red=_enum_values("appetite", definition.get("appetite_red"), "appetite_red"),
+        menstrual_min_age_years=float(menstrual.get("min_age_years", 10.0)),
+        heavy_pads_per_day=int(pads) if pads is not None else None,
+        clots_are_heavy=bool(menstrual.get("clots_are_heavy", True)),
+        irregular_cycle_days_over=int(cycle) if cycle is not None else None,
+        hunger_red=_enum_values("hunger_vital_sign", hunger.get("red"), "hunger.red"),
+        hunger_green=_enum_values("hunger_vital_sign", hunger.get("green"), "hunger.green"),
+        diet_flags=tuple(diet_flags),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Compilation (scalar evaluator)
+# ---------------------------------------------------------------------------
+
+def _int_or_none(value) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except Exception:
+        return None
+
+
+def _compile_baz(rs: CompiledRuleset) -> Callable[[float], Tuple[str, str]]:
+    tests = []
+    for b in rs.baz_bands:
+        if b.below is not None:
+            tests.append((lambda z, t=b.below: z < t, b.level, b.category))
+        else:
+            tests.append((lambda z, t=b.above: z > t, b.level, b.category))
+    default = rs.baz_default
+
+    def baz_category(baz: float) -> Tuple[str, str]:
+        for test, level, category in tests:
+            if test(baz):
+                return level, category
+        return default
+    return baz_category
+
+
+def _compile_muac(rs: CompiledRuleset) -> Callable[[Optional[float], Optional[int]], Optional[str]]:
+    lo, hi = rs.muac_age_months
+    red_below, yellow_max = rs.muac_red_below, rs.muac_yellow_max
+
+    def muac_flag(muac_cm, age_months):
+        if muac_cm is None or age_months is None:
+            return None
+        if age_months < lo or age_months > hi:
+            return None
+        x = float(muac_cm)
+        if x < red_below:
+            return "RED"
+        if x <= yellow_max:
+            return "YELLOW"
+        return "GREEN"
+    return muac_flag
+
+
+def _compile_health(rs: CompiledRuleset) -> Callable[[str, Optional[float], Dict[str, Any]], List[str]]:
+    keys = rs.health_keys
+    appetite_red = set(rs.appetite_red)
+    min_age = rs.menstrual_min_age_years
+    heavy_pads, clots_heavy, cycle_over = rs.heavy_pads_per_day, rs.clots_are_heavy, rs.irregular_cycle_days_over
+
+    def health_red_flags(sex: str, age_years, answers) -> List[str]:
+        red = [k for k in keys if bool(answers.get(k))]
+        if (answers.get("appetite") or "").upper() in appetite_red:
+            red.append("appetite_poor")
+
+        # Adolescent girls: heavy bleeding + irregular cycles
+        if sex == "F" and age_years is not None and float(age_years) >= min_age:
+            pads = _int_or_none(answers.get("pads_per_day"))
+            if (heavy_pads is not None and pads is not None and pads >= heavy_pads) or (
+                clots_heavy and bool(answers.get("bleeding_clots"))
+            ):
+                red.append("heavy_bleeding")
+            days = _int_or_none(answers.get("cycle_length_days"))
+            if cycle_over is not None and days is not None and days > cycle_over:
+                red.append(f"irregular_cycles_gt_{cycle_over}")
+        return red
+    return health_red_flags
+
+
+def _compile_diet(rs: CompiledRuleset) -> Callable[[str, Dict[str, Any]], List[str]]:
+    specs = tuple((d.key, d.flag, d.when, frozenset(d.diet_types) if d.diet_types is not None else None)
+                  for d in rs.diet_flags)
+
+    def diet_flags(diet_type: str, answers) -> List[str]:
+        return [
+            flag for key, flag, when, types in specs
+            if (types is None or diet_type in types) and answers.get(key) is when
+        ]
+    return diet_flags
+
+
+def _compile_evaluator(rs: CompiledRuleset) -> Callable[..., Any]:
+    from .services import RiskResult, _bmi
+
+    baz_category = _compile_baz(rs)
+    muac_flag = _compile_muac(rs)
+    health_red_flags = _compile_health(rs)
+    diet_flags_for = _compile_diet(rs)
+    baz_lo, baz_hi = rs.baz_age_years
+    unavailable_level = rs.baz_unavailable_level
+    sd_boundaries = rs.sd_boundaries
+    hunger_red, hunger_green = set(rs.hunger_red), set(rs.hunger_green)
+    version, ref_hash = rs.version, reference_hash()
+
+    def evaluate(*, age_years, age_months, sex, height_cm, weight_kg, muac_cm, answers):
+        flags: List[str] = []
+        derived: Dict[str, Any] = {}
+        sex = (sex or "").upper()
+
+        # --- BMI + BAZ ---
+        bmi = _bmi(height_cm, weight_kg)
+        derived["bmi"] = bmi
+        growth_level = unavailable_level
+        if bmi is not None and age_years is not None and baz_lo <= float(age_years) <= baz_hi and sex in {"M", "F"}:
+            baz, ref_age, median, sd = bmi_to_baz(bmi=float(bmi), age_years=float(age_years), sex=sex, age_months=age_months)
+            derived.update({"baz": baz, "bmi_ref_age_years": ref_age, "bmi_ref_median": median, "bmi_ref_sd": sd})
+            derived["bmi_sd_boundaries"] = {z: float(median) + float(z) * float(sd) for z in sd_boundaries}
+            growth_level, baz_cat = baz_category(float(baz))
+            derived["baz_category"] = baz_cat
+            flags.append(f"baz_{baz_cat}")
+        else:
+            flags.append("baz_unavailable")
+
+        # --- Stunting / underweight (only when the WHO HFA/WFA tables are installed) ---
+        months = age_in_months(age_years, age_months)
+        if months is not None:
+            if height_cm is not None:
+                haz = zscore(HFA, value=float(height_cm), age_months=months, sex=sex)
+                if haz is not None:
+                    derived.update({"haz": haz, "haz_category": haz_category(haz)})
+            if weight_kg is not None:
+                waz = zscore(WFA, value=float(weight_kg), age_months=months, sex=sex)
+                if waz is not None:
+                    derived.update({"waz": waz, "waz_category": waz_category(waz)})
+
+        # --- MUAC ---
+        muac_level = muac_flag(muac_cm, age_months)
+        derived["muac_level"] = muac_level
+        if muac_level in {"RED", "YELLOW"}:
+            flags.append(f"muac_{muac_level.lower()}")
+
+        # --- Section C ---
+        health_red = health_red_flags(sex, age_years, answers)
+        derived["health_red_flags"] = health_red
+
+        # --- Section F ---
+        hunger = (answers.get("hunger_vital_sign") or "").upper()
+        derived["hunger_vital_sign"] = hunger
+        food_security_red = hunger in hunger_red
+        if food_security_red:
+            flags.append("food_insecurity")
+
+        # --- Sections D + E ---
+        diet_type = (answers.get("diet_type") or "").upper()
+        derived["diet_type"] = diet_type
+        diet_flags = diet_flags_for(diet_type, answers)
+        derived["diet_flags"] = diet_flags
+        flags.extend(diet_flags)
+
+        # --- Final status ---
+        if growth_level == "RED" or muac_level == "RED" or health_red or food_security_red:
+            level = "RED"
+        elif growth_level == "YELLOW" or muac_level == "YELLOW" or diet_flags or hunger not in hunger_green:
+            level = "YELLOW"
+        else:
+            level = "GREEN"
+
+        if derived.get("baz") is not None:
+            flags.append(f"baz={derived['baz']:.2f}")
+        if derived.get("bmi") is not None:
+            flags.append(f"bmi={derived['bmi']:.1f}")
+
+        return RiskResult(level=level, flags=flags, derived=derived, ruleset_version=version, reference_hash=ref_hash)
+
+    return evaluate
+
+
+_COMPILED: Dict[str, CompiledRuleset] = {}
+
+
+def compile_ruleset(definition: Dict[str, Any]) -> CompiledRuleset:
+    """Validate + compile a definition (cached by content hash)."""
+    key = content_hash(definition)
+    rs = _COMPILED.get(key)
+    if rs is None:
+        rs = CompiledRuleset(definition=copy.deepcopy(definition), **_parse(definition))
+        rs.evaluate = _compile_evaluator(rs)
+        _COMPILED[key] = rs
+    return rs
+
+
+def load_ruleset_file(path: Path = DEFAULT_RULESET_FILE) -> CompiledRuleset:
+    return compile_ruleset(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+# ---------------------------------------------------------------------------
+# Active ruleset (DB override, else bundled default)
+# ---------------------------------------------------------------------------
+
+ACTIVE_CACHE_SECONDS = 60
+_active: Dict[str, Any] = {"ruleset": None, "expires": 0.0}
+
+
+def get_active_ruleset() -> CompiledRuleset:
+    """Most recent active RiskRuleset row, else the bundled default.
+
+    Cached per process for ACTIVE_CACHE_SECONDS; saving a RiskRuleset clears
+    the cache in the saving process immediately.
+    """
+    now = time.monotonic()
+    if _active["ruleset"] is not None and now < _active["expires"]:
+        return _active["ruleset"]
+
+    from .models import RiskRuleset
+    try:
+        row = RiskRuleset.objects.filter(is_active=True).order_by("-created_at", "-id").values_list("definition", flat=True).first()
+    except DatabaseError:
+        row = None
+    try:
+        rs = compile_ruleset(row) if row else load_ruleset_file()
+    except RulesetError:
+        # e.g. a row written around RiskRuleset.save(); keep scoring with the bundled rules
+        logger.error("Active RiskRuleset is invalid; using the bundled ruleset", exc_info=True)
+        rs = load_ruleset_file()
+    _active.update(ruleset=rs, expires=now + ACTIVE_CACHE_SECONDS)
+    return rs
+
+
+def clear_active_ruleset_cache() -> None:
+    _active.update(ruleset=None, expires=0.0)
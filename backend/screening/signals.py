@@ -0,0 +1,73 @@
+"""Screening signals.
+
+Saving or deleting a RiskRuleset invalidates the per-process active ruleset
+cache (other processes pick the change up within rules.ACTIVE_CACHE_SECONDS).
+
+Screening, Application and new Student rows refresh the StudentStatus
+projection (screening.status) inside the writing transaction. Bulk writers
+that bypass signals call refresh_student_status() themselves, and screenings
+saved through screening.writes advance it with note_new_screening().
+After `migrate`, students still without a row get one
+(`fill_status_after_migrate`, connected in ScreeningConfig.ready()).
+"""
+
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from assist.models import Application
+from roster.models import Student
+
+from .models import RiskRuleset, Screening, StudentStatus
+from .rules import clear_active_ruleset_cache
+from .status import fill_missing_student_status, refresh_student_status
+from .writes import side_effects_deferred
+
+
+@receiver(post_save, sender=RiskRuleset)
+@receiver(post_delete, sender=RiskRuleset)
+def reset_active_ruleset(sender, **kwargs):
+    clear_active_ruleset_cache()
+
+
+@receiver(post_save, sender=Screening)
+@receiver(post_save, sender=Application)
+def refresh_status_on_save(sender, instance, raw=False, **kwargs):
+    if not raw and not side_effects_deferred(instance):
+        refresh_student_status([instance.student_id])
+
+
+@receiver(post_delete, sender=Screening)
+@receiver(post_delete, sender=Application)
+def refresh_status_on_delete(sender, instance, origin=None, **kwargs):
+    # Cascades from deleting the student/organization remove the status row too
+    if origin is not None and getattr(origin, "model", type(origin)) is not sender:
+        return
+    refresh_student_status([instance.student_id])
+
+
+@receiver(post_save, sender=Student)
+def create_status_for_new_student(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        refresh_student_status([instance.pk])
+
+
+def _schema_is_current(apps) -> bool:
+    """False after migrating backwards: the projection code needs today's tables."""
+    for model in (StudentStatus, Screening):
+        try:
+            state = apps.get_model(model._meta.app_label, model._meta.model_name)
+        except LookupError:
+            return False
+        if {f.column for f in state._meta.concrete_fields} != {f.column for f in model._meta.concrete_fields}:
+            return False
+    return True
+
+
+def fill_status_after_migrate(sender, apps=None, verbosity=1, **kwargs):
+    if apps is None or not _schema_is_current(apps):
+        return
+    n = fill_missing_student_status()
+    if n and verbosity >= 2:
+        print(f"  Created StudentStatus rows for {n} students.")
@@ -0,0 +1,299 @@
+"""Read-only "what-if" simulator for risk thresholds.
+
+Answers questions like "how many children move from YELLOW to RED if the
+overweight cut-off moves from +1 to +1.5 SD?" without touching `Screening`:
+
+  - `ScreeningSnapshot` keeps every screening in memory as columns (the same
+    `ScreeningColumns` used by batch re-scoring, plus org/grade/sex codes and
+    precomputed BMI/BAZ). It refreshes incrementally by loading only rows with
+    an id above the last one seen; a full rebuild happens every
+    SNAPSHOT_REBUILD_SECONDS to pick up edited rows.
+  - `simulate()` compiles an alternative ruleset (the active ruleset plus
+    dotted-path overrides) and evaluates it, and the active ruleset, over the
+    whole snapshot with the vectorized kernels in screening.batch.
+
+Nothing here writes to the database.
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .batch import LEVELS, SCORING_FIELDS, ScreeningColumns, compute_baz, compute_bmi, load_columns, score_columns
+from .models import Screening
+from .rules import RulesetError, compile_ruleset, get_active_ruleset
+
+SNAPSHOT_REFRESH_SECONDS = 300
+SNAPSHOT_REBUILD_SECONDS = 6 * 3600
+_CHUNK = 20000
+_MAX_CACHED_LEVELS = 8
+
+GROUP_DIMENSIONS = ("org", "grade", "sex")
+_SEXES = ("M", "F", "O", "")
+
+
+class ScreeningSnapshot:
+    """Columnar, append-only, in-memory copy of all screenings."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.cols: Optional[ScreeningColumns] = None
+        self.grade: np.ndarray = np.empty(0, dtype=np.int32)
+        self.grades: List[str] = []          # grade code -> label
+        self.bmi: np.ndarray = np.empty(0)
+        self.baz: np.ndarray = np.empty(0)   # all ages; rulesets apply their own age range
+        self.max_id = 0
+        self.refreshed_at = 0.0
+        self.built_at = 0.0
+        self._levels: Dict[str, np.ndarray] = {}  # ruleset content hash -> level codes
+        self._groups: Dict[Tuple[str, ...], Tuple[np.ndarray, List[Dict[str, Any]]]] = {}
+
+    def __len__(self) -> int:
+        return 0 if self.cols is None else len(self.cols)
+
+    def refresh(self, *, force_rebuild: bool = False) -> int:
+        """Load screenings newer than max_id (or everything on rebuild). Returns rows added."""
+        with self.lock:
+            now = time.monotonic()
+            if force_rebuild or self.cols is None or now - self.built_at > SNAPSHOT_REBUILD_SECONDS:
+                self._reset()
+                self.built_at = now
+            added = self._load_new()
+            self.refreshed_at = now
+            return added
+
+    def ensure_fresh(self) -> None:
+        if self.cols is None or time.monotonic() - self.refreshed_at > SNAPSHOT_REFRESH_SECONDS:
+            self.refresh()
+
+    def _reset(self):
+        self.cols = None
+        self.grade = np.empty(0, dtype=np.int32)
+        self.grades = []
+        self.bmi = np.empty(0)
+        self.baz = np.empty(0)
+        self.max_id = 0
+        self._levels = {}
+        self._groups = {}
+
+    def _load_new(self) -> int:
+        grade_codes = {g: i for i, g in enumerate(self.grades)}
+        base = Screening.objects.order_by("id").values_list(*SCORING_FIELDS, "student__classroom__grade")
+        parts: List[Tuple[ScreeningColumns, np.ndarray]] = []
+        last_id = self.max_id
+        while True:
+            rows = list(base.filter(id__gt=last_id)[:_CHUNK])
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            grades = np.empty(len(rows), dtype=np.int32)
+            for i, row in enumerate(rows):
+                label = row[-1] or ""
+                code = grade_codes.get(label)
+                if code is None:
+                    code = grade_codes[label] = len(self.grades)
+                    self.grades.append(label)
+                grades[i] = code
+            cols = load_columns([row[:-1] for row in rows])
+            cols.stored = []        # not needed for simulation
+            cols.screened_at = []
+            parts.append((cols, grades))
+
+        if not parts:
+            return 0
+
+        new_cols = _concat([c for c, _ in parts])
+        bmi = compute_bmi(new_cols.height_cm, new_cols.weight_kg)
+        baz = compute_baz(bmi, new_cols.age_years, new_cols.age_months, new_cols.sex, (-np.inf, np.inf))
+
+        self.cols = new_cols if self.cols is None else _concat([self.cols, new_cols])
+        self.grade = np.concatenate([self.grade] + [g for _, g in parts])
+        self.bmi = np.concatenate([self.bmi, bmi])
+        self.baz = np.concatenate([self.baz, baz])
+        self.max_id = last_id
+        self._levels = {}
+        self._groups = {}
+        return len(new_cols)
+
+    def levels(self, ruleset) -> np.ndarray:
+        """Level codes (index into batch.LEVELS) for every row under `ruleset`."""
+        cached = self._levels.get(ruleset.content_hash)
+        if cached is None:
+            cached = score_columns(self.cols, ruleset, bmi=self.bmi, baz=self.baz).level
+            if len(self._levels) >= _MAX_CACHED_LEVELS:
+                self._levels.pop(next(iter(self._levels)))
+            self._levels[ruleset.content_hash] = cached
+        return cached
+
+    def group_keys(self, dims: Sequence[str]) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        """Dense group index per row + a description of each group, for `dims` (cached)."""
+        key = tuple(dims)
+        cached = self._groups.get(key)
+        if cached is not None:
+            return cached
+        cols = self.cols
+        if not dims:
+            cached = (np.zeros(len(cols), dtype=np.int64), [{}])
+        else:
+            sex_code = np.select([cols.sex == s for s in _SEXES[:-1]], range(len(_SEXES) - 1), default=len(_SEXES) - 1)
+            orgs, org_code = np.unique(cols.org_ids, return_inverse=True)
+            columns = {
+                "org": (org_code, len(orgs), lambda v: int(orgs[v])),
+                "grade": (self.grade, max(len(self.grades), 1), lambda v: self.grades[v]),
+                "sex": (sex_code, len(_SEXES), lambda v: _SEXES[v]),
+            }
+            combined = np.zeros(len(cols), dtype=np.int64)
+            for d in dims:
+                codes, size, _label = columns[d]
+                combined = combined * size + codes
+            uniq, inverse = np.unique(combined, return_inverse=True)
+            labels = []
+            for value in uniq.tolist():
+                label = {}
+                for d in reversed(dims):
+                    codes, size, to_label = columns[d]
+                    value, code = divmod(value, size)
+                    label[d] = to_label(code)
+                labels.append({d: label[d] for d in dims})
+            cached = (inverse.reshape(-1), labels)
+        self._groups[key] = cached
+        return cached
+
+
+def _concat(parts: Sequence[ScreeningColumns]) -> ScreeningColumns:
+    if len(parts) == 1:
+        return parts[0]
+    first = parts[0]
+    return ScreeningColumns(
+        ids=np.concatenate([p.ids for p in parts]),
+        org_ids=np.concatenate([p.org_ids for p in parts]),
+        screened_at=[],
+        sex=np.concatenate([p.sex for p in parts]),
+        age_years=np.concatenate([p.age_years for p in parts]),
+        age_months=np.concatenate([p.age_months for p in parts]),
+        height_cm=np.concatenate([p.height_cm for p in parts]),
+        weight_kg=np.concatenate([p.weight_kg for p in parts]),
+        muac_cm=np.concatenate([p.muac_cm for p in parts]),
+        truthy=np.concatenate([p.truthy for p in parts]),
+        yes_no=np.concatenate([p.yes_no for p in parts]),
+        enums={k: np.concatenate([p.enums[k] for p in parts]) for k in first.enums},
+        pads_per_day=np.concatenate([p.pads_per_day for p in parts]),
+        cycle_length_days=np.concatenate([p.cycle_length_days for p in parts]),
+    )
+
+
+_snapshot = ScreeningSnapshot()
+
+
+def get_snapshot() -> ScreeningSnapshot:
+    _snapshot.ensure_fresh()
+    return _snapshot
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+def apply_overrides(definition: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of `definition` with dotted-path overrides applied.
+
+    Numeric path segments index lists, e.g.
+      {"baz.bands.3.above": 1.5, "appetite_red": []}
+    """
+    out = copy.deepcopy(definition)
+    for path, value in (overrides or {}).items():
+        parts = str(path).split(".")
+        node: Any = out
+        try:
+            for part in parts[:-1]:
+                node = node[int(part)] if isinstance(node, list) else node.setdefault(part, {})
+            last = parts[-1]
+            if isinstance(node, list):
+                node[int(last)] = value
+            else:
+                node[last] = value
+        except (IndexError, ValueError, TypeError, AttributeError):
+            raise RulesetError(f"Invalid override path {path!r}")
+    return out
+
+
+def _counts(group_idx: np.ndarray, levels: np.ndarray, n_groups: int) -> np.ndarray:
+    return np.bincount(group_idx * len(LEVELS) + levels, minlength=n_groups * len(LEVELS)).reshape(n_groups, len(LEVELS))
+
+
+def _level_dict(counts: Iterable[int]) -> Dict[str, int]:
+    return {str(level): int(n) for level, n in zip(LEVELS, counts)}
+
+
+def simulate(
+    overrides: Optional[Dict[str, Any]] = None,
+    *,
+    definition: Optional[Dict[str, Any]] = None,
+    group_by: Sequence[str] = GROUP_DIMENSIONS,
+    org_ids: Optional[Iterable[int]] = None,
+    snapshot: Optional[ScreeningSnapshot] = None,
+) -> Dict[str, Any]:
+    """Compare the active ruleset with a scenario over all stored screenings.
+
+    The scenario is `definition` (a full ruleset definition) or the active
+    ruleset with `overrides` applied. Raises RulesetError for invalid input.
+    """
+    started = time.perf_counter()
+    dims = [d for d in GROUP_DIMENSIONS if d in set(group_by)]
+    snap = snapshot or get_snapshot()
+    baseline_rs = get_active_ruleset()
+    if definition is None:
+        definition = apply_overrides(baseline_rs.definition, overrides)
+        definition["version"] = f"{baseline_rs.version}+whatif"
+    scenario_rs = compile_ruleset(definition)
+
+    result: Dict[str, Any] = {
+        "rows": 0,
+        "snapshot_max_id": snap.max_id,
+        "baseline_version": baseline_rs.version,
+        "scenario_version": scenario_rs.version,
+        "group_by": dims,
+        "baseline": _level_dict((0, 0, 0)),
+        "scenario": _level_dict((0, 0, 0)),
+        "transitions": {},
+        "groups": [],
+    }
+    if not len(snap):
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    with snap.lock:
+        base_levels = snap.levels(baseline_rs)
+        new_levels = snap.levels(scenario_rs)
+        group_idx, labels = snap.group_keys(dims)
+        if org_ids is not None:
+            mask = np.isin(snap.cols.org_ids, list(org_ids))
+            base_levels, new_levels, group_idx = base_levels[mask], new_levels[mask], group_idx[mask]
+
+    n_groups = len(labels)
+    base_counts = _counts(group_idx, base_levels.astype(np.int64), n_groups)
+    new_counts = _counts(group_idx, new_levels.astype(np.int64), n_groups)
+    moves = np.bincount(base_levels.astype(np.int64) * len(LEVELS) + new_levels, minlength=len(LEVELS) ** 2)
+
+    result.update({
+        "rows": int(len(base_levels)),
+        "baseline": _level_dict(base_counts.sum(axis=0)),
+        "scenario": _level_dict(new_counts.sum(axis=0)),
+        "transitions": {
+            f"{LEVELS[i // len(LEVELS)]}->{LEVELS[i % len(LEVELS)]}": int(n)
+            for i, n in enumerate(moves)
+            if n and i // len(LEVELS) != i % len(LEVELS)
+        },
+        "groups": [
+            {**labels[g], "baseline": _level_dict(base_counts[g]), "scenario": _level_dict(new_counts[g])}
+            for g in np.flatnonzero(base_counts.sum(axis=1))
+        ],
+    })
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
@@ -0,0 +1,203 @@
+"""StudentStatus projection: one row per student for teacher lists and risk filters.
+
+It also carries the student's growth series (screening.growth), so result
+pages and growth charts read one row instead of the screening history.
+
+Teacher lists used to annotate every student with correlated subqueries
+(latest screening id/date/risk, EXISTS over approved applications). They now
+join StudentStatus, whose (organization, last_risk) index serves the risk filter.
+
+The projection is kept current inside the writing transaction:
+
+  - signals (screening.signals) for single Screening / Application / Student saves;
+  - explicit `refresh_student_status()` calls from bulk writers that bypass
+    signals (bulk import / offline sync, batch re-scoring);
+  - `note_new_screening()` from the single-screening write path
+    (screening.writes), which advances the loaded row with one UPDATE.
+
+The row also carries the re-screening due dates (screening.rescreen).
+
+`rebuild_student_status()` (command: rebuild_student_status) recomputes
+everything, e.g. if the projection drifted. Students without a row (all of
+them right after the projection was introduced) get one at the end of every
+`migrate` (`fill_missing_student_status()`, a post_migrate receiver), so
+teacher lists never show screened students as unscreened after a deploy.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Callable, Iterable, Optional
+
+from django.db import connection
+from django.db.models import Count, F, OuterRef, Subquery
+from django.utils import timezone
+
+from assist.models import Application
+from roster.models import Student
+
+from .growth import GROWTH_MAX_POINTS, SERIES_FIELDS, point_from_values, series_json_by_student
+from .models import Screening, StudentStatus
+from .rescreen import milestone_due_by_student, next_due_on, rescreen_due_on
+
+REFRESH_CHUNK = 1000
+
+_UPDATE_FIELDS = [
+    "organization", "last_screening", "last_screened_at", "last_risk", "last_baz",
+    "academic_year", "screenings_this_year", "supplements_granted", "growth",
+    "rescreen_due_on", "milestone_due_on", "next_due_on", "updated_at",
+]
+
+
+def current_academic_year(today: Optional[date] = None) -> str:
+    from screening_only.services import academic_year_label_for_date
+
+    return academic_year_label_for_date(today or timezone.localdate())
+
+
+def _refresh_chunk(ids, year: str, year_start, year_end) -> int:
+    latest = Screening.objects.filter(student=OuterRef("pk")).order_by("-screened_at", "-id")
+    students = list(
+        Student.objects.filter(id__in=ids)
+        .annotate(last_screening_id=Subquery(latest.values("id")[:1]))
+        .values_list("id", "organization_id", "last_screening_id", "created_at")
+    )
+    if not students:
+        return 0
+
+    last = {
+        row[0]: row
+        for row in Screening.objects.filter(id__in=[s[2] for s in students if s[2]])
+        .values_list("id", "screened_at", "risk_level", "baz")
+    }
+    counts = dict(
+        Screening.objects.filter(student_id__in=ids, screened_at__gte=year_start, screened_at__lt=year_end)
+        .values("student_id").annotate(n=Count("id")).values_list("student_id", "n")
+    )
+    granted = set(
+        Application.objects.filter(student_id__in=ids, status=Application.Status.APPROVED)
+        .values_list("student_id", flat=True)
+    )
+    growth = series_json_by_student(
+        Screening.objects.filter(student_id__in=ids).order_by("student_id", "screened_at", "id")
+        .values_list("student_id", *SERIES_FIELDS)
+    )
+    milestones = milestone_due_by_student(ids)
+
+    now = timezone.now()
+    rows = []
+    for student_id, org_id, screening_id, joined_at in students:
+        _, screened_at, risk, baz = last.get(screening_id, (None, None, "", None))
+        rescreen = rescreen_due_on(screened_at, joined_at)
+        milestone = milestones.get(student_id)
+        rows.append(StudentStatus(
+            student_id=student_id,
+            organization_id=org_id,
+            last_screening_id=screening_id,
+            last_screened_at=screened_at,
+            last_risk=risk or "",
+            last_baz=baz,
+            academic_year=year,
+            screenings_this_year=counts.get(student_id, 0),
+            supplements_granted=student_id in granted,
+            growth=growth.get(student_id, []),
+            rescreen_due_on=rescreen,
+            milestone_due_on=milestone,
+            next_due_on=next_due_on(rescreen, milestone),
+            updated_at=now,
+        ))
+
+    # INSERT ... ON DUPLICATE KEY UPDATE (MySQL) / ON CONFLICT (student_id) DO UPDATE
+    target = ["student"] if connection.features.supports_update_conflicts_with_target else None
+    StudentStatus.objects.bulk_create(rows, update_conflicts=True, unique_fields=target, update_fields=_UPDATE_FIELDS)
+    return len(rows)
+
+
+def refresh_student_status(student_ids: Iterable[int]) -> int:
+    """Recompute the projection for `student_ids` (set-based, a few queries per chunk)."""
+    ids = sorted({int(i) for i in student_ids if i})
+    if not ids:
+        return 0
+    from screening_only.services import academic_year_range
+
+    year = current_academic_year()
+    year_start, year_end = academic_year_range(year)
+    return sum(
+        _refresh_chunk(ids[i:i + REFRESH_CHUNK], year, year_start, year_end)
+        for i in range(0, len(ids), REFRESH_CHUNK)
+    )
+
+
+def note_new_screening(student: Student, screening: Screening) -> None:
+    """Advance `student`'s row for `screening`, just inserted as their latest (one UPDATE).
+
+    Uses the row loaded as `student.current_status`; recomputes instead when it
+    is missing, newer than `screening`, or from an earlier academic year. The
+    UPDATE only applies if the row is unchanged since it was loaded (same
+    `updated_at`); when a concurrent screening of the same student got there
+    first, the row is recomputed so neither count nor growth point is lost.
+    """
+    try:
+        status = student.current_status
+    except StudentStatus.DoesNotExist:
+        status = None
+    year = current_academic_year()
+    if (status is None or status.academic_year != year
+            or (status.last_screened_at and status.last_screened_at > screening.screened_at)):
+        refresh_student_status([student.pk])
+        return
+
+    point = point_from_values(screening.pk, screening.screened_at, screening.age_months, screening.height_cm,
+                              screening.weight_kg, screening.bmi, screening.baz)
+    loaded_at = status.updated_at
+    status.last_screening_id = screening.pk
+    status.last_screened_at = screening.screened_at
+    status.last_risk = screening.risk_level or ""
+    status.last_baz = screening.baz
+    status.screenings_this_year += 1
+    status.growth = (list(status.growth or []) + [point.to_json()])[-GROWTH_MAX_POINTS:]
+    # Milestones this screening completes are cleared by the deferred side effects
+    status.rescreen_due_on = rescreen_due_on(screening.screened_at)
+    status.next_due_on = next_due_on(status.rescreen_due_on, status.milestone_due_on)
+    status.updated_at = timezone.now()
+    updated = StudentStatus.objects.filter(pk=student.pk, updated_at=loaded_at).update(
+        screenings_this_year=F("screenings_this_year") + 1,
+        **{f: getattr(status, f) for f in (
+            "last_screening_id", "last_screened_at", "last_risk", "last_baz",
+            "growth", "rescreen_due_on", "next_due_on", "updated_at",
+        )},
+    )
+    if not updated:
+        refresh_student_status([student.pk])
+
+
+def rebuild_student_status(org_id: Optional[int] = None, *, chunk_size: int = REFRESH_CHUNK,
+                           progress: Optional[Callable[[int], None]] = None) -> int:
+    """Recompute every student's row (optionally one organization), in id order."""
+    qs = Student.objects.order_by("id")
+    if org_id:
+        qs = qs.filter(organization_id=org_id)
+    done, last_id = 0, 0
+    while True:
+        ids = list(qs.filter(id__gt=last_id).values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return done
+        done += refresh_student_status(ids)
+        last_id = ids[-1]
+        if progress:
+            progress(done)
+
+
+def fill_missing_student_status(*, chunk_size: int = REFRESH_CHUNK,
+                                progress: Optional[Callable[[int], None]] = None) -> int:
+    """Create the rows of students that have none (an anti-join; nothing to do once filled)."""
+    qs = Student.objects.filter(current_status__isnull=True).order_by("id")
+    done, last_id = 0, 0
+    while True:
+        ids = list(qs.filter(id__gt=last_id).values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return done
+        done += refresh_student_status(ids)
+        last_id = ids[-1]
+        if progress:
+            progress(done)
@@ -0,0 +1,336 @@
+"""Offline-first sync for teacher devices.
+
+Two pieces:
+
+  - `form_schema()`: a JSON description of `NewScreeningForm` (fields, types,
+    choices, limits, sections) so a device can render and pre-validate the form
+    without the server. Its `version` is a content hash, served as the ETag.
+
+  - `apply_sync_batch()`: applies a batch of screenings captured offline in
+    one transaction. Each item carries a client-generated idempotency `key`;
+    items whose key was already applied are reported as "duplicate" with the
+    stored result instead of creating a second screening. Validation, student
+    and guardian upserts and scoring reuse the bulk import path
+    (screening.bulk_import), so lookups and inserts are set-based; milestone
+    completion and enforcement for the created screenings run after commit
+    (screening.writes), as for a screening saved from the form.
+
+Devices use the teacher's session. `teacher_form_schema` sets the csrftoken
+cookie and `teacher_sync` expects it back in the X-CSRFToken header, like any
+other session-authenticated POST.
+
+Item format (everything under "answers" uses NewScreeningForm field names):
+
+  {"key": "3f0c...", "student_code": "S-102", "captured_at": "2026-10-17T09:30:00+05:30",
+   "classroom_id": 12, "is_low_income": false,
+   "measurements": {"weight_kg": 24.5, "height_cm": 128.0, "muac_cm": null},
+   "answers": {"student_name": "...", "dob": "2016-04-02", "sex": "F", "parent_phone_e164": "...", ...}}
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from django import forms as django_forms
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import Organization
+from audit.utils import audit_log
+from roster.models import Classroom
+
+from .batch import rebuild_rollups
+from .bulk_import import ImportResult, RowError, ValidRow, validate_record, write_rows
+from .forms import NewScreeningForm, _age_months
+from .models import Screening
+
+log = logging.getLogger(__name__)
+
+MAX_SYNC_ITEMS = 200
+MAX_KEY_LENGTH = Screening._meta.get_field("sync_key").max_length
+# Screenings captured more than this long ago are rejected (stale device queues)
+MAX_CAPTURE_AGE = timedelta(days=60)
+
+# First field of each form section, in form order
+_SECTION_STARTS = {
+    "student_name": "A",
+    "weight_kg_r1": "B",
+    "health_general_poor": "C",
+    "diet_type": "D",
+    "deworming_taken": "E",
+    "hunger_vital_sign": "F",
+}
+
+
+# ---------------------------------------------------------------------------
+# Form schema
+# ---------------------------------------------------------------------------
+
+def _field_schema(name: str, f: django_forms.Field, section: str) -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "name": name,
+        "label": str(f.label or name),
+        "section": section,
+        "required": bool(f.required),
+    }
+    if isinstance(f, django_forms.BooleanField):
+        out["type"] = "boolean"
+    elif isinstance(f, django_forms.TypedChoiceField) and {"yes", "no"} <= set(dict(f.choices)):
+        out["type"] = "yes_no"
+    elif isinstance(f, django_forms.ChoiceField):
+        out["type"] = "choice"
+        out["choices"] = [{"value": str(v), "label": str(label)} for v, label in f.choices if v != ""]
+    elif isinstance(f, django_forms.DateField):
+        out["type"] = "date"
+    elif isinstance(f, django_forms.DecimalField):
+        out.update(type="decimal", max_digits=f.max_digits, decimal_places=f.decimal_places)
+    elif isinstance(f, django_forms.IntegerField):
+        out["type"] = "integer"
+    else:
+        out["type"] = "text"
+        if getattr(f, "max_length", None):
+            out["max_length"] = f.max_length
+    if getattr(f, "min_value", None) is not None:
+        out["min"] = f.min_value
+    if getattr(f, "max_value", None) is not None:
+        out["max"] = f.max_value
+    return out
+
+
+@lru_cache(maxsize=1)
+def form_schema() -> Dict[str, Any]:
+    """JSON schema of NewScreeningForm; `version` changes whenever the form does."""
+    fields, section = [], "A"
+    for name, f in NewScreeningForm.base_fields.items():
+        section = _SECTION_STARTS.get(name, section)
+        fields.append(_field_schema(name, f, section))
+
+    body = {
+        "fields": fields,
+        # Range checks done in NewScreeningForm.clean()
+        "ranges": {"weight_kg_r1": [5, 200], "height_cm_r1": [50, 250], "muac_cm": [5, 35]},
+        "sync": {"max_items": MAX_SYNC_ITEMS, "max_key_length": MAX_KEY_LENGTH},
+    }
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    return {"version": hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16], **body}
+
+
+# ---------------------------------------------------------------------------
+# Batch sync
+# ---------------------------------------------------------------------------
+
+class SyncError(ValueError):
+    """The batch as a whole is malformed."""
+
+
+@dataclass
+class SyncResult:
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    created: int = 0
+    duplicates: int = 0
+    errors: int = 0
+
+
+def _record_for(item: Dict[str, Any]) -> Dict[str, Any]:
+    answers = item.get("answers") or {}
+    measurements = item.get("measurements") or {}
+    if not isinstance(answers, dict) or not isinstance(measurements, dict):
+        raise SyncError("answers and measurements must be objects.")
+    record = dict(answers)
+    record["unique_student_id"] = item.get("student_code") or answers.get("unique_student_id")
+    for src, dst in (("weight_kg", "weight_kg_r1"), ("height_cm", "height_cm_r1"), ("muac_cm", "muac_cm")):
+        if src in measurements:
+            record[dst] = measurements[src]
+    if "is_low_income" in item:
+        record["is_low_income"] = item["is_low_income"]
+    return record
+
+
+def _captured_at(item: Dict[str, Any], now: datetime) -> Tuple[Optional[datetime], Optional[str]]:
+    raw = item.get("captured_at")
+    if not raw:
+        return None, None
+    dt = parse_datetime(str(raw))
+    if dt is None:
+        return None, "captured_at must be an ISO 8601 datetime."
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    if dt > now + timedelta(minutes=5):
+        return None, "captured_at is in the future."
+    if dt < now - MAX_CAPTURE_AGE:
+        return None, f"captured_at is older than {MAX_CAPTURE_AGE.days} days."
+    return dt, None
+
+
+def _item_result(key: str, status: str, s: Screening) -> Dict[str, Any]:
+    return {
+        "key": key,
+        "status": status,
+        "screening_id": s.id,
+        "student_id": s.student_id,
+        "risk_level": s.risk_level,
+        "red_flags": s.red_flags,
+        "bmi": str(s.bmi) if s.bmi is not None else None,
+        "baz": str(s.baz) if s.baz is not None else None,
+        "screened_at": s.screened_at.isoformat(),
+        "result_url": reverse("screening_result", args=[s.id]),
+        "whatsapp": None,
+    }
+
+
+def apply_sync_batch(org: Organization, items: List[Dict[str, Any]], *, teacher=None, request=None) -> SyncResult:
+    """Validate and apply `items`; returns one result per item, in input order."""
+    if not isinstance(items, list):
+        raise SyncError("items must be a list.")
+    if len(items) > MAX_SYNC_ITEMS:
+        raise SyncError(f"At most {MAX_SYNC_ITEMS} items per batch.")
+
+    now = timezone.now()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+    def _error(i: int, key: str, errors: List[RowError]):
+        results[i] = {"key": key, "status": "error",
+                      "errors": [{"field": e.field, "message": e.message} for e in errors]}
+
+    # 1) keys: malformed, repeated within the batch, or already applied earlier
+    keyed: Dict[str, int] = {}
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise SyncError(f"items[{i}] must be an object.")
+        key = str(item.get("key") or "").strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            _error(i, key, [RowError(i, "key", f"key is required (max {MAX_KEY_LENGTH} chars).")])
+        elif key in keyed:
+            _error(i, key, [RowError(i, "key", f"Same key as items[{keyed[key]}].")])
+        else:
+            keyed[key] = i
+    # Retries are answered from the stored screening, even if the form has changed since
+    for s in Screening.objects.filter(organization=org, sync_key__in=list(keyed)):
+        results[keyed.pop(s.sync_key)] = _item_result(s.sync_key, "duplicate", s)
+
+    # 2) per-item validation (no DB access)
+    valid: List[Tuple[int, ValidRow]] = []
+    for key, i in keyed.items():
+        item = items[i]
+        captured_at, problem = _captured_at(item, now)
+        if problem:
+            _error(i, key, [RowError(i, "captured_at", problem)])
+            continue
+        try:
+            record = _record_for(item)
+        except SyncError as e:
+            _error(i, key, [RowError(i, "", str(e))])
+            continue
+        row, errors = validate_record(i, record)
+        classroom_id = item.get("classroom_id")
+        if classroom_id not in (None, "") and not str(classroom_id).isdigit():
+            errors.append(RowError(i, "classroom_id", "classroom_id must be an integer."))
+        if errors:
+            _error(i, key, errors)
+            continue
+        row.sync_key = key
+        row.screened_at = captured_at
+        row.classroom_id = int(classroom_id) if classroom_id not in (None, "") else None
+        if captured_at and row.dob:
+            # Age at the time of measurement, not at sync time
+            months = _age_months(row.dob, timezone.localtime(captured_at).date())
+            row.derived.update(age_months=months, age_years=round(months / 12.0, 2))
+        valid.append((i, row))
+
+    # 3) set-based checks: classrooms, students repeated within the batch
+    classroom_ids = set(
+        Classroom.objects.filter(organization=org, id__in={r.classroom_id for _, r in valid if r.classroom_id})
+        .values_list("id", flat=True)
+    )
+    to_write: List[Tuple[int, ValidRow]] = []
+    seen_codes: Dict[str, int] = {}
+    for i, row in valid:
+        if row.classroom_id and row.classroom_id not in classroom_ids:
+            _error(i, row.sync_key, [RowError(i, "classroom_id", "Unknown classroom for this school.")])
+            continue
+        first = seen_codes.setdefault(row.code.lower(), i)
+        if first != i:
+            _error(i, row.sync_key, [RowError(i, "student_code", f"Student already screened in items[{first}].")])
+            continue
+        to_write.append((i, row))
+
+    # 4) one transaction for the whole batch
+    summary = ImportResult()
+    touched_days: Set[Tuple[int, date]] = set()
+    if to_write:
+        with transaction.atomic():
+            write_rows(org, [r for _, r in to_write], result=summary, touched_days=touched_days, teacher=teacher)
+            audit_log(teacher, org, "SCREENING_SYNC", payload={
+                "items": len(items),
+                "created": summary.screenings_created,
+                "levels": summary.level_counts,
+            })
+            transaction.on_commit(lambda: rebuild_rollups(touched_days))
+
+        created = {
+            s.sync_key: s
+            for s in Screening.objects.filter(organization=org, sync_key__in=[r.sync_key for _, r in to_write])
+        }
+        for i, row in to_write:
+            results[i] = _item_result(row.sync_key, "created", created[row.sync_key])
+
+    _attach_whatsapp(org, results, request)
+
+    out = SyncResult(items=results)
+    for r in results:
+        if r["status"] == "created":
+            out.created += 1
+        elif r["status"] == "duplicate":
+            out.duplicates += 1
+        else:
+            out.errors += 1
+    return out
+
+
+def _attach_whatsapp(org: Organization, results: List[Dict[str, Any]], request=None) -> None:
+    """Prepare click-to-chat messages for created/duplicate items (never fails the sync)."""
+    from messaging.services import click_to_chat_url, prepare_screening_status_click_to_chat_many
+
+    ids = [r["screening_id"] for r in results if r.get("screening_id")]
+    if not ids:
+        return
+    screenings = list(
+        Screening.objects.filter(id__in=ids).select_related("organization", "student__primary_guardian")
+    )
+
+    try:
+        org.screening_only_profile
+        is_screening_only = True
+    except Exception:
+        is_screening_only = False
+
+    prepared: Dict[int, Tuple[Any, str]] = {}
+    try:
+        if is_screening_only:
+            from screening_only.services import prepare_screening_only_redflag_click_to_chat
+            for s in screenings:
+                msg_log, text = prepare_screening_only_redflag_click_to_chat(request, s)
+                if msg_log:
+                    prepared[s.id] = (msg_log, text)
+        else:
+            prepared = prepare_screening_status_click_to_chat_many(screenings)
+    except Exception:
+        log.exception("Preparing WhatsApp messages for sync failed")
+
+    for r in results:
+        hit = prepared.get(r.get("screening_id"))
+        if hit and hit[0].id:
+            msg_log, text = hit
+            r["whatsapp"] = {
+                "url": click_to_chat_url(msg_log.to_phone_e164, text),
+                "preview_url": reverse("whatsapp_preview", args=[msg_log.id]),
+                "template_code": msg_log.template_code,
+            }
@@ -0,0 +1,18 @@
+from __future__ import annotations
+from celery import shared_task
+
+
+@shared_task
+def screening_side_effects(screening_ids, audit=True, rollups=True):
+    """Milestones, enforcement, audit and rollups for screenings saved by screening.writes."""
+    from .writes import apply_side_effects
+
+    return apply_side_effects(screening_ids, audit=audit, rollups=rollups)
+
+
+@shared_task
+def rebuild_rescreen_due():
+    """Nightly recompute of the re-screening due dates (screening.rescreen)."""
+    from .rescreen import rebuild_due_dates
+
+    return rebuild_due_dates()
@@ -5,7 +5,12 @@ from .views import (
     teacher_add_student,
     screening_create,
     screening_result,
+    student_growth,
     send_parent_whatsapp,
+    teacher_bulk_import,
+    teacher_form_schema,
+    screening_risk_preview,
+    teacher_sync,
 )
 from .export import export_screenings_csv
 
@@ -13,12 +18,17 @@ urlpatterns = [
     re_path(r"^teacher/(?P<token>[-a-z0-9_]+-[A-Za-z0-9]{8})/add-student/$",
             teacher_add_student, name="teacher_add_student_token"),
     path("teacher/add-student/", teacher_add_student, name="teacher_add_student"),
+    path("teacher/bulk-import/", teacher_bulk_import, name="teacher_bulk_import"),
+    path("teacher/sync/", teacher_sync, name="teacher_sync"),
+    path("teacher/form-schema/", teacher_form_schema, name="teacher_form_schema"),
+    path("teacher/risk-preview/", screening_risk_preview, name="screening_risk_preview"),
     re_path(r"^teacher/(?P<token>[-a-z0-9_]+-[A-Za-z0-9]{8})/$",
             teacher_portal_token, name="teacher_portal_token"),
 
     path("teacher/", teacher_portal, name="teacher_portal"),
     path("teacher/screen/<int:student_id>/", screening_create, name="screening_create"),
     path("teacher/result/<int:screening_id>/", screening_result, name="screening_result"),
+    path("teacher/student/<int:student_id>/growth/", student_growth, name="student_growth"),
     path("teacher/send/<int:screening_id>/", send_parent_whatsapp, name="send_parent_whatsapp"),
 
     path("admin/export/screenings.csv", export_screenings_csv, name="export_screenings_csv"),
@@ -1,30 +1,37 @@
 import json
-from datetime import timedelta
 
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError, transaction
-from django.db.models import Q, OuterRef, Subquery, Exists
-from django.http import HttpResponseForbidden
+from django.db.models import F
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.utils import timezone
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import etag, require_GET, require_POST
 
 from accounts.models import Organization, OrgMembership
-from audit.utils import audit_log
 from messaging.models import MessageLog
 from messaging.ratelimit import RateLimitExceeded
 from messaging.services import prepare_screening_status_click_to_chat
 from roster.models import Classroom, Guardian, Student
+from roster.catalog import get_catalog
+from roster.pagination import keyset_paginate, page_size_for
+from roster.search import search_students
 
+from .bulk_import import ImportFileError, import_screenings, template_csv
 from .decorators import require_teacher_or_public
 from .forms import AddStudentForm, NewScreeningForm
+from .growth import series_for
 from .models import Screening
-from .services import compute_risk
-from assist.models import Application
+from .preview import preview_risk
+from .sync import SyncError, apply_sync_batch, form_schema
+from .writes import build_screening, record_screening, save_screening
 import logging
 logger = logging.getLogger(__name__)
 
+TEACHER_PORTAL_PAGE_SIZE = 50
+
 def teacher_portal_token(request, token: str):
     try:
             org.screening_only_profile
@@ -94,132 +101,64 @@ def teacher_portal(request):
     risk = request.GET.get("risk")  # GREEN|YELLOW|RED
     q = (request.GET.get("q") or "").strip()
 
-    last_screening = (
-    Screening.objects
-        .filter(student=OuterRef("pk"))
-        .order_by("-screened_at")
-        .values("risk_level")[:1]
-    )
-    approved_application = (
-        Application.objects
-        .filter(
-            organization=org,
-            student=OuterRef("pk"),
-            status=Application.Status.APPROVED,
-        )
-    )
+    # Latest risk / supplements come from the StudentStatus projection (screening.status)
     students = (
         Student.objects
         .filter(organization=org)
         .annotate(
-            last_risk=Subquery(last_screening),
-            supplements_granted=Exists(approved_application),
+            last_risk=F("current_status__last_risk"),
+            supplements_granted=F("current_status__supplements_granted"),
         )
     )
-    
+
     if classroom_id:
         students = students.filter(classroom_id=classroom_id)
     if risk in {"GREEN", "YELLOW", "RED"}:
-        students = students.filter(last_risk=risk)
+        students = students.filter(current_status__last_risk=risk)
     if q:
-        students = students.filter(Q(first_name__icontains=q) | Q(last_name__icontains=q) | Q(student_code__icontains=q))
+        students = search_students(students, q, organization=org)
 
-    students = students.order_by("last_name", "first_name")
-    classrooms = Classroom.objects.filter(organization=org).order_by("grade", "division")
+    page = keyset_paginate(request, students, page_size=page_size_for(request, TEACHER_PORTAL_PAGE_SIZE))
+    catalog = get_catalog(org)
+    for s in page:
+        s.classroom_entry = catalog.get(s.classroom_id)
 
     return render(request, "screening/teacher_portal.html", {
-        "students": students,
-        "classrooms": classrooms,
+        "students": page,
+        "page": page,
+        "classrooms": catalog.classrooms,
         "selected_classroom": int(classroom_id) if classroom_id else None,
         "selected_risk": risk or "",
         "q": q,
         "teacher_token": org.screening_link_token,
     })
 
-def _warn_if_large_change(student: Student, height_cm: float, weight_kg: float, now_dt):
-    prev = Screening.objects.filter(student=student, screened_at__gte=now_dt - timedelta(days=183)).order_by("-screened_at").first()
-    if not prev:
-        return []
-    warnings = []
-    try:
-        if prev.weight_kg is not None and abs(float(prev.weight_kg) - float(weight_kg)) > 10:
-            warnings.append("Weight changed by > 10kg in ~6 months. Please verify readings.")
-        if prev.height_cm is not None and abs(float(prev.height_cm) - float(height_cm)) > 10:
-            warnings.append("Height changed by > 10cm in ~6 months. Please verify readings.")
-    except Exception:
-        pass
-    return warnings
-
 @require_teacher_or_public
 def screening_create(request, student_id: int):
     org = getattr(request, "org", None)
     if not org:
         return HttpResponseForbidden("Organization context required.")
-    student = get_object_or_404(Student, pk=student_id, organization=org)
+    student = get_object_or_404(Student.objects.select_related("primary_guardian", "current_status"),
+                                pk=student_id, organization=org)
 
     if request.method == "POST":
         form = NewScreeningForm(request.POST, student=student)
         if form.is_valid():
-            derived = form.cleaned_data["_derived"]
-            answers = form.cleaned_data["answers"]
-
-            # Update student master
-            student.student_code = answers.get("unique_student_id") or student.student_code
-            student.dob = form.cleaned_data.get("dob") or student.dob
-            student.gender = form.cleaned_data.get("sex") or student.gender
-            student.save(update_fields=["student_code", "dob", "gender", "updated_at"])
-
-            # Guardian (mandatory)
-            phone = form.cleaned_data["parent_phone_e164"]
-            guardian, _ = Guardian.objects.get_or_create(
-                organization=org, phone_e164=phone,
-                defaults={"full_name": "Parent", "whatsapp_opt_in": True}
-            )
-            if student.primary_guardian_id != guardian.id:
-                student.primary_guardian = guardian
-                student.save(update_fields=["primary_guardian", "updated_at"])
-
-            now_dt = timezone.now()
-            height_cm = float(derived["height_cm"])
-            weight_kg = float(derived["weight_kg"])
-
-            for w in _warn_if_large_change(student, height_cm, weight_kg, now_dt):
-                messages.warning(request, w)
-
-            s = Screening(
-                organization=org,
-                student=student,
+            # Student/guardian update and insert only; milestones, enforcement,
+            # audit and rollups run after commit (screening.writes)
+            s, warnings = record_screening(
+                org, student,
+                answers=form.cleaned_data["answers"],
+                derived=form.cleaned_data["_derived"],
+                phone=form.cleaned_data["parent_phone_e164"],
+                dob=form.cleaned_data.get("dob"),
+                sex=form.cleaned_data.get("sex"),
                 teacher=_teacher_fk(request),
-                screened_at=now_dt,
-                gender=student.gender,
-                age_years=derived["age_years"],
-                age_months=derived["age_months"],
-                height_cm=height_cm,
-                weight_kg=weight_kg,
-                muac_cm=derived.get("muac_cm"),
-                answers=answers,
-                is_low_income_at_screen=bool(getattr(student, "is_low_income", False)),
-            )
-
-            rr = compute_risk(
-                age_years=float(derived["age_years"]),
-                age_months=int(derived["age_months"]),
-                sex=student.gender,
-                height_cm=height_cm,
-                weight_kg=weight_kg,
-                muac_cm=float(derived["muac_cm"]) if derived.get("muac_cm") is not None else None,
-                answers=answers,
             )
-            s.risk_level = rr.level
-            s.red_flags = rr.flags
-            if rr.derived.get("bmi") is not None:
-                s.bmi = rr.derived["bmi"]
-            if rr.derived.get("baz") is not None:
-                s.baz = rr.derived["baz"]
-            s.save()
+            for w in warnings:
+                messages.warning(request, w)
 
             log = _auto_send_for_screening(request, s)
-            audit_log(_teacher_fk(request), org, "SCREENING_CREATED", target=s, payload={"risk": s.risk_level})
 
             if log:
                 preview = reverse("whatsapp_preview", args=[log.id])
@@ -237,8 +176,9 @@ def screening_result(request, screening_id: int):
     org = getattr(request, "org", None)
     if not org:
         return HttpResponseForbidden("Organization context required.")
-    s = get_object_or_404(Screening, pk=screening_id, organization=org)
+    s = get_object_or_404(Screening.objects.select_related("student__current_status"), pk=screening_id, organization=org)
     last_message = MessageLog.objects.filter(related_screening=s).order_by("-created_at").first()
+    growth = series_for(s.student)
 
     teacher_view = {
         "GREEN": "Child’s growth and diet look on track.",
@@ -250,6 +190,26 @@ def screening_result(request, screening_id: int):
         "s": s,
         "last_message": last_message,
         "teacher_view": teacher_view,
+        "growth": growth,
+        "growth_change": growth.change_since_previous(s.id),
+        "growth_trend": growth.baz_trend(),
+        "growth_chart": growth.chart(),
+    })
+
+
+@require_teacher_or_public
+def student_growth(request, student_id: int):
+    """A student's growth series and BAZ trend as JSON (growth chart data)."""
+    org = getattr(request, "org", None)
+    if not org:
+        return HttpResponseForbidden("Organization context required.")
+    student = get_object_or_404(Student.objects.select_related("current_status"), pk=student_id, organization=org)
+    growth = series_for(student)
+    trend = growth.baz_trend()
+    return JsonResponse({
+        "student_id": student.id,
+        "series": growth.chart(),
+        "baz_trend": trend and {"slope_per_year": trend.slope_per_year, "direction": trend.direction, "points": trend.points},
     })
 
 @require_teacher_or_public
@@ -269,36 +229,21 @@ def teacher_add_student(request, token=None):
         return HttpResponseForbidden("Organization context required.")
 
     initial = {}
-    selected_classroom_id = request.GET.get("classroom")
-    if selected_classroom_id:
-        c = Classroom.objects.filter(id=selected_classroom_id, organization=org).first()
-        if c:
-            initial["grade"] = c.grade
-            initial["division"] = c.division
-
-    preferred_division_order = [chr(c) for c in range(ord("A"), ord("Z") + 1)] + ["Other"]
-    division_rank = {d: i for i, d in enumerate(preferred_division_order)}
-    divisions_by_grade = {}
-    for g, d in Classroom.objects.filter(organization=org).values_list("grade", "division"):
-        divisions_by_grade.setdefault(g, set()).add(d or "")
-    
-    # Convert sets -> sorted lists for JSON serialization.
-    divisions_by_grade = {
-        g: sorted(list(ds), key=lambda x: (division_rank.get(x, 999), str(x)))
-        for g, ds in divisions_by_grade.items()
-    }
+    catalog = get_catalog(org)
+    c = catalog.get(request.GET.get("classroom"))
+    if c:
+        initial["grade"] = c.grade
+        initial["division"] = c.division
 
     if request.method == "POST":
-        student_form = AddStudentForm(request.POST, organization=org, initial=initial)
+        student_form = AddStudentForm(request.POST, organization=org, initial=initial, catalog=catalog)
         screening_form = NewScreeningForm(request.POST, student=None, organization=org)
 
         if student_form.is_valid() and screening_form.is_valid():
             try:
                 with transaction.atomic():
-                    grade = student_form.cleaned_data["grade"]
-                    division = student_form.cleaned_data["division"] or ""
-                    classroom = Classroom.objects.filter(organization=org, grade=grade, division=division).first()
-                    if not classroom:
+                    classroom_id = student_form.cleaned_data.get("classroom_id")
+                    if not classroom_id:
                         raise ValidationError("Selected Grade/Division does not exist.")
 
                     phone = screening_form.cleaned_data["parent_phone_e164"]
@@ -312,7 +257,7 @@ def teacher_add_student(request, token=None):
 
                     student = Student.objects.create(
                         organization=org,
-                        classroom=classroom,
+                        classroom_id=classroom_id,
                         first_name=(answers.get("student_name") or "").strip(),
                         last_name="",
                         gender=answers.get("sex"),
@@ -322,41 +267,10 @@ def teacher_add_student(request, token=None):
                         primary_guardian=guardian,
                     )
 
-                    now_dt = timezone.now()
-                    height_cm = float(derived["height_cm"])
-                    weight_kg = float(derived["weight_kg"])
-
-                    s = Screening(
-                        organization=org,
-                        student=student,
-                        teacher=_teacher_fk(request),
-                        screened_at=now_dt,
-                        gender=student.gender,
-                        age_years=derived["age_years"],
-                        age_months=derived["age_months"],
-                        height_cm=height_cm,
-                        weight_kg=weight_kg,
-                        muac_cm=derived.get("muac_cm"),
-                        answers=answers,
-                        is_low_income_at_screen=student_form.cleaned_data.get("is_low_income", False),
-                    )
-
-                    rr = compute_risk(
-                        age_years=float(derived["age_years"]),
-                        age_months=int(derived["age_months"]),
-                        sex=student.gender,
-                        height_cm=height_cm,
-                        weight_kg=weight_kg,
-                        muac_cm=float(derived["muac_cm"]) if derived.get("muac_cm") is not None else None,
-                        answers=answers,
-                    )
-                    s.risk_level = rr.level
-                    s.red_flags = rr.flags
-                    if rr.derived.get("bmi") is not None:
-                        s.bmi = rr.derived["bmi"]
-                    if rr.derived.get("baz") is not None:
-                        s.baz = rr.derived["baz"]
-                    s.save()
+                    s = save_screening(build_screening(
+                        org, student, answers=answers, derived=derived, teacher=_teacher_fk(request),
+                        is_low_income=student_form.cleaned_data.get("is_low_income", False),
+                    ))
 
                 log = _auto_send_for_screening(request, s)
                 messages.success(request, f"Student “{student.full_name}” created and screening completed.")
@@ -370,11 +284,115 @@ def teacher_add_student(request, token=None):
                 messages.error(request, f"Could not complete: {e}")
 
     else:
-        student_form = AddStudentForm(organization=org, initial=initial)
+        student_form = AddStudentForm(organization=org, initial=initial, catalog=catalog)
         screening_form = NewScreeningForm(student=None, organization=org)
 
     return render(request, "screening/add_student.html", {
         "student_form": student_form,
         "screening_form": screening_form,
-        "divisions_by_grade": json.dumps(divisions_by_grade),
+        "divisions_by_grade": catalog.divisions_by_grade_json,
+    })
+
+
+@require_teacher_or_public
+def teacher_bulk_import(request, token=None):
+    """Upload a CSV/XLSX of screenings for one class (see screening.bulk_import)."""
+    org = getattr(request, "org", None)
+    if not org:
+        return HttpResponseForbidden("Organization context required.")
+
+    if request.GET.get("template"):
+        resp = HttpResponse(template_csv(), content_type="text/csv")
+        resp["Content-Disposition"] = 'attachment; filename="screening_import_template.csv"'
+        return resp
+
+    classrooms = Classroom.objects.filter(organization=org).order_by("grade", "division")
+    result = None
+    selected = request.POST.get("classroom") or request.GET.get("classroom")
+
+    if request.method == "POST":
+        classroom = classrooms.filter(id=selected).first() if selected else None
+        upload = request.FILES.get("file")
+        if not classroom:
+            messages.error(request, "Select the class these children belong to.")
+        elif not upload:
+            messages.error(request, "Choose a CSV or XLSX file to upload.")
+        else:
+            try:
+                result = import_screenings(
+                    upload, upload.name, org=org, classroom=classroom,
+                    teacher=_teacher_fk(request), dry_run=bool(request.POST.get("dry_run")),
+                )
+            except ImportFileError as e:
+                messages.error(request, str(e))
+            else:
+                if result.dry_run:
+                    messages.info(request, f"Checked {result.rows} rows: {result.error_lines} with errors. Nothing was saved.")
+                else:
+                    messages.success(request, f"Imported {result.screenings_created} of {result.rows} screenings.")
+
+    return render(request, "screening/bulk_import.html", {
+        "classrooms": classrooms,
+        "selected_classroom": int(selected) if selected and str(selected).isdigit() else None,
+        "result": result,
+        "teacher_token": org.screening_link_token,
+    })
+
+
+@require_GET
+@ensure_csrf_cookie
+@require_teacher_or_public
+@etag(lambda request, *args, **kwargs: form_schema()["version"])
+def teacher_form_schema(request):
+    """Field schema for offline devices; revalidate with If-None-Match. Also sets the csrftoken cookie."""
+    resp = JsonResponse(form_schema())
+    resp["Cache-Control"] = "private, max-age=0, must-revalidate"
+    return resp
+
+
+@require_GET
+@require_teacher_or_public
+def screening_risk_preview(request):
+    """Provisional BAZ / category / level for the partially filled screening form."""
+    resp = JsonResponse(preview_risk(request.GET))
+    resp["Cache-Control"] = "private, no-store"
+    return resp
+
+
+@require_POST
+@require_teacher_or_public
+def teacher_sync(request):
+    """Apply a batch of screenings captured offline (see screening.sync).
+
+    A session-authenticated POST, so CsrfViewMiddleware applies: the device
+    sends the csrftoken cookie from teacher_form_schema back as X-CSRFToken.
+    """
+    org = getattr(request, "org", None)
+    if not org:
+        return HttpResponseForbidden("Organization context required.")
+
+    try:
+        body = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON."}, status=400)
+    if not isinstance(body, dict):
+        return JsonResponse({"error": "Expected a JSON object."}, status=400)
+
+    schema_version = body.get("schema_version")
+    try:
+        result = apply_sync_batch(org, body.get("items"), teacher=_teacher_fk(request), request=request)
+    except SyncError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except IntegrityError:
+        # Another upload of the same keys committed first; the device retries and gets "duplicate"
+        logger.warning("Sync batch for org %s conflicted with a concurrent upload", org.id)
+        return JsonResponse({"error": "Conflicting upload in progress; retry."}, status=409)
+
+    return JsonResponse({
+        "schema_version": form_schema()["version"],
+        "schema_stale": bool(schema_version) and schema_version != form_schema()["version"],
+        "created": result.created,
+        "duplicates": result.duplicates,
+        "errors": result.errors,
+        "items": result.items,
     })
@@ -0,0 +1,211 @@
+"""Single-screening write path (screening_create, teacher_add_student).
+
+Saving one screening used to cost ~20 queries before the redirect: two student
+saves, the guardian lookup, the history check, the Screening post_save
+receivers (StudentStatus refresh, milestone completion and enforcement, the
+reporting rollup rebuild) and the audit row. `record_screening()` does only
+what the next page needs, in one transaction:
+
+  - the guardian lookup/insert (skipped when the student's guardian already
+    has the phone) and one UPDATE of the student fields that changed;
+  - the screening INSERT and one UPDATE of the loaded StudentStatus row
+    (status.note_new_screening).
+
+Everything else runs after commit in the `screening.tasks.screening_side_effects`
+Celery task (`apply_side_effects()`), set-based over the screenings it is
+given: milestone completion, enforcement once per organization, the audit rows
+in one insert, and one rollup rebuild per (organization, day). Screenings
+written this way carry a flag (`side_effects_deferred()`) that makes the
+post_save receivers doing the same work inline skip them.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from roster.models import Guardian, Student
+from roster.search import reindex_students
+
+from .facets import facets_from_derived
+from .growth import series_for
+from .models import Screening
+from .rescreen import refresh_due_dates
+from .services import compute_risk
+from .status import note_new_screening
+
+logger = logging.getLogger(__name__)
+
+_DEFERRED = "_side_effects_deferred"
+
+
+def side_effects_deferred(instance) -> bool:
+    """True for screenings whose post-save work runs in apply_side_effects()."""
+    return getattr(instance, _DEFERRED, False)
+
+
+def build_screening(org, student: Student, *, answers: dict, derived: dict, teacher=None,
+                    is_low_income: bool = False, screened_at: Optional[datetime] = None) -> Screening:
+    """An unsaved, scored Screening of `student` from NewScreeningForm's cleaned data."""
+    height_cm = float(derived["height_cm"])
+    weight_kg = float(derived["weight_kg"])
+    s = Screening(
+        organization=org,
+        student=student,
+        teacher=teacher,
+        screened_at=screened_at or timezone.now(),
+        gender=student.gender,
+        age_years=derived["age_years"],
+        age_months=derived["age_months"],
+        height_cm=height_cm,
+        weight_kg=weight_kg,
+        muac_cm=derived.get("muac_cm"),
+        answers=answers,
+        is_low_income_at_screen=bool(is_low_income),
+    )
+    rr = compute_risk(
+        age_years=float(derived["age_years"]),
+        age_months=int(derived["age_months"]),
+        sex=student.gender,
+        height_cm=height_cm,
+        weight_kg=weight_kg,
+        muac_cm=float(derived["muac_cm"]) if derived.get("muac_cm") is not None else None,
+        answers=answers,
+    )
+    s.risk_level = rr.level
+    s.red_flags = rr.flags
+    s.ruleset_version = rr.ruleset_version
+    s.reference_hash = rr.reference_hash
+    for name, value in facets_from_derived(rr.derived).items():
+        setattr(s, name, value)
+    if rr.derived.get("bmi") is not None:
+        s.bmi = rr.derived["bmi"]
+    if rr.derived.get("baz") is not None:
+        s.baz = rr.derived["baz"]
+    return s
+
+
+def save_screening(s: Screening) -> Screening:
+    """INSERT `s` and advance its student's status row; the rest runs after commit."""
+    setattr(s, _DEFERRED, True)
+    s.save()
+    note_new_screening(s.student, s)
+    screening_id = s.pk
+    transaction.on_commit(lambda: dispatch_side_effects([screening_id]))
+    return s
+
+
+def record_screening(org, student: Student, *, answers: dict, derived: dict, phone: str, dob=None, sex=None,
+                     teacher=None) -> Tuple[Screening, List[str]]:
+    """Update the student from the form, insert the screening; returns (screening, plausibility warnings).
+
+    Load `student` with select_related("primary_guardian", "current_status")
+    so the guardian and status row need no further queries.
+    """
+    with transaction.atomic():
+        guardian = student.primary_guardian if student.primary_guardian_id else None
+        if guardian is None or guardian.phone_e164 != phone:
+            guardian, _ = Guardian.objects.get_or_create(
+                organization=org, phone_e164=phone,
+                defaults={"full_name": "Parent", "whatsapp_opt_in": True},
+            )
+
+        values = {
+            "student_code": answers.get("unique_student_id") or student.student_code,
+            "dob": dob or student.dob,
+            "gender": sex or student.gender,
+            "primary_guardian_id": guardian.id,
+        }
+        changed = {f: v for f, v in values.items() if getattr(student, f) != v}
+        if changed:
+            student.updated_at = timezone.now()
+            Student.objects.filter(pk=student.pk).update(updated_at=student.updated_at, **changed)
+            for f, v in changed.items():
+                setattr(student, f, v)
+            student.primary_guardian = guardian
+            if "student_code" in changed or "primary_guardian_id" in changed:
+                reindex_students([student.pk])
+
+        s = build_screening(org, student, answers=answers, derived=derived, teacher=teacher,
+                            is_low_income=student.is_low_income)
+        # Against the student's growth series (screening.growth), before this screening joins it
+        warnings = series_for(student).plausibility_warnings(
+            height_cm=s.height_cm, weight_kg=s.weight_kg, baz=s.baz, on=timezone.localdate(s.screened_at),
+        )
+        save_screening(s)
+    return s, warnings
+
+
+# ---------------------------------------------------------------------------
+# Deferred side effects
+# ---------------------------------------------------------------------------
+
+def dispatch_side_effects(screening_ids: List[int], *, audit: bool = True, rollups: bool = True) -> None:
+    from .tasks import screening_side_effects
+
+    try:
+        screening_side_effects.delay(screening_ids, audit=audit, rollups=rollups)
+    except Exception:
+        logger.warning("Screening side effects: task queue unavailable, running inline", exc_info=True)
+        apply_side_effects(screening_ids, audit=audit, rollups=rollups)
+
+
+def apply_side_effects(screening_ids: Iterable[int], *, audit: bool = True, rollups: bool = True) -> Dict[str, int]:
+    """Post-save work for screenings written by save_screening(), set-based over `screening_ids`.
+
+    Bulk writers (screening.bulk_import, screening.sync) write their own audit
+    row and rebuild rollups themselves, and pass audit=False, rollups=False.
+    """
+    from accounts.models import Organization
+    from audit.models import AuditLog
+    from program.models import Enrollment, ScreeningMilestone
+    from program.services import evaluate_org_enforcement
+
+    from .batch import rebuild_rollups
+
+    screenings = list(
+        Screening.objects.filter(id__in=set(screening_ids))
+        .only("id", "organization", "student", "teacher", "screened_at", "risk_level")
+        .order_by("screened_at", "id")
+    )
+    if not screenings:
+        return {"screenings": 0, "milestones": 0, "rollup_days": 0}
+
+    # Milestones due by the screening date on the student's ACTIVE enrollments
+    by_student: Dict[int, List[Screening]] = {}
+    for s in screenings:
+        by_student.setdefault(s.student_id, []).append(s)
+    completed = 0
+    milestones = ScreeningMilestone.objects.filter(
+        enrollment__student_id__in=by_student,
+        enrollment__status=Enrollment.Status.ACTIVE,
+        status__in=[ScreeningMilestone.Status.DUE, ScreeningMilestone.Status.OVERDUE],
+    ).select_related("enrollment")
+    for m in milestones:
+        s = next((s for s in by_student[m.enrollment.student_id]
+                  if s.organization_id == m.enrollment.organization_id and m.due_on <= s.screened_at.date()), None)
+        if s is not None:
+            m.mark_completed(s)
+            completed += 1
+    if completed:
+        refresh_due_dates(by_student)
+
+    org_ids = {s.organization_id for s in screenings}
+    for org in Organization.objects.filter(id__in=org_ids):
+        evaluate_org_enforcement(org)
+
+    if audit:
+        AuditLog.objects.bulk_create([
+            AuditLog(organization_id=s.organization_id, actor_id=s.teacher_id, action="SCREENING_CREATED",
+                     target_app="screening", target_model="screening", target_id=str(s.pk),
+                     payload={"risk": s.risk_level}, created_at=s.screened_at)
+            for s in screenings
+        ])
+    days = 0
+    if rollups:
+        days = rebuild_rollups({(s.organization_id, timezone.localtime(s.screened_at).date()) for s in screenings})
+    return {"screenings": len(screenings), "milestones": completed, "rollup_days": days}
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from datetime import timedelta
 from typing import Optional
 
 from django.conf import settings
@@ -13,8 +12,12 @@ from django.utils import timezone
 from messaging.i18n import flags_to_text
 from accounts.models import Organization, OrgMembership, Role
 from roster.models import Classroom, Student
+from roster.pagination import keyset_paginate, page_size_for
+from roster.search import search_students
+from screening.growth import series_for
 from screening.models import Screening
-from django.db.models import OuterRef, Subquery, Q
+from screening.rescreen import DUE_FILTERS, RESCREEN_CYCLE_DAYS, due_counts_by_class, filter_due
+from django.db.models import F, Q
 from .decorators import require_screening_only_admin, require_screening_only_teacher
 from .forms import SchoolEnrollmentForm, TeacherAccessForm
 from .google_oauth import (
@@ -37,6 +40,8 @@ from .services import (
 
 User = get_user_model()
 
+TEACHER_DASHBOARD_PAGE_SIZE = 50
+
 
 def _split_full_name(full_name: str) -> tuple[str, str]:
     full_name = (full_name or "").strip()
@@ -514,43 +519,47 @@ def teacher_dashboard(request: HttpRequest) -> HttpResponse:
     and screen new student / rescreen existing student:contentReference[oaicite:19]{index=19}.
     """
     org = request.org
-    # Basic cycle concept: last 6 months
-    cycle_start = timezone.now() - timedelta(days=183)
+    today = timezone.localdate()
 
-    classrooms = Classroom.objects.filter(organization=org).order_by("grade", "division")
+    classrooms = list(Classroom.objects.filter(organization=org).order_by("grade", "division"))
     classroom_id = request.GET.get("classroom") or ""
     q = (request.GET.get("q") or "").strip()
     lang = (request.GET.get("lang") or "en").strip().lower()
+    due = request.GET.get("due") or ""
+    if due not in DUE_FILTERS:
+        due = ""
+
+    # Re-screening due today / overdue per class and for the school (screening.rescreen)
+    due_by_class = due_counts_by_class(org, today)
+    for c in classrooms:
+        c.due_counts = due_by_class.get(c.id, {"overdue": 0, "due_today": 0})
+    due_total = {k: sum(v[k] for v in due_by_class.values()) for k in ("overdue", "due_today")}
 
     students = Student.objects.filter(organization=org).select_related("classroom")
 
     if classroom_id:
         students = students.filter(classroom_id=classroom_id)
 
-    if q:
-        students = students.filter(
-            Q(first_name__icontains=q) |
-            Q(last_name__icontains=q) |
-            Q(student_code__icontains=q)
-        )
+    if due:
+        students = filter_due(students, due, today)
 
-    # Annotate last screening
-    from django.db.models import OuterRef, Subquery
+    if q:
+        students = search_students(students, q, organization=org)
 
-    last_screening = Screening.objects.filter(student=OuterRef("pk")).order_by("-screened_at")
+    # Last screening from the StudentStatus projection (screening.status)
     students = students.annotate(
-        last_screening_id=Subquery(last_screening.values("id")[:1]),
-        last_screened_at=Subquery(last_screening.values("screened_at")[:1]),
-        last_risk=Subquery(last_screening.values("risk_level")[:1]),
-    ).order_by("last_name", "first_name", "id")
-
-    for s in students:
-        s.screening_url = reverse("screening_create", args=[s.id]) + f"?lang={lang}"
+        last_screening_id=F("current_status__last_screening_id"),
+        last_screened_at=F("current_status__last_screened_at"),
+        last_risk=F("current_status__last_risk"),
+        next_due_on=F("current_status__next_due_on"),
+        milestone_due_on=F("current_status__milestone_due_on"),
+    )
+    page = keyset_paginate(request, students, page_size=page_size_for(request, TEACHER_DASHBOARD_PAGE_SIZE))
 
     # NOTE: The actual screening form is handled by existing screening_create in screening/views.py as requested.
     # We link to /screening/teacher/screen/<student_id>/?lang=<lang>
-    def screening_url(student_id: int) -> str:
-        return reverse("screening_create", args=[student_id]) + f"?lang={lang}"
+    for s in page:
+        s.screening_url = reverse("screening_create", args=[s.id]) + f"?lang={lang}"
 
     # Existing add-student flow (creates new Student + Screening) is in screening app.
     add_student_url = reverse("teacher_add_student") + (f"?classroom={classroom_id}" if classroom_id else "")
@@ -564,10 +573,14 @@ def teacher_dashboard(request: HttpRequest) -> HttpResponse:
             "selected_classroom_id": str(classroom_id),
             "q": q,
             "lang": lang,
-            "students": students,
-            # "screening_url": screening_url,
+            "students": page,
+            "page": page,
             "add_student_url": add_student_url,
-            "cycle_start": cycle_start,
+            "today": today,
+            "cycle_days": RESCREEN_CYCLE_DAYS,
+            "due": due,
+            "due_total": due_total,
+            "unassigned_due": due_by_class.get(None),
         },
     )
 
@@ -613,7 +626,10 @@ def parent_result(request: HttpRequest, token: str) -> HttpResponse:
     Public parent screening result view (linked from WhatsApp and from video page).
     """
     screening_id = parse_parent_token(token)
-    s = get_object_or_404(Screening.objects.select_related("student", "student__classroom", "organization"), id=screening_id)
+    s = get_object_or_404(
+        Screening.objects.select_related("student", "student__classroom", "student__current_status", "organization"),
+        id=screening_id,
+    )
 
     lang = (request.GET.get("lang") or "en").strip().lower()
     try:
@@ -640,6 +656,7 @@ def parent_result(request: HttpRequest, token: str) -> HttpResponse:
             "lang": lang,
             "local_code": local_code,
             "flags_text": flags_text,
+            "growth_change": series_for(s.student).change_since_previous(s.id),
             "video_url": reverse("screening_only:parent_video", args=[token]),
         },
     )
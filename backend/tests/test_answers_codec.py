@@ -0,0 +1,36 @@
+import json
+
+from screening.answers_codec import decode_answers, encode_answers, is_packed
+
+FORM_ANSWERS = {
+    "student_name": "राहुल Sharma", "unique_student_id": "S-0042", "dob": "2013-07-09", "sex": "F",
+    "parent_phone_e164": "+919876543210", "weight_kg_r1": "31.50", "height_cm_r1": "138",
+    "health_general_poor": False, "health_pallor": True, "appetite": "POOR",
+    "menarche_started": True, "menarche_age_years": 11.5, "pads_per_day": 6, "bleeding_clots": False,
+    "cycle_length_days": None, "diet_type": "LACTO_OVO", "breakfast_eaten": None, "egg": False,
+    "deworming_taken": True, "deworming_date": "", "hunger_vital_sign": "SOMETIMES_TRUE",
+}
+
+
+def test_round_trip_is_exact():
+    packed = encode_answers(FORM_ANSWERS)
+    assert is_packed(packed)
+    assert len(packed) < len(json.dumps(FORM_ANSWERS)) / 4
+    decoded = decode_answers(packed)
+    assert decoded == FORM_ANSWERS
+    assert [type(decoded[k]) for k in FORM_ANSWERS] == [type(v) for v in FORM_ANSWERS.values()]
+
+
+def test_values_outside_the_schema_survive():
+    odd = {
+        "pads_per_day": "7", "cycle_length_days": 70000, "weight_kg_r1": "-0", "appetite": "good",
+        "parent_phone_e164": "+0123", "health_pallor": 1, "sync_note": {"device": "a1"},
+    }
+    assert decode_answers(encode_answers(odd)) == odd
+    assert decode_answers(encode_answers({})) == {}
+
+
+def test_legacy_json_is_read():
+    assert decode_answers(json.dumps(FORM_ANSWERS).encode()) == FORM_ANSWERS
+    assert decode_answers(json.dumps(FORM_ANSWERS)) == FORM_ANSWERS
+    assert decode_answers(None) == {}
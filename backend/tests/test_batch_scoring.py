@@ -0,0 +1,109 @@
+import json
+import random
+from decimal import Decimal
+
+import pytest
+from django.core.exceptions import ValidationError
+
+from screening.batch import LEVELS, load_columns, score_columns
+from screening.models import RiskRuleset
+from screening.rules import (
+    DEFAULT_RULESET_FILE, RulesetError, clear_active_ruleset_cache, compile_ruleset, get_active_ruleset,
+    load_ruleset_file,
+)
+from screening.services import compute_risk
+
+_YES_NO = (True, False, None)
+
+
+def _random_answers(rng: random.Random) -> dict:
+    answers = {k: rng.random() < 0.08 for k in load_ruleset_file().health_keys}
+    answers.update({
+        "appetite": rng.choice(["GOOD", "NORMAL", "POOR", None]),
+        "pads_per_day": rng.choice([None, 2, 5, "7", "x"]),
+        "bleeding_clots": rng.random() < 0.1,
+        "cycle_length_days": rng.choice([None, 28, 50, "46"]),
+        "diet_type": rng.choice(["LACTO_VEG", "LACTO_OVO", "NON_VEG", None]),
+        "hunger_vital_sign": rng.choice(["OFTEN_TRUE", "SOMETIMES_TRUE", "NEVER_TRUE", None]),
+    })
+    for k in ("breakfast_eaten", "lunch_eaten", "green_leafy_veg", "other_vegetables", "fruits",
+              "dal_pulses_beans", "milk_curd", "egg", "fish_chicken_meat", "nuts_groundnuts",
+              "millet_whole_grains", "ssb_or_packaged_snacks", "deworming_taken"):
+        answers[k] = rng.choice(_YES_NO + (True, True))
+    return answers
+
+
+def _dec(x):
+    return None if x is None else Decimal(str(x))
+
+
+def test_batch_scores_match_compute_risk():
+    rng = random.Random(1234)
+    ruleset = load_ruleset_file()
+    rows, expected = [], []
+    for i in range(3000):
+        months = rng.randint(0, 240)
+        age_years = round(months / 12.0, 2)
+        sex = rng.choice(["M", "F", "O"])
+        height = rng.choice([None, round(rng.uniform(60, 190), 2)])
+        weight = rng.choice([None, round(rng.uniform(8, 110), 2)])
+        muac = rng.choice([None, round(rng.uniform(9, 16), 1)])
+        answers = _random_answers(rng)
+
+        rows.append((i + 1, 1, None, sex, _dec(age_years), months, _dec(height), _dec(weight), _dec(muac),
+                     answers, "", [], None, None, "", ""))
+        expected.append(compute_risk(
+            age_years=age_years, age_months=months, sex=sex,
+            height_cm=height, weight_kg=weight, muac_cm=muac, answers=answers, ruleset=ruleset,
+        ))
+
+    scores = score_columns(load_columns(rows), ruleset)
+    for i, rr in enumerate(expected):
+        assert LEVELS[scores.level[i]] == rr.level
+        assert scores.flags(i) == rr.flags
+
+
+def test_ruleset_thresholds_are_data():
+    definition = json.loads(DEFAULT_RULESET_FILE.read_text())
+    definition["version"] = "test-strict-muac"
+    definition["muac"]["red_below"] = 13.0
+    strict = compile_ruleset(definition)
+
+    kwargs = dict(age_years=3.0, age_months=36, sex="F", height_cm=None, weight_kg=None, muac_cm=12.0,
+                  answers={"hunger_vital_sign": "NEVER_TRUE"})
+    assert compute_risk(ruleset=load_ruleset_file(), **kwargs).flags[1] == "muac_yellow"
+    rr = compute_risk(ruleset=strict, **kwargs)
+    assert (rr.level, rr.flags[1], rr.ruleset_version) == ("RED", "muac_red", "test-strict-muac")
+
+
+def test_ruleset_rejects_unknown_answer_keys():
+    definition = json.loads(DEFAULT_RULESET_FILE.read_text())
+    definition["health_red_flags"].append("not_a_question")
+    with pytest.raises(RulesetError):
+        compile_ruleset(definition)
+
+
+@pytest.mark.django_db
+def test_published_ruleset_is_immutable_and_bad_active_row_falls_back():
+    definition = json.loads(DEFAULT_RULESET_FILE.read_text())
+    definition["version"] = "v-test"
+    rs = RiskRuleset.objects.create(version="v-test", definition=definition)
+
+    rs.definition["muac"]["red_below"] = 13.0
+    with pytest.raises(ValidationError):
+        rs.save()
+    rs.refresh_from_db()
+    rs.is_active, rs.notes = False, "retired"
+    rs.save()  # activation and notes stay editable
+
+    bad = dict(definition, version="v-bad", health_red_flags=["not_a_question"])
+    with pytest.raises(ValidationError):
+        RiskRuleset.objects.create(version="v-bad", definition=bad)
+
+    # A malformed active row written around save() must not break scoring
+    RiskRuleset.objects.filter(pk=rs.pk).update(is_active=True, definition=bad)
+    clear_active_ruleset_cache()
+    try:
+        assert get_active_ruleset().version == load_ruleset_file().version
+    finally:
+        clear_active_ruleset_cache()
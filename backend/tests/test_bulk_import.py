@@ -0,0 +1,61 @@
+import csv
+import io
+from datetime import date, timedelta
+
+import pytest
+
+from accounts.models import Organization
+from assist.models import Application
+from program.models import Enrollment, ScreeningMilestone
+from program.services import evaluate_org_enforcement
+from roster.models import Classroom, Guardian, Student
+from screening import tasks
+from screening.bulk_import import import_screenings
+from screening.models import Screening, StudentStatus
+
+_YES = ("breakfast_eaten", "lunch_eaten", "green_leafy_veg", "other_vegetables", "fruits",
+        "dal_pulses_beans", "milk_curd", "egg", "fish_chicken_meat", "nuts_groundnuts",
+        "millet_whole_grains", "ssb_or_packaged_snacks", "deworming_taken")
+
+
+def _csv(code):
+    row = {k: "yes" for k in _YES}
+    row.update({
+        "student_name": "Ravi", "unique_student_id": code, "dob": "01/06/2016", "sex": "M",
+        "parent_phone_e164": "+919811111111", "appetite": "NORMAL", "diet_type": "LACTO_VEG",
+        "hunger_vital_sign": "NEVER_TRUE", "weight_kg_r1": "24", "height_cm_r1": "128",
+    })
+    buff = io.StringIO()
+    writer = csv.DictWriter(buff, fieldnames=list(row))
+    writer.writeheader()
+    writer.writerow(row)
+    return io.BytesIO(buff.getvalue().encode("utf-8"))
+
+
+@pytest.mark.django_db
+def test_import_completes_overdue_milestone_and_unsuspends(monkeypatch, django_capture_on_commit_callbacks):
+    monkeypatch.setattr(tasks.screening_side_effects, "delay", tasks.screening_side_effects)
+    org = Organization.objects.create(name="Import School", screening_link_token="import-school-abcdefgh")
+    five_a = Classroom.objects.create(organization=org, grade="5", division="A")
+    parent = Guardian.objects.create(organization=org, full_name="Parent", phone_e164="+919811111111")
+    student = Student.objects.create(organization=org, first_name="Ravi", gender="M", student_code="IMP-1",
+                                     primary_guardian=parent)
+    app = Application.objects.create(organization=org, student=student, status="APPROVED")
+    start = date.today() - timedelta(days=100)
+    enrollment = Enrollment.objects.create(organization=org, application=app, student=student,
+                                           start_date=start, end_date=start + timedelta(days=180))
+    ScreeningMilestone.bootstrap_for_enrollment(enrollment)
+    ScreeningMilestone.objects.filter(enrollment=enrollment, milestone="MONTH_3").update(
+        status=ScreeningMilestone.Status.OVERDUE)
+    evaluate_org_enforcement(org)
+    assert Organization.objects.get(pk=org.pk).assistance_suspended
+
+    with django_capture_on_commit_callbacks(execute=True):
+        result = import_screenings(_csv("imp-1"), "class.csv", org=org, classroom=five_a)
+    assert result.screenings_created == 1 and result.errors == []
+
+    s = Screening.objects.get(student=student)
+    m3 = ScreeningMilestone.objects.get(enrollment=enrollment, milestone="MONTH_3")
+    assert m3.status == ScreeningMilestone.Status.COMPLETED and m3.completed_screening_id == s.id
+    assert not Organization.objects.get(pk=org.pk).assistance_suspended
+    assert StudentStatus.objects.get(pk=student.pk).milestone_due_on == start + timedelta(days=180)
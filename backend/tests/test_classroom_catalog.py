@@ -0,0 +1,27 @@
+import pytest
+
+from accounts.models import Organization
+from roster.catalog import get_catalog
+from roster.models import Classroom
+from screening.forms import AddStudentForm
+
+
+@pytest.mark.django_db
+def test_catalog_orders_classes_and_follows_changes():
+    org = Organization.objects.create(name="Catalog School", screening_link_token="catalog-school-abcdefgh")
+    for grade, division in [("10", "B"), ("2", "A"), ("Nursery", "Other"), ("Nursery", "A"), ("10", "A")]:
+        Classroom.objects.create(organization=org, grade=grade, division=division)
+
+    catalog = get_catalog(org)
+    assert catalog.grades == ("Nursery", "2", "10")
+    assert catalog.divisions("Nursery") == ["A", "Other"]
+    assert catalog.classroom_id("10", "B") == Classroom.objects.get(organization=org, grade="10", division="B").id
+    assert get_catalog(org.id) is catalog
+
+    new = Classroom.objects.create(organization=org, grade="2", division="B")
+    assert get_catalog(org).classroom_id("2", "B") == new.id
+
+    form = AddStudentForm({"grade": "2", "division": "B"}, organization=org)
+    assert form.is_valid(), form.errors
+    assert form.cleaned_data["classroom_id"] == new.id
+    assert not AddStudentForm({"grade": "2", "division": "Z"}, organization=org).is_valid()
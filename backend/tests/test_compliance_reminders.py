@@ -0,0 +1,49 @@
+from datetime import date, timedelta
+
+import pytest
+from django.utils import timezone
+
+from accounts.models import Organization
+from assist.models import Application
+from messaging.models import MessageLog
+from program.models import ComplianceSubmission, Enrollment, MonthlySupply
+from program.reminders import plan_compliance_reminders, reminder_candidates
+from roster.models import Guardian, Student
+
+
+def _enrolled_supply(org, code, phone="+919800000001"):
+    guardian = Guardian.objects.create(organization=org, full_name="Parent", phone_e164=phone) if phone else None
+    student = Student.objects.create(organization=org, first_name=code, gender="F", student_code=code,
+                                     primary_guardian=guardian)
+    app = Application.objects.create(organization=org, student=student, status="APPROVED")
+    Enrollment.objects.create(organization=org, application=app, student=student,
+                              start_date=date.today(), end_date=date.today() + timedelta(days=180))
+    supply = MonthlySupply.objects.get(enrollment__student=student, month_index=1)
+    supply.set_delivered(date.today() - timedelta(days=30))
+    ComplianceSubmission.objects.get_or_create(monthly_supply=supply)
+    return supply
+
+
+@pytest.mark.django_db
+def test_planner_queues_each_due_supply_once_per_day(django_assert_max_num_queries):
+    org = Organization.objects.create(name="Remind School", screening_link_token="remind-school-abcdefgh")
+    due = [_enrolled_supply(org, f"R{i}", phone=f"+91980000010{i}") for i in range(3)]
+    no_phone = _enrolled_supply(org, "R-nophone", phone="")
+    submitted = _enrolled_supply(org, "R-done", phone="+919800000200")
+    ComplianceSubmission.objects.filter(monthly_supply=submitted).update(status="COMPLIANT")
+    # reminded through another path in the last 24h
+    MessageLog.objects.create(organization=org, to_phone_e164="+919800000102", template_code="COMPLIANCE_REMINDER_V1",
+                              related_supply=due[2])
+
+    assert list(reminder_candidates()) == due[:2]
+
+    # candidates + outbox insert + id read-back + stamp, the empty next chunk, savepoints
+    with django_assert_max_num_queries(9):
+        assert plan_compliance_reminders(chunk_size=1000) == 2
+    assert MessageLog.objects.filter(related_supply__in=due[:2], status="QUEUED",
+                                     next_attempt_at__isnull=False).count() == 2
+    assert MonthlySupply.objects.get(pk=due[0].pk).last_reminded_at is not None
+    assert not MessageLog.objects.filter(related_supply=no_phone).exists()
+
+    assert plan_compliance_reminders() == 0
+    assert plan_compliance_reminders(timezone.now() + timedelta(hours=25)) == 3
@@ -0,0 +1,33 @@
+from datetime import date
+
+from screening.growth import GrowthPoint, GrowthSeries
+
+
+def _series(*points):
+    return GrowthSeries(1, [GrowthPoint(i, day, None, h, w, None, baz) for i, (day, h, w, baz) in enumerate(points, 1)])
+
+
+def test_plausibility_uses_elapsed_time_and_baz():
+    series = _series((date(2025, 1, 10), 120.0, 22.0, -0.5), (date(2025, 7, 10), 123.0, 23.0, -0.4))
+
+    assert series.plausibility_warnings(height_cm=124.0, weight_kg=23.5, baz=-0.3, on=date(2025, 10, 1)) == []
+    shrank = series.plausibility_warnings(height_cm=120.5, weight_kg=23.0, baz=-0.4, on=date(2025, 10, 1))
+    assert len(shrank) == 1 and shrank[0].startswith("Height decreased by 2.5 cm")
+    # +9 cm in 3 months is faster than any growth velocity; +9 cm over two years is not
+    assert series.plausibility_warnings(height_cm=132.0, weight_kg=None, on=date(2025, 10, 1))
+    assert not series.plausibility_warnings(height_cm=132.0, weight_kg=None, on=date(2027, 7, 1))
+    assert "moved -2.6 SD" in series.plausibility_warnings(height_cm=123.5, weight_kg=17.0, baz=-3.0,
+                                                            on=date(2025, 10, 1))[0]
+    assert _series().plausibility_warnings(height_cm=90.0, weight_kg=10.0) == []
+
+
+def test_baz_trend_and_change_since_previous():
+    series = _series((date(2024, 6, 1), 118.0, 21.0, 0.2), (date(2025, 1, 1), 121.0, 21.5, -0.3),
+                     (date(2025, 6, 1), 123.0, 21.6, -0.8))
+    trend = series.baz_trend(today=date(2025, 7, 1))
+    assert trend.direction == "falling" and trend.points == 3 and trend.slope_per_year < -0.5
+    assert series.baz_trend(today=date(2030, 1, 1)) is None
+
+    change = series.change_since_previous(3)
+    assert change == {"since": date(2025, 1, 1), "days": 151, "height_cm": 2.0, "weight_kg": 0.1}
+    assert series.change_since_previous(1) is None
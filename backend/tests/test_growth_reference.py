@@ -0,0 +1,47 @@
+import math
+
+import numpy as np
+import pytest
+
+from screening.growth_reference import BFA, HFA, WFA, ReferenceTable, get_table, zscore
+
+
+def test_bmi_lookup_interpolates_between_reference_ages():
+    # Boys 7y: median 15.1, SD 1.9; 7.5y: median 15.3, SD 2.2 -> 7y 3m sits halfway
+    table = get_table(BFA, "m")
+    assert table.params_at(84) == (15.1, 1.9)
+    median, sd = table.params_at(87)
+    assert median == pytest.approx(15.2) and sd == pytest.approx(2.05)
+    assert zscore(BFA, value=15.2 + 2.05, age_months=87, sex="M") == pytest.approx(1.0)
+    # Outside the 5-18y table there is no z-score, and params clamp to the end rows
+    assert zscore(BFA, value=15.0, age_months=59, sex="M") is None
+    assert table.params_at(10) == table.params[0] and table.params_at(10_000) == table.params[-1]
+
+
+def test_scalar_and_array_paths_agree_exactly():
+    table = get_table(BFA, "F")
+    rng = np.random.default_rng(7)
+    ages = np.concatenate([rng.uniform(table.min_months, table.max_months, 500), table._xs])
+    values = rng.uniform(11, 30, len(ages))
+    scalar = [table.zscore(float(v), float(a))[0] for v, a in zip(values, ages)]
+    assert table.zscores(values, ages).tolist() == scalar
+
+
+def test_lms_restricts_weight_based_z_beyond_three_sd():
+    lms = dict(sex="M", months=(60.0, 120.0), params=((-1.0, 20.0, 0.1), (-1.0, 30.0, 0.1)), is_lms=True)
+    wfa, hfa = ReferenceTable(indicator=WFA, **lms), ReferenceTable(indicator=HFA, **lms)
+    assert wfa.zscore(20.0, 60)[0] == pytest.approx(0.0)
+    heavy = 40.0  # far above +3 SD at 60 months
+    unrestricted = hfa.zscore(heavy, 60)[0]
+    sd3, sd2 = 20.0 * (1 - 0.1 * 3) ** -1, 20.0 * (1 - 0.1 * 2) ** -1
+    assert unrestricted == pytest.approx(((heavy / 20.0) ** -1 - 1) / -0.1)
+    restricted = wfa.zscore(heavy, 60)[0]
+    # WHO: beyond +3 SD, weight-based z is extrapolated linearly from the SD2-SD3 distance
+    assert restricted == pytest.approx(3 + (heavy - sd3) / (sd3 - sd2)) != unrestricted
+    assert wfa.zscores(np.array([heavy]), np.array([60.0])).tolist() == [wfa.zscore(heavy, 60)[0]]
+    assert math.isnan(wfa.zscore(0.0, 60)[0])
+
+
+def test_tables_not_shipped_are_unavailable():
+    assert get_table(HFA, "M") is None and get_table(BFA, "X") is None
+    assert zscore(HFA, value=120, age_months=96, sex="M") is None
@@ -0,0 +1,52 @@
+import pytest
+from django.http import QueryDict
+from django.test import RequestFactory
+
+from accounts.models import Organization
+from roster.models import Student
+from roster.pagination import encode_cursor, keyset_paginate
+
+NAMES = [("", "Asha"), ("", "Asha"), ("", "Zoya"), ("Kumar", ""), ("Kumar", "Asha"), ("Kumar", "Asha"),
+         ("Rao", "Mira"), ("rao", "Mira"), ("Singh", "")]
+
+
+def _page(qs, query="", size=2):
+    return keyset_paginate(RequestFactory().get("/students/?" + query), qs, page_size=size)
+
+
+@pytest.mark.django_db
+def test_keyset_pages_cover_blank_and_duplicate_names_both_ways():
+    org = Organization.objects.create(name="Page School", screening_link_token="page-school-abcdefgh")
+    for i, (last, first) in enumerate(NAMES):
+        Student.objects.create(organization=org, last_name=last, first_name=first, gender="F", student_code=f"P{i}")
+    qs = Student.objects.filter(organization=org)
+    expected = list(qs.order_by("last_name", "first_name", "id").values_list("id", flat=True))
+
+    seen, page, pages = [], _page(qs, "q=x"), []
+    while True:
+        pages.append(page)
+        seen += [s.id for s in page]
+        if not page.has_next:
+            break
+        assert QueryDict(page.next_query)["q"] == "x"  # other filters are kept
+        page = _page(qs, page.next_query)
+    assert seen == expected and len(pages) == 5
+    assert not pages[0].has_previous and pages[-1].has_previous
+
+    back = []
+    while page.has_previous:
+        page = _page(qs, page.previous_query)
+        back = [s.id for s in page] + back
+    assert back == expected[:-1] and not page.has_previous  # 8 rows = 4 full pages before the last one
+
+
+@pytest.mark.django_db
+def test_bad_cursors_fall_back_to_the_first_page():
+    org = Organization.objects.create(name="Cursor School", screening_link_token="cursor-school-abcdefgh")
+    for i in range(3):
+        Student.objects.create(organization=org, last_name="", first_name=f"K{i}", gender="M", student_code=f"C{i}")
+    qs = Student.objects.filter(organization=org)
+    first = [s.id for s in _page(qs)]
+    for cursor in ("not-base64!", encode_cursor(["", "K0"]), encode_cursor([None, "K0", 1])):
+        page = _page(qs, f"after={cursor}")
+        assert [s.id for s in page] == first and not page.has_previous
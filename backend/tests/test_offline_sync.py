@@ -0,0 +1,84 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import Organization
+from assist.models import Application
+from program.models import Enrollment, ScreeningMilestone
+from program.services import evaluate_org_enforcement
+from roster.models import Guardian, Student
+from screening import tasks
+from screening.models import Screening
+
+_YES = ("breakfast_eaten", "lunch_eaten", "green_leafy_veg", "other_vegetables", "fruits",
+        "dal_pulses_beans", "milk_curd", "egg", "fish_chicken_meat", "nuts_groundnuts",
+        "millet_whole_grains", "ssb_or_packaged_snacks", "deworming_taken")
+
+
+def _item(key, code):
+    answers = {k: "yes" for k in _YES}
+    answers.update({
+        "student_name": f"Child {code}", "dob": "2018-06-01", "sex": "F",
+        "parent_phone_e164": "+919800000001", "appetite": "NORMAL",
+        "diet_type": "LACTO_VEG", "hunger_vital_sign": "NEVER_TRUE",
+    })
+    return {"key": key, "student_code": code,
+            "measurements": {"weight_kg": 20, "height_cm": 115}, "answers": answers}
+
+
+@pytest.mark.django_db
+def test_sync_batch_is_idempotent(client):
+    org = Organization.objects.create(name="Sync School", screening_link_token="sync-school-abcdefgh")
+    session = client.session
+    session["public_teacher_org_id"] = org.id
+    session.save()
+
+    body = json.dumps({"items": [_item("a1", "S1"), _item("a2", "S2"), _item("a1", "S3")]})
+    first = client.post(reverse("teacher_sync"), body, content_type="application/json").json()
+    assert [i["status"] for i in first["items"]] == ["created", "created", "error"]
+
+    again = client.post(reverse("teacher_sync"), body, content_type="application/json").json()
+    assert [i["status"] for i in again["items"]] == ["duplicate", "duplicate", "error"]
+    assert again["items"][0]["screening_id"] == first["items"][0]["screening_id"]
+    assert Screening.objects.filter(organization=org).count() == 2
+
+    schema = client.get(reverse("teacher_form_schema"))
+    assert client.get(reverse("teacher_form_schema"), HTTP_IF_NONE_MATCH=schema["ETag"]).status_code == 304
+
+
+@pytest.mark.django_db
+def test_sync_needs_csrf_token_and_completes_overdue_milestones(monkeypatch, django_capture_on_commit_callbacks):
+    monkeypatch.setattr(tasks.screening_side_effects, "delay", tasks.screening_side_effects)
+    org = Organization.objects.create(name="Field School", screening_link_token="field-school-abcdefgh")
+    parent = Guardian.objects.create(organization=org, full_name="Parent", phone_e164="+919800000001")
+    student = Student.objects.create(organization=org, first_name="Asha", gender="F", student_code="S1",
+                                     primary_guardian=parent)
+    app = Application.objects.create(organization=org, student=student, status="APPROVED")
+    start = date.today() - timedelta(days=100)
+    enrollment = Enrollment.objects.create(organization=org, application=app, student=student,
+                                           start_date=start, end_date=start + timedelta(days=180))
+    ScreeningMilestone.bootstrap_for_enrollment(enrollment)
+    ScreeningMilestone.objects.filter(enrollment=enrollment, milestone="MONTH_3").update(
+        status=ScreeningMilestone.Status.OVERDUE)
+    evaluate_org_enforcement(org)
+
+    device = Client(enforce_csrf_checks=True)
+    session = device.session
+    session["public_teacher_org_id"] = org.id
+    session.save()
+    body = json.dumps({"items": [_item("k1", "S1")]})
+    assert device.post(reverse("teacher_sync"), body, content_type="application/json").status_code == 403
+
+    device.get(reverse("teacher_form_schema"))
+    token = device.cookies["csrftoken"].value
+    with django_capture_on_commit_callbacks(execute=True):
+        resp = device.post(reverse("teacher_sync"), body, content_type="application/json", HTTP_X_CSRFTOKEN=token)
+    assert resp.json()["created"] == 1
+
+    m3 = ScreeningMilestone.objects.get(enrollment=enrollment, milestone="MONTH_3")
+    assert m3.status == ScreeningMilestone.Status.COMPLETED
+    assert m3.completed_screening_id == resp.json()["items"][0]["screening_id"]
+    assert not Organization.objects.get(pk=org.pk).assistance_suspended
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+import pytest
+import requests
+from django.utils import timezone
+
+from accounts.models import Organization
+from messaging import outbox
+from messaging.client import WhatsAppClient
+from messaging.models import MessageLog
+from messaging.providers.base import WhatsAppProvider
+
+
+class FlakyProvider(WhatsAppProvider):
+    def __init__(self):
+        self.sent = []
+
+    def send_template(self, to_phone_e164, template_name, language_code, components):
+        if to_phone_e164.endswith("5"):
+            raise requests.HTTPError("500 Server Error", response=type("R", (), {"status_code": 500})())
+        if to_phone_e164.endswith("4"):
+            raise requests.HTTPError("400 Client Error", response=type("R", (), {"status_code": 400})())
+        self.sent.append(to_phone_e164)
+        return (f"wamid.{to_phone_e164}", "sent")
+
+
+@pytest.mark.django_db
+def test_outbox_claims_by_priority_sends_once_and_backs_off(monkeypatch):
+    org = Organization.objects.create(name="Outbox School", screening_link_token="outbox-school-abcdefgh")
+    provider = FlakyProvider()
+    monkeypatch.setattr("messaging.client.get_client", lambda name=None: WhatsAppClient(provider, 4))
+
+    def msg(phone, code, **kw):
+        return outbox.outbox_message(organization=org, to_phone_e164=phone, template_code=code, **kw)
+
+    MessageLog.objects.bulk_create([
+        msg("+919800000001", "COMPLIANCE_REMINDER_V1"),
+        msg("+919800000002", "RED_ASSIST_V1"),
+        msg("+919800000004", "RED_EDU_V1"),
+        msg("+919800000005", "RED_EDU_V1"),
+        msg("+919800000006", "RED_EDU_V1", scheduled_at=timezone.now() + timedelta(hours=1)),
+    ])
+    # Click-to-chat log: QUEUED but sent by hand, never by the outbox
+    MessageLog.objects.create(organization=org, to_phone_e164="+919800000007", template_code="RED_EDU_V1")
+
+    first = outbox.claim_batch(1)
+    assert [m.to_phone_e164 for m in first] == ["+919800000002"]
+    assert first[0].status == MessageLog.Status.SENDING and first[0].attempts == 1
+
+    stats = outbox.dispatch_outbox(batch_size=2)
+    assert stats == {"claimed": 3, "sent": 1, "retry": 1, "dead": 1, "lost": 0, "released": 0}
+    assert provider.sent == ["+919800000001"]  # the claimed row is not sent again
+
+    by_phone = {m.to_phone_e164: m for m in MessageLog.objects.filter(organization=org)}
+    assert by_phone["+919800000001"].status == MessageLog.Status.SENT
+    assert by_phone["+919800000004"].status == MessageLog.Status.DEAD
+    retry = by_phone["+919800000005"]
+    assert retry.status == MessageLog.Status.QUEUED and retry.attempts == 1 and retry.error_code == "500"
+    assert retry.next_attempt_at > timezone.now() + timedelta(seconds=20)
+    assert by_phone["+919800000006"].status == MessageLog.Status.QUEUED
+    assert by_phone["+919800000007"].attempts == 0
+
+    # The first worker "died": its lease expires and the row goes back to the queue
+    assert outbox.release_expired_leases(timezone.now() + timedelta(seconds=outbox.MIN_LEASE_SECONDS + 1)) == 1
+    assert outbox.requeue_dead([by_phone["+919800000004"]]) == 1
+
+
+class SlowProvider(WhatsAppProvider):
+    """Sends fine, but by the time it returns another worker has re-claimed the row."""
+
+    def __init__(self, on_send):
+        self.on_send = on_send
+
+    def send_template(self, to_phone_e164, template_name, language_code, components):
+        self.on_send()
+        return ("wamid.late", "sent")
+
+
+@pytest.mark.django_db
+def test_outbox_write_back_needs_the_lease(monkeypatch):
+    # 100 rows at 8 concurrent sends and a 20 s timeout can take 13 x 40 s
+    assert outbox.lease_seconds(100, 8, 20) >= 13 * 40
+
+    org = Organization.objects.create(name="Lease School", screening_link_token="lease-school-abcdefgh")
+    msg = outbox.outbox_message(organization=org, to_phone_e164="+919800000001", template_code="RED_EDU_V1")
+    msg.save()
+
+    def expire_and_reclaim():
+        later = timezone.now() + timedelta(hours=1)
+        outbox.release_expired_leases(later)
+        outbox.claim_batch(1, now=later)
+
+    monkeypatch.setattr("messaging.client.get_client",
+                        lambda name=None: WhatsAppClient(SlowProvider(expire_and_reclaim), 1))
+    stats = outbox.dispatch_outbox(batch_size=1, max_batches=1)
+    assert stats["sent"] == 1 and stats["lost"] == 1
+
+    msg.refresh_from_db()
+    assert msg.status == MessageLog.Status.SENDING and msg.attempts == 2 and msg.provider_msg_id == ""
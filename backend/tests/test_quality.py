@@ -0,0 +1,43 @@
+import numpy as np
+
+from reporting.models import MeasurementQualityMonthly
+from reporting.quality import QualityColumns, compute_quality, digit_preference_index, row_issues
+
+
+def _cols(n, *, teacher, month, height, weight, level, age=10.0):
+    full = lambda v, dtype=float: np.full(n, v, dtype=dtype) if np.isscalar(v) else np.asarray(v, dtype=dtype)
+    return QualityColumns(
+        org=full(1, np.int64), teacher=full(teacher, np.int64), month=full(month, np.int64),
+        sex=np.array(["M"] * n), age_years=full(age), age_months=full(age * 12), height_cm=full(height),
+        weight_kg=full(weight), level=full(level, np.int8),
+    )
+
+
+def _concat(*parts):
+    return QualityColumns(*(np.concatenate([getattr(p, f) for p in parts]) for f in QualityColumns.__dataclass_fields__))
+
+
+def test_digit_preference_index_bounds():
+    assert digit_preference_index(np.full((1, 10), 5))[0] == 0
+    assert round(digit_preference_index(np.array([[50] + [0] * 9]))[0]) == 90
+
+
+def test_heaping_units_and_risk_shift():
+    rng = np.random.default_rng(3)
+    month = 2026 * 12 + 3
+    careful = _cols(60, teacher=7, month=month - 1, height=rng.uniform(130, 140, 60).round(1),
+                    weight=rng.uniform(26, 32, 60).round(1), level=0)
+    rounding = _cols(60, teacher=7, month=month, height=rng.choice([130.0, 135.0, 140.0], 60),
+                     weight=rng.uniform(26, 32, 60).round(1), level=[2] * 30 + [0] * 30)
+    pounds = _cols(5, teacher=8, month=month, height=135.0, weight=29.0 * 2.20462, level=2)
+
+    rows = compute_quality(_concat(careful, rounding, pounds))
+    by_key = {(r.scope, r.teacher_id, r.month.month): r for r in rows}
+    Scope = MeasurementQualityMonthly.Scope
+
+    before, after = by_key[(Scope.TEACHER, 7, 3)], by_key[(Scope.TEACHER, 7, 4)]
+    assert before.height_heaping < 2 and after.height_heaping == 5.0
+    assert after.shift_flagged and after.red_share_change == 0.5
+    assert "height heaping" in row_issues(after) and "risk shift" in row_issues(after)
+    assert by_key[(Scope.TEACHER, 8, 4)].unit_suspect == 5
+    assert by_key[(Scope.SCHOOL, None, 4)].screened == 65
@@ -0,0 +1,32 @@
+import pytest
+import redis
+
+from messaging import ratelimit
+from messaging.ratelimit import Limit, RateLimitExceeded
+
+
+def test_local_limiter_consumes_only_when_every_window_has_room():
+    limiter = ratelimit._LocalLimiter()
+    glob, phone = Limit("g", 60, 3), Limit("p", 86400, 2)
+
+    assert [limiter.acquire((glob, phone), now=t).allowed for t in (0, 1, 2)] == [True, True, False]
+    refused = limiter.acquire((glob, phone), now=3)
+    assert refused.retry_after == 86400 - 3
+    assert limiter.acquire((glob,), now=4).allowed  # the refused sends did not use the global window
+    assert not limiter.acquire((glob,), now=5).allowed
+    assert limiter.acquire((glob,), now=60.5).allowed  # sliding: the send at t=0 has left the window
+
+
+def test_falls_back_to_in_process_limits_when_redis_is_down(monkeypatch):
+    def down(**kwargs):
+        raise redis.ConnectionError("connection refused")
+
+    monkeypatch.setattr(ratelimit, "_script", down)
+    monkeypatch.setattr(ratelimit, "_local", ratelimit._LocalLimiter())
+    monkeypatch.setattr(ratelimit, "_redis_down_until", 0.0)
+    monkeypatch.setenv("WA_RATE_PER_PHONE_PER_DAY", "1")
+
+    ratelimit.check_send("+919800000001", "RED_EDU_V1")
+    with pytest.raises(RateLimitExceeded) as exc:
+        ratelimit.check_send("+919800000001", "RED_EDU_V1")
+    assert exc.value.retry_after > 86000
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from accounts.models import Organization
+from assist.models import Application
+from program.models import Enrollment, ScreeningMilestone
+from roster.models import Classroom, Student
+from screening.models import Screening, StudentStatus
+from screening.rescreen import RESCREEN_CYCLE_DAYS, due_counts_by_class, filter_due, rebuild_due_dates
+
+
+@pytest.mark.django_db
+def test_due_dates_follow_screenings_and_milestones():
+    org = Organization.objects.create(name="Due School", screening_link_token="due-school-abcdefgh")
+    five_a = Classroom.objects.create(organization=org, grade="5", division="A")
+    today = timezone.localdate()
+
+    lapsed = Student.objects.create(organization=org, classroom=five_a, first_name="Asha", gender="F",
+                                    student_code="D-1")
+    Screening.objects.create(organization=org, student=lapsed, gender="F", age_years=10, age_months=120,
+                             screened_at=timezone.now() - timedelta(days=RESCREEN_CYCLE_DAYS + 10))
+    enrolled = Student.objects.create(organization=org, classroom=five_a, first_name="Ravi", gender="M",
+                                      student_code="D-2")
+    s = Screening.objects.create(organization=org, student=enrolled, gender="M", age_years=10, age_months=120)
+    app = Application.objects.create(organization=org, student=enrolled, status="APPROVED")
+    start = today - timedelta(days=90)
+    enrollment = Enrollment.objects.create(organization=org, application=app, student=enrolled,
+                                           start_date=start, end_date=start + timedelta(days=180))
+    ScreeningMilestone.bootstrap_for_enrollment(enrollment)
+    Student.objects.create(organization=org, first_name="New", gender="M", student_code="D-3")  # never screened
+
+    assert StudentStatus.objects.get(pk=enrolled.pk).next_due_on == today
+    assert due_counts_by_class(org, today) == {five_a.id: {"overdue": 1, "due_today": 1},
+                                               None: {"overdue": 0, "due_today": 1}}
+    assert list(filter_due(Student.objects.filter(classroom=five_a), "overdue", today)) == [lapsed]
+
+    ScreeningMilestone.objects.filter(enrollment=enrollment, milestone="MONTH_3").first().mark_completed(s)
+    StudentStatus.objects.filter(organization=org).update(rescreen_due_on=None, milestone_due_on=None,
+                                                          next_due_on=None)
+    assert rebuild_due_dates(org.id) == 3
+    status = StudentStatus.objects.get(pk=enrolled.pk)
+    assert status.milestone_due_on == start + timedelta(days=180)
+    assert status.next_due_on == status.milestone_due_on
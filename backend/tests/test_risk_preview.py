@@ -0,0 +1,34 @@
+from datetime import date
+
+import pytest
+
+from screening.preview import preview_risk
+from screening.services import compute_risk
+
+TODAY = date(2026, 6, 15)
+
+
+@pytest.mark.django_db
+def test_preview_matches_compute_risk_without_queries(django_assert_num_queries):
+    params = {"dob": "2016-06-01", "sex": "M", "weight_kg_r1": "22.0", "height_cm_r1": "140",
+              "health_pallor": "on", "hunger_vital_sign": "never_true", "appetite": "GOOD"}
+    preview_risk({})  # loads the active ruleset (cached per process)
+
+    with django_assert_num_queries(0):
+        out = preview_risk(params, today=TODAY)
+        again = preview_risk(params, today=TODAY)
+    assert out == again and not out["provisional"]
+
+    rr = compute_risk(age_years=10.0, age_months=120, sex="M", height_cm=140.0, weight_kg=22.0, muac_cm=None,
+                      answers={"health_pallor": True, "hunger_vital_sign": "NEVER_TRUE", "appetite": "GOOD"})
+    assert out["level"] == rr.level == "RED"
+    assert out["baz"] == round(rr.derived["baz"], 2) and out["baz_category"] == rr.derived["baz_category"]
+    assert out["health_red_flags"] == ["health_pallor"]
+
+
+@pytest.mark.django_db
+def test_preview_reports_missing_and_out_of_range_fields():
+    out = preview_risk({"dob": "2016-06-01", "height_cm_r1": "400", "weight_kg_r1": "abc"}, today=TODAY)
+    assert out["provisional"] and out["baz"] is None
+    assert out["missing"] == ["sex", "weight_kg_r1", "height_cm_r1", "hunger_vital_sign"]
+    assert set(out["errors"]) == {"height_cm_r1", "weight_kg_r1"}
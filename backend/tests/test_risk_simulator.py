@@ -0,0 +1,41 @@
+import pytest
+
+from accounts.models import Organization
+from roster.models import Student
+from screening.models import Screening
+from screening.rules import RulesetError
+from screening.simulator import ScreeningSnapshot, apply_overrides, simulate
+
+
+def _screen(org, code, muac):
+    student = Student.objects.create(organization=org, first_name=code, gender="F", student_code=code)
+    return Screening.objects.create(organization=org, student=student, gender="F", age_years=3, age_months=36,
+                                    muac_cm=muac, answers={"hunger_vital_sign": "NEVER_TRUE"}, risk_level="GREEN")
+
+
+@pytest.mark.django_db
+def test_what_if_counts_transitions_without_writing():
+    org = Organization.objects.create(name="Sim School", screening_link_token="sim-school-abcdefgh")
+    _screen(org, "M1", 12.0)
+    _screen(org, "M2", 14.5)
+    snapshot = ScreeningSnapshot()
+    snapshot.refresh()
+
+    out = simulate({"muac.red_below": 13.0}, group_by=["org"], org_ids=[org.id], snapshot=snapshot)
+    assert out["rows"] == 2 and out["transitions"] == {"YELLOW->RED": 1}
+    assert out["scenario"]["RED"] == out["baseline"]["RED"] + 1
+    assert out["groups"] == [{"org": org.id, "baseline": out["baseline"], "scenario": out["scenario"]}]
+    assert set(Screening.objects.values_list("risk_level", flat=True)) == {"GREEN"}
+
+    # New screenings join the snapshot on the next incremental refresh
+    _screen(org, "M3", 12.2)
+    assert snapshot.refresh() == 1
+    assert simulate({"muac.red_below": 13.0}, org_ids=[org.id], snapshot=snapshot)["transitions"] == {"YELLOW->RED": 2}
+
+
+def test_override_paths_are_validated():
+    definition = {"baz": {"bands": [{"above": 1}]}}
+    assert apply_overrides(definition, {"baz.bands.0.above": 1.5}) == {"baz": {"bands": [{"above": 1.5}]}}
+    assert definition["baz"]["bands"][0]["above"] == 1
+    with pytest.raises(RulesetError):
+        apply_overrides({"baz": {"bands": []}}, {"baz.bands.4.above": 1.5})
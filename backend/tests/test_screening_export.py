@@ -0,0 +1,58 @@
+import csv
+import gzip
+import io
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Organization, OrgMembership, Role
+from audit.models import AuditLog
+from roster.models import Student
+from screening.export import _iter_rows
+from screening.models import Screening
+
+User = get_user_model()
+
+
+@pytest.fixture
+def exported(db):
+    org = Organization.objects.create(name="Export School", screening_link_token="export-school-abcdefgh")
+    student = Student.objects.create(organization=org, first_name="Asha", gender="F", student_code="E1")
+    tied = timezone.now() - timedelta(days=1)
+    times = [tied, tied, tied, tied - timedelta(hours=1), tied + timedelta(hours=1)]
+    ids = [Screening.objects.create(organization=org, student=student, gender="F", screened_at=t,
+                                    height_cm=120, weight_kg=24, red_flags=["a", "b"]).id for t in times]
+    return org, ids
+
+
+def test_iter_rows_pages_through_ties_newest_first(exported):
+    org, ids = exported
+    qs = Screening.objects.filter(organization=org)
+    expected = list(qs.order_by("-screened_at", "-id").values_list("id", flat=True))
+    assert [row[0] for row in _iter_rows(qs, chunk_size=2)] == expected
+    assert sorted(expected) == sorted(ids)
+
+
+def test_streamed_export_is_audited_with_the_row_count(exported, client):
+    org, ids = exported
+    admin = User.objects.create_user(email="export@test", password="x")
+    OrgMembership.objects.create(user=admin, organization=org, role=Role.ORG_ADMIN)
+    client.login(email="export@test", password="x")
+    url = reverse("export_screenings_csv") + f"?org={org.id}&all=1"
+
+    resp = client.get(url + "&gzip=1")
+    rows = list(csv.reader(io.StringIO(gzip.decompress(b"".join(resp.streaming_content)).decode("utf-8"))))
+    assert len(rows) == 1 + len(ids) and rows[1][-1] == "a;b"
+    audit = AuditLog.objects.filter(organization=org, action="CSV_EXPORTED").latest("id")
+    assert audit.payload["count"] == len(ids) and audit.payload["completed"] is True
+
+    # The client goes away after the header and two rows: the partial count is still logged
+    partial = client.get(url)
+    body = iter(partial.streaming_content)
+    [next(body) for _ in range(3)]
+    partial.close()
+    audit = AuditLog.objects.filter(organization=org, action="CSV_EXPORTED").latest("id")
+    assert audit.payload["count"] == 2 and audit.payload["completed"] is False
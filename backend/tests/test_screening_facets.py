@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+import pytest
+
+from accounts.models import Organization
+from roster.models import Student
+from screening.batch import backfill_facets, load_columns, score_columns
+from screening.facets import count_enum, count_flags, facets_from_derived, filter_flags
+from screening.models import Screening
+from screening.rules import load_ruleset_file
+from screening.services import compute_risk
+
+
+
+def _dec(x):
+    return None if x is None else Decimal(str(x))
+
+
+def test_batch_facets_match_compute_risk():
+    ruleset = load_ruleset_file()
+    cases = [
+        dict(age_years=12.0, age_months=144, sex="F", height_cm=140.0, weight_kg=30.0, muac_cm=None,
+             answers={"health_pallor": True, "appetite": "POOR", "pads_per_day": 6, "cycle_length_days": 50,
+                      "egg": False, "diet_type": "LACTO_OVO", "hunger_vital_sign": "SOMETIMES_TRUE"}),
+        dict(age_years=8.0, age_months=96, sex="M", height_cm=None, weight_kg=None, muac_cm=None,
+             answers={"menarche_started": True, "breakfast_eaten": False, "hunger_vital_sign": "NEVER_TRUE"}),
+    ]
+    rows = [(i + 1, 1, None, c["sex"], _dec(c["age_years"]), c["age_months"], _dec(c["height_cm"]),
+             _dec(c["weight_kg"]), None, c["answers"], "", [], None, None, "", "") for i, c in enumerate(cases)]
+    scores = score_columns(load_columns(rows), ruleset)
+    for i, c in enumerate(cases):
+        assert scores.facets(i) == facets_from_derived(compute_risk(ruleset=ruleset, **c).derived)
+
+
+@pytest.mark.django_db
+def test_filter_and_count_flags_in_sql():
+    org = Organization.objects.create(name="Facet School", screening_link_token="facet-school-abcdefgh")
+    answers = [
+        {"health_pallor": True, "hunger_vital_sign": "OFTEN_TRUE"},
+        {"health_pallor": True, "health_visible_worms": True, "egg": False, "diet_type": "LACTO_OVO"},
+        {"breakfast_eaten": False, "hunger_vital_sign": "NEVER_TRUE"},
+    ]
+    for i, a in enumerate(answers):
+        student = Student.objects.create(organization=org, first_name=f"Facet{i}", gender="M",
+                                         student_code=f"F{i}")
+        Screening.objects.create(organization=org, student=student, gender="M", age_years=9, age_months=108,
+                                 answers=a)
+    qs = Screening.objects.filter(organization=org)
+    assert backfill_facets(qs).changed == 3
+
+    assert filter_flags(qs, "health_pallor").count() == 2
+    assert filter_flags(qs, "health_pallor", "health_visible_worms").count() == 1
+    assert filter_flags(qs, "health_visible_worms", "breakfast_skipped", match_any=True).count() == 2
+    counts = count_flags(qs, ["health_pallor", "missing_egg", "breakfast_skipped", "heavy_bleeding"])
+    assert counts == {"health_pallor": 2, "missing_egg": 1, "breakfast_skipped": 1, "heavy_bleeding": 0}
+    assert count_enum(qs, "hunger_code") == {"": 1, "OFTEN_TRUE": 1, "SOMETIMES_TRUE": 0, "NEVER_TRUE": 1}
+    assert count_enum(qs, "baz_category_code")["unavailable"] == 3
+    with pytest.raises(ValueError):
+        filter_flags(qs, "not_a_flag")
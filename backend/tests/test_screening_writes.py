@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+
+import pytest
+
+from accounts.models import Organization
+from assist.models import Application
+from audit.models import AuditLog
+from program.models import Enrollment, ScreeningMilestone
+from roster.models import Guardian, Student
+from screening.models import StudentStatus
+from screening.writes import apply_side_effects, record_screening
+
+DERIVED = {"age_years": 10, "age_months": 120, "height_cm": "135.0", "weight_kg": "28.0", "muac_cm": None}
+
+
+def _record(org, student_id, **kw):
+    student = Student.objects.select_related("primary_guardian", "current_status").get(pk=student_id)
+    return record_screening(org, student, answers={"unique_student_id": "W1"}, derived=DERIVED,
+                            phone="+919822222222", sex="M", **kw)
+
+
+@pytest.mark.django_db
+def test_record_screening_query_budget_and_deferred_side_effects(django_assert_max_num_queries,
+                                                                 django_capture_on_commit_callbacks):
+    org = Organization.objects.create(name="Write School", screening_link_token="write-school-abcdefgh")
+    parent = Guardian.objects.create(organization=org, full_name="Parent", phone_e164="+919822222222")
+    student = Student.objects.create(organization=org, first_name="Ravi", gender="M", student_code="W1",
+                                     primary_guardian=parent)
+    app = Application.objects.create(organization=org, student=student, status="APPROVED")
+    start = date.today() - timedelta(days=100)
+    enrollment = Enrollment.objects.create(organization=org, application=app, student=student,
+                                           start_date=start, end_date=start + timedelta(days=180))
+    ScreeningMilestone.bootstrap_for_enrollment(enrollment)
+    _record(org, student.id)  # warms the active ruleset cache
+
+    # student SELECT (with guardian and status), screening INSERT, status UPDATE, savepoint pair
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        with django_assert_max_num_queries(5):
+            s, warnings = _record(org, student.id)
+    assert len(callbacks) == 1 and warnings == []
+
+    status = StudentStatus.objects.get(pk=student.pk)
+    assert status.last_screening_id == s.id and status.screenings_this_year == 2
+    assert [p[0] for p in status.growth][-1] == s.id
+    assert not AuditLog.objects.filter(organization=org).exists()
+
+    done = apply_side_effects([s.id])
+    assert done["milestones"] == 1 and done["rollup_days"] == 1
+    assert ScreeningMilestone.objects.get(enrollment=enrollment, milestone="MONTH_3").completed_screening_id == s.id
+    assert AuditLog.objects.get(organization=org, target_id=str(s.id)).action == "SCREENING_CREATED"
+
+
+@pytest.mark.django_db
+def test_note_new_screening_with_a_stale_status_row_recomputes():
+    org = Organization.objects.create(name="Race School", screening_link_token="race-school-abcdefgh")
+    parent = Guardian.objects.create(organization=org, full_name="Parent", phone_e164="+919822222222")
+    student = Student.objects.create(organization=org, first_name="Ravi", gender="M", student_code="W1",
+                                     primary_guardian=parent)
+    _record(org, student.id)
+
+    # Two teachers open the same student; the first save lands before the second
+    stale = Student.objects.select_related("primary_guardian", "current_status").get(pk=student.id)
+    first, _ = _record(org, student.id)
+    second, _ = record_screening(org, stale, answers={"unique_student_id": "W1"}, derived=DERIVED,
+                                 phone="+919822222222", sex="M")
+
+    status = StudentStatus.objects.get(pk=student.pk)
+    assert status.screenings_this_year == 3 and status.last_screening_id == second.id
+    assert [p[0] for p in status.growth][-2:] == [first.id, second.id]
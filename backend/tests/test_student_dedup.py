@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+
+import pytest
+from django.utils import timezone
+
+from accounts.models import Organization
+from assist.models import Application
+from program.models import Enrollment
+from roster.dedup import find_duplicates, merge_candidate, name_key
+from roster.models import DuplicateCandidate, Guardian, Student
+from screening.models import Screening
+
+
+def test_name_key_absorbs_romanization_variants():
+    assert name_key("mohammad") == name_key("muhammed") == name_key("mohd")
+    assert name_key("shreya") == name_key("sreya")
+    assert name_key("rahul") != name_key("rohit")
+
+
+@pytest.mark.django_db
+def test_find_dismiss_and_merge_duplicates():
+    org = Organization.objects.create(name="Dedup School", screening_link_token="dedup-school-abcdefgh")
+    parent = Guardian.objects.create(organization=org, full_name="Parent", phone_e164="+919811111111")
+    arif = Student.objects.create(organization=org, first_name="Mohammad", last_name="Arif", gender="M",
+                                  dob=date(2015, 3, 4), student_code="A-1", primary_guardian=parent)
+    again = Student.objects.create(organization=org, first_name="Mohd", last_name="Arif", gender="M",
+                                   dob=date(2015, 4, 3), student_code="A-77")
+    # twin sister: same family and birthday, different child
+    Student.objects.create(organization=org, first_name="Ayesha", last_name="Arif", gender="F",
+                           dob=date(2015, 3, 4), student_code="A-2", primary_guardian=parent)
+    Student.objects.create(organization=org, first_name="Rahul", last_name="Sharma", gender="M", student_code="A-3")
+    screening = Screening.objects.create(organization=org, student=again, gender="M", age_years=9, age_months=108)
+    app = Application.objects.create(organization=org, student=again, status="APPROVED")
+    enrollment = Enrollment.objects.create(organization=org, application=app, student=again,
+                                           start_date=date(2024, 6, 1), end_date=date(2024, 12, 1))
+    long_ago = timezone.now() - timedelta(days=30)
+    Application.objects.filter(pk=app.pk).update(updated_at=long_ago)
+    Enrollment.objects.filter(pk=enrollment.pk).update(updated_at=long_ago)
+
+    stats = find_duplicates(org.id)
+    assert stats.created == 1
+    candidate = DuplicateCandidate.objects.get(organization=org)
+    assert (candidate.student_a, candidate.student_b) == (arif, again)
+    assert "DOB day/month swapped" in candidate.reasons
+
+    assert find_duplicates(org.id).created == 0
+
+    moved = merge_candidate(candidate, keep_id=arif.id)
+    assert moved["screenings"] == moved["applications"] == moved["enrollments"] == 1
+    assert not Student.objects.filter(pk=again.pk).exists()
+    assert not DuplicateCandidate.objects.filter(organization=org).exists()
+    arif.refresh_from_db()
+    assert arif.screenings.count() == 1 and "A-77" in arif.notes
+    assert arif.current_status.last_screening_id == screening.id
+    # Moved rows advance their watermark so the warehouse export picks them up
+    for model, pk in ((Application, app.pk), (Enrollment, enrollment.pk)):
+        row = model.objects.get(pk=pk)
+        assert row.student_id == arif.id and row.updated_at > long_ago
@@ -0,0 +1,38 @@
+import pytest
+
+from accounts.models import Organization
+from roster.models import Guardian, Student
+from roster.search import lookup_students, search_students
+
+
+@pytest.mark.django_db
+def test_search_prefix_transliteration_and_cross_org_lookup():
+    org = Organization.objects.create(name="Search School", screening_link_token="search-school-abcdefgh")
+    other = Organization.objects.create(name="Other School", screening_link_token="other-school-abcdefgh")
+    guardian = Guardian.objects.create(organization=other, full_name="Parent", phone_e164="+919812345678")
+    rahul = Student.objects.create(organization=org, first_name="Rahul", last_name="Sharma", gender="M",
+                                   student_code="NL-0042")
+    Student.objects.create(organization=org, first_name="Priya", last_name="Verma", gender="F")
+    zoe = Student.objects.create(organization=other, first_name="Zoë", gender="F", student_code="X9",
+                                 primary_guardian=guardian)
+
+    students = Student.objects.filter(organization=org)
+
+    def found(q, qs=students, organization=org):
+        return set(search_students(qs, q, organization=organization).values_list("id", flat=True))
+
+    assert found("rah") == {rahul.id}
+    assert found("RAHUL shar") == {rahul.id}
+    assert found("राहुल") == {rahul.id}
+    assert found("शर्मा") == {rahul.id}
+    assert found("nl0042") == {rahul.id}
+    assert found("rahul verma") == set()
+    assert found("zoe", Student.objects.filter(organization=other), other) == {zoe.id}
+
+    assert list(lookup_students("98123 45678")) == [zoe]
+    assert list(lookup_students("nl-0042")) == [rahul]
+
+    guardian.phone_e164 = "+919800000000"
+    guardian.save()
+    assert list(lookup_students("9800000000")) == [zoe]
+    assert not lookup_students("9812345678").exists()
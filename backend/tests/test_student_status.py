@@ -0,0 +1,23 @@
+import pytest
+
+from accounts.models import Organization
+from roster.models import Student
+from screening.models import Screening, StudentStatus
+from screening.status import fill_missing_student_status
+
+
+@pytest.mark.django_db
+def test_missing_status_rows_are_filled_once():
+    org = Organization.objects.create(name="Status School", screening_link_token="status-school-abcdefgh")
+    kids = [Student.objects.create(organization=org, first_name=f"Kid{i}", gender="M", student_code=f"ST{i}")
+            for i in range(3)]
+    s = Screening.objects.create(organization=org, student=kids[0], gender="M", age_years=9, age_months=108,
+                                 height_cm=130, weight_kg=26, risk_level="YELLOW")
+    # As right after the projection was deployed: no rows yet
+    StudentStatus.objects.filter(organization=org).delete()
+
+    assert fill_missing_student_status(chunk_size=2) == 3
+    status = StudentStatus.objects.get(pk=kids[0].pk)
+    assert status.last_screening_id == s.id and status.last_risk == "YELLOW"
+    assert StudentStatus.objects.get(pk=kids[1].pk).last_screening_id is None
+    assert fill_missing_student_status() == 0
@@ -0,0 +1,65 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Organization
+from messaging.models import MessageLog, WebhookEvent
+from messaging.webhooks import apply_webhook_events
+
+
+def _body(*statuses):
+    return json.dumps({"entry": [{"changes": [{"value": {"statuses": [
+        {"id": msg_id, "status": status, **extra} for msg_id, status, extra in statuses
+    ]}}]}]})
+
+
+@pytest.mark.django_db
+def test_webhook_stages_and_consumer_applies_monotonic_transitions(client):
+    org = Organization.objects.create(name="Hook School", screening_link_token="hook-school-abcdefgh")
+    read = MessageLog.objects.create(organization=org, to_phone_e164="+1", provider_msg_id="wamid.a", status="READ")
+    sent = MessageLog.objects.create(organization=org, to_phone_e164="+2", provider_msg_id="wamid.b", status="SENT")
+    bounced = MessageLog.objects.create(organization=org, to_phone_e164="+3", provider_msg_id="wamid.c", status="SENT")
+
+    url = reverse("wa_webhook")
+    for body in (
+        _body(("wamid.a", "delivered", {}), ("wamid.b", "delivered", {})),
+        _body(("wamid.b", "read", {}), ("wamid.c", "failed", {"errors": [{"code": 131026, "title": "Undeliverable"}]})),
+        _body(("wamid.b", "delivered", {}), ("wamid.late", "sent", {})),
+    ):
+        assert client.post(url, body, content_type="application/json", HTTP_HOST="localhost").status_code == 200
+    assert WebhookEvent.objects.count() == 3
+    assert MessageLog.objects.get(pk=sent.pk).status == "SENT"  # nothing applied in the request
+
+    stats = apply_webhook_events()
+    assert stats == {"events": 3, "statuses": 4, "updated": 2, "restaged": 1, "unknown": 0}
+    assert MessageLog.objects.get(pk=read.pk).status == "READ"
+    assert MessageLog.objects.get(pk=sent.pk).status == "READ"
+    bounced.refresh_from_db()
+    assert (bounced.status, bounced.error_code, bounced.error_title) == ("FAILED", "131026", "Undeliverable")
+
+    # The send's write-back lands after the callback; the re-staged status then applies
+    MessageLog.objects.create(organization=org, to_phone_e164="+4", provider_msg_id="wamid.late", status="SENDING")
+    assert apply_webhook_events()["updated"] == 1
+    assert MessageLog.objects.get(provider_msg_id="wamid.late").status == "SENT"
+    assert not WebhookEvent.objects.filter(processed_at__isnull=True).exists()
+
+    WebhookEvent.objects.create(payload=json.loads(_body(("wamid.gone", "read", {}))),
+                                received_at=timezone.now() - timedelta(hours=1))
+    assert apply_webhook_events()["unknown"] == 1
+
+
+@pytest.mark.django_db
+def test_restaged_status_keeps_its_own_arrival_time():
+    org = Organization.objects.create(name="Grace School", screening_link_token="grace-school-abcdefgh")
+    MessageLog.objects.create(organization=org, to_phone_e164="+1", provider_msg_id="wamid.old", status="SENT")
+    now = timezone.now()
+    WebhookEvent.objects.create(payload=json.loads(_body(("wamid.old", "delivered", {}))),
+                                received_at=now - timedelta(minutes=9))
+    WebhookEvent.objects.create(payload=json.loads(_body(("wamid.new", "sent", {}))), received_at=now)
+
+    assert apply_webhook_events()["restaged"] == 1
+    restaged = WebhookEvent.objects.get(processed_at__isnull=True)
+    assert restaged.received_at == now  # not the resolved event's 9-minute-old timestamp
@@ -0,0 +1,48 @@
+import csv
+import gzip
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from accounts.models import Organization
+from reporting.warehouse import TABLES, LocalStore, export_table
+from roster.models import Student
+from screening.batch import rescore_screenings
+from screening.models import Screening
+
+
+def _rows(result):
+    out = []
+    for path in result.files:
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            out.extend(csv.DictReader(fh))
+    return out
+
+
+@pytest.mark.django_db
+def test_screening_export_is_incremental_and_picks_up_rescored_rows(tmp_path):
+    org = Organization.objects.create(name="Warehouse School", screening_link_token="warehouse-school-abcdefgh")
+    kids = [
+        Student.objects.create(organization=org, first_name=f"Kid{i}", gender="F", student_code=f"WH{i}")
+        for i in range(2)
+    ]
+    screenings = [
+        Screening.objects.create(organization=org, student=k, gender="F", age_years=9, age_months=108,
+                                 height_cm=130, weight_kg=26, answers={"hunger_vital_sign": "NEVER_TRUE"})
+        for k in kids
+    ]
+    rescore_screenings()
+    store, spec, now = LocalStore(str(tmp_path)), TABLES["screening"], timezone.now() + timedelta(hours=1)
+
+    first = export_table(spec, store, fmt="csv", now=now, run_id="r1")
+    assert sorted(int(r["id"]) for r in _rows(first)) == sorted(s.id for s in screenings)
+    assert export_table(spec, store, fmt="csv", now=now, run_id="r2").rows == 0
+
+    # A stale stored result is fixed by the re-score, and the fix reaches the warehouse
+    Screening.objects.filter(pk=screenings[0].pk).update(risk_level="RED")
+    assert rescore_screenings().changed == 1
+    later = export_table(spec, store, fmt="csv", now=now + timedelta(hours=1), run_id="r3")
+    rows = _rows(later)
+    assert [int(r["id"]) for r in rows] == [screenings[0].id]
+    assert rows[0]["risk_level"] == Screening.objects.get(pk=screenings[0].pk).risk_level != "RED"
@@ -0,0 +1,38 @@
+import threading
+import time
+
+import requests
+
+from messaging.client import OutboundMessage, WhatsAppClient
+from messaging.providers.base import WhatsAppProvider
+
+
+class SlowProvider(WhatsAppProvider):
+    def __init__(self):
+        self.active = self.peak = 0
+        self.lock = threading.Lock()
+
+    def send_template(self, to_phone_e164, template_name, language_code, components):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+        if to_phone_e164.endswith("3"):
+            raise requests.HTTPError("400 Client Error: invalid recipient")
+        return (f"wamid.{to_phone_e164}", "sent")
+
+
+def test_send_many_is_concurrent_ordered_and_isolates_failures():
+    provider = SlowProvider()
+    client = WhatsAppClient(provider, concurrency=4)
+    messages = [OutboundMessage(f"+91980000000{i}", "tpl", "en", {}) for i in range(8)]
+
+    results = client.send_many(messages)
+
+    assert provider.peak == 4
+    assert [r.provider_msg_id for r in results if r.ok] == [f"wamid.{m.to_phone_e164}" for m in messages
+                                                           if not m.to_phone_e164.endswith("3")]
+    failed = results[3]
+    assert not failed.ok and "invalid recipient" in failed.error_title and failed.error_code == "HTTPError"